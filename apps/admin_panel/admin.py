@@ -1,7 +1,9 @@
 from django.contrib import admin
-from apps.admin_panel.models import Budget, BudgetAllocation, AuditTrail, ApprovedBudget
+from apps.admin_panel.models import Budget, BudgetAllocation, AuditTrail, AuditArchive, ApprovedBudget, ConvertedPDFCache
 
 # Register your models here.
 admin.site.register(BudgetAllocation)
 admin.site.register(AuditTrail)
+admin.site.register(AuditArchive)
+admin.site.register(ConvertedPDFCache)
 admin.site.register(ApprovedBudget)
\ No newline at end of file
@@ -0,0 +1,185 @@
+# bb_budget_monitoring_system/apps/admin_panel/audit_archive.py
+"""
+Audit trail retention
+Rows older than the retention age are appended to one gzip-compressed
+NDJSON file per month under MEDIA_ROOT/audit_archive/ and deleted from the
+AuditTrail table in batches. Archived months stay searchable through
+read_archived_entries().
+"""
+
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+ARCHIVE_DIR = 'audit_archive'
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_RETENTION_DAYS = getattr(settings, 'AUDIT_RETENTION_DAYS', 365)
+
+ARCHIVED_FIELDS = (
+    'id', 'timestamp', 'user_id', 'user__username', 'user__fullname',
+    'action', 'model_name', 'record_id', 'detail', 'ip_address',
+)
+
+
+def month_of(timestamp):
+    """First day of the (local) month of a timestamp"""
+    return timezone.localtime(timestamp).date().replace(day=1)
+
+
+def archive_path(month):
+    return os.path.join(ARCHIVE_DIR, f"{month:%Y-%m}.ndjson.gz")
+
+
+def _append_to_file(relative_path, rows):
+    """
+    Append rows as a new gzip member (gzip readers treat concatenated
+    members as one stream) and fsync before the rows are deleted.
+    """
+    path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as compressed:
+            for row in rows:
+                compressed.write((json.dumps(row, default=str) + '\n').encode('utf-8'))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def _record_month(month, rows):
+    from .models import AuditArchive
+
+    archive, _ = AuditArchive.objects.select_for_update().get_or_create(
+        month=month,
+        defaults={'path': archive_path(month)}
+    )
+    first, last = rows[0]['timestamp'], rows[-1]['timestamp']
+    archive.row_count += len(rows)
+    archive.first_timestamp = min(filter(None, [archive.first_timestamp, first]))
+    archive.last_timestamp = max(filter(None, [archive.last_timestamp, last]))
+    archive.save()
+
+
+def archive_audit_trail(days=DEFAULT_RETENTION_DAYS, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, progress=None):
+    """
+    Move audit rows older than `days` days into the monthly archive files.
+
+    Each batch is written (and fsynced) to the archive before it is deleted,
+    and the delete commits together with the AuditArchive counters. A crash
+    in between can only leave rows in both places; readers skip the
+    duplicates by id.
+
+    Args:
+        days: Retention age of the AuditTrail table
+        batch_size: Rows archived and deleted per transaction
+        dry_run: Only count the rows that would be archived
+        progress: Optional callable(rows_done) called after every batch
+
+    Returns:
+        Dictionary of archived row counts per month ('YYYY-MM')
+    """
+    from .models import AuditTrail
+
+    cutoff = timezone.now() - timedelta(days=days)
+    old_rows = AuditTrail.objects.filter(timestamp__lt=cutoff)
+
+    if dry_run:
+        counts = {}
+        for timestamp in old_rows.values_list('timestamp', flat=True).iterator(chunk_size=batch_size):
+            key = f"{month_of(timestamp):%Y-%m}"
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    counts = {}
+    done = 0
+    while True:
+        rows = list(old_rows.order_by('timestamp', 'id').values(*ARCHIVED_FIELDS)[:batch_size])
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(month_of(row['timestamp']), []).append(row)
+
+        for month, month_rows in by_month.items():
+            _append_to_file(archive_path(month), month_rows)
+
+        with transaction.atomic():
+            for month, month_rows in by_month.items():
+                _record_month(month, month_rows)
+                key = f"{month:%Y-%m}"
+                counts[key] = counts.get(key, 0) + len(month_rows)
+            AuditTrail.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+
+        done += len(rows)
+        if progress:
+            progress(done)
+
+    return counts
+
+
+def get_archived_months():
+    from .models import AuditArchive
+
+    return list(AuditArchive.objects.all())
+
+
+def read_archived_entries(month, user_ids=None, action=None, start=None, end=None):
+    """
+    Search one archived month.
+
+    Args:
+        month: date (any day of the month) or 'YYYY-MM'
+        user_ids: Only entries of these users
+        action: Only entries with this action
+        start, end: Only entries with start <= timestamp < end
+
+    Returns:
+        Unsaved AuditTrail instances, newest first, with .user set from the
+        current users table (None if the user no longer exists)
+    """
+    from apps.users.models import User
+    from .models import AuditTrail
+
+    if isinstance(month, str):
+        month = datetime.strptime(month, '%Y-%m').date()
+    month = date(month.year, month.month, 1)
+
+    path = os.path.join(settings.MEDIA_ROOT, archive_path(month))
+    if not os.path.exists(path):
+        return []
+
+    user_ids = set(user_ids) if user_ids is not None else None
+    entries = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            row = json.loads(line)
+            if action and row['action'] != action:
+                continue
+            if user_ids is not None and row['user_id'] not in user_ids:
+                continue
+            timestamp = datetime.fromisoformat(row['timestamp'])
+            if (start and timestamp < start) or (end and timestamp >= end):
+                continue
+            entries[row['id']] = AuditTrail(
+                id=row['id'],
+                timestamp=timestamp,
+                user_id=row['user_id'],
+                action=row['action'],
+                model_name=row['model_name'],
+                record_id=row['record_id'],
+                detail=row['detail'],
+                ip_address=row['ip_address'],
+            )
+
+    users = User.objects.in_bulk({entry.user_id for entry in entries.values() if entry.user_id})
+    for entry in entries.values():
+        entry.user = users.get(entry.user_id)
+
+    return sorted(entries.values(), key=lambda entry: (entry.timestamp, entry.pk), reverse=True)
@@ -0,0 +1,339 @@
+# bb_budget_monitoring_system/apps/admin_panel/audit_writer.py
+"""
+Buffered audit trail writer
+Entries are collected per request (or per management command run) and
+written with a single bulk_create when the request/command finishes.
+Entries recorded inside a transaction only join the buffer once it commits,
+so a rolled back action leaves no audit entry, exactly as an INSERT inside
+the transaction would have.
+
+Outside a buffer, entries go to a bounded in-process queue that is flushed
+when it fills up, by a background flusher once it gets old, by the next
+buffer flush, or at exit.
+
+Durability: from the moment an action commits until its entry is written,
+the entry is also appended to a per-process spool file under
+AUDIT_SPOOL_DIR. If the process dies first, another process writes the
+entries of the orphaned spool file (one the flusher of its owner has not
+touched for AUDIT_SPOOL_ORPHAN_AGE seconds). Spool files are not fsynced:
+entries survive a crash or kill of the process, not of the machine. Delivery
+is at least once; a crash between the bulk_create and the spool update can
+write an entry twice. With AUDIT_SPOOL_DIR set to None, entries not yet
+written are lost with the process.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from itertools import count
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.dateparse import parse_datetime
+
+
+logger = logging.getLogger(__name__)
+
+# Fallback queue limits: flush when either is reached
+AUDIT_QUEUE_MAX_SIZE = 500
+AUDIT_QUEUE_MAX_AGE = 5  # seconds, also the flusher's interval
+
+# Spool files of crashed processes are picked up after this long without
+# a heartbeat from their owner
+AUDIT_SPOOL_DIR = getattr(settings, 'AUDIT_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'audit_spool'))
+AUDIT_SPOOL_ORPHAN_AGE = 60  # seconds
+
+SPOOL_SUFFIX = '.jsonl'
+
+_local = threading.local()
+_queue = deque()
+_queue_lock = threading.Lock()
+_queue_oldest = None
+
+_spool_lock = threading.Lock()
+_spool_pending = {}  # spool key -> serialized entry, for this process
+_spool_keys = count()
+_spool_name = None  # (pid, file name); a forked child starts its own file
+
+_flusher = None  # (pid, thread)
+_flusher_lock = threading.Lock()
+
+
+def _buffers():
+    if not hasattr(_local, 'buffers'):
+        _local.buffers = []
+    return _local.buffers
+
+
+def _spool_path():
+    global _spool_name
+    if _spool_name is None or _spool_name[0] != os.getpid():
+        _spool_name = (os.getpid(), f'{uuid.uuid4().hex}{SPOOL_SUFFIX}')
+    return os.path.join(AUDIT_SPOOL_DIR, _spool_name[1])
+
+
+def _serialize(entry):
+    from .models import AuditTrail
+
+    data = {
+        field.attname: getattr(entry, field.attname)
+        for field in AuditTrail._meta.concrete_fields if not field.primary_key
+    }
+    data['timestamp'] = data['timestamp'].isoformat()
+    return json.dumps(data)
+
+
+def _deserialize(line):
+    from .models import AuditTrail
+
+    data = json.loads(line)
+    data['timestamp'] = parse_datetime(data['timestamp'])
+    return AuditTrail(**data)
+
+
+def _rewrite_spool(path):
+    """Replace the spool file with the entries still pending (removed when none are)"""
+    if not _spool_pending:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.writelines(f'{line}\n' for line in _spool_pending.values())
+    os.replace(temporary, path)
+
+
+def _spool(entries):
+    """Keep entries on disk until they are written"""
+    if not AUDIT_SPOOL_DIR or not entries:
+        return
+    lines = []
+    try:
+        with _spool_lock:
+            for entry in entries:
+                entry._spool_key = next(_spool_keys)
+                lines.append(_serialize(entry))
+                _spool_pending[entry._spool_key] = lines[-1]
+            os.makedirs(AUDIT_SPOOL_DIR, exist_ok=True)
+            with open(_spool_path(), 'a', encoding='utf-8') as f:
+                f.writelines(f'{line}\n' for line in lines)
+    except Exception:
+        # The entries are still queued in memory, only the crash safety is lost
+        logger.exception("Could not spool %d audit trail entries", len(entries))
+
+
+def _unspool(entries):
+    """Forget spooled entries once they are written (or logged)"""
+    keys = [entry._spool_key for entry in entries if hasattr(entry, '_spool_key')]
+    if not keys:
+        return
+    try:
+        with _spool_lock:
+            for key in keys:
+                _spool_pending.pop(key, None)
+            _rewrite_spool(_spool_path())
+    except Exception:
+        logger.exception("Could not update the audit spool; entries may be written twice")
+
+
+def recover_spool(max_age=None):
+    """
+    Write the entries of spool files left behind by dead processes.
+
+    A file is taken over when its owner has not touched it for `max_age`
+    seconds (AUDIT_SPOOL_ORPHAN_AGE by default); it is renamed first so only
+    one process replays it.
+
+    Returns:
+        Number of entries written
+    """
+    from .models import AuditTrail
+
+    if not AUDIT_SPOOL_DIR or not os.path.isdir(AUDIT_SPOOL_DIR):
+        return 0
+    max_age = AUDIT_SPOOL_ORPHAN_AGE if max_age is None else max_age
+    own = os.path.basename(_spool_path())
+
+    written = 0
+    for name in os.listdir(AUDIT_SPOOL_DIR):
+        path = os.path.join(AUDIT_SPOOL_DIR, name)
+        if name == own or not name.endswith(SPOOL_SUFFIX):
+            continue
+        try:
+            if time.time() - os.path.getmtime(path) < max_age:
+                continue
+            claimed = f'{path}.{uuid.uuid4().hex}.replay'
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            continue  # Written or claimed by another process meanwhile
+
+        try:
+            with open(claimed, encoding='utf-8') as f:
+                entries = [_deserialize(line) for line in f if line.strip()]
+            AuditTrail.objects.bulk_create(entries)
+        except Exception:
+            logger.exception("Could not replay audit spool %s", name)
+            os.replace(claimed, path)  # Retried on the next pass
+            continue
+        os.remove(claimed)
+        written += len(entries)
+        logger.warning("Wrote %d audit trail entries left by a stopped process", len(entries))
+    return written
+
+
+def _write(entries):
+    """bulk_create entries; on failure they go back to the fallback queue"""
+    from .models import AuditTrail
+
+    if not entries:
+        return
+    try:
+        AuditTrail.objects.bulk_create(entries)
+    except Exception:
+        logger.exception("Could not write %d audit trail entries, requeueing", len(entries))
+        _enqueue(entries, flush=False)
+    else:
+        _unspool(entries)
+
+
+def _take_queue():
+    global _queue_oldest
+    with _queue_lock:
+        entries = list(_queue)
+        _queue.clear()
+        _queue_oldest = None
+    return entries
+
+
+def _enqueue(entries, flush=True):
+    global _queue_oldest
+    with _queue_lock:
+        _queue.extend(entries)
+        if _queue_oldest is None:
+            _queue_oldest = time.monotonic()
+        overflowing = len(_queue) >= AUDIT_QUEUE_MAX_SIZE
+        stale = time.monotonic() - _queue_oldest >= AUDIT_QUEUE_MAX_AGE
+
+    if overflowing and not flush:
+        # Writing just failed and the queue is full; keep the entries in the
+        # log (and the spool) rather than dropping them silently
+        for entry in _take_queue():
+            logger.error(
+                "Unwritten audit entry: %s %s %s %s by user %s",
+                entry.action, entry.model_name, entry.record_id, entry.detail, entry.user_id
+            )
+    elif flush and (overflowing or stale):
+        _write(_take_queue())
+
+
+def _flush_stale():
+    """Write the fallback queue if its oldest entry has waited AUDIT_QUEUE_MAX_AGE"""
+    with _queue_lock:
+        stale = _queue_oldest is not None and time.monotonic() - _queue_oldest >= AUDIT_QUEUE_MAX_AGE
+    if stale:
+        _write(_take_queue())
+
+
+def _heartbeat():
+    """Touch this process' spool file so no other process takes it over"""
+    with _spool_lock:
+        if _spool_pending:
+            try:
+                os.utime(_spool_path())
+            except OSError:
+                pass
+
+
+def _run_flusher():
+    while True:
+        time.sleep(AUDIT_QUEUE_MAX_AGE)
+        try:
+            _flush_stale()
+            _heartbeat()
+            recover_spool()
+        except Exception:
+            logger.exception("Audit trail flusher pass failed")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    """Start the background flusher of this process (again after a fork)"""
+    global _flusher
+    if _flusher is not None and _flusher[0] == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher is None or _flusher[0] != os.getpid():
+            thread = threading.Thread(target=_run_flusher, name='audit-flusher', daemon=True)
+            thread.start()
+            _flusher = (os.getpid(), thread)
+
+
+def _append(entry):
+    _ensure_flusher()
+    _spool([entry])
+    buffers = _buffers()
+    if buffers:
+        buffers[-1].append(entry)
+    else:
+        _enqueue([entry])
+
+
+def record(entry):
+    """
+    Queue an unsaved AuditTrail entry for writing.
+
+    Inside an atomic block the entry is held until the outermost transaction
+    commits (and dropped if it rolls back).
+    """
+    transaction.on_commit(lambda: _append(entry))
+
+
+def flush():
+    """Write every entry of the fallback queue now"""
+    _write(_take_queue())
+
+
+@contextmanager
+def audit_buffer():
+    """
+    Collect audit entries recorded in the block and write them, together
+    with anything waiting in the fallback queue, in one bulk_create on exit,
+    whether the block finished or raised.
+
+    Usage:
+        with audit_buffer():
+            ...  # log_audit_trail(...) calls
+    """
+    entries = []
+    buffers = _buffers()
+    buffers.append(entries)
+    try:
+        yield entries
+    finally:
+        buffers.pop()
+        if buffers:
+            # Nested buffer: hand over to the enclosing one
+            buffers[-1].extend(entries)
+        else:
+            _write(_take_queue() + entries)
+
+
+class AuditBufferMiddleware:
+    """Write the audit entries of a request once the response is ready"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit_buffer():
+            return self.get_response(request)
+
+
+atexit.register(flush)
@@ -3,97 +3,78 @@ Document conversion utilities for PR approval
 Converts uploaded Word/PDF documents to standardized PDFs using LibreOffice
 """
 import os
-import subprocess
 import tempfile
-import time
+from concurrent.futures import ThreadPoolExecutor
 from django.core.files.base import ContentFile
+from django.db import connections
 from pathlib import Path
 
+from apps.budgets.models import ActivityDesignSupportingDocument, PurchaseRequestSupportingDocument
+from .office_pool import OFFICE_POOL_SIZE, OfficeConversionError, OfficeConversionTimeout, convert_to_pdf
+from .pdf_cache import cache_stats_summary, get_cached_pdf, hash_chunks, new_cache_stats, store_pdf
 
-def convert_docx_to_pdf_libreoffice(docx_file):
+
+def _written(chunks, out):
+    """Pass chunks through while copying them to `out`"""
+    for chunk in chunks:
+        out.write(chunk)
+        yield chunk
+
+
+def convert_docx_to_pdf_libreoffice(docx_file, cache_stats=None):
     """
-    Convert Word document to PDF using LibreOffice
+    Convert Word document to PDF using LibreOffice (through the warm
+    office pool, see office_pool.py). A document whose exact bytes were
+    converted before is served from the PDF cache (pdf_cache.py) instead.
     
     Args:
         docx_file: Django UploadedFile object (.docx or .doc)
+        cache_stats: Optional new_cache_stats() dict counting cache hits/misses
     
     Returns:
         ContentFile: PDF file ready to save, or None if conversion fails
     """
+    filename = docx_file.name.rsplit('.', 1)[0] + '.pdf'
     try:
         # Create temp directory
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Save uploaded file to temp location
-            temp_docx_path = os.path.join(temp_dir, 'input.docx')
+            # Save uploaded file to temp location, keeping its extension so
+            # LibreOffice picks the right import filter
+            extension = os.path.splitext(docx_file.name)[1].lower() or '.docx'
+            temp_docx_path = os.path.join(temp_dir, 'input' + extension)
             
             with open(temp_docx_path, 'wb') as temp_file:
-                for chunk in docx_file.chunks():
-                    temp_file.write(chunk)
-            
-            print(f"📝 Saved temp DOCX: {temp_docx_path}")
+                content_hash, source_size = hash_chunks(
+                    _written(docx_file.chunks(), temp_file)
+                )
             
-            # LibreOffice conversion command
-            cmd = [
-                r"C:\Program Files\LibreOffice\program\soffice.exe",
-                '--headless',
-                '--invisible',
-                '--nocrashreport',
-                '--nodefault',
-                '--nofirststartwizard',
-                '--nolockcheck',
-                '--nologo',
-                '--norestore',
-                '--convert-to', 'pdf:writer_pdf_Export',  # Writer PDF export filter
-                '--outdir', temp_dir,
-                temp_docx_path
-            ]
+            pdf_content = get_cached_pdf(content_hash)
+            if cache_stats is not None:
+                cache_stats['hits' if pdf_content is not None else 'misses'] += 1
+            if pdf_content is not None:
+                print(f"✅ PDF served from conversion cache ({len(pdf_content)} bytes)")
+                return ContentFile(pdf_content, name=filename)
             
+            print(f"📝 Saved temp DOCX: {temp_docx_path}")
             print(f"🔄 Running LibreOffice conversion...")
-            print(f"Command: {' '.join(cmd)}")
-            
-            # Run conversion
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            if result.returncode != 0:
-                print(f"❌ LibreOffice stderr: {result.stderr}")
-                print(f"❌ LibreOffice stdout: {result.stdout}")
-                return None
-            
-            print(f"✅ LibreOffice stdout: {result.stdout}")
-            
-            # Wait for file to be written
-            time.sleep(1)
             
-            # Find generated PDF
-            pdf_path = os.path.join(temp_dir, 'input.pdf')
+            pdf_content = convert_to_pdf(temp_docx_path, filter_name='writer_pdf_Export')
+            print(f"✅ PDF created ({len(pdf_content)} bytes)")
             
-            if not os.path.exists(pdf_path):
-                # List all files to debug
-                files = os.listdir(temp_dir)
-                print(f"❌ PDF not found. Files in temp dir: {files}")
-                return None
-            
-            file_size = os.path.getsize(pdf_path)
-            print(f"✅ PDF created: {pdf_path} ({file_size} bytes)")
-            
-            # Read PDF content
-            with open(pdf_path, 'rb') as f:
-                pdf_content = f.read()
+            try:
+                store_pdf(content_hash, source_size, pdf_content)
+            except Exception as e:
+                # The conversion itself succeeded
+                print(f"⚠️ Could not cache converted PDF: {e}")
             
             # Create ContentFile with proper filename
-            filename = docx_file.name.rsplit('.', 1)[0] + '.pdf'
             return ContentFile(pdf_content, name=filename)
             
-    except FileNotFoundError:
-        print("❌ LibreOffice not found at C:\\Program Files\\LibreOffice\\program\\soffice.exe")
+    except OfficeConversionTimeout as e:
+        print(f"❌ {e}")
         return None
-    except subprocess.TimeoutExpired:
-        print("❌ Conversion timeout (>60s)")
+    except OfficeConversionError as e:
+        print(f"❌ LibreOffice conversion failed: {e}")
         return None
     except Exception as e:
         print(f"❌ Error converting DOCX to PDF: {e}")
@@ -102,12 +83,13 @@ def convert_docx_to_pdf_libreoffice(docx_file):
         return None
 
 
-def ensure_pdf(uploaded_file):
+def ensure_pdf(uploaded_file, cache_stats=None):
     """
     Ensure file is PDF. If it's DOCX, convert it using LibreOffice.
     
     Args:
         uploaded_file: Django UploadedFile object
+        cache_stats: Optional new_cache_stats() dict counting cache hits/misses
     
     Returns:
         File: PDF file or None if conversion fails
@@ -125,7 +107,7 @@ def ensure_pdf(uploaded_file):
     # Try to convert DOCX/DOC to PDF
     elif filename.endswith(('.docx', '.doc')):
         print(f"🔄 Converting Word document to PDF: {uploaded_file.name}")
-        pdf_file = convert_docx_to_pdf_libreoffice(uploaded_file)
+        pdf_file = convert_docx_to_pdf_libreoffice(uploaded_file, cache_stats=cache_stats)
         
         if pdf_file:
             print(f"✅ Conversion successful")
@@ -140,6 +122,47 @@ def ensure_pdf(uploaded_file):
         return None
 
 
+def convert_files_in_parallel(files, cache_stats):
+    """
+    ensure_pdf() for several files, at most one per office worker at a time
+    
+    Args:
+        files: Django File objects (empty ones are skipped)
+        cache_stats: new_cache_stats() dict the cache hits/misses are added to
+    
+    Returns:
+        list: PDF file or None for each file, in the same order
+    """
+    def convert(file):
+        stats = new_cache_stats()
+        try:
+            return ensure_pdf(file, cache_stats=stats), stats
+        except Exception as e:
+            print(f"❌ Error converting {file.name}: {e}")
+            return None, stats
+        finally:
+            # Worker threads open their own connections (PDF cache lookups)
+            connections.close_all()
+    
+    pending = [file for file in files if file]
+    outcomes = {}
+    if pending:
+        with ThreadPoolExecutor(
+            max_workers=min(max(OFFICE_POOL_SIZE, 1), len(pending)),
+            thread_name_prefix='pdf-convert'
+        ) as executor:
+            outcomes = dict(zip(map(id, pending), executor.map(convert, pending)))
+    
+    converted = []
+    for file in files:
+        pdf_file, stats = outcomes.get(id(file), (None, None))
+        if stats:
+            cache_stats['hits'] += stats['hits']
+            cache_stats['misses'] += stats['misses']
+        converted.append(pdf_file)
+    return converted
+
+
 def convert_pr_documents_to_pdf(pr):
     """
     Convert all PR documents to PDF when partially approved
@@ -156,17 +179,27 @@ def convert_pr_documents_to_pdf(pr):
         'main_document_format': None,
         'supporting_docs': [],
         'errors': [],
-        'warnings': []
+        'warnings': [],
+        'cache': None
     }
+    cache_stats = new_cache_stats()
     
     try:
-        # Convert main PR document
+        supporting_docs = list(pr.supporting_documents.filter(is_signed_copy=False))
+
+        # Convert the main document and the supporting documents in parallel
+        converted_files = convert_files_in_parallel(
+            [pr.uploaded_document] + [doc.document for doc in supporting_docs],
+            cache_stats
+        )
+
+        # Main PR document
         if pr.uploaded_document:
             original_name = pr.uploaded_document.name
             original_ext = original_name.split('.')[-1].lower()
             print(f"🔄 Processing main document: {original_name} (format: {original_ext})")
-            
-            converted_file = ensure_pdf(pr.uploaded_document)
+
+            converted_file = converted_files[0]
             
             if converted_file:
                 # Check if it's actually a PDF
@@ -193,20 +226,20 @@ def convert_pr_documents_to_pdf(pr):
                 )
                 print(f"⚠️ Main document conversion failed")
         
-        # Convert supporting documents
-        supporting_docs = pr.supporting_documents.filter(is_signed_copy=False)
-        
-        for doc in supporting_docs:
+        # Supporting documents
+        converted_docs = []
+
+        for doc, converted_file in zip(supporting_docs, converted_files[1:]):
             original_name = doc.document.name
             original_ext = original_name.split('.')[-1].lower()
             print(f"🔄 Processing supporting doc: {doc.file_name} (format: {original_ext})")
-            
-            converted_file = ensure_pdf(doc.document)
-            
+
             if converted_file and converted_file.name.lower().endswith('.pdf'):
-                # Update document with PDF version
-                doc.document = converted_file
-                doc.save()
+                # Store the PDF version (unless it already was one); the rows
+                # are updated together below
+                if converted_file is not doc.document:
+                    doc.document.save(converted_file.name, converted_file, save=False)
+                    converted_docs.append(doc)
                 results['supporting_docs'].append({
                     'name': doc.file_name,
                     'format': 'PDF',
@@ -223,7 +256,10 @@ def convert_pr_documents_to_pdf(pr):
                     f"Failed to convert '{doc.file_name}'"
                 )
                 print(f"⚠️ Supporting doc conversion failed: {doc.file_name}")
-        
+
+        if converted_docs:
+            PurchaseRequestSupportingDocument.objects.bulk_update(converted_docs, ['document'])
+
         # Summary
         successful_conversions = (
             (1 if results['main_document'] else 0) +
@@ -232,6 +268,9 @@ def convert_pr_documents_to_pdf(pr):
         total_docs = 1 + len(results['supporting_docs'])
         
         print(f"📊 Conversion summary: {successful_conversions}/{total_docs} documents converted successfully")
+
+        results['cache'] = cache_stats_summary(cache_stats)
+        print(f"📊 Conversion cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es)")
         
         return results
 
@@ -240,6 +279,7 @@ def convert_pr_documents_to_pdf(pr):
         import traceback
         traceback.print_exc()
         results['errors'].append(str(e))
+        results['cache'] = cache_stats_summary(cache_stats)
         return results
 
 
@@ -259,17 +299,27 @@ def convert_ad_documents_to_pdf(ad):
         'main_document_format': None,
         'supporting_docs': [],
         'errors': [],
-        'warnings': []
+        'warnings': [],
+        'cache': None
     }
+    cache_stats = new_cache_stats()
 
     try:
-        # Convert main AD document
+        supporting_docs = list(ad.supporting_documents.filter(is_signed_copy=False))
+
+        # Convert the main document and the supporting documents in parallel
+        converted_files = convert_files_in_parallel(
+            [ad.uploaded_document] + [doc.document for doc in supporting_docs],
+            cache_stats
+        )
+
+        # Main AD document
         if ad.uploaded_document:
             original_name = ad.uploaded_document.name
             original_ext = original_name.split('.')[-1].lower()
             print(f"🔄 Processing main AD document: {original_name} (format: {original_ext})")
 
-            converted_file = ensure_pdf(ad.uploaded_document)
+            converted_file = converted_files[0]
 
             if converted_file:
                 # Check if it's actually a PDF
@@ -296,20 +346,20 @@ def convert_ad_documents_to_pdf(ad):
                 )
                 print(f"⚠️ Main AD document conversion failed")
 
-        # Convert supporting documents
-        supporting_docs = ad.supporting_documents.filter(is_signed_copy=False)
+        # Supporting documents
+        converted_docs = []
 
-        for doc in supporting_docs:
+        for doc, converted_file in zip(supporting_docs, converted_files[1:]):
             original_name = doc.document.name
             original_ext = original_name.split('.')[-1].lower()
             print(f"🔄 Processing AD supporting doc: {doc.file_name} (format: {original_ext})")
 
-            converted_file = ensure_pdf(doc.document)
-
             if converted_file and converted_file.name.lower().endswith('.pdf'):
-                # Update document with PDF version
-                doc.document = converted_file
-                doc.save()
+                # Store the PDF version (unless it already was one); the rows
+                # are updated together below
+                if converted_file is not doc.document:
+                    doc.document.save(converted_file.name, converted_file, save=False)
+                    converted_docs.append(doc)
                 results['supporting_docs'].append({
                     'name': doc.file_name,
                     'format': 'PDF',
@@ -327,6 +377,9 @@ def convert_ad_documents_to_pdf(ad):
                 )
                 print(f"⚠️ AD supporting doc conversion failed: {doc.file_name}")
 
+        if converted_docs:
+            ActivityDesignSupportingDocument.objects.bulk_update(converted_docs, ['document'])
+
         # Summary
         successful_conversions = (
             (1 if results['main_document'] else 0) +
@@ -336,6 +389,9 @@ def convert_ad_documents_to_pdf(ad):
 
         print(f"📊 AD Conversion summary: {successful_conversions}/{total_docs} documents converted successfully")
 
+        results['cache'] = cache_stats_summary(cache_stats)
+        print(f"📊 AD Conversion cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es)")
+
         return results
 
     except Exception as e:
@@ -343,4 +399,5 @@ def convert_ad_documents_to_pdf(ad):
         import traceback
         traceback.print_exc()
         results['errors'].append(str(e))
+        results['cache'] = cache_stats_summary(cache_stats)
         return results
\ No newline at end of file
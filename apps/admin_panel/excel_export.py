@@ -0,0 +1,178 @@
+# bb_budget_monitoring_system/apps/admin_panel/excel_export.py
+"""
+Constant-memory Excel exports
+Rows are streamed into an openpyxl write-only workbook backed by a spooled
+temporary file, so memory stays flat no matter how many rows are exported
+"""
+
+import tempfile
+from copy import copy
+
+from django.http import FileResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Exports larger than this spill from memory to disk: the rows themselves are
+# not kept, so this bounds an export's memory (see StreamingExcelExportMemoryTests)
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Rows fetched per database round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+CURRENCY_FORMAT = '#,##0.00'
+PESO_FORMAT = '₱#,##0.00'
+PERCENT_FORMAT = '0.00"%"'
+
+_THIN = Side(style='thin')
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+
+
+def _fill(color):
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+def _style_definitions():
+    """Named styles shared by every export: name -> attributes"""
+    center = Alignment(horizontal='center', vertical='center')
+    right = Alignment(horizontal='right', vertical='center')
+    middle = Alignment(vertical='center')
+    alt_fill = _fill('F2F2F2')
+    summary_fill = _fill('E7E6E6')
+
+    return {
+        'report_title': dict(font=Font(bold=True, size=16, color='FFFFFF'), fill=_fill('305496'), alignment=center),
+        'report_title_small': dict(font=Font(bold=True, size=14, color='FFFFFF'), fill=_fill('305496'), alignment=center),
+        'report_info': dict(font=Font(italic=True, size=10, color='666666'), alignment=Alignment(horizontal='center')),
+        'header': dict(
+            font=Font(bold=True, color='FFFFFF', size=11), fill=_fill('4472C4'), border=_BORDER,
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        ),
+        'header_large': dict(font=Font(bold=True, color='FFFFFF', size=12), fill=_fill('4472C4'), border=_BORDER, alignment=center),
+        'cell': dict(border=_BORDER, alignment=middle),
+        'cell_alt': dict(border=_BORDER, alignment=middle, fill=alt_fill),
+        'cell_left': dict(border=_BORDER, alignment=Alignment(horizontal='left', vertical='center')),
+        'bordered': dict(border=_BORDER),
+        'currency': dict(border=_BORDER, alignment=right, number_format=CURRENCY_FORMAT),
+        'currency_alt': dict(border=_BORDER, alignment=right, number_format=CURRENCY_FORMAT, fill=alt_fill),
+        'peso': dict(border=_BORDER, number_format=PESO_FORMAT),
+        'percent': dict(border=_BORDER, alignment=center, number_format=PERCENT_FORMAT),
+        'percent_alt': dict(border=_BORDER, alignment=center, number_format=PERCENT_FORMAT, fill=alt_fill),
+        'utilization_low': dict(
+            border=_BORDER, alignment=center, number_format=PERCENT_FORMAT,
+            fill=_fill('C6EFCE'), font=Font(color='006100'),
+        ),
+        'utilization_mid': dict(
+            border=_BORDER, alignment=center, number_format=PERCENT_FORMAT,
+            fill=_fill('FFEB9C'), font=Font(color='9C6500'),
+        ),
+        'utilization_high': dict(
+            border=_BORDER, alignment=center, number_format=PERCENT_FORMAT,
+            fill=_fill('FFC7CE'), font=Font(color='9C0006'),
+        ),
+        'status_approved': dict(border=_BORDER, fill=_fill('C6EFCE')),
+        'status_pending': dict(border=_BORDER, fill=_fill('FFEB9C')),
+        'status_rejected': dict(border=_BORDER, fill=_fill('FFC7CE')),
+        'status_partially_approved': dict(border=_BORDER, fill=_fill('BDD7EE')),
+        'summary_label': dict(font=Font(bold=True, size=11), fill=summary_fill, border=_BORDER, alignment=right),
+        'summary_currency': dict(
+            font=Font(bold=True, size=11), fill=summary_fill, border=_BORDER, alignment=right,
+            number_format=CURRENCY_FORMAT,
+        ),
+        'summary_percent': dict(
+            font=Font(bold=True, size=11), fill=summary_fill, border=_BORDER, alignment=center,
+            number_format=PERCENT_FORMAT,
+        ),
+        'summary_blank': dict(fill=summary_fill, border=_BORDER),
+        'bold': dict(font=Font(bold=True)),
+    }
+
+
+def status_style(status):
+    """Named style of a PR/AD status cell"""
+    name = f"status_{(status or '').lower().replace(' ', '_')}"
+    return name if name in ('status_approved', 'status_pending', 'status_rejected', 'status_partially_approved') else 'bordered'
+
+
+def utilization_style(utilization):
+    """Named style of a utilization cell, color coded like the allocation table"""
+    if utilization < 50:
+        return 'utilization_low'
+    if utilization < 80:
+        return 'utilization_mid'
+    return 'utilization_high'
+
+
+class StreamingExcelExport:
+    """
+    Single-sheet write-only workbook.
+
+    Styles are registered once as named styles and each name is resolved once;
+    cells only get a copy of the resolved style ids, so no per-cell
+    Font/Fill/Border objects are created. Rows go straight to openpyxl's
+    temporary sheet file and are never kept in memory.
+    """
+
+    def __init__(self, sheet_title, column_widths):
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(sheet_title)
+        self.row_count = 0
+        self._resolved_styles = {}
+
+        for name, attributes in _style_definitions().items():
+            style = NamedStyle(name=name)
+            for attribute, value in attributes.items():
+                setattr(style, attribute, value)
+            self.workbook.add_named_style(style)
+
+        # Column widths must be known before the first row is written
+        for index, width in enumerate(column_widths, 1):
+            self.sheet.column_dimensions[get_column_letter(index)].width = width
+
+    def cell(self, value, style=None):
+        cell = WriteOnlyCell(self.sheet, value=value)
+        if style:
+            resolved = self._resolved_styles.get(style)
+            if resolved is None:
+                cell.style = style
+                self._resolved_styles[style] = copy(cell._style)
+            else:
+                cell._style = copy(resolved)
+        return cell
+
+    def append(self, values, styles=None, height=None):
+        """
+        Write one row.
+
+        Args:
+            values: Cell values
+            styles: One style name for every cell, or a list aligned with values
+            height: Optional row height
+        """
+        self.row_count += 1
+        if height:
+            self.sheet.row_dimensions[self.row_count].height = height
+
+        if styles is None or isinstance(styles, str):
+            styles = [styles] * len(values)
+        self.sheet.append([self.cell(value, style) for value, style in zip(values, styles)])
+
+    def merged_row(self, value, columns, style, height=None):
+        """Write a value spanning the first `columns` columns"""
+        self.append([value], [style], height=height)
+        if columns > 1:
+            self.sheet.merged_cells.add(f'A{self.row_count}:{get_column_letter(columns)}{self.row_count}')
+
+    def blank_row(self):
+        self.append([])
+
+    def response(self, filename):
+        """Save into a spooled temporary file and stream it back"""
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.workbook.save(output)
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
@@ -58,69 +58,31 @@ def convert_excel_to_pdf_improved(pre):
 
 def convert_with_libreoffice_improved(excel_path):
     """
-    Improved LibreOffice conversion with better parameters
+    Convert with LibreOffice's calc PDF export through the warm office pool
+    (see office_pool.py); a workbook converted before is served from the
+    PDF cache (pdf_cache.py)
     """
-    import tempfile
-    import time
-    
-    with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            # Better LibreOffice command with more options
-            cmd = [
-                r"C:\Program Files\LibreOffice\program\soffice.exe",
-                '--headless',
-                '--invisible',
-                '--nocrashreport',
-                '--nodefault',
-                '--nofirststartwizard',
-                '--nolockcheck',
-                '--nologo',
-                '--norestore',
-                '--convert-to', 'pdf:calc_pdf_Export',  # Specify calc PDF export filter
-                '--outdir', temp_dir,
-                excel_path
-            ]
-            
-            print(f"Running LibreOffice conversion...")
-            print(f"Command: {' '.join(cmd)}")
-            
-            # Run with longer timeout
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True,
-                timeout=60  # Increased timeout
-            )
-            
-            if result.returncode != 0:
-                print(f"LibreOffice stderr: {result.stderr}")
-                raise Exception(f"LibreOffice failed with return code {result.returncode}")
-            
-            print(f"LibreOffice stdout: {result.stdout}")
-            
-            # Get generated PDF
-            pdf_filename = os.path.splitext(os.path.basename(excel_path))[0] + '.pdf'
-            pdf_path = os.path.join(temp_dir, pdf_filename)
-            
-            # Wait a bit for file to be written
-            time.sleep(1)
-            
-            if os.path.exists(pdf_path):
-                file_size = os.path.getsize(pdf_path)
-                print(f"✅ PDF created: {pdf_path} ({file_size} bytes)")
-                
-                with open(pdf_path, 'rb') as f:
-                    return f.read()
-            else:
-                # List files in temp dir to debug
-                files = os.listdir(temp_dir)
-                print(f"Files in temp dir: {files}")
-                raise Exception("PDF file not created")
-                
-        except FileNotFoundError:
-            raise Exception("LibreOffice not installed. Install: sudo apt-get install libreoffice")
-        except subprocess.TimeoutExpired:
-            raise Exception("Conversion timeout (>60s). File may be too large.")
+    from .office_pool import OfficeConversionError, convert_to_pdf
+    from .pdf_cache import get_cached_pdf, hash_file, store_pdf
+
+    content_hash, source_size = hash_file(excel_path)
+    pdf_content = get_cached_pdf(content_hash)
+    if pdf_content is not None:
+        print(f"✅ PDF served from conversion cache ({len(pdf_content)} bytes)")
+        return pdf_content
+
+    print(f"Running LibreOffice conversion...")
+    try:
+        pdf_content = convert_to_pdf(excel_path, filter_name='calc_pdf_Export')
+    except OfficeConversionError as e:
+        raise Exception(f"LibreOffice conversion failed: {e}")
+
+    print(f"✅ PDF created ({len(pdf_content)} bytes)")
+    try:
+        store_pdf(content_hash, source_size, pdf_content)
+    except Exception as e:
+        print(f"⚠️ Could not cache converted PDF: {e}")
+    return pdf_content
 
 
 def convert_with_unoconv(excel_path):
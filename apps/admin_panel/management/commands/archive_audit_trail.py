@@ -0,0 +1,83 @@
+"""
+Management command to move old audit trail rows into the monthly archive.
+
+Rows older than the retention age are appended to compressed NDJSON files
+(MEDIA_ROOT/audit_archive/YYYY-MM.ndjson.gz) and deleted from the audit
+trail table in batches. Archived months remain searchable from the Audit
+Trail page.
+
+Usage:
+    python manage.py archive_audit_trail                  # Archive rows older than AUDIT_RETENTION_DAYS
+    python manage.py archive_audit_trail --days 180
+    python manage.py archive_audit_trail --dry-run        # Count rows per month only
+    python manage.py archive_audit_trail --batch-size 2000
+    python manage.py archive_audit_trail --list           # List archived months
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.admin_panel.audit_archive import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_RETENTION_DAYS,
+    archive_audit_trail,
+    get_archived_months,
+)
+from apps.admin_panel.audit_writer import flush
+
+
+class Command(BaseCommand):
+    help = 'Move audit trail rows older than the retention age into compressed monthly archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=DEFAULT_RETENTION_DAYS,
+            help=f'Archive rows older than this many days (default: {DEFAULT_RETENTION_DAYS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows archived and deleted per transaction (default: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Show what would be archived without changing anything')
+        parser.add_argument('--list', action='store_true', help='List archived months')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            archives = get_archived_months()
+            if not archives:
+                self.stdout.write('No archived months.')
+            for archive in archives:
+                self.stdout.write(f"  {archive.month:%Y-%m}: {archive.row_count} row(s) in {archive.path}")
+            return
+
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        # Entries still waiting in this process's audit queue belong in the
+        # table before the cutoff is applied
+        flush()
+
+        counts = archive_audit_trail(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            progress=lambda done: self.stdout.write(f'  {done} row(s) archived...'),
+        )
+
+        if not counts:
+            self.stdout.write(self.style.SUCCESS(f"[OK] No audit rows older than {options['days']} days."))
+            return
+
+        for month, count in sorted(counts.items()):
+            self.stdout.write(f'  {month}: {count} row(s)')
+
+        total = sum(counts.values())
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'[!] Dry run: {total} row(s) would be archived.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'[OK] Archived {total} row(s) in {len(counts)} month(s).'))
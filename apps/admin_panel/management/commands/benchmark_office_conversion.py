@@ -0,0 +1,126 @@
+"""
+Management command to compare cold-spawn and pooled LibreOffice conversion.
+
+The same documents are converted to PDF twice with the same concurrency:
+once spawning `soffice --convert-to` per document (the old behaviour) and
+once through a warm OfficePool. Pool start-up is timed separately since a
+web process pays it only once.
+
+Usage:
+    python manage.py benchmark_office_conversion media/samples/pr.docx
+    python manage.py benchmark_office_conversion a.docx b.xlsx --jobs 40 --concurrency 4
+    python manage.py benchmark_office_conversion a.docx --health     # Start a pool and show its instances
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.admin_panel.office_pool import (
+    LIBREOFFICE_PATH,
+    OFFICE_POOL_SIZE,
+    OfficeConversionError,
+    OfficePool,
+    convert_with_cold_spawn,
+    get_pdf_filter,
+    uno_available,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark document to PDF conversion: one soffice per document vs the warm office pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', type=str, help='Documents to convert (.docx, .xlsx, ...)')
+        parser.add_argument('--jobs', type=int, default=20, help='Conversions per mode (default: 20)')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=max(OFFICE_POOL_SIZE, 1),
+            help=f'Parallel conversions / pool size (default: OFFICE_POOL_SIZE = {OFFICE_POOL_SIZE})',
+        )
+        parser.add_argument('--skip-cold', action='store_true', help='Only run the pooled conversions')
+        parser.add_argument('--health', action='store_true', help='Print the pool instances after the run')
+
+    def handle(self, *args, **options):
+        files = [os.path.abspath(path) for path in options['files']]
+        for path in files:
+            if not os.path.isfile(path):
+                raise CommandError(f'File not found: {path}')
+            try:
+                get_pdf_filter(path)
+            except OfficeConversionError as e:
+                raise CommandError(str(e))
+        if options['jobs'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--jobs and --concurrency must be at least 1')
+        if not os.path.exists(LIBREOFFICE_PATH):
+            raise CommandError(f'LibreOffice not found at {LIBREOFFICE_PATH} (set LIBREOFFICE_PATH)')
+
+        jobs = [files[index % len(files)] for index in range(options['jobs'])]
+        concurrency = options['concurrency']
+        self.stdout.write(
+            f'Converting {len(jobs)} document(s) per mode with {concurrency} in parallel '
+            f'({LIBREOFFICE_PATH})'
+        )
+
+        if not options['skip_cold']:
+            self._report('Cold spawn', self._run(jobs, concurrency, convert_with_cold_spawn))
+
+        if not uno_available():
+            self.stdout.write(self.style.WARNING(
+                '[!] Python UNO bridge not available (install python3-uno); pooled mode skipped'
+            ))
+            return
+
+        pool = OfficePool(size=concurrency, queue_size=len(jobs))
+        try:
+            started = time.perf_counter()
+            for instance in pool.instances:
+                instance.start()
+            self.stdout.write(f'Pool start-up: {time.perf_counter() - started:.2f}s for {concurrency} instance(s)')
+            pool.start()
+            self._report('Pooled', self._run(jobs, concurrency, pool.convert))
+
+            if options['health']:
+                for state in pool.health():
+                    self.stdout.write(
+                        f"    office-{state['name']}: pid {state['pid']}, "
+                        f"{'healthy' if state['healthy'] else 'UNHEALTHY'}, "
+                        f"{state['jobs_done']} job(s), {state['restarts']} restart(s)"
+                    )
+        finally:
+            pool.stop()
+
+    def _run(self, jobs, concurrency, convert):
+        """Run every job with `convert(input, output, filter)`; (seconds, per-job times, failures)"""
+        timings, failures = [], []
+
+        def run_one(index, path):
+            with tempfile.TemporaryDirectory(prefix='bb_office_bench_') as out_dir:
+                job_started = time.perf_counter()
+                try:
+                    convert(path, os.path.join(out_dir, f'{index}.pdf'), get_pdf_filter(path))
+                except OfficeConversionError as e:
+                    failures.append(f'{os.path.basename(path)}: {e}')
+                    return
+                timings.append(time.perf_counter() - job_started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run_one, range(len(jobs)), jobs))
+        return time.perf_counter() - started, timings, failures
+
+    def _report(self, label, run):
+        elapsed, timings, failures = run
+        if timings:
+            timings.sort()
+            self.stdout.write(self.style.SUCCESS(
+                f'[OK] {label}: {len(timings)} PDF(s) in {elapsed:.2f}s '
+                f'({len(timings) / elapsed:.2f} docs/s, median {timings[len(timings) // 2]:.2f}s, '
+                f'max {timings[-1]:.2f}s)'
+            ))
+        for failure in failures:
+            self.stdout.write(self.style.ERROR(f'[X] {label}: {failure}'))
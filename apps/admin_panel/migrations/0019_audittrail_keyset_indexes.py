@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0018_budgetallocation_is_compiled'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audittrail',
+            index=models.Index(fields=['-timestamp', '-id'], name='audit_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audittrail',
+            index=models.Index(fields=['action', '-timestamp', '-id'], name='audit_action_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audittrail',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='audit_user_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0021_auditarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConvertedPDFCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('converter_version', models.CharField(max_length=64)),
+                ('path', models.CharField(max_length=255)),
+                ('source_size', models.PositiveBigIntegerField(default=0)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Converted PDF Cache Entry',
+                'verbose_name_plural': 'Converted PDF Cache',
+                'db_table': 'converted_pdf_cache',
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'converter_version'), name='unique_converted_pdf')],
+            },
+        ),
+    ]
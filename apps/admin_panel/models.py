@@ -31,10 +31,65 @@ class AuditTrail(models.Model):
     record_id = models.CharField(max_length=100, null=True)  # ID of the affected record
     detail = models.TextField()  # Description of what happened
     ip_address = models.GenericIPAddressField(null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the entry is recorded; rows are written later in batches
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-timestamp']
+        # Keyset pagination seeks on (timestamp, id), alone or after a filter
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='audit_timestamp_idx'),
+            models.Index(fields=['action', '-timestamp', '-id'], name='audit_action_timestamp_idx'),
+            models.Index(fields=['user', '-timestamp', '-id'], name='audit_user_timestamp_idx'),
+        ]
+
+
+class AuditArchive(models.Model):
+    """
+    One month of audit trail rows moved out of the AuditTrail table into a
+    gzip-compressed NDJSON file under MEDIA_ROOT (see audit_archive).
+    """
+    month = models.DateField(unique=True)  # First day of the archived month
+    path = models.CharField(max_length=255)  # Relative to MEDIA_ROOT
+    row_count = models.PositiveIntegerField(default=0)
+    first_timestamp = models.DateTimeField(null=True)
+    last_timestamp = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"Audit archive {self.month:%Y-%m} ({self.row_count} rows)"
+
+
+class ConvertedPDFCache(models.Model):
+    """
+    PDF produced from an uploaded Word/Excel document, keyed by the SHA-256
+    of the source bytes and the converter version (see pdf_cache). The PDF
+    is stored once under MEDIA_ROOT; least recently used entries are evicted
+    when the cache outgrows its size limit.
+    """
+    content_hash = models.CharField(max_length=64)
+    converter_version = models.CharField(max_length=64)
+    path = models.CharField(max_length=255)  # Relative to MEDIA_ROOT
+    source_size = models.PositiveBigIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0)  # PDF bytes
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'converted_pdf_cache'
+        verbose_name = 'Converted PDF Cache Entry'
+        verbose_name_plural = 'Converted PDF Cache'
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'converter_version'], name='unique_converted_pdf'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} (converter {self.converter_version})"
+
     
 class ApprovedBudget(models.Model):
     PERIOD_CHOICES = [
@@ -0,0 +1,427 @@
+# bb_budget_monitoring_system/apps/admin_panel/office_pool.py
+"""
+Pool of warm headless LibreOffice processes for document to PDF conversion
+Each web process keeps OFFICE_POOL_SIZE soffice instances listening on a
+private pipe and feeds them from a bounded queue, so a conversion no longer
+pays the office cold start. Instances are health-checked before every job
+and restarted when they crash, hang or exceed the per-job timeout.
+
+The pool needs LibreOffice's Python UNO bridge (`import uno`, the
+python3-uno package). Without it, or with OFFICE_POOL_SIZE = 0, every
+conversion spawns `soffice --convert-to` as before.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+LIBREOFFICE_PATH = getattr(settings, 'LIBREOFFICE_PATH', '/usr/bin/soffice')
+OFFICE_POOL_SIZE = getattr(settings, 'OFFICE_POOL_SIZE', 2)
+OFFICE_POOL_QUEUE_SIZE = getattr(settings, 'OFFICE_POOL_QUEUE_SIZE', 20)
+OFFICE_CONVERSION_TIMEOUT = getattr(settings, 'OFFICE_CONVERSION_TIMEOUT', 60)  # seconds per document
+OFFICE_START_TIMEOUT = getattr(settings, 'OFFICE_START_TIMEOUT', 30)  # seconds until an instance accepts jobs
+OFFICE_QUEUE_WAIT = getattr(settings, 'OFFICE_QUEUE_WAIT', 300)  # seconds a job may wait for a free instance
+OFFICE_HEALTH_CHECK_TIMEOUT = getattr(settings, 'OFFICE_HEALTH_CHECK_TIMEOUT', 5)  # seconds before a hung instance is killed
+
+# Part of the PDF cache key (pdf_cache.py): bump when conversion output
+# changes (export filters or their options, a LibreOffice upgrade)
+CONVERTER_VERSION = getattr(settings, 'PDF_CONVERTER_VERSION', 'libreoffice-1')
+
+# PDF export filter by source extension
+PDF_FILTERS = {
+    '.doc': 'writer_pdf_Export',
+    '.docx': 'writer_pdf_Export',
+    '.odt': 'writer_pdf_Export',
+    '.rtf': 'writer_pdf_Export',
+    '.xls': 'calc_pdf_Export',
+    '.xlsx': 'calc_pdf_Export',
+    '.ods': 'calc_pdf_Export',
+}
+
+SOFFICE_FLAGS = [
+    '--headless',
+    '--invisible',
+    '--nocrashreport',
+    '--nodefault',
+    '--nofirststartwizard',
+    '--nolockcheck',
+    '--nologo',
+    '--norestore',
+]
+
+
+class OfficeConversionError(Exception):
+    """A document could not be converted"""
+
+
+class OfficeConversionTimeout(OfficeConversionError):
+    """The conversion (or the wait for a free office instance) took too long"""
+
+
+def get_pdf_filter(path):
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        return PDF_FILTERS[extension]
+    except KeyError:
+        raise OfficeConversionError(f"Unsupported format for PDF conversion: {extension or path}")
+
+
+def _profile_url(profile_dir):
+    # Every soffice needs its own profile to run next to the others
+    return 'file://' + os.path.abspath(profile_dir).replace(os.sep, '/')
+
+
+def convert_with_cold_spawn(input_path, output_path, filter_name, timeout=OFFICE_CONVERSION_TIMEOUT):
+    """Convert with a one-off `soffice --convert-to` process (no pool)"""
+    with tempfile.TemporaryDirectory(prefix='bb_office_') as work_dir:
+        cmd = [
+            LIBREOFFICE_PATH,
+            *SOFFICE_FLAGS,
+            f'-env:UserInstallation={_profile_url(os.path.join(work_dir, "profile"))}',
+            '--convert-to', f'pdf:{filter_name}',
+            '--outdir', work_dir,
+            input_path,
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except FileNotFoundError:
+            raise OfficeConversionError(f"LibreOffice not found at {LIBREOFFICE_PATH} (set LIBREOFFICE_PATH)")
+        except subprocess.TimeoutExpired:
+            raise OfficeConversionTimeout(f"Conversion timeout (>{timeout}s)")
+
+        # soffice has exited, so the file is complete if it exists
+        converted = os.path.join(work_dir, os.path.splitext(os.path.basename(input_path))[0] + '.pdf')
+        if result.returncode != 0 or not os.path.exists(converted):
+            raise OfficeConversionError(
+                f"LibreOffice failed (code {result.returncode}): {result.stderr.strip() or result.stdout.strip()}"
+            )
+        shutil.move(converted, output_path)
+
+
+class OfficeProcess:
+    """One headless soffice listening on a private pipe, driven through UNO"""
+
+    def __init__(self, name):
+        self.name = name
+        self.pipe_name = f'bb_office_{os.getpid()}_{name}_{uuid.uuid4().hex[:8]}'
+        self.profile_dir = None
+        self.process = None
+        self.desktop = None
+        self.restarts = 0
+        self.jobs_done = 0
+
+    def start(self):
+        import uno
+        from com.sun.star.connection import NoConnectException
+
+        self.profile_dir = tempfile.mkdtemp(prefix=f'bb_office_profile_{self.name}_')
+        try:
+            self.process = subprocess.Popen(
+                [
+                    LIBREOFFICE_PATH,
+                    *SOFFICE_FLAGS,
+                    f'-env:UserInstallation={_profile_url(self.profile_dir)}',
+                    f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext',
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise OfficeConversionError(f"LibreOffice not found at {LIBREOFFICE_PATH} (set LIBREOFFICE_PATH)")
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context
+        )
+        deadline = time.monotonic() + OFFICE_START_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(f'uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext')
+                break
+            except NoConnectException:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise OfficeConversionError(f"Office instance {self.name} did not start")
+                time.sleep(0.1)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+        logger.info("Office instance %s started (pid %s)", self.name, self.process.pid)
+
+    def is_healthy(self, timeout=None):
+        """
+        Whether the instance answers a UNO call. With `timeout`, an instance
+        that hasn't answered after that many seconds is killed, which fails
+        the call instead of blocking the caller forever.
+        """
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            return False
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, self.kill)
+            timer.start()
+        try:
+            self.desktop.getFrames().getCount()
+            return self.process.poll() is None
+        except Exception:
+            return False
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def convert(self, input_path, output_path, filter_name):
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def properties(**values):
+            result = []
+            for name, value in values.items():
+                prop = PropertyValue()
+                prop.Name, prop.Value = name, value
+                result.append(prop)
+            return tuple(result)
+
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)), '_blank', 0,
+            properties(Hidden=True, ReadOnly=True)
+        )
+        if document is None:
+            raise OfficeConversionError(f"LibreOffice could not open {os.path.basename(input_path)}")
+        try:
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                properties(FilterName=filter_name)
+            )
+        finally:
+            document.close(True)
+        self.jobs_done += 1
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+        self.desktop = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def restart(self):
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+
+class ConversionJob:
+    def __init__(self, input_path, output_path, filter_name, timeout):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.filter_name = filter_name
+        self.timeout = timeout
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+
+
+class OfficePool:
+    """
+    OFFICE_POOL_SIZE office instances, each served by one worker thread
+    taking jobs from a shared bounded queue.
+    """
+
+    process_class = OfficeProcess
+
+    def __init__(self, size=OFFICE_POOL_SIZE, queue_size=OFFICE_POOL_QUEUE_SIZE):
+        self.size = size
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.instances = [self.process_class(str(index)) for index in range(size)]
+        self.threads = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        for instance in self.instances:
+            thread = threading.Thread(
+                target=self._work, args=(instance,), name=f'office-{instance.name}', daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        for _ in self.threads:
+            try:
+                self.jobs.put_nowait(None)
+            except queue.Full:
+                break
+        for instance in self.instances:
+            instance.stop()
+
+    def _ensure_running(self, instance):
+        """Health check before a job: (re)start the instance if needed"""
+        if instance.is_healthy(timeout=OFFICE_HEALTH_CHECK_TIMEOUT):
+            return
+        if instance.process is not None:
+            logger.warning("Office instance %s is unhealthy, restarting", instance.name)
+            instance.restart()
+        else:
+            instance.start()
+
+    def _work(self, instance):
+        while not self._stopping.is_set():
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.cancelled:
+                continue
+
+            timed_out = threading.Event()
+
+            def on_timeout():
+                timed_out.set()
+                instance.kill()
+
+            try:
+                self._ensure_running(instance)
+                timer = threading.Timer(job.timeout, on_timeout)
+                timer.start()
+                try:
+                    instance.convert(job.input_path, job.output_path, job.filter_name)
+                finally:
+                    timer.cancel()
+                if timed_out.is_set():
+                    raise OfficeConversionTimeout(f"Conversion timeout (>{job.timeout}s)")
+            except Exception as e:
+                if timed_out.is_set():
+                    e = OfficeConversionTimeout(f"Conversion timeout (>{job.timeout}s)")
+                job.error = e if isinstance(e, OfficeConversionError) else OfficeConversionError(str(e))
+                # A failed job may have taken the instance down with it; the
+                # next job's health check restarts it
+                logger.warning("Office instance %s failed a conversion: %s", instance.name, job.error)
+            finally:
+                job.done.set()
+
+    def convert(self, input_path, output_path, filter_name, timeout=OFFICE_CONVERSION_TIMEOUT):
+        """
+        Queue a conversion and wait for it.
+
+        Raises:
+            OfficeConversionTimeout: No instance was free within
+                OFFICE_QUEUE_WAIT, or the conversion exceeded `timeout`
+            OfficeConversionError: The conversion failed
+        """
+        job = ConversionJob(input_path, output_path, filter_name, timeout)
+        deadline = time.monotonic() + OFFICE_QUEUE_WAIT
+        try:
+            self.jobs.put(job, timeout=OFFICE_QUEUE_WAIT)
+        except queue.Full:
+            raise OfficeConversionTimeout("Conversion queue is full")
+
+        remaining = deadline - time.monotonic() + timeout + OFFICE_START_TIMEOUT
+        if not job.done.wait(max(remaining, timeout)):
+            job.cancelled = True
+            raise OfficeConversionTimeout("Timed out waiting for a free office instance")
+        if job.error is not None:
+            raise job.error
+
+    def health(self):
+        """State of every instance, for monitoring"""
+        return [
+            {
+                'name': instance.name,
+                'pid': instance.process.pid if instance.process is not None else None,
+                'healthy': instance.is_healthy(),
+                'restarts': instance.restarts,
+                'jobs_done': instance.jobs_done,
+            }
+            for instance in self.instances
+        ]
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def uno_available():
+    try:
+        import uno  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_office_pool():
+    """This process's pool, started on first use; None when pooling is unavailable"""
+    global _pool, _pool_pid
+
+    if OFFICE_POOL_SIZE < 1 or not uno_available():
+        return None
+    with _pool_lock:
+        # A forked worker must not share its parent's instances
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = OfficePool()
+            _pool.start()
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_office_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.stop()
+        _pool = None
+
+
+atexit.register(shutdown_office_pool)
+
+
+def convert_to_pdf(input_path, filter_name=None, timeout=OFFICE_CONVERSION_TIMEOUT):
+    """
+    Convert an office document to PDF through the pool (or a one-off
+    soffice when pooling is unavailable).
+
+    Args:
+        input_path: Path of the .doc/.docx/.xls/.xlsx/... file
+        filter_name: LibreOffice PDF export filter; by extension if omitted
+        timeout: Seconds the conversion itself may take
+
+    Returns:
+        bytes: The PDF
+
+    Raises:
+        OfficeConversionError: Conversion failed or timed out
+    """
+    filter_name = filter_name or get_pdf_filter(input_path)
+
+    with tempfile.TemporaryDirectory(prefix='bb_office_out_') as out_dir:
+        output_path = os.path.join(out_dir, 'output.pdf')
+        pool = get_office_pool()
+        if pool is not None:
+            pool.convert(input_path, output_path, filter_name, timeout=timeout)
+        else:
+            convert_with_cold_spawn(input_path, output_path, filter_name, timeout=timeout)
+
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            raise OfficeConversionError("LibreOffice produced no PDF")
+        with open(output_path, 'rb') as f:
+            return f.read()
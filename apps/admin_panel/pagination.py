@@ -0,0 +1,158 @@
+# bb_budget_monitoring_system/apps/admin_panel/pagination.py
+"""
+Keyset (cursor) pagination for large, append-only tables
+Pages are found by seeking past the last row shown instead of OFFSET, so
+every page costs the same index range scan no matter how deep it is
+"""
+
+import base64
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q
+
+
+# Above this many matching rows the total is shown as "N+"
+APPROXIMATE_COUNT_CAP = 10000
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """(timestamp, pk) of a cursor, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        timestamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of rows ordered newest first by (timestamp, id)"""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        """Cursor of the page of older rows"""
+        if not self.has_next:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(last.timestamp, last.pk)
+
+    @property
+    def previous_cursor(self):
+        """Cursor of the page of newer rows"""
+        if not self.has_previous:
+            return None
+        first = self.object_list[0]
+        return encode_cursor(first.timestamp, first.pk)
+
+
+def keyset_paginate(queryset, per_page, after=None, before=None, field='timestamp'):
+    """
+    Return the page of `queryset` following (`after`) or preceding (`before`)
+    a cursor, newest rows first.
+
+    The seek condition keeps a plain `field <= value` bound next to the
+    tie-breaker so the (field, id) indexes are used as a range scan.
+
+    Args:
+        queryset: Rows to page through
+        per_page: Rows per page
+        after: Cursor of the last row of the previous (newer) page
+        before: Cursor of the first row of the next (older) page
+        field: Timestamp column ordering the rows
+
+    Returns:
+        KeysetPage
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if after is None else None
+
+    if before is not None:
+        timestamp, pk = before
+        rows = list(
+            queryset.filter(
+                Q(**{f'{field}__gte': timestamp}),
+                Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'pk__gt': pk})
+            ).order_by(field, 'pk')[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page]
+        rows.reverse()
+        return KeysetPage(rows, has_next=True, has_previous=has_previous)
+
+    if after is not None:
+        timestamp, pk = after
+        queryset = queryset.filter(
+            Q(**{f'{field}__lte': timestamp}),
+            Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk})
+        )
+
+    rows = list(queryset.order_by(f'-{field}', '-pk')[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=after is not None)
+
+
+def approximate_count(queryset, cap=APPROXIMATE_COUNT_CAP):
+    """
+    Cheap row count for display.
+
+    Unfiltered tables on PostgreSQL use the planner's row estimate; otherwise
+    counting stops after `cap` rows.
+
+    Returns:
+        (count, is_exact); count is at most `cap` unless estimated
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] > cap:
+            return row[0], False
+
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count <= cap
+
+
+def keyset_paginate_list(rows, per_page, after=None, before=None):
+    """
+    keyset_paginate() for rows already in memory (e.g. archived audit
+    entries), sorted newest first by (timestamp, pk); uses the same cursors.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if after is None else None
+
+    def key(row):
+        return row.timestamp, row.pk
+
+    if before is not None:
+        newer = [row for row in rows if key(row) > before]
+        page = newer[-per_page:]
+        return KeysetPage(page, has_next=True, has_previous=len(newer) > per_page)
+
+    if after is not None:
+        rows = [row for row in rows if key(row) < after]
+
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=after is not None)
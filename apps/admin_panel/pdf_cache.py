@@ -0,0 +1,153 @@
+# bb_budget_monitoring_system/apps/admin_panel/pdf_cache.py
+"""
+Content-addressed cache of document -> PDF conversions
+PRs and ADs are mostly filled-in copies of the same templates, so the same
+Word/Excel bytes reach LibreOffice again and again. Each conversion is
+stored once under MEDIA_ROOT/pdf_cache/, keyed by the SHA-256 of the source
+bytes and the converter version, and repeats are served from there without
+starting LibreOffice. Least recently used entries are evicted once the
+cache outgrows PDF_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .office_pool import CONVERTER_VERSION
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = 'pdf_cache'
+PDF_CACHE_MAX_BYTES = getattr(settings, 'PDF_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+
+def new_cache_stats():
+    """Hit/miss counters for one batch of conversions (see cache_stats_summary)"""
+    return {'hits': 0, 'misses': 0}
+
+
+def cache_stats_summary(stats):
+    lookups = stats['hits'] + stats['misses']
+    return {
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'hit_rate': round(stats['hits'] / lookups, 3) if lookups else None,
+    }
+
+
+def hash_chunks(chunks):
+    """SHA-256 hex digest and size of a stream of byte chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    with open(path, 'rb') as f:
+        return hash_chunks(iter(lambda: f.read(chunk_size), b''))
+
+
+def cache_path(content_hash, converter_version=CONVERTER_VERSION):
+    version = ''.join(c if c.isalnum() or c in '.-_' else '_' for c in converter_version)
+    return os.path.join(CACHE_DIR, content_hash[:2], f'{content_hash}-{version}.pdf')
+
+
+def get_cached_pdf(content_hash):
+    """PDF bytes converted earlier from the same source bytes, or None"""
+    from .models import ConvertedPDFCache
+
+    entry = ConvertedPDFCache.objects.filter(
+        content_hash=content_hash,
+        converter_version=CONVERTER_VERSION
+    ).only('pk', 'path').first()
+    if entry is None:
+        return None
+
+    try:
+        with open(os.path.join(settings.MEDIA_ROOT, entry.path), 'rb') as f:
+            pdf_content = f.read()
+    except FileNotFoundError:
+        # File removed behind the cache's back (or evicted concurrently)
+        ConvertedPDFCache.objects.filter(pk=entry.pk).delete()
+        return None
+
+    ConvertedPDFCache.objects.filter(pk=entry.pk).update(
+        last_used_at=timezone.now(),
+        hits=F('hits') + 1
+    )
+    return pdf_content
+
+
+def store_pdf(content_hash, source_size, pdf_content):
+    """Keep a conversion result and evict past the size limit"""
+    from .models import ConvertedPDFCache
+
+    relative_path = cache_path(content_hash)
+    path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write next to the target and rename so readers never see a partial PDF
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_content)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    try:
+        with transaction.atomic():
+            ConvertedPDFCache.objects.create(
+                content_hash=content_hash,
+                converter_version=CONVERTER_VERSION,
+                path=relative_path,
+                source_size=source_size,
+                size=len(pdf_content),
+            )
+    except IntegrityError:
+        # The same document was converted concurrently; the file is identical
+        pass
+    evict_pdf_cache()
+
+
+def evict_pdf_cache(max_bytes=PDF_CACHE_MAX_BYTES):
+    """
+    Delete least recently used entries (and their files) until the cache
+    fits in `max_bytes`.
+
+    Returns:
+        int: Number of entries evicted
+    """
+    from .models import ConvertedPDFCache
+
+    total = ConvertedPDFCache.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total <= max_bytes:
+        return 0
+
+    evicted = []
+    for entry in ConvertedPDFCache.objects.order_by('last_used_at').values('pk', 'path', 'size').iterator():
+        if total <= max_bytes:
+            break
+        evicted.append(entry)
+        total -= entry['size']
+
+    ConvertedPDFCache.objects.filter(pk__in=[entry['pk'] for entry in evicted]).delete()
+    for entry in evicted:
+        try:
+            os.remove(os.path.join(settings.MEDIA_ROOT, entry['path']))
+        except FileNotFoundError:
+            pass
+    logger.info("Evicted %s converted PDF(s) from the cache", len(evicted))
+    return len(evicted)
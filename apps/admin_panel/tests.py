@@ -1,3 +1,383 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.admin_panel import audit_archive, audit_writer, excel_export, office_pool
+from apps.admin_panel.audit_archive import archive_audit_trail, read_archived_entries
+from apps.admin_panel.audit_writer import audit_buffer, recover_spool
+from apps.admin_panel.excel_export import StreamingExcelExport
+from apps.admin_panel.models import AuditArchive, AuditTrail
+from apps.admin_panel.office_pool import OfficePool, OfficeProcess
+from apps.admin_panel.pagination import keyset_paginate, keyset_paginate_list
+from apps.admin_panel.utils import log_audit_trail
+from apps.users.models import User
+
+
+class AuditWriterTests(TestCase):
+    """Audit entries are written by the flusher and survive the process in the spool"""
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir, ignore_errors=True)
+        for patcher in (
+            mock.patch.object(audit_writer, 'AUDIT_SPOOL_DIR', self.spool_dir),
+            # Flusher passes are run by hand
+            mock.patch.object(audit_writer, '_ensure_flusher'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(audit_writer._take_queue)
+        self.addCleanup(audit_writer._spool_pending.clear)
+
+        self.user = User.objects.create_user('auditor', 'Audit User', 'auditor@example.com', 'password', department='IT')
+
+    def log(self, detail='Approved PR'):
+        with self.captureOnCommitCallbacks(execute=True):
+            log_audit_trail(self.user, 'APPROVE', 'PurchaseRequest', 1, detail)
+
+    def spooled(self):
+        entries = []
+        for name in os.listdir(self.spool_dir):
+            with open(os.path.join(self.spool_dir, name), encoding='utf-8') as f:
+                entries.extend(json.loads(line)['detail'] for line in f)
+        return entries
+
+    def test_flusher_writes_stale_queue(self):
+        self.log()
+        audit_writer._flush_stale()
+        self.assertEqual(AuditTrail.objects.count(), 0)
+
+        # The queue gets old with no further entry to trigger a flush
+        audit_writer._queue_oldest -= audit_writer.AUDIT_QUEUE_MAX_AGE
+        audit_writer._flush_stale()
+        self.assertEqual(AuditTrail.objects.get().detail, 'Approved PR')
+
+    def test_entries_are_spooled_until_written(self):
+        with audit_buffer():
+            self.log('first')
+            self.log('second')
+            self.assertEqual(self.spooled(), ['first', 'second'])
+
+        self.assertEqual(self.spooled(), [])
+        self.assertEqual(AuditTrail.objects.count(), 2)
+
+    def test_failed_write_stays_spooled(self):
+        with mock.patch.object(AuditTrail.objects, 'bulk_create', side_effect=RuntimeError), \
+                self.assertLogs(audit_writer.logger, 'ERROR'):
+            with audit_buffer():
+                self.log()
+        self.assertEqual(self.spooled(), ['Approved PR'])
+
+        audit_writer.flush()
+        self.assertEqual(self.spooled(), [])
+        self.assertEqual(AuditTrail.objects.count(), 1)
+
+    def test_spool_of_stopped_process_is_replayed(self):
+        with audit_buffer():
+            self.log()
+            # The process dies here: nothing written, the spool file remains
+            path = audit_writer._spool_path()
+            orphan = os.path.join(self.spool_dir, 'stopped-process.jsonl')
+            shutil.copy(path, orphan)
+            audit_writer._spool_pending.clear()
+            audit_writer._buffers()[-1].clear()
+
+        self.assertEqual(recover_spool(), 0)  # Its owner could still be alive
+        self.assertTrue(os.path.exists(orphan))
+
+        stopped_at = time.time() - audit_writer.AUDIT_SPOOL_ORPHAN_AGE
+        os.utime(orphan, (stopped_at, stopped_at))
+        with self.assertLogs(audit_writer.logger, 'WARNING'):
+            self.assertEqual(recover_spool(), 1)
+        self.assertFalse(os.path.exists(orphan))
+
+        entry = AuditTrail.objects.get()
+        self.assertEqual((entry.user, entry.action, entry.record_id), (self.user, 'APPROVE', '1'))
+
+
+MANILA = ZoneInfo('Asia/Manila')
+
+
+class AuditArchiveTests(TestCase):
+    """Old audit rows move to monthly archive files and stay searchable"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.admin = User.objects.create_user(
+            'admin', 'Admin User', 'admin@example.com', 'password', department='IT', is_admin=True
+        )
+
+    def audit(self, timestamp, action='APPROVE'):
+        return AuditTrail.objects.create(
+            user=self.admin, action=action, model_name='PurchaseRequest', record_id='1',
+            detail=f'{action} at {timestamp:%Y-%m-%d %H:%M}', timestamp=timestamp
+        )
+
+    def test_months_follow_local_time(self):
+        # 16:30 UTC on 31 January is already February in Manila
+        january = self.audit(datetime(2025, 1, 31, 23, 30, tzinfo=MANILA))
+        february = self.audit(datetime(2025, 2, 1, 0, 30, tzinfo=MANILA))
+        self.assertEqual(february.timestamp.astimezone(ZoneInfo('UTC')).day, 31)
+
+        self.assertEqual(archive_audit_trail(days=30), {'2025-01': 1, '2025-02': 1})
+
+        self.assertFalse(AuditTrail.objects.exists())
+        self.assertEqual([entry.pk for entry in read_archived_entries('2025-01')], [january.pk])
+        self.assertEqual([entry.pk for entry in read_archived_entries('2025-02')], [february.pk])
+        self.assertEqual(read_archived_entries('2025-02')[0].timestamp, february.timestamp)
+        self.assertEqual(
+            [(f'{archive.month:%Y-%m}', archive.row_count) for archive in AuditArchive.objects.order_by('month')],
+            [('2025-01', 1), ('2025-02', 1)]
+        )
+
+    def test_rows_appended_twice_are_read_once(self):
+        entries = [self.audit(datetime(2025, 3, day, 9, 0, tzinfo=MANILA)) for day in (3, 4)]
+
+        # The batch reaches the file, then the delete rolls back: the next
+        # run appends the same rows again
+        with mock.patch.object(audit_archive, '_record_month', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                archive_audit_trail(days=30)
+        self.assertEqual(AuditTrail.objects.count(), 2)
+        self.assertEqual(archive_audit_trail(days=30), {'2025-03': 2})
+
+        self.assertEqual(
+            [entry.pk for entry in read_archived_entries('2025-03')],
+            [entries[1].pk, entries[0].pk]
+        )
+        self.assertEqual(AuditArchive.objects.get().row_count, 2)
+
+    def test_audit_trail_view_searches_an_archived_month(self):
+        self.audit(datetime(2025, 1, 9, 23, 30, tzinfo=MANILA))
+        first_day = self.audit(datetime(2025, 1, 10, 0, 30, tzinfo=MANILA))
+        rejected = self.audit(datetime(2025, 1, 11, 12, 0, tzinfo=MANILA), action='REJECT')
+        last_day = self.audit(datetime(2025, 1, 12, 23, 30, tzinfo=MANILA))
+        self.audit(datetime(2025, 1, 13, 0, 30, tzinfo=MANILA))  # Still the 12th in UTC
+        archive_audit_trail(days=30)
+        recent = self.audit(datetime.now(tz=MANILA))
+
+        self.client.force_login(self.admin)
+        url = reverse('audit_trail')
+        dates = {'start_date': '2025-01-10', 'end_date': '2025-01-12'}
+
+        response = self.client.get(url, {'archive_month': '2025-01', **dates})
+        self.assertEqual(response.context['archive_month'], '2025-01')
+        self.assertEqual(
+            [entry.pk for entry in response.context['page_obj']],
+            [last_day.pk, rejected.pk, first_day.pk]
+        )
+        self.assertEqual(response.context['total_count'], 3)
+
+        response = self.client.get(url, {'archive_month': '2025-01', 'action': 'REJECT', **dates})
+        self.assertEqual([entry.pk for entry in response.context['page_obj']], [rejected.pk])
+
+        # A month that was never archived falls back to the table
+        response = self.client.get(url, {'archive_month': '2024-12'})
+        self.assertIsNone(response.context['archive_month'])
+        self.assertEqual([entry.pk for entry in response.context['page_obj']], [recent.pk])
+
+
+class AuditTrailPaginationTests(TestCase):
+    """Audit pages are found by (timestamp, id) cursors, never by OFFSET"""
+
+    PER_PAGE = 7  # Pages end in the middle of a run of equal timestamps
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            'admin', 'Admin User', 'admin@example.com', 'password', department='IT', is_admin=True
+        )
+        # 40 entries, five to a timestamp (batched writes share theirs), an
+        # hour apart from 20:00 on 10 June to 03:00 on 11 June local time,
+        # all of them 10 June in UTC
+        start = datetime(2025, 6, 10, 20, 0, tzinfo=MANILA)
+        AuditTrail.objects.bulk_create([
+            AuditTrail(
+                user=self.admin, action='UPDATE', model_name='PurchaseRequest', record_id=str(index),
+                detail=f'Entry {index}', timestamp=start + timedelta(hours=index // 5)
+            )
+            for index in range(40)
+        ])
+        self.newest_first = list(AuditTrail.objects.order_by('-timestamp', '-pk').values_list('pk', flat=True))
+
+    def walk(self, paginate):
+        """Every page following next cursors, then back again following previous cursors"""
+        forward = [paginate()]
+        while forward[-1].has_next:
+            forward.append(paginate(after=forward[-1].next_cursor))
+        backward = [forward[-1]]
+        while backward[-1].has_previous:
+            backward.append(paginate(before=backward[-1].previous_cursor))
+        return [[row.pk for row in page] for page in forward], [[row.pk for row in page] for page in backward]
+
+    def test_cursors_round_trip_over_equal_timestamps(self):
+        rows = list(AuditTrail.objects.order_by('-timestamp', '-pk'))
+        for paginate in (
+            lambda **cursor: keyset_paginate(AuditTrail.objects.all(), self.PER_PAGE, **cursor),
+            lambda **cursor: keyset_paginate_list(rows, self.PER_PAGE, **cursor),
+        ):
+            forward, backward = self.walk(paginate)
+
+            self.assertEqual([pk for page in forward for pk in page], self.newest_first)
+            self.assertEqual(len(forward), 6)
+            self.assertEqual(backward, forward[::-1])
+
+    def test_date_range_is_a_plain_timestamp_range(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('audit_trail'), {'start_date': '2025-06-10', 'end_date': '2025-06-10'})
+
+        self.assertEqual(response.context['total_count'], 20)
+        self.assertEqual([entry.pk for entry in response.context['page_obj']], self.newest_first[20:35])
+
+        audit_queries = [query['sql'] for query in queries.captured_queries if 'admin_panel_audittrail' in query['sql']]
+        self.assertTrue(audit_queries)
+        for sql in audit_queries:
+            self.assertIn('"timestamp" >= ', sql)
+            self.assertIn('"timestamp" < ', sql)
+            # No per-row date conversion (SQLite's date cast, PostgreSQL's AT TIME ZONE)
+            self.assertNotIn('django_datetime_cast_date', sql)
+            self.assertNotIn('AT TIME ZONE', sql)
+
+    @mock.patch('apps.admin_panel.views.AUDIT_TRAIL_PAGE_SIZE', 5)
+    def test_deep_pages_use_no_offset_or_full_count(self):
+        self.client.force_login(self.admin)
+        url = reverse('audit_trail')
+        response = self.client.get(url)
+        for _ in range(4):
+            response = self.client.get(url, {'after': response.context['page_obj'].next_cursor})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'after': response.context['page_obj'].next_cursor})
+
+        self.assertEqual(
+            [entry.pk for entry in response.context['page_obj']],
+            self.newest_first[25:30]
+        )
+        audit_queries = [query['sql'] for query in queries.captured_queries if 'admin_panel_audittrail' in query['sql']]
+        self.assertTrue(audit_queries)
+        for sql in audit_queries:
+            self.assertNotIn('OFFSET', sql.upper())
+            if 'COUNT(' in sql.upper():
+                # approximate_count() stops counting after APPROXIMATE_COUNT_CAP rows
+                self.assertIn('LIMIT', sql.upper())
+
+
+class StreamingExcelExportMemoryTests(TestCase):
+    """
+    Export memory does not grow with the row count.
+
+    Rows cost nothing once written; saving holds at most SPOOL_MAX_SIZE of
+    output in memory before it rolls over to disk, so the spool is made
+    small enough for the larger export to roll over. Set
+    EXPORT_MEMORY_TEST_ROWS=500000 for the full-size check (minutes under
+    tracemalloc).
+    """
+
+    SMALL_EXPORT_ROWS = 1_000
+    LARGE_EXPORT_ROWS = int(os.environ.get('EXPORT_MEMORY_TEST_ROWS', 20_000))
+    SPOOL_MAX_SIZE = 64 * 1024
+
+    def measure(self, rows):
+        """Peak traced memory (bytes) above the empty export while writing rows and while saving"""
+        tracemalloc.start()
+        try:
+            export = StreamingExcelExport('Users', [10, 25, 35, 15, 15])
+            export.merged_row('USERS REPORT', 5, 'report_title', height=30)
+            export.append(['#', 'Username', 'Email', 'Allocated', 'Status'], 'header')
+            baseline = tracemalloc.get_traced_memory()[0]
+
+            tracemalloc.reset_peak()
+            for index in range(rows):
+                export.append(
+                    [index, f'user{index}', f'user{index}@example.com', Decimal('1234.50'), 'Approved'],
+                    ['cell', 'cell_left', 'cell', 'currency', 'status_approved']
+                )
+            rows_peak = tracemalloc.get_traced_memory()[1] - baseline
+
+            tracemalloc.reset_peak()
+            response = export.response('users.xlsx')
+            save_peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+        response.close()
+        return rows_peak, save_peak
+
+    def test_memory_is_flat_from_small_to_large_exports(self):
+        with mock.patch.object(excel_export, 'SPOOL_MAX_SIZE', self.SPOOL_MAX_SIZE):
+            small_rows_peak, small_save_peak = self.measure(self.SMALL_EXPORT_ROWS)
+            large_rows_peak, large_save_peak = self.measure(self.LARGE_EXPORT_ROWS)
+
+        self.assertLess(large_rows_peak - small_rows_peak, 512 * 1024)
+        self.assertLess(large_save_peak - small_save_peak, self.SPOOL_MAX_SIZE + 256 * 1024)
+
+
+class HangingOfficeProcess(OfficeProcess):
+    """
+    An OfficeProcess without soffice whose first instance hangs in the UNO
+    call until it is killed, the way a wedged soffice does
+    """
+
+    def start(self):
+        killed = threading.Event()
+        hang = self.restarts == 0
+
+        def get_count():
+            if hang:
+                killed.wait(30)
+                raise RuntimeError('Binary URP bridge disposed during call')
+            return 0
+
+        self.process = mock.Mock(pid=self.restarts + 100)
+        self.process.poll.side_effect = lambda: 1 if killed.is_set() else None
+        self.process.kill.side_effect = killed.set
+        self.process.terminate.side_effect = killed.set
+        self.desktop = mock.Mock()
+        self.desktop.getFrames.return_value.getCount.side_effect = get_count
+
+    def convert(self, input_path, output_path, filter_name):
+        self.jobs_done += 1
+
+
+class HangingOfficePool(OfficePool):
+    process_class = HangingOfficeProcess
+
+
+class OfficePoolHealthCheckTests(TestCase):
+    """A hung instance is killed by the pre-job health check and restarted"""
+
+    @mock.patch.object(office_pool, 'OFFICE_HEALTH_CHECK_TIMEOUT', 0.2)
+    def test_hung_instance_is_restarted_before_the_job(self):
+        pool = HangingOfficePool(size=1, queue_size=1)
+        instance = pool.instances[0]
+        instance.start()
+        hung_process = instance.process
+        pool.start()
+        try:
+            started = time.monotonic()
+            pool.convert('in.docx', 'out.pdf', 'writer_pdf_Export', timeout=5)
+            elapsed = time.monotonic() - started
+        finally:
+            pool.stop()
+
+        self.assertLess(elapsed, 5)
+        hung_process.kill.assert_called()
+        self.assertEqual(instance.restarts, 1)
+        self.assertEqual(instance.jobs_done, 1)
@@ -5,6 +5,10 @@ from . import views
 urlpatterns = [
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('dashboard/export-excel/', views.export_admin_dashboard_excel, name='export_admin_dashboard_excel'),
+    path('dashboard/export-excel/enqueue/', views.enqueue_admin_dashboard_export, name='enqueue_admin_dashboard_export'),
+    path('exports/<uuid:job_id>/status/', views.admin_export_job_status, name='admin_export_job_status'),
+    path('exports/<uuid:job_id>/download/', views.admin_export_job_download, name='admin_export_job_download'),
+    path('conversions/<str:target>/<uuid:object_id>/status/', views.pdf_conversion_status, name='pdf_conversion_status'),
     path('client_accounts/', views.client_accounts, name='client_accounts'),
     path('budget_allocation/', views.budget_allocation, name='budget_allocation'),
     path('departments-pr-request/', views.departments_pr_request, name='department_pr_request'),
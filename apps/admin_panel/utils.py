@@ -2,23 +2,45 @@
 def log_audit_trail(request, action, model_name, record_id=None, detail=None):
     """
     Utility function to create audit trail entries
+
+    Entries are buffered and written in one batch at the end of the request
+    (see audit_writer). `request` may also be a User, for callers that have
+    no request at hand.
     """
+    from django.utils import timezone
     from .models import AuditTrail
-    
-    AuditTrail.objects.create(
-        user=request.user,
+    from .audit_writer import record
+
+    if hasattr(request, 'META'):
+        user, ip_address = request.user, request.META.get('REMOTE_ADDR')
+    else:
+        user, ip_address = request, None
+
+    record(AuditTrail(
+        user=user if getattr(user, 'is_authenticated', False) else None,
         action=action,
         model_name=model_name,
         record_id=str(record_id) if record_id else None,
         detail=detail,
-        ip_address=request.META.get('REMOTE_ADDR')
-    )
-    
+        ip_address=ip_address,
+        timestamp=timezone.now()
+    ))
+
+
 def generate_pre_number(pre):
     """
-    Generate unique PRE number based on ID
-    Returns: PRE-YYYY-XXXXXXXX (first 8 chars of UUID)
+    Return the PRE number, assigning the next one from the sequence of the
+    PRE's fiscal year on first use.
+
+    Call inside the transaction that creates the PRE, as its last statement
+    (see assign_number), so a rolled back PRE releases its number.
+    Returns: PRE-YYYY-NNNN
     """
-    from datetime import datetime
-    year = datetime.now().year
-    return f'PRE-{year}-{str(pre.id)[:8].upper()}'
\ No newline at end of file
+    import re
+    from apps.budgets.services.sequence_service import assign_number
+
+    if pre.pre_number:
+        return pre.pre_number
+
+    year = re.search(r'\d{4}', pre.fiscal_year or '')
+    return assign_number(pre, 'PRE', year=int(year.group()) if year else None)
@@ -16,6 +16,8 @@ from apps.budgets.models import (
     RequestApproval,
     SystemNotification
 )
+from apps.budgets.services.consumption_service import attach_quarter_consumption
+from apps.budgets.services.dashboard_service import get_admin_dashboard_metrics
 from django.contrib import messages
 from decimal import Decimal
 from django.db import transaction
@@ -33,11 +35,17 @@ from django.http import FileResponse, Http404, JsonResponse
 import os
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from django.http import HttpResponse
-from openpyxl.utils import get_column_letter
 from openpyxl import Workbook
-from django.db.models import Q
+from django.db.models import Q, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
 from django.views.decorators.http import require_http_methods
 from .forms import ApprovedDocumentUploadForm
+from .pagination import approximate_count, keyset_paginate, keyset_paginate_list
+from .audit_archive import get_archived_months, read_archived_entries
+from .excel_export import EXPORT_CHUNK_SIZE, XLSX_CONTENT_TYPE, StreamingExcelExport, status_style, utilization_style
+from apps.budgets.services.export_job_service import EXPORT_ASYNC_ROW_THRESHOLD, enqueue_export
+from apps.budgets.views import export_job_download_response, export_job_response, export_job_status_response
+from io import BytesIO
 
 # Create your views here.
 @role_required('admin', login_url='/admin/')
@@ -58,10 +66,8 @@ def admin_dashboard(request):
             last_login__gte=thirty_days_ago
         ).count()
 
-        # Get base budget allocations with year filtering
-        base_allocations = NewBudgetAllocation.objects.select_related(
-            'approved_budget', 'end_user'
-        ).filter(is_active=True)
+        # Get base budget allocations
+        base_allocations = NewBudgetAllocation.objects.filter(is_active=True)
 
         # Get available years from budget allocations
         available_years = (
@@ -72,71 +78,13 @@ def admin_dashboard(request):
             .order_by('-year')
         )
 
-        # Apply year filter to budget allocations
-        if selected_year == 'all':
-            budget_allocated = base_allocations
-        else:
-            budget_allocated = base_allocations.filter(
-                allocated_at__year=selected_year
-            )
+        # Budget and request metrics (fixed number of queries, see dashboard_service)
+        metrics = get_admin_dashboard_metrics(selected_year)
 
-        # Total Budget from filtered allocations
-        total_budget = budget_allocated.aggregate(
-            Sum('allocated_amount')
-        )['allocated_amount__sum'] or 0
-
-        # Pending Requests Count (PRE + PR + AD) - filtered by year
-        if selected_year == 'all':
-            pending_pre_count = NewDepartmentPRE.objects.filter(status='Pending').count()
-            pending_pr_count = NewPurchaseRequest.objects.filter(status='Pending').count()
-            pending_ad_count = NewActivityDesign.objects.filter(status='Pending').count()
-        else:
-            pending_pre_count = NewDepartmentPRE.objects.filter(
-                status='Pending',
-                budget_allocation__allocated_at__year=selected_year
-            ).count()
-            pending_pr_count = NewPurchaseRequest.objects.filter(
-                status='Pending',
-                budget_allocation__allocated_at__year=selected_year
-            ).count()
-            pending_ad_count = NewActivityDesign.objects.filter(
-                status='Pending',
-                budget_allocation__allocated_at__year=selected_year
-            ).count()
-        total_pending_realignment_request = pending_pre_count + pending_pr_count + pending_ad_count
-
-        # Approved Requests Count (PRE + PR + AD) - filtered by year
-        if selected_year == 'all':
-            approved_pre_count = NewDepartmentPRE.objects.filter(status__in=['Approved', 'Partially Approved']).count()
-            approved_pr_count = NewPurchaseRequest.objects.filter(status__in=['Approved', 'Partially Approved']).count()
-            approved_ad_count = NewActivityDesign.objects.filter(status__in=['Approved', 'Partially Approved']).count()
-        else:
-            approved_pre_count = NewDepartmentPRE.objects.filter(
-                status__in=['Approved', 'Partially Approved'],
-                budget_allocation__allocated_at__year=selected_year
-            ).count()
-            approved_pr_count = NewPurchaseRequest.objects.filter(
-                status__in=['Approved', 'Partially Approved'],
-                budget_allocation__allocated_at__year=selected_year
-            ).count()
-            approved_ad_count = NewActivityDesign.objects.filter(
-                status__in=['Approved', 'Partially Approved'],
-                budget_allocation__allocated_at__year=selected_year
-            ).count()
-        total_approved_realignment_request = approved_pre_count + approved_pr_count + approved_ad_count
-
-        # Add computed fields for the template
-        budget_allocated_list = []
-        for allocation in budget_allocated:
-            budget_allocated_list.append({
-                'id': allocation.id,
-                'department': allocation.department,
-                'approved_budget': allocation.approved_budget,
-                'total_allocated': allocation.allocated_amount,
-                'spent': allocation.get_total_used(),
-                'remaining_budget': allocation.allocated_amount - allocation.get_total_used(),
-                'end_user': allocation.end_user,
-            })
+        total_budget = metrics['total_budget']
+        total_pending_realignment_request = metrics['total_pending']
+        total_approved_realignment_request = metrics['total_approved']
+        budget_allocated_list = metrics['budget_allocated']
 
         # Calculate percentage changes for trends
         user_trend = "up"  # You can calculate actual trend
@@ -144,34 +92,11 @@ def admin_dashboard(request):
         pending_trend = "down" if total_pending_realignment_request < 10 else "up"
         approved_trend = "up"
 
-        # Chart data (group by department) - using NEW model
-        from django.db.models import F, ExpressionWrapper, DecimalField
-
-        dept_agg = (
-            NewBudgetAllocation.objects
-            .filter(is_active=True)
-            .values('department')
-            .annotate(
-                total_allocated=Sum('allocated_amount'),
-                total_pre_used=Sum('pre_amount_used'),
-                total_pr_used=Sum('pr_amount_used'),
-                total_ad_used=Sum('ad_amount_used')
-            )
-            .order_by('department')
-        )
-
-        dept_labels = [row['department'] or 'Unknown' for row in dept_agg]
-        dept_allocated = [float(row['total_allocated'] or 0) for row in dept_agg]
-
-        # Calculate total spent (PR + AD only, excluding PRE)
-        dept_spent = [
-            float(
-                (row['total_pr_used'] or 0) +
-                (row['total_ad_used'] or 0)
-            )
-            for row in dept_agg
-        ]
-        dept_remaining = [max(0.0, a - s) for a, s in zip(dept_allocated, dept_spent)]
+        # Chart data (group by department, spent = PR + AD only, excluding PRE)
+        dept_labels = metrics['dept_labels']
+        dept_allocated = metrics['dept_allocated']
+        dept_spent = metrics['dept_spent']
+        dept_remaining = metrics['dept_remaining']
 
         # Recent Activity (latest 8 for better display)
         recent_activities = (
@@ -181,21 +106,11 @@ def admin_dashboard(request):
         )
 
         # Additional metrics for enhanced dashboard
-        # Total departments with active budgets (filtered by year)
-        active_departments = budget_allocated.values('department').distinct().count()
-
-        # Average budget utilization
-        total_allocated_sum = sum(dept_allocated) or 1  # Avoid division by zero
-        total_spent_sum = sum(dept_spent)
-        avg_utilization = (total_spent_sum / total_allocated_sum * 100) if total_allocated_sum > 0 else 0
+        active_departments = metrics['active_departments']
+        avg_utilization = metrics['avg_utilization']
 
         # Low budget departments (less than 20% remaining)
-        low_budget_depts = 0
-        for alloc in budget_allocated_list:
-            if alloc['total_allocated'] > 0:
-                remaining_pct = (alloc['remaining_budget'] / alloc['total_allocated']) * 100
-                if remaining_pct < 20:
-                    low_budget_depts += 1
+        low_budget_depts = metrics['low_budget_depts']
 
     except Exception as e:
         # Fallback values in case of any errors
@@ -521,7 +436,7 @@ def handle_departments_request(request, request_id):
     """
     from apps.budgets.models import PurchaseRequest as NewPurchaseRequest
     from apps.budgets.models import PurchaseRequestAllocation as NewPurchaseRequestAllocation
-    from .document_converter import convert_pr_documents_to_pdf  # ← NEW IMPORT
+    from apps.budgets.services.conversion_job_service import enqueue_conversion
     
     purchase_request = get_object_or_404(
         NewPurchaseRequest.objects.select_related(
@@ -554,38 +469,16 @@ def handle_departments_request(request, request_id):
                 purchase_request.partially_approved_at = timezone.now()
                 purchase_request.save(update_fields=['status', 'partially_approved_at', 'updated_at'])
                 
-                # 2. 🔥 AUTO-CONVERT DOCUMENTS TO PDF
-                print(f"🔄 Starting document conversion for PR {purchase_request.pr_number}")
-                conversion_results = convert_pr_documents_to_pdf(purchase_request)
-
-                # 3. Check conversion results and show appropriate messages
-                if conversion_results['main_document']:
-                    if conversion_results['main_document_format'] == 'PDF':
-                        messages.success(request, 
-                            f'✅ PR {purchase_request.pr_number} partially approved!')
-                        messages.info(request,
-                            f'📄 Main document converted to PDF successfully.')
-                    else:
-                        messages.success(request, 
-                            f'✅ PR {purchase_request.pr_number} partially approved!')
-                        messages.info(request,
-                            f'📄 Main document already in PDF format.')
-                else:
-                    # Conversion completely failed
-                    messages.success(request, 
-                        f'✅ PR {purchase_request.pr_number} partially approved!')
-                    messages.warning(request,
-                        f'⚠️ Document conversion failed. Original files are available for download. Manual PDF conversion may be needed.')
-
-                # Show specific warnings (only if there are issues)
-                if conversion_results['warnings']:
-                    for warning in conversion_results['warnings']:
-                        messages.warning(request, warning)
-
-                # Show errors (if any critical errors)
-                if conversion_results['errors']:
-                    for error in conversion_results['errors']:
-                        messages.error(request, f"❌ {error}")
+                # 2. 🔥 CONVERT DOCUMENTS TO PDF IN THE BACKGROUND
+                # (the conversion worker retries failures; the preview page polls pdf_status)
+                conversion_job = enqueue_conversion('pr', purchase_request, request.user)
+                print(f"🔄 Queued document conversion for PR {purchase_request.pr_number} (job {conversion_job.pk})")
+
+                # 3. Show messages
+                messages.success(request,
+                    f'✅ PR {purchase_request.pr_number} partially approved!')
+                messages.info(request,
+                    f'📄 Documents are being converted to PDF in the background.')
                 
                 # 4. Log audit trail
                 log_audit_trail(
@@ -595,8 +488,7 @@ def handle_departments_request(request, request_id):
                     record_id=purchase_request.id,
                     detail=f'Purchase Request {purchase_request.pr_number} partially approved by Admin. '
                            f'Amount: ₱{purchase_request.total_amount:,.2f} from {line_item_name} - {quarter}. '
-                           f'Documents converted: Main={conversion_results["main_document"]}, '
-                           f'Supporting={len(conversion_results["supporting_docs"])}'
+                           f'PDF conversion queued (job {conversion_job.pk}).'
                 )
                 
                 # 5. Create notification for end user
@@ -1573,55 +1465,40 @@ def export_allocation_excel(request, allocation_id):
 
 @role_required('admin', login_url='/admin/')
 def bulk_export_allocations(request):
-    """Export all budget allocations to Excel"""
-    
+    """Export all budget allocations to Excel (streamed, constant memory)"""
+    from datetime import datetime
+
     # Get all allocations
-    allocations = NewBudgetAllocation.objects.select_related(
-        'approved_budget', 'end_user'
-    ).order_by('-allocated_at')
-    
+    allocations = NewBudgetAllocation.objects.order_by('-allocated_at')
+
     # Apply filters if any (same as the table view)
     summary_year = request.GET.get('summary_year')
     if summary_year and summary_year != 'all':
         allocations = allocations.filter(approved_budget__fiscal_year=summary_year)
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Budget Allocations"
-    
-    # Set column widths
-    ws.column_dimensions['A'].width = 8
-    ws.column_dimensions['B'].width = 30
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 25
-    ws.column_dimensions['E'].width = 25
-    ws.column_dimensions['F'].width = 30
-    ws.column_dimensions['G'].width = 18
-    ws.column_dimensions['H'].width = 18
-    ws.column_dimensions['I'].width = 15
-    ws.column_dimensions['J'].width = 15
-    ws.column_dimensions['K'].width = 15
-    ws.column_dimensions['L'].width = 15
-    ws.column_dimensions['M'].width = 22
-    
-    # Title
-    ws.merge_cells('A1:M1')
-    title_cell = ws['A1']
-    title_cell.value = "BUDGET ALLOCATIONS REPORT"
-    title_cell.font = Font(bold=True, size=16, color="FFFFFF")
-    title_cell.alignment = Alignment(horizontal='center', vertical='center')
-    title_cell.fill = PatternFill(start_color="305496", end_color="305496", fill_type="solid")
-    ws.row_dimensions[1].height = 30
-    
-    # Export info
-    from django.utils import timezone
-    ws.merge_cells('A2:M2')
-    info_cell = ws['A2']
-    info_cell.value = f"Generated on: {timezone.now().strftime('%B %d, %Y %I:%M %p')} | Total Records: {allocations.count()}"
-    info_cell.font = Font(italic=True, size=10, color="666666")
-    info_cell.alignment = Alignment(horizontal='center')
-    
+
+    # Count and totals in one query (needed for the header before any row is written)
+    totals = allocations.aggregate(
+        count=Count('id'),
+        allocated=Sum('allocated_amount'),
+        remaining=Sum('remaining_balance'),
+        pre_used=Sum('pre_amount_used'),
+        pr_used=Sum('pr_amount_used'),
+        ad_used=Sum('ad_amount_used'),
+    )
+
+    export = StreamingExcelExport(
+        "Budget Allocations",
+        [8, 30, 12, 25, 25, 30, 18, 18, 15, 15, 15, 15, 22]
+    )
+
+    # Title and export info
+    export.merged_row("BUDGET ALLOCATIONS REPORT", 13, 'report_title', height=30)
+    export.merged_row(
+        f"Generated on: {timezone.now().strftime('%B %d, %Y %I:%M %p')} | Total Records: {totals['count']}",
+        13, 'report_info'
+    )
+    export.blank_row()
+
     # Headers
     headers = [
         'ID',
@@ -1638,145 +1515,62 @@ def bulk_export_allocations(request):
         'Utilization %',
         'Allocated At'
     ]
-    
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        cell.border = thin_border
-    
-    ws.row_dimensions[4].height = 25
-    
+    export.append(headers, 'header', height=25)
+
     # Data rows
-    row_num = 5
-    for allocation in allocations:
-        total_used = (allocation.pre_amount_used + 
-                     allocation.pr_amount_used + 
-                     allocation.ad_amount_used)
-        
-        utilization = (total_used / allocation.allocated_amount * 100) if allocation.allocated_amount > 0 else 0
-        
-        row_data = [
-            allocation.id,
-            allocation.approved_budget.title,
-            allocation.approved_budget.fiscal_year,
-            allocation.end_user.mfo or 'N/A',
-            allocation.department,
-            f"{allocation.end_user.fullname} ({allocation.end_user.username})",
-            float(allocation.allocated_amount),
-            float(allocation.remaining_balance),
-            float(allocation.pre_amount_used),
-            float(allocation.pr_amount_used),
-            float(allocation.ad_amount_used),
+    rows = allocations.values(
+        'id', 'approved_budget__title', 'approved_budget__fiscal_year',
+        'end_user__mfo', 'end_user__fullname', 'end_user__username', 'department',
+        'allocated_amount', 'remaining_balance', 'pre_amount_used', 'pr_amount_used',
+        'ad_amount_used', 'allocated_at'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for allocation in rows:
+        total_used = (allocation['pre_amount_used'] +
+                      allocation['pr_amount_used'] +
+                      allocation['ad_amount_used'])
+
+        utilization = (total_used / allocation['allocated_amount'] * 100) if allocation['allocated_amount'] > 0 else 0
+
+        # Alternate row colors (data starts on row 5)
+        alt = '_alt' if (export.row_count + 1) % 2 == 0 else ''
+
+        export.append([
+            allocation['id'],
+            allocation['approved_budget__title'],
+            allocation['approved_budget__fiscal_year'],
+            allocation['end_user__mfo'] or 'N/A',
+            allocation['department'],
+            f"{allocation['end_user__fullname']} ({allocation['end_user__username']})",
+            float(allocation['allocated_amount']),
+            float(allocation['remaining_balance']),
+            float(allocation['pre_amount_used']),
+            float(allocation['pr_amount_used']),
+            float(allocation['ad_amount_used']),
             round(utilization, 2),
-            allocation.allocated_at.strftime('%b %d, %Y %I:%M %p')
-        ]
-        
-        for col_num, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_num, column=col_num)
-            cell.value = value
-            cell.border = thin_border
-            cell.alignment = Alignment(vertical='center')
-            
-            # Format currency columns
-            if col_num in [7, 8, 9, 10, 11]:
-                cell.number_format = '#,##0.00'
-                cell.alignment = Alignment(horizontal='right', vertical='center')
-            
-            # Format percentage column
-            if col_num == 12:
-                cell.number_format = '0.00"%"'
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                # Color code utilization
-                if utilization < 50:
-                    cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                    cell.font = Font(color="006100")
-                elif utilization < 80:
-                    cell.fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-                    cell.font = Font(color="9C6500")
-                else:
-                    cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-                    cell.font = Font(color="9C0006")
-            
-            # Alternate row colors
-            if row_num % 2 == 0:
-                if col_num != 12:  # Don't override utilization coloring
-                    cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-        
-        row_num += 1
-    
+            allocation['allocated_at'].strftime('%b %d, %Y %I:%M %p')
+        ], [f'cell{alt}'] * 6 + [f'currency{alt}'] * 5 + [utilization_style(utilization), f'cell{alt}'])
+
     # Summary row
-    row_num += 1
-    summary_fill = PatternFill(start_color="E7E6E6", end_color="E7E6E6", fill_type="solid")
-    summary_font = Font(bold=True, size=11)
-    
-    # Calculate totals
-    total_allocated = sum(float(a.allocated_amount) for a in allocations)
-    total_remaining = sum(float(a.remaining_balance) for a in allocations)
-    total_pre_used = sum(float(a.pre_amount_used) for a in allocations)
-    total_pr_used = sum(float(a.pr_amount_used) for a in allocations)
-    total_ad_used = sum(float(a.ad_amount_used) for a in allocations)
+    export.blank_row()
+
+    total_allocated = float(totals['allocated'] or 0)
+    total_pre_used = float(totals['pre_used'] or 0)
+    total_pr_used = float(totals['pr_used'] or 0)
+    total_ad_used = float(totals['ad_used'] or 0)
     total_used = total_pre_used + total_pr_used + total_ad_used
     avg_utilization = (total_used / total_allocated * 100) if total_allocated > 0 else 0
-    
-    ws.merge_cells(f'A{row_num}:F{row_num}')
-    summary_label = ws.cell(row=row_num, column=1)
-    summary_label.value = "TOTAL / AVERAGE"
-    summary_label.font = summary_font
-    summary_label.fill = summary_fill
-    summary_label.alignment = Alignment(horizontal='right', vertical='center')
-    summary_label.border = thin_border
-    
-    # Totals
-    totals = [
-        total_allocated,
-        total_remaining,
-        total_pre_used,
-        total_pr_used,
-        total_ad_used,
-        round(avg_utilization, 2)
-    ]
-    
-    for col_offset, total in enumerate(totals, 7):
-        cell = ws.cell(row=row_num, column=col_offset)
-        cell.value = total
-        cell.font = summary_font
-        cell.fill = summary_fill
-        cell.border = thin_border
-        cell.alignment = Alignment(horizontal='right' if col_offset != 12 else 'center', vertical='center')
-        
-        if col_offset in [7, 8, 9, 10, 11]:
-            cell.number_format = '#,##0.00'
-        elif col_offset == 12:
-            cell.number_format = '0.00"%"'
-    
-    # Empty cell for last column
-    cell = ws.cell(row=row_num, column=13)
-    cell.fill = summary_fill
-    cell.border = thin_border
-    
-    # Prepare response
-    from datetime import datetime
-    filename = f"Budget_Allocations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    export.append(
+        ["TOTAL / AVERAGE", None, None, None, None, None,
+         total_allocated, float(totals['remaining'] or 0), total_pre_used, total_pr_used, total_ad_used,
+         round(avg_utilization, 2), None],
+        ['summary_label'] * 6 + ['summary_currency'] * 5 + ['summary_percent', 'summary_blank']
     )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
+    export.sheet.merged_cells.add(f'A{export.row_count}:F{export.row_count}')
+
+    filename = f"Budget_Allocations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return export.response(filename)
 
 @role_required('admin', login_url='/admin/')
 def institutional_funds(request):
@@ -2192,11 +1986,12 @@ def export_budget_excel(request, budget_id):
 
 @role_required('admin', login_url='/admin/')
 def bulk_export_budgets(request):
-    """Export all approved budgets to Excel with filters applied"""
-    
+    """Export all approved budgets to Excel with filters applied (streamed, constant memory)"""
+    from datetime import datetime
+
     # Get all budgets with same filters as the table view
     budgets = NewApprovedBudget.objects.order_by('-created_at')
-    
+
     # Apply filters from GET parameters
     fiscal_year_filter = request.GET.get('fiscal_year')
     amount_min = request.GET.get('amount_min')
@@ -2204,218 +1999,125 @@ def bulk_export_budgets(request):
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     search_query = request.GET.get('search')
-    
+
     if fiscal_year_filter:
         budgets = budgets.filter(fiscal_year=fiscal_year_filter)
-    
+
     if amount_min:
         try:
             budgets = budgets.filter(amount__gte=Decimal(amount_min))
         except:
             pass
-    
+
     if amount_max:
         try:
             budgets = budgets.filter(amount__lte=Decimal(amount_max))
         except:
             pass
-    
+
     if date_from:
         budgets = budgets.filter(created_at__date__gte=date_from)
-    
+
     if date_to:
         budgets = budgets.filter(created_at__date__lte=date_to)
-    
+
     if search_query:
         budgets = budgets.filter(
-            Q(title__icontains=search_query) | 
+            Q(title__icontains=search_query) |
             Q(description__icontains=search_query) |
             Q(fiscal_year__icontains=search_query)
         )
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Approved Budgets"
-    
-    # Set column widths
-    ws.column_dimensions['A'].width = 8
-    ws.column_dimensions['B'].width = 35
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 18
-    ws.column_dimensions['E'].width = 18
-    ws.column_dimensions['F'].width = 18
-    ws.column_dimensions['G'].width = 15
-    ws.column_dimensions['H'].width = 25
-    ws.column_dimensions['I'].width = 22
-    
-    # Title
-    ws.merge_cells('A1:I1')
-    title_cell = ws['A1']
-    title_cell.value = "APPROVED BUDGETS REPORT"
-    title_cell.font = Font(bold=True, size=16, color="FFFFFF")
-    title_cell.alignment = Alignment(horizontal='center', vertical='center')
-    title_cell.fill = PatternFill(start_color="305496", end_color="305496", fill_type="solid")
-    ws.row_dimensions[1].height = 30
-    
-    # Export info
-    from django.utils import timezone
-    ws.merge_cells('A2:I2')
-    info_cell = ws['A2']
-    info_cell.value = f"Generated on: {timezone.now().strftime('%B %d, %Y %I:%M %p')} | Total Records: {budgets.count()}"
-    info_cell.font = Font(italic=True, size=10, color="666666")
-    info_cell.alignment = Alignment(horizontal='center')
-    
+
+    # Count and totals in one query
+    totals = budgets.aggregate(
+        count=Count('id'),
+        amount=Sum('amount'),
+        remaining=Sum('remaining_budget'),
+    )
+
+    # Supporting document count and formats per budget, in one grouped query
+    documents = {}
+    document_rows = SupportingDocument.objects.filter(
+        approved_budget__in=budgets.values('pk')
+    ).order_by().values('approved_budget_id', 'file_format').annotate(count=Count('id'))
+    for row in document_rows:
+        count, formats = documents.get(row['approved_budget_id'], (0, set()))
+        formats.add((row['file_format'] or '').upper())
+        documents[row['approved_budget_id']] = (count + row['count'], formats)
+
+    export = StreamingExcelExport(
+        "Approved Budgets",
+        [8, 35, 12, 18, 18, 18, 15, 25, 22]
+    )
+
+    # Title and export info
+    export.merged_row("APPROVED BUDGETS REPORT", 9, 'report_title', height=30)
+    export.merged_row(
+        f"Generated on: {timezone.now().strftime('%B %d, %Y %I:%M %p')} | Total Records: {totals['count']}",
+        9, 'report_info'
+    )
+    export.blank_row()
+
     # Headers
     headers = [
-        'ID', 
-        'Title', 
-        'Fiscal Year', 
-        'Amount (₱)', 
-        'Remaining Balance (₱)', 
+        'ID',
+        'Title',
+        'Fiscal Year',
+        'Amount (₱)',
+        'Remaining Balance (₱)',
         'Allocated (₱)',
         'Utilization %',
-        'Documents', 
+        'Documents',
         'Created At'
     ]
-    
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        cell.border = thin_border
-    
-    ws.row_dimensions[4].height = 25
-    
+    export.append(headers, 'header', height=25)
+
     # Data rows
-    row_num = 5
-    for budget in budgets:
-        allocated = budget.amount - budget.remaining_budget
-        utilization = (allocated / budget.amount * 100) if budget.amount > 0 else 0
-        
-        # Get document count and formats
-        docs = budget.supporting_documents.all()
-        doc_info = f"{docs.count()} file(s)"
-        if docs.exists():
-            formats = ", ".join(set([doc.file_format.upper() for doc in docs]))
-            doc_info = f"{docs.count()} file(s) ({formats})"
-        
-        row_data = [
-            budget.id,
-            budget.title,
-            budget.fiscal_year,
-            float(budget.amount),
-            float(budget.remaining_budget),
+    rows = budgets.values(
+        'id', 'title', 'fiscal_year', 'amount', 'remaining_budget', 'created_at'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for budget in rows:
+        allocated = budget['amount'] - budget['remaining_budget']
+        utilization = (allocated / budget['amount'] * 100) if budget['amount'] > 0 else 0
+
+        doc_count, formats = documents.get(budget['id'], (0, set()))
+        doc_info = f"{doc_count} file(s)"
+        if doc_count:
+            doc_info = f"{doc_count} file(s) ({', '.join(sorted(formats))})"
+
+        # Alternate row colors (data starts on row 5)
+        alt = '_alt' if (export.row_count + 1) % 2 == 0 else ''
+
+        export.append([
+            budget['id'],
+            budget['title'],
+            budget['fiscal_year'],
+            float(budget['amount']),
+            float(budget['remaining_budget']),
             float(allocated),
             round(utilization, 2),
             doc_info,
-            budget.created_at.strftime('%b %d, %Y %I:%M %p')
-        ]
-        
-        for col_num, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_num, column=col_num)
-            cell.value = value
-            cell.border = thin_border
-            cell.alignment = Alignment(vertical='center')
-            
-            # Format currency columns
-            if col_num in [4, 5, 6]:
-                cell.number_format = '#,##0.00'
-                cell.alignment = Alignment(horizontal='right', vertical='center')
-            
-            # Format percentage column
-            if col_num == 7:
-                cell.number_format = '0.00"%"'
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Alternate row colors
-            if row_num % 2 == 0:
-                cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-        
-        row_num += 1
-    
+            budget['created_at'].strftime('%b %d, %Y %I:%M %p')
+        ], [f'cell{alt}'] * 3 + [f'currency{alt}'] * 3 + [f'percent{alt}', f'cell{alt}', f'cell{alt}'])
+
     # Summary row
-    row_num += 1
-    summary_fill = PatternFill(start_color="E7E6E6", end_color="E7E6E6", fill_type="solid")
-    summary_font = Font(bold=True, size=11)
-    
-    # Calculate totals
-    total_amount = sum(float(b.amount) for b in budgets)
-    total_remaining = sum(float(b.remaining_budget) for b in budgets)
+    export.blank_row()
+
+    total_amount = float(totals['amount'] or 0)
+    total_remaining = float(totals['remaining'] or 0)
     total_allocated = total_amount - total_remaining
     avg_utilization = (total_allocated / total_amount * 100) if total_amount > 0 else 0
-    
-    ws.merge_cells(f'A{row_num}:C{row_num}')
-    summary_label = ws.cell(row=row_num, column=1)
-    summary_label.value = "TOTAL / AVERAGE"
-    summary_label.font = summary_font
-    summary_label.fill = summary_fill
-    summary_label.alignment = Alignment(horizontal='right', vertical='center')
-    summary_label.border = thin_border
-    
-    # Total amount
-    cell = ws.cell(row=row_num, column=4)
-    cell.value = total_amount
-    cell.font = summary_font
-    cell.fill = summary_fill
-    cell.number_format = '#,##0.00'
-    cell.alignment = Alignment(horizontal='right', vertical='center')
-    cell.border = thin_border
-    
-    # Total remaining
-    cell = ws.cell(row=row_num, column=5)
-    cell.value = total_remaining
-    cell.font = summary_font
-    cell.fill = summary_fill
-    cell.number_format = '#,##0.00'
-    cell.alignment = Alignment(horizontal='right', vertical='center')
-    cell.border = thin_border
-    
-    # Total allocated
-    cell = ws.cell(row=row_num, column=6)
-    cell.value = total_allocated
-    cell.font = summary_font
-    cell.fill = summary_fill
-    cell.number_format = '#,##0.00'
-    cell.alignment = Alignment(horizontal='right', vertical='center')
-    cell.border = thin_border
-    
-    # Average utilization
-    cell = ws.cell(row=row_num, column=7)
-    cell.value = round(avg_utilization, 2)
-    cell.font = summary_font
-    cell.fill = summary_fill
-    cell.number_format = '0.00"%"'
-    cell.alignment = Alignment(horizontal='center', vertical='center')
-    cell.border = thin_border
-    
-    # Empty cells for remaining columns
-    for col in [8, 9]:
-        cell = ws.cell(row=row_num, column=col)
-        cell.fill = summary_fill
-        cell.border = thin_border
-    
-    # Prepare response
-    from datetime import datetime
-    filename = f"Approved_Budgets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    export.append(
+        ["TOTAL / AVERAGE", None, None, total_amount, total_remaining, total_allocated,
+         round(avg_utilization, 2), None, None],
+        ['summary_label'] * 3 + ['summary_currency'] * 3 + ['summary_percent', 'summary_blank', 'summary_blank']
     )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    wb.save(response)
-    return response
+    export.sheet.merged_cells.add(f'A{export.row_count}:C{export.row_count}')
+
+    filename = f"Approved_Budgets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    return export.response(filename)
 
 @role_required('admin', login_url='/admin/')
 def admin_logout(request):
@@ -2429,40 +2131,102 @@ def admin_logout(request):
     logout(request)
     return redirect('admin_login')
 
+
+AUDIT_TRAIL_PAGE_SIZE = 15
+AUDIT_DEPARTMENTS_CACHE_TIMEOUT = 10 * 60
+
+
 @role_required('admin', login_url='/admin/')
 def audit_trail(request):
-    
-    # Get all audit records and users
-    audit_records = AuditTrail.objects.select_related('user').all()
-    departments = User.objects.all().values_list('department', flat=True).distinct()
-    
+    """
+    Audit log with keyset pagination (?after=/?before= cursors instead of
+    page numbers), so deep pages cost the same as the first one.
+    ?archive_month=YYYY-MM searches an archived month instead of the table.
+    """
+    from django.core.cache import cache
+    from urllib.parse import urlencode
+
+    audit_records = AuditTrail.objects.select_related('user')
+    departments = cache.get_or_set(
+        'audit_trail:departments',
+        lambda: list(User.objects.order_by().values_list('department', flat=True).distinct()),
+        AUDIT_DEPARTMENTS_CACHE_TIMEOUT
+    )
+
     # Filter by department
     department = request.GET.get('department')
+    department_users = None
     if department:
-        audit_records = audit_records.filter(user__department=department)
-    
+        department_users = User.objects.filter(department=department).values('id')
+        audit_records = audit_records.filter(user_id__in=department_users)
+
     # Filter by action if specified
     action_filter = request.GET.get('action')
     if action_filter:
         audit_records = audit_records.filter(action=action_filter)
-        
-    # Filter by date range if specified
+
+    # Filter by date range if specified (whole local days, as a plain
+    # timestamp range so the indexes apply)
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
+    start = end = None
     if start_date and end_date:
-        audit_records = audit_records.filter(
-            timestamp__date__range=[start_date, end_date]
-        )
-        
+        try:
+            start = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
+            end = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+        except ValueError:
+            start = end = None
+            messages.error(request, 'Invalid date range.')
+        else:
+            audit_records = audit_records.filter(timestamp__gte=start, timestamp__lt=end)
+
+    # Archived months are searched on demand from their archive file
+    archive_months = get_archived_months()
+    archive_month = request.GET.get('archive_month')
+    if archive_month and archive_month not in {f"{archive.month:%Y-%m}" for archive in archive_months}:
+        messages.error(request, 'That month has not been archived.')
+        archive_month = None
+
     # Pagination
-    paginator = Paginator(audit_records, 15)  # 15 records per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    if archive_month:
+        archived = read_archived_entries(
+            archive_month,
+            user_ids=[user['id'] for user in department_users] if department_users is not None else None,
+            action=action_filter,
+            start=start,
+            end=end
+        )
+        page_obj = keyset_paginate_list(
+            archived,
+            AUDIT_TRAIL_PAGE_SIZE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
+        total_count, total_is_exact = len(archived), True
+    else:
+        page_obj = keyset_paginate(
+            audit_records,
+            AUDIT_TRAIL_PAGE_SIZE,
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
+        total_count, total_is_exact = approximate_count(audit_records)
+
+    filter_query = urlencode({
+        key: request.GET[key]
+        for key in ('department', 'action', 'start_date', 'end_date')
+        if request.GET.get(key)
+    } | ({'archive_month': archive_month} if archive_month else {}))
+
     context = {
         'page_obj': page_obj,
+        'total_count': total_count,
+        'total_is_exact': total_is_exact,
+        'filter_query': filter_query,
         'action_choices': AuditTrail.ACTION_CHOICES,
         'departments': departments,
+        'archive_months': archive_months,
+        'archive_month': archive_month,
     }
     return render(request, 'admin_panel/audit_trail.html', context)
 
@@ -2955,39 +2719,17 @@ def handle_activity_design_request(request, pk):
                 activity_design.partially_approved_at = timezone.now()
                 activity_design.save(update_fields=['status', 'partially_approved_at', 'updated_at'])
 
-                # 2. 🔥 AUTO-CONVERT DOCUMENTS TO PDF
-                from .document_converter import convert_ad_documents_to_pdf
-                print(f"🔄 Starting document conversion for AD {activity_design.ad_number}")
-                conversion_results = convert_ad_documents_to_pdf(activity_design)
-
-                # 3. Check conversion results and show appropriate messages
-                if conversion_results['main_document']:
-                    if conversion_results['main_document_format'] == 'PDF':
-                        messages.success(request,
-                            f'✅ AD {activity_design.ad_number} partially approved!')
-                        messages.info(request,
-                            f'📄 Main document converted to PDF successfully.')
-                    else:
-                        messages.success(request,
-                            f'✅ AD {activity_design.ad_number} partially approved!')
-                        messages.info(request,
-                            f'📄 Main document already in PDF format.')
-                else:
-                    # Conversion completely failed
-                    messages.success(request,
-                        f'✅ AD {activity_design.ad_number} partially approved!')
-                    messages.warning(request,
-                        f'⚠️ Document conversion failed. Original files are available for download. Manual PDF conversion may be needed.')
-
-                # Show specific warnings (only if there are issues)
-                if conversion_results['warnings']:
-                    for warning in conversion_results['warnings']:
-                        messages.warning(request, warning)
-
-                # Show errors (if any critical errors)
-                if conversion_results['errors']:
-                    for error in conversion_results['errors']:
-                        messages.error(request, f"❌ {error}")
+                # 2. 🔥 CONVERT DOCUMENTS TO PDF IN THE BACKGROUND
+                # (the conversion worker retries failures; the preview page polls pdf_status)
+                from apps.budgets.services.conversion_job_service import enqueue_conversion
+                conversion_job = enqueue_conversion('ad', activity_design, request.user)
+                print(f"🔄 Queued document conversion for AD {activity_design.ad_number} (job {conversion_job.pk})")
+
+                # 3. Show messages
+                messages.success(request,
+                    f'✅ AD {activity_design.ad_number} partially approved!')
+                messages.info(request,
+                    f'📄 Documents are being converted to PDF in the background.')
 
                 # 4. Log audit trail
                 log_audit_trail(
@@ -2997,8 +2739,7 @@ def handle_activity_design_request(request, pk):
                     record_id=activity_design.id,
                     detail=f'Activity Design {activity_design.ad_number} partially approved by Admin. '
                            f'Amount: ₱{activity_design.total_amount:,.2f} from {allocations.count()} line items: {line_items_info}. '
-                           f'Documents converted: Main={conversion_results["main_document"]}, '
-                           f'Supporting={len(conversion_results["supporting_docs"])}'
+                           f'PDF conversion queued (job {conversion_job.pk}).'
                 )
 
                 # 5. Create notification for end user
@@ -3113,27 +2854,25 @@ def handle_activity_design_request(request, pk):
     return redirect('departments_ad_request')
 
 
+def _allocation_count(allocation_model, parent_field):
+    """Correlated subquery counting the funding line items of a PR/AD"""
+    counts = allocation_model.objects.filter(
+        **{parent_field: OuterRef('pk')}
+    ).order_by().values(parent_field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 @role_required('admin', login_url='/admin/')
 def export_ad_requests_excel(request):
-    """Export Activity Design requests to Excel with optional year filter"""
-    from apps.budgets.models import ActivityDesign
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from django.http import HttpResponse
+    """Export Activity Design requests to Excel with optional year filter (streamed)"""
+    from apps.budgets.models import ActivityDesign, ActivityDesignAllocation
     from datetime import datetime
 
     # Get year filter from query params
     year_filter = request.GET.get('year')
 
     # Get all Activity Designs
-    ads = ActivityDesign.objects.select_related(
-        'submitted_by',
-        'budget_allocation',
-        'budget_allocation__approved_budget'
-    ).prefetch_related(
-        'pre_allocations',
-        'pre_allocations__pre_line_item'
-    ).order_by('-submitted_at')
+    ads = ActivityDesign.objects.order_by('-submitted_at')
 
     # Apply year filter if provided
     if year_filter and year_filter != 'all':
@@ -3142,126 +2881,60 @@ def export_ad_requests_excel(request):
     else:
         title_suffix = " - All Years"
 
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Activity Designs"
-
-    # Styling
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    title_fill = PatternFill(start_color="305496", end_color="305496", fill_type="solid")
-    title_font = Font(bold=True, size=14, color="FFFFFF")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    export = StreamingExcelExport("Activity Designs", [15, 25, 25, 40, 18, 20, 20, 18])
 
     # Title
-    ws.merge_cells('A1:H1')
-    title_cell = ws['A1']
-    title_cell.value = f"ACTIVITY DESIGN REQUESTS REPORT{title_suffix}"
-    title_cell.font = title_font
-    title_cell.alignment = Alignment(horizontal='center', vertical='center')
-    title_cell.fill = title_fill
-    ws.row_dimensions[1].height = 30
+    export.merged_row(f"ACTIVITY DESIGN REQUESTS REPORT{title_suffix}", 8, 'report_title_small', height=30)
+    export.blank_row()
 
     # Headers
     headers = ['AD Number', 'Department', 'Submitted By', 'Purpose', 'Total Amount', 'Funding Sources', 'Date Submitted', 'Status']
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = thin_border
-
-    # Column widths
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 25
-    ws.column_dimensions['C'].width = 25
-    ws.column_dimensions['D'].width = 40
-    ws.column_dimensions['E'].width = 18
-    ws.column_dimensions['F'].width = 20
-    ws.column_dimensions['G'].width = 20
-    ws.column_dimensions['H'].width = 18
-
-    # Data rows
-    row_num = 4
-    for ad in ads:
-        ws.cell(row=row_num, column=1, value=ad.ad_number).border = thin_border
-        ws.cell(row=row_num, column=2, value=ad.department).border = thin_border
-        ws.cell(row=row_num, column=3, value=ad.submitted_by.get_full_name()).border = thin_border
-        ws.cell(row=row_num, column=4, value=ad.purpose).border = thin_border
-
-        # Format amount
-        amount_cell = ws.cell(row=row_num, column=5, value=float(ad.total_amount))
-        amount_cell.number_format = '₱#,##0.00'
-        amount_cell.border = thin_border
-
-        # Funding sources count
-        funding_count = ad.pre_allocations.count()
-        ws.cell(row=row_num, column=6, value=f"{funding_count} Line Item(s)").border = thin_border
-
-        # Date submitted
-        ws.cell(row=row_num, column=7, value=ad.submitted_at.strftime("%b %d, %Y %I:%M %p")).border = thin_border
-
-        # Status with color coding
-        status_cell = ws.cell(row=row_num, column=8, value=ad.status)
-        status_cell.border = thin_border
-        if ad.status == 'Approved':
-            status_cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-        elif ad.status == 'Pending':
-            status_cell.fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-        elif ad.status == 'Rejected':
-            status_cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        elif ad.status == 'Partially Approved':
-            status_cell.fill = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
-
-        row_num += 1
+    export.append(headers, 'header')
+
+    # Data rows (funding sources counted by a correlated subquery, not per row)
+    rows = ads.annotate(
+        funding_count=_allocation_count(ActivityDesignAllocation, 'activity_design')
+    ).values(
+        'ad_number', 'department', 'submitted_by__fullname', 'purpose',
+        'total_amount', 'funding_count', 'submitted_at', 'status'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    total_requests = 0
+    for ad in rows:
+        export.append([
+            ad['ad_number'],
+            ad['department'],
+            ad['submitted_by__fullname'],
+            ad['purpose'],
+            float(ad['total_amount']),
+            f"{ad['funding_count']} Line Item(s)",
+            ad['submitted_at'].strftime("%b %d, %Y %I:%M %p") if ad['submitted_at'] else '',
+            ad['status']
+        ], ['bordered'] * 4 + ['peso', 'bordered', 'bordered', status_style(ad['status'])])
+        total_requests += 1
 
     # Summary row
-    summary_row = row_num + 1
-    ws.cell(row=summary_row, column=1, value="TOTAL REQUESTS:").font = Font(bold=True)
-    ws.cell(row=summary_row, column=2, value=ads.count()).font = Font(bold=True)
+    export.blank_row()
+    export.append(["TOTAL REQUESTS:", total_requests], 'bold')
 
     # Footer
-    footer_row = summary_row + 2
-    ws.cell(row=footer_row, column=1, value=f"Generated on: {datetime.now().strftime('%B %d, %Y %I:%M %p')}")
+    export.blank_row()
+    export.append([f"Generated on: {datetime.now().strftime('%B %d, %Y %I:%M %p')}"])
 
-    # Prepare response
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     filename = f"Activity_Design_Requests{title_suffix.replace(' - ', '_')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    wb.save(response)
-    return response
-
+    return export.response(filename)
 
 @role_required('admin', login_url='/admin/')
 def export_pr_requests_excel(request):
-    """Export Purchase Requests to Excel with optional year filter"""
-    from apps.budgets.models import PurchaseRequest as NewPurchaseRequest
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from django.http import HttpResponse
+    """Export Purchase Requests to Excel with optional year filter (streamed)"""
+    from apps.budgets.models import PurchaseRequest as NewPurchaseRequest, PurchaseRequestAllocation
     from datetime import datetime
 
     # Get year filter from query params
     year_filter = request.GET.get('year')
 
     # Get all Purchase Requests
-    prs = NewPurchaseRequest.objects.select_related(
-        'submitted_by',
-        'budget_allocation__approved_budget',
-        'source_pre',
-        'source_line_item'
-    ).prefetch_related(
-        'supporting_documents',
-        'pre_allocations'
-    ).order_by('-created_at')
+    prs = NewPurchaseRequest.objects.order_by('-created_at')
 
     # Apply year filter if provided
     if year_filter and year_filter != 'all':
@@ -3270,95 +2943,47 @@ def export_pr_requests_excel(request):
     else:
         title_suffix = " - All Years"
 
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Purchase Requests"
-
-    # Styling
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    title_fill = PatternFill(start_color="305496", end_color="305496", fill_type="solid")
-    title_font = Font(bold=True, size=14, color="FFFFFF")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    export = StreamingExcelExport("Purchase Requests", [18, 25, 25, 45, 20, 18, 20])
 
     # Title
-    ws.merge_cells('A1:G1')
-    title_cell = ws['A1']
-    title_cell.value = f"PURCHASE REQUESTS REPORT{title_suffix}"
-    title_cell.font = title_font
-    title_cell.alignment = Alignment(horizontal='center', vertical='center')
-    title_cell.fill = title_fill
-    ws.row_dimensions[1].height = 30
+    export.merged_row(f"PURCHASE REQUESTS REPORT{title_suffix}", 7, 'report_title_small', height=30)
+    export.blank_row()
 
     # Headers
     headers = ['PR Number', 'Department', 'Submitted By', 'Purpose', 'Date Submitted', 'Status', 'Funding Sources']
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = thin_border
-
-    # Column widths
-    ws.column_dimensions['A'].width = 18
-    ws.column_dimensions['B'].width = 25
-    ws.column_dimensions['C'].width = 25
-    ws.column_dimensions['D'].width = 45
-    ws.column_dimensions['E'].width = 20
-    ws.column_dimensions['F'].width = 18
-    ws.column_dimensions['G'].width = 20
-
-    # Data rows
-    row_num = 4
-    for pr in prs:
-        ws.cell(row=row_num, column=1, value=pr.pr_number or 'N/A').border = thin_border
-        ws.cell(row=row_num, column=2, value=pr.department).border = thin_border
-        ws.cell(row=row_num, column=3, value=pr.submitted_by.fullname).border = thin_border
-        ws.cell(row=row_num, column=4, value=pr.purpose).border = thin_border
-        ws.cell(row=row_num, column=5, value=pr.created_at.strftime("%b %d, %Y %I:%M %p")).border = thin_border
-
-        # Status with color coding
-        status_cell = ws.cell(row=row_num, column=6, value=pr.status)
-        status_cell.border = thin_border
-        if pr.status == 'Approved':
-            status_cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-        elif pr.status == 'Pending':
-            status_cell.fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-        elif pr.status == 'Rejected':
-            status_cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        elif pr.status == 'Partially Approved':
-            status_cell.fill = PatternFill(start_color="BDD7EE", end_color="BDD7EE", fill_type="solid")
-
-        # Funding sources count
-        funding_count = pr.pre_allocations.count()
-        ws.cell(row=row_num, column=7, value=f"{funding_count} Line Item(s)").border = thin_border
-
-        row_num += 1
+    export.append(headers, 'header')
+
+    # Data rows (funding sources counted by a correlated subquery, not per row)
+    rows = prs.annotate(
+        funding_count=_allocation_count(PurchaseRequestAllocation, 'purchase_request')
+    ).values(
+        'pr_number', 'department', 'submitted_by__fullname', 'purpose',
+        'created_at', 'status', 'funding_count'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    total_requests = 0
+    for pr in rows:
+        export.append([
+            pr['pr_number'] or 'N/A',
+            pr['department'],
+            pr['submitted_by__fullname'],
+            pr['purpose'],
+            pr['created_at'].strftime("%b %d, %Y %I:%M %p"),
+            pr['status'],
+            f"{pr['funding_count']} Line Item(s)"
+        ], ['bordered'] * 5 + [status_style(pr['status']), 'bordered'])
+        total_requests += 1
 
     # Summary row
-    summary_row = row_num + 1
-    ws.cell(row=summary_row, column=1, value="TOTAL REQUESTS:").font = Font(bold=True)
-    ws.cell(row=summary_row, column=2, value=prs.count()).font = Font(bold=True)
+    export.blank_row()
+    export.append(["TOTAL REQUESTS:", total_requests], 'bold')
 
     # Footer
-    footer_row = summary_row + 2
-    ws.cell(row=footer_row, column=1, value=f"Generated on: {datetime.now().strftime('%B %d, %Y %I:%M %p')}")
+    export.blank_row()
+    export.append([f"Generated on: {datetime.now().strftime('%B %d, %Y %I:%M %p')}"])
 
-    # Prepare response
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     filename = f"Purchase_Requests{title_suffix.replace(' - ', '_')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    wb.save(response)
-    return response
-
+    return export.response(filename)
 
 @role_required('admin', login_url='/admin/')
 def pre_budget_realignment_admin(request):
@@ -3563,7 +3188,7 @@ def admin_pre_detail(request, pre_id):
 
     # Calculate budget tracking breakdown for each line item
     line_items_with_breakdown = []
-    for item in pre.line_items.all():
+    for item in attach_quarter_consumption(pre.line_items.all(), source=pre):
         item_data = {
             'item': item,
             'quarters': []
@@ -4437,306 +4062,246 @@ def bulk_user_action_ajax(request):
 
     return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=400)
 
-@role_required('admin', login_url='/admin/')
-def export_users_excel(request):
-    """Export users to Excel file"""
-    try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-        from openpyxl.utils import get_column_letter
+def _admin_dashboard_export_params(request):
+    return {'year': request.GET.get('year', str(datetime.now().year))}
 
-        # Get all non-staff users
-        users = User.objects.filter(is_staff=False).order_by('department', 'fullname')
 
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Users"
-
-        # Define styles
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+def _admin_dashboard_allocations(year_filter):
+    allocations = NewBudgetAllocation.objects.filter(is_active=True)
+    if year_filter != 'all':
+        allocations = allocations.filter(allocated_at__year=year_filter)
+    return allocations
 
-        # Headers
-        headers = ['Full Name', 'Username', 'Email', 'Department', 'MFO', 'Position', 'Role', 'Status', 'Last Login', 'Created At']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = border
 
-        # Data rows
-        for row_num, user in enumerate(users, 2):
-            role = 'Approving Officer' if user.is_approving_officer else 'End User'
-            status = 'Active' if user.is_active else 'Inactive'
-            last_login = user.last_login.strftime('%Y-%m-%d %H:%M') if user.last_login else 'Never'
-            created_at = user.created_at.strftime('%Y-%m-%d %H:%M') if user.created_at else 'N/A'
-
-            data = [
-                user.fullname,
-                user.username,
-                user.email,
-                user.department,
-                user.mfo or 'N/A',
-                user.position or 'N/A',
-                role,
-                status,
-                last_login,
-                created_at
-            ]
+def render_admin_dashboard_excel(user, params, output):
+    """
+    Render Admin Dashboard data to Excel
+    Includes summary metrics and department budget breakdown
 
-            for col_num, value in enumerate(data, 1):
-                cell = ws.cell(row=row_num, column=col_num)
-                cell.value = value
-                cell.border = border
-                cell.alignment = Alignment(horizontal='left', vertical='center')
-
-        # Adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Prepare response
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename=users_export_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+    Args:
+        user: Requesting admin (the report itself is the same for every admin)
+        params: 'year' request parameter
+        output: Binary file object the workbook is written to
 
-        wb.save(response)
-        return response
+    Returns:
+        Download filename
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from django.db.models.functions import ExtractYear
+    from datetime import timedelta
 
-    except Exception as e:
-        import traceback
-        print(traceback.format_exc())
-        return HttpResponse(f'Error exporting users: {str(e)}', status=500)
+    year_filter = params['year']
 
+    # Create workbook
+    wb = Workbook()
+    wb.remove(wb.active)
 
-@role_required('admin', login_url='/admin/')
-def export_admin_dashboard_excel(request):
-    """
-    Export Admin Dashboard data to Excel
-    Includes summary metrics and department budget breakdown
-    """
-    try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-        from openpyxl.utils import get_column_letter
-        from django.db.models.functions import ExtractYear
-        from datetime import datetime, timedelta
+    # Define styles
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF", size=12)
+    title_font = Font(bold=True, size=14)
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
 
-        # Get year filter
-        current_year = str(datetime.now().year)
-        year_filter = request.GET.get('year', current_year)
-
-        # Create workbook
-        wb = Workbook()
-        wb.remove(wb.active)
-
-        # Define styles
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        title_font = Font(bold=True, size=14)
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+    # Year suffix for titles
+    if year_filter and year_filter != 'all':
+        year_suffix = f" - Year {year_filter}"
+    else:
+        year_suffix = " - All Years" if year_filter == 'all' else ""
 
-        # Year suffix for titles
-        if year_filter and year_filter != 'all':
-            year_suffix = f" - Year {year_filter}"
-        else:
-            year_suffix = " - All Years" if year_filter == 'all' else ""
+    # Get filtered budget allocations
+    base_allocations = NewBudgetAllocation.objects.select_related(
+        'approved_budget', 'end_user'
+    ).filter(is_active=True)
 
-        # Get filtered budget allocations
-        base_allocations = NewBudgetAllocation.objects.select_related(
-            'approved_budget', 'end_user'
-        ).filter(is_active=True)
+    if year_filter == 'all':
+        budget_allocated = base_allocations
+    else:
+        budget_allocated = base_allocations.filter(
+            allocated_at__year=year_filter
+        )
 
-        if year_filter == 'all':
-            budget_allocated = base_allocations
-        else:
-            budget_allocated = base_allocations.filter(
-                allocated_at__year=year_filter
-            )
+    # ========== SHEET 1: Summary ==========
+    ws_summary = wb.create_sheet('Summary')
 
-        # ========== SHEET 1: Summary ==========
-        ws_summary = wb.create_sheet('Summary')
+    # Title
+    ws_summary['A1'] = f'ADMIN DASHBOARD SUMMARY{year_suffix}'
+    ws_summary['A1'].font = title_font
+    ws_summary.merge_cells('A1:B1')
 
-        # Title
-        ws_summary['A1'] = f'ADMIN DASHBOARD SUMMARY{year_suffix}'
-        ws_summary['A1'].font = title_font
-        ws_summary.merge_cells('A1:B1')
+    ws_summary['A2'] = f'Generated: {timezone.now().strftime("%B %d, %Y %I:%M %p")}'
+    ws_summary.merge_cells('A2:B2')
 
-        ws_summary['A2'] = f'Generated: {timezone.now().strftime("%B %d, %Y %I:%M %p")}'
-        ws_summary.merge_cells('A2:B2')
+    # Calculate summary metrics
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    end_users_total = User.objects.filter(
+        is_staff=False,
+        is_approving_officer=False,
+        last_login__gte=thirty_days_ago
+    ).count()
+
+    total_budget = budget_allocated.aggregate(
+        Sum('allocated_amount')
+    )['allocated_amount__sum'] or 0
+
+    # Pending Requests
+    if year_filter == 'all':
+        pending_pre = NewDepartmentPRE.objects.filter(status='Pending').count()
+        pending_pr = NewPurchaseRequest.objects.filter(status='Pending').count()
+        pending_ad = NewActivityDesign.objects.filter(status='Pending').count()
+    else:
+        pending_pre = NewDepartmentPRE.objects.filter(
+            status='Pending',
+            budget_allocation__allocated_at__year=year_filter
+        ).count()
+        pending_pr = NewPurchaseRequest.objects.filter(
+            status='Pending',
+            budget_allocation__allocated_at__year=year_filter
+        ).count()
+        pending_ad = NewActivityDesign.objects.filter(
+            status='Pending',
+            budget_allocation__allocated_at__year=year_filter
+        ).count()
+    total_pending = pending_pre + pending_pr + pending_ad
 
-        # Calculate summary metrics
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        end_users_total = User.objects.filter(
-            is_staff=False,
-            is_approving_officer=False,
-            last_login__gte=thirty_days_ago
+    # Approved Requests
+    if year_filter == 'all':
+        approved_pre = NewDepartmentPRE.objects.filter(status__in=['Approved', 'Partially Approved']).count()
+        approved_pr = NewPurchaseRequest.objects.filter(status__in=['Approved', 'Partially Approved']).count()
+        approved_ad = NewActivityDesign.objects.filter(status__in=['Approved', 'Partially Approved']).count()
+    else:
+        approved_pre = NewDepartmentPRE.objects.filter(
+            status__in=['Approved', 'Partially Approved'],
+            budget_allocation__allocated_at__year=year_filter
         ).count()
+        approved_pr = NewPurchaseRequest.objects.filter(
+            status__in=['Approved', 'Partially Approved'],
+            budget_allocation__allocated_at__year=year_filter
+        ).count()
+        approved_ad = NewActivityDesign.objects.filter(
+            status__in=['Approved', 'Partially Approved'],
+            budget_allocation__allocated_at__year=year_filter
+        ).count()
+    total_approved = approved_pre + approved_pr + approved_ad
+
+    active_departments = budget_allocated.values('department').distinct().count()
+
+    # Summary data
+    row = 4
+    summary_data = [
+        ('Active Users (Last 30 Days)', end_users_total),
+        ('Total Budget Allocated', f'₱{total_budget:,.2f}'),
+        ('Active Departments', active_departments),
+        ('', ''),
+        ('Pending Requests', ''),
+        ('  - PRE Requests', pending_pre),
+        ('  - PR Requests', pending_pr),
+        ('  - AD Requests', pending_ad),
+        ('  Total Pending', total_pending),
+        ('', ''),
+        ('Approved Requests', ''),
+        ('  - PRE Requests', approved_pre),
+        ('  - PR Requests', approved_pr),
+        ('  - AD Requests', approved_ad),
+        ('  Total Approved', total_approved),
+    ]
 
-        total_budget = budget_allocated.aggregate(
-            Sum('allocated_amount')
-        )['allocated_amount__sum'] or 0
+    for metric, value in summary_data:
+        ws_summary[f'A{row}'] = metric
+        ws_summary[f'B{row}'] = value
+        if metric and not metric.startswith('  '):
+            ws_summary[f'A{row}'].font = Font(bold=True)
+        row += 1
 
-        # Pending Requests
-        if year_filter == 'all':
-            pending_pre = NewDepartmentPRE.objects.filter(status='Pending').count()
-            pending_pr = NewPurchaseRequest.objects.filter(status='Pending').count()
-            pending_ad = NewActivityDesign.objects.filter(status='Pending').count()
-        else:
-            pending_pre = NewDepartmentPRE.objects.filter(
-                status='Pending',
-                budget_allocation__allocated_at__year=year_filter
-            ).count()
-            pending_pr = NewPurchaseRequest.objects.filter(
-                status='Pending',
-                budget_allocation__allocated_at__year=year_filter
-            ).count()
-            pending_ad = NewActivityDesign.objects.filter(
-                status='Pending',
-                budget_allocation__allocated_at__year=year_filter
-            ).count()
-        total_pending = pending_pre + pending_pr + pending_ad
-
-        # Approved Requests
-        if year_filter == 'all':
-            approved_pre = NewDepartmentPRE.objects.filter(status__in=['Approved', 'Partially Approved']).count()
-            approved_pr = NewPurchaseRequest.objects.filter(status__in=['Approved', 'Partially Approved']).count()
-            approved_ad = NewActivityDesign.objects.filter(status__in=['Approved', 'Partially Approved']).count()
-        else:
-            approved_pre = NewDepartmentPRE.objects.filter(
-                status__in=['Approved', 'Partially Approved'],
-                budget_allocation__allocated_at__year=year_filter
-            ).count()
-            approved_pr = NewPurchaseRequest.objects.filter(
-                status__in=['Approved', 'Partially Approved'],
-                budget_allocation__allocated_at__year=year_filter
-            ).count()
-            approved_ad = NewActivityDesign.objects.filter(
-                status__in=['Approved', 'Partially Approved'],
-                budget_allocation__allocated_at__year=year_filter
-            ).count()
-        total_approved = approved_pre + approved_pr + approved_ad
-
-        active_departments = budget_allocated.values('department').distinct().count()
-
-        # Summary data
-        row = 4
-        summary_data = [
-            ('Active Users (Last 30 Days)', end_users_total),
-            ('Total Budget Allocated', f'₱{total_budget:,.2f}'),
-            ('Active Departments', active_departments),
-            ('', ''),
-            ('Pending Requests', ''),
-            ('  - PRE Requests', pending_pre),
-            ('  - PR Requests', pending_pr),
-            ('  - AD Requests', pending_ad),
-            ('  Total Pending', total_pending),
-            ('', ''),
-            ('Approved Requests', ''),
-            ('  - PRE Requests', approved_pre),
-            ('  - PR Requests', approved_pr),
-            ('  - AD Requests', approved_ad),
-            ('  Total Approved', total_approved),
-        ]
+    # Adjust column widths
+    ws_summary.column_dimensions['A'].width = 35
+    ws_summary.column_dimensions['B'].width = 20
+
+    # ========== SHEET 2: Department Budget Breakdown ==========
+    ws_dept = wb.create_sheet('Department Budgets')
 
-        for metric, value in summary_data:
-            ws_summary[f'A{row}'] = metric
-            ws_summary[f'B{row}'] = value
-            if metric and not metric.startswith('  '):
-                ws_summary[f'A{row}'].font = Font(bold=True)
-            row += 1
+    # Title
+    ws_dept['A1'] = f'DEPARTMENT BUDGET BREAKDOWN{year_suffix}'
+    ws_dept['A1'].font = title_font
+    ws_dept.merge_cells('A1:E1')
 
-        # Adjust column widths
-        ws_summary.column_dimensions['A'].width = 35
-        ws_summary.column_dimensions['B'].width = 20
+    ws_dept['A2'] = f'Generated: {timezone.now().strftime("%B %d, %Y %I:%M %p")}'
+    ws_dept.merge_cells('A2:E2')
 
-        # ========== SHEET 2: Department Budget Breakdown ==========
-        ws_dept = wb.create_sheet('Department Budgets')
+    # Headers
+    row = 4
+    headers = ['Department', 'Allocated Budget', 'Spent Budget', 'Remaining Budget', 'Status']
+    for col_num, header in enumerate(headers, 1):
+        cell = ws_dept.cell(row=row, column=col_num)
+        cell.value = header
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        cell.border = border
 
-        # Title
-        ws_dept['A1'] = f'DEPARTMENT BUDGET BREAKDOWN{year_suffix}'
-        ws_dept['A1'].font = title_font
-        ws_dept.merge_cells('A1:E1')
+    # Data
+    row += 1
+    for allocation in budget_allocated:
+        total_allocated = allocation.allocated_amount
+        spent = allocation.get_total_used()
+        remaining = total_allocated - spent
+        status = 'Active' if remaining > 0 else 'Depleted'
 
-        ws_dept['A2'] = f'Generated: {timezone.now().strftime("%B %d, %Y %I:%M %p")}'
-        ws_dept.merge_cells('A2:E2')
+        data = [
+            allocation.department,
+            float(total_allocated),
+            float(spent),
+            float(remaining),
+            status
+        ]
 
-        # Headers
-        row = 4
-        headers = ['Department', 'Allocated Budget', 'Spent Budget', 'Remaining Budget', 'Status']
-        for col_num, header in enumerate(headers, 1):
+        for col_num, value in enumerate(data, 1):
             cell = ws_dept.cell(row=row, column=col_num)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+            if col_num in [2, 3, 4]:  # Budget columns
+                cell.value = value
+                cell.number_format = '₱#,##0.00'
+            else:
+                cell.value = value
             cell.border = border
-
-        # Data
+            cell.alignment = Alignment(horizontal='left' if col_num == 1 else 'right', vertical='center')
         row += 1
-        for allocation in budget_allocated:
-            total_allocated = allocation.allocated_amount
-            spent = allocation.get_total_used()
-            remaining = total_allocated - spent
-            status = 'Active' if remaining > 0 else 'Depleted'
-
-            data = [
-                allocation.department,
-                float(total_allocated),
-                float(spent),
-                float(remaining),
-                status
-            ]
 
-            for col_num, value in enumerate(data, 1):
-                cell = ws_dept.cell(row=row, column=col_num)
-                if col_num in [2, 3, 4]:  # Budget columns
-                    cell.value = value
-                    cell.number_format = '₱#,##0.00'
-                else:
-                    cell.value = value
-                cell.border = border
-                cell.alignment = Alignment(horizontal='left' if col_num == 1 else 'right', vertical='center')
-            row += 1
-
-        # Adjust column widths
-        ws_dept.column_dimensions['A'].width = 30
-        ws_dept.column_dimensions['B'].width = 20
-        ws_dept.column_dimensions['C'].width = 20
-        ws_dept.column_dimensions['D'].width = 20
-        ws_dept.column_dimensions['E'].width = 15
-
-        # Prepare response
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        filename = f'admin_dashboard{year_suffix.replace(" - ", "_").replace(" ", "_")}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        response['Content-Disposition'] = f'attachment; filename={filename}'
+    # Adjust column widths
+    ws_dept.column_dimensions['A'].width = 30
+    ws_dept.column_dimensions['B'].width = 20
+    ws_dept.column_dimensions['C'].width = 20
+    ws_dept.column_dimensions['D'].width = 20
+    ws_dept.column_dimensions['E'].width = 15
+
+    filename = f'admin_dashboard{year_suffix.replace(" - ", "_").replace(" ", "_")}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+
+    wb.save(output)
+    return filename
+
+
+@role_required('admin', login_url='/admin/')
+def export_admin_dashboard_excel(request):
+    """
+    Export Admin Dashboard data to Excel
+    Large reports are queued for the export worker (see render_admin_dashboard_excel)
+    """
+    try:
+        params = _admin_dashboard_export_params(request)
 
-        wb.save(response)
+        row_estimate = _admin_dashboard_allocations(params['year']).count()
+        if row_estimate > EXPORT_ASYNC_ROW_THRESHOLD:
+            job = enqueue_export('admin_dashboard_excel', request.user, params, row_estimate)
+            return export_job_response(request, job, url_prefix='admin_')
+
+        output = BytesIO()
+        filename = render_admin_dashboard_excel(request.user, params, output)
+        response = HttpResponse(output.getvalue(), content_type=XLSX_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
 
     except Exception as e:
@@ -4745,6 +4310,37 @@ def export_admin_dashboard_excel(request):
         return HttpResponse(f'Error exporting dashboard data: {str(e)}', status=500)
 
 
+@role_required('admin', login_url='/admin/')
+def enqueue_admin_dashboard_export(request):
+    """Queue the dashboard export regardless of its size"""
+    params = _admin_dashboard_export_params(request)
+    row_estimate = _admin_dashboard_allocations(params['year']).count()
+    job = enqueue_export('admin_dashboard_excel', request.user, params, row_estimate)
+    return export_job_response(request, job, url_prefix='admin_')
+
+
+@role_required('admin', login_url='/admin/')
+def admin_export_job_status(request, job_id):
+    """Poll an export job"""
+    return export_job_status_response(request, job_id, url_prefix='admin_')
+
+
+@role_required('admin', login_url='/admin/')
+def admin_export_job_download(request, job_id):
+    """Download a finished export"""
+    return export_job_download_response(request, job_id)
+
+
+@role_required('admin', login_url='/admin/')
+def pdf_conversion_status(request, target, object_id):
+    """Poll the background PDF conversion of a PR ('pr') or AD ('ad')"""
+    from apps.budgets.services.conversion_job_service import CONVERSION_TARGETS, get_conversion_status
+
+    if target not in CONVERSION_TARGETS:
+        raise Http404("Unknown conversion target")
+    return JsonResponse(get_conversion_status(target, object_id))
+
+
 # ===========================
 # User Management AJAX Endpoints
 # ===========================
@@ -5025,98 +4621,50 @@ def bulk_user_action_ajax(request):
 
 @role_required('admin', login_url='/admin/')
 def export_users_excel(request):
-    """Export users to Excel file"""
+    """Export users to Excel file (streamed, constant memory)"""
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-        from openpyxl.utils import get_column_letter
-
         # Get all non-staff users
         users = User.objects.filter(is_staff=False).order_by('department', 'fullname')
 
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Users"
-
-        # Define styles
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+        # Column widths are fixed up front: a streamed sheet cannot be measured afterwards
+        export = StreamingExcelExport("Users", [30, 20, 35, 30, 20, 25, 20, 12, 18, 18])
 
         # Headers
         headers = ['Full Name', 'Username', 'Email', 'Department', 'MFO', 'Position', 'Role', 'Status', 'Last Login', 'Created At']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = border
+        export.append(headers, 'header_large')
 
         # Data rows
-        for row_num, user in enumerate(users, 2):
-            role = 'Approving Officer' if user.is_approving_officer else 'End User'
-            status = 'Active' if user.is_active else 'Inactive'
-            last_login = user.last_login.strftime('%Y-%m-%d %H:%M') if user.last_login else 'Never'
-            created_at = user.created_at.strftime('%Y-%m-%d %H:%M') if user.created_at else 'N/A'
-
-            data = [
-                user.fullname,
-                user.username,
-                user.email,
-                user.department,
-                user.mfo or 'N/A',
-                user.position or 'N/A',
+        rows = users.values(
+            'fullname', 'username', 'email', 'department', 'mfo', 'position',
+            'is_approving_officer', 'is_active', 'last_login', 'created_at'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        for user in rows:
+            role = 'Approving Officer' if user['is_approving_officer'] else 'End User'
+            status = 'Active' if user['is_active'] else 'Inactive'
+            last_login = user['last_login'].strftime('%Y-%m-%d %H:%M') if user['last_login'] else 'Never'
+            created_at = user['created_at'].strftime('%Y-%m-%d %H:%M') if user['created_at'] else 'N/A'
+
+            export.append([
+                user['fullname'],
+                user['username'],
+                user['email'],
+                user['department'],
+                user['mfo'] or 'N/A',
+                user['position'] or 'N/A',
                 role,
                 status,
                 last_login,
                 created_at
-            ]
+            ], 'cell_left')
 
-            for col_num, value in enumerate(data, 1):
-                cell = ws.cell(row=row_num, column=col_num)
-                cell.value = value
-                cell.border = border
-                cell.alignment = Alignment(horizontal='left', vertical='center')
-
-        # Adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Prepare response
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename=users_export_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-
-        wb.save(response)
-        return response
+        return export.response(f'users_export_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
 
     except Exception as e:
         import traceback
         print(traceback.format_exc())
         return HttpResponse(f'Error exporting users: {str(e)}', status=500)
 
-
-# ============================================================================
-# ARCHIVE MANAGEMENT VIEWS
-# ============================================================================
-
 @role_required('admin', login_url='/admin/')
 def archive_center(request):
     """
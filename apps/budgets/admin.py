@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ApprovedBudget, SupportingDocument, DepartmentPRE, BudgetAllocation, PRECategory, PRELineItem, PREReceipt, PRESubCategory, SystemNotification, RequestApproval, PurchaseRequest, PurchaseRequestAllocation, PurchaseRequestItem, PRDraft, PRDraftSupportingDocument, PurchaseRequestSupportingDocument, ActivityDesign, ActivityDesignAllocation, ActivityDesignSupportingDocument
+from .models import ApprovedBudget, SupportingDocument, DepartmentPRE, BudgetAllocation, PRECategory, PRELineItem, PREReceipt, PRESubCategory, SystemNotification, RequestApproval, PurchaseRequest, PurchaseRequestAllocation, PurchaseRequestItem, PRDraft, PRDraftSupportingDocument, PurchaseRequestSupportingDocument, ActivityDesign, ActivityDesignAllocation, ActivityDesignSupportingDocument, PRELineItemQuarterBalance, DocumentSequence, ArchiveJob, ExportJob, ParsedPRECache, ConversionJob
 
 # Register your models here.
 admin.site.register(ApprovedBudget)
@@ -20,4 +20,10 @@ admin.site.register(PRDraftSupportingDocument)
 admin.site.register(PurchaseRequestSupportingDocument)
 admin.site.register(ActivityDesign)
 admin.site.register(ActivityDesignAllocation)
-admin.site.register(ActivityDesignSupportingDocument)
\ No newline at end of file
+admin.site.register(ActivityDesignSupportingDocument)
+admin.site.register(PRELineItemQuarterBalance)
+admin.site.register(DocumentSequence)
+admin.site.register(ArchiveJob)
+admin.site.register(ExportJob)
+admin.site.register(ParsedPRECache)
+admin.site.register(ConversionJob)
@@ -1,28 +1,26 @@
 # bb_budget_monitoring_system/apps/budgets/context_processors.py
-from apps.budgets.models import ApprovedBudget
+from django.utils.functional import SimpleLazyObject
+
+from apps.budgets.services.fiscal_year_service import get_available_fiscal_years
 
 
 def archive_context(request):
     """
     Add archive-related context variables to all templates.
-    """
-    # Get available fiscal years (active only for end users, all for admins)
-    if request.user.is_authenticated:
-        is_admin = getattr(request.user, 'is_admin', False)
 
-        if is_admin:
-            # Admins can see all years (active and archived)
-            all_fiscal_years = ApprovedBudget.all_objects.values_list('fiscal_year', flat=True).distinct().order_by('-fiscal_year')
-        else:
-            # End users see only active years
-            all_fiscal_years = ApprovedBudget.objects.values_list('fiscal_year', flat=True).distinct().order_by('-fiscal_year')
+    Both values are lazy: nothing is looked up unless the template reads them,
+    and the fiscal years come from the process-wide registry.
+    """
+    def _is_admin():
+        return request.user.is_authenticated and getattr(request.user, 'is_admin', False)
 
-        return {
-            'available_fiscal_years': list(all_fiscal_years),
-            'user_can_view_archived': is_admin,
-        }
+    def _fiscal_years():
+        if not request.user.is_authenticated:
+            return []
+        # Admins see all years (active and archived), end users only active years
+        return get_available_fiscal_years(include_archived=_is_admin())
 
     return {
-        'available_fiscal_years': [],
-        'user_can_view_archived': False,
+        'available_fiscal_years': SimpleLazyObject(_fiscal_years),
+        'user_can_view_archived': SimpleLazyObject(_is_admin),
     }
@@ -0,0 +1,97 @@
+"""
+Management command to run, resume or inspect fiscal year archive jobs.
+
+Usage:
+    python manage.py archive_job --year 2023 --reason "Year closed"
+    python manage.py archive_job --year 2023 --unarchive --reason "Audit"
+    python manage.py archive_job --year 2023 --chunk-size 5000
+    python manage.py archive_job --resume <job id>      # Continue a failed job
+    python manage.py archive_job --resume-all           # Continue every unfinished job
+    python manage.py archive_job --list
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.budgets.models import ArchiveJob
+from apps.admin_panel.audit_writer import audit_buffer
+from apps.budgets.services.archive_job_service import (
+    DEFAULT_CHUNK_SIZE,
+    create_archive_job,
+    get_resumable_jobs,
+    run_archive_job,
+)
+
+
+class Command(BaseCommand):
+    help = 'Archive or unarchive a fiscal year in chunks, resume failed runs, or list archive jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=str, help='Fiscal year to archive/unarchive')
+        parser.add_argument('--unarchive', action='store_true', help='Restore the fiscal year instead')
+        parser.add_argument('--reason', type=str, default='', help='Archive/unarchive reason')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Rows updated per transaction (default: {DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument('--resume', type=int, help='Resume the job with this id')
+        parser.add_argument('--resume-all', action='store_true', help='Resume every unfinished job')
+        parser.add_argument('--list', action='store_true', help='List recent jobs')
+
+    def execute(self, *args, **options):
+        # Audit entries of the whole run are written in one batch
+        with audit_buffer():
+            return super().execute(*args, **options)
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for job in ArchiveJob.objects.all()[:20]:
+                self._report(job)
+            return
+
+        if options['resume']:
+            try:
+                jobs = [ArchiveJob.objects.get(pk=options['resume'])]
+            except ArchiveJob.DoesNotExist:
+                raise CommandError(f"Archive job {options['resume']} not found")
+        elif options['resume_all']:
+            jobs = get_resumable_jobs()
+            if not jobs:
+                self.stdout.write(self.style.SUCCESS('[OK] No unfinished archive jobs.'))
+                return
+        elif options['year']:
+            if options['unarchive'] and not options['reason'].strip():
+                raise CommandError('--reason is required to unarchive')
+            try:
+                jobs = [create_archive_job(
+                    options['year'],
+                    action='UNARCHIVE' if options['unarchive'] else 'ARCHIVE',
+                    reason=options['reason'],
+                    chunk_size=options['chunk_size'],
+                )]
+            except ValueError as e:
+                raise CommandError(str(e))
+        else:
+            raise CommandError('Specify --year, --resume, --resume-all or --list')
+
+        for job in jobs:
+            try:
+                run_archive_job(job)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'[!] Job #{job.pk} failed: {e}'))
+                self.stdout.write(self.style.WARNING(f'    Resume with: python manage.py archive_job --resume {job.pk}'))
+                continue
+            self._report(job)
+
+    def _report(self, job):
+        style = self.style.SUCCESS if job.status == 'COMPLETED' else self.style.WARNING
+        marker = '[OK]' if job.status == 'COMPLETED' else '[!]'
+        self.stdout.write(style(
+            f'{marker} Job #{job.pk}: {job.get_action_display()} FY {job.fiscal_year} - {job.status}, '
+            f'{job.rows_processed} row(s) in {job.elapsed_seconds:.2f}s '
+            f'({job.rows_per_second:,.0f} rows/s)'
+        ))
+        for key, count in job.progress.items():
+            self.stdout.write(f'    {key}: {count}')
+        if job.error:
+            self.stdout.write(self.style.ERROR(f'    Error: {job.error}'))
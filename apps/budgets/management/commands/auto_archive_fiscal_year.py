@@ -2,6 +2,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from apps.budgets.services import archive_fiscal_year
+from apps.admin_panel.audit_writer import audit_buffer
 from apps.budgets.models import ApprovedBudget
 from apps.users.models import User
 from datetime import datetime
@@ -34,6 +35,11 @@ class Command(BaseCommand):
             help='Skip sending email notifications',
         )
 
+    def execute(self, *args, **options):
+        # Audit entries of the whole run are written in one batch
+        with audit_buffer():
+            return super().execute(*args, **options)
+
     def handle(self, *args, **options):
         today = timezone.now()
         is_dry_run = options['dry_run']
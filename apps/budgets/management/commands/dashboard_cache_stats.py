@@ -0,0 +1,32 @@
+"""
+Management command to report the hit/miss counters of the dashboard snapshot cache.
+
+Usage:
+    python manage.py dashboard_cache_stats
+    python manage.py dashboard_cache_stats --reset   # Report, then zero the counters
+"""
+
+from django.core.management.base import BaseCommand
+from apps.budgets.services.snapshot_service import get_snapshot_stats, reset_snapshot_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the end user dashboard snapshot cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after reporting them',
+        )
+
+    def handle(self, *args, **options):
+        stats = get_snapshot_stats()
+
+        self.stdout.write(f"   Hits:     {stats['hits']}")
+        self.stdout.write(f"   Misses:   {stats['misses']}")
+        self.stdout.write(self.style.SUCCESS(f"[OK] Hit rate: {stats['hit_rate']:.1f}%"))
+
+        if options['reset']:
+            reset_snapshot_stats()
+            self.stdout.write(self.style.WARNING('[!] Counters reset.'))
@@ -0,0 +1,161 @@
+"""
+Management command to import a directory of departmental PRE workbooks.
+
+Workbooks are parsed in parallel worker processes. Each one is matched to
+its fiscal year budget allocation by the department in its END USER header
+(or by its file name), checked like an upload through upload_pre, and saved
+as a pending DepartmentPRE with its line items, one transaction per file.
+
+Usage:
+    python manage.py import_pres media/imports/2026 --fiscal-year 2026
+    python manage.py import_pres media/imports/2026 --fiscal-year 2026 --dry-run   # Validate only
+    python manage.py import_pres media/imports --fiscal-year 2026 --recursive --workers 4
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.admin_panel.audit_writer import audit_buffer
+from apps.budgets.services.pre_import_service import (
+    PREImportError,
+    build_allocation_index,
+    import_parsed_pre,
+    match_allocation,
+    validate_pre_import,
+)
+from apps.end_user_app.utils.pre_parser import parse_pre_file
+
+
+class Command(BaseCommand):
+    help = 'Parse a directory of PRE workbooks in parallel and create the PREs for their budget allocations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', type=str, help='Directory containing the PRE .xlsx files')
+        parser.add_argument('--fiscal-year', type=str, required=True, help='Fiscal year of the allocations')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Parser processes (default: number of CPUs)',
+        )
+        parser.add_argument('--recursive', action='store_true', help='Include subdirectories')
+        parser.add_argument('--dry-run', action='store_true', help='Parse and validate without saving anything')
+
+    def execute(self, *args, **options):
+        # Audit entries of the whole run are written in one batch
+        with audit_buffer():
+            return super().execute(*args, **options)
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'Not a directory: {directory}')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        files = self._find_workbooks(directory, options['recursive'])
+        if not files:
+            self.stdout.write(self.style.WARNING(f'[!] No .xlsx files in {directory}'))
+            return
+
+        index = build_allocation_index(options['fiscal_year'])
+        if not index:
+            raise CommandError(f"No active budget allocations for fiscal year {options['fiscal_year']}")
+
+        dry_run = options['dry_run']
+        workers = min(options['workers'], len(files))
+        self.stdout.write(
+            f"{'Validating' if dry_run else 'Importing'} {len(files)} PRE file(s) "
+            f"with {workers} worker(s)..."
+        )
+
+        started = time.perf_counter()
+        claimed = {}
+        succeeded, failed = [], []
+        total_amount = Decimal('0')
+        total_items = 0
+        parse_seconds = 0.0
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(parse_pre_file, path): path for path in files}
+            for future in as_completed(futures):
+                path = futures[future]
+                name = os.path.relpath(path, directory)
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed.append(name)
+                    self.stdout.write(self.style.ERROR(f'[X] {name}: parser crashed - {e}'))
+                    continue
+
+                parse_seconds += result['seconds']
+                if not result['success']:
+                    failed.append(name)
+                    self.stdout.write(self.style.ERROR(
+                        f"[X] {name}: parse failed - {'; '.join(result['errors'])} ({result['seconds']:.2f}s)"
+                    ))
+                    continue
+
+                save_started = time.perf_counter()
+                try:
+                    allocation = match_allocation(index, result['header']['department'], path)
+                    if allocation.pk in claimed:
+                        raise PREImportError(f"Same allocation ({allocation.department}) as {claimed[allocation.pk]}")
+
+                    if dry_run:
+                        item_count = validate_pre_import(result, allocation)
+                    else:
+                        _, item_count = import_parsed_pre(result, allocation)
+                except Exception as e:
+                    failed.append(name)
+                    self.stdout.write(self.style.ERROR(f'[X] {name}: {e}'))
+                    continue
+
+                claimed[allocation.pk] = name
+                succeeded.append(name)
+                total_amount += result['grand_total']
+                total_items += item_count
+                self.stdout.write(self.style.SUCCESS(
+                    f"[OK] {name} -> {allocation.department}: {item_count} items, "
+                    f"₱{result['grand_total']:,.2f} "
+                    f"(parse {result['seconds']:.2f}s, save {time.perf_counter() - save_started:.2f}s)"
+                ))
+
+                for warning in result['validation_warnings']:
+                    self.stdout.write(self.style.WARNING(
+                        f"    [!] {warning['item']}: Excel total {warning['excel_total']:,.2f}, "
+                        f"quarters add up to {warning['calculated_total']:,.2f}"
+                    ))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write('')
+        self.stdout.write('=' * 60)
+        self.stdout.write(f"{'Valid' if dry_run else 'Imported'}: {len(succeeded)}")
+        self.stdout.write(f'Failed: {len(failed)}')
+        self.stdout.write(f'Line items: {total_items}')
+        self.stdout.write(f'Total amount: ₱{total_amount:,.2f}')
+        self.stdout.write(f'Time: {elapsed:.2f}s (parsing {parse_seconds:.2f}s across workers)')
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f'[!] {len(failed)} file(s) failed: {", ".join(sorted(failed))}'))
+        elif dry_run:
+            self.stdout.write(self.style.SUCCESS('[OK] Dry run: every file can be imported.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'[OK] Imported {len(succeeded)} PRE(s).'))
+
+    def _find_workbooks(self, directory, recursive):
+        paths = []
+        for root, dirs, filenames in os.walk(directory):
+            paths.extend(
+                os.path.join(root, filename)
+                for filename in filenames
+                # Skip Excel lock files (~$name.xlsx)
+                if filename.lower().endswith('.xlsx') and not filename.startswith('~$')
+            )
+            if not recursive:
+                break
+        return sorted(paths)
@@ -0,0 +1,68 @@
+"""
+Management command to rebuild or verify the materialized PRE line item quarter balances.
+
+The balances are normally kept current by signals; run this after deploying the
+balance table, after bulk data fixes, or whenever --check reports drift.
+
+Usage:
+    python manage.py rebuild_quarter_balances
+    python manage.py rebuild_quarter_balances --check       # Compare against raw allocation sums
+    python manage.py rebuild_quarter_balances --pre <uuid>  # Limit to one PRE
+"""
+
+from django.core.management.base import BaseCommand
+from apps.budgets.models import PRELineItem
+from apps.budgets.services.balance_service import (
+    find_balance_discrepancies,
+    rebuild_quarter_balances,
+)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild PRE line item quarter balances from PR/AD allocations, or check them for drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report balances that differ from the raw allocation sums',
+        )
+        parser.add_argument(
+            '--pre',
+            type=str,
+            help='Limit to the line items of a single PRE (UUID)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of line items processed per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        line_items = PRELineItem.objects.all()
+        if options['pre']:
+            line_items = line_items.filter(pre_id=options['pre'])
+
+        chunk_size = options['chunk_size']
+
+        if options['check']:
+            discrepancies = find_balance_discrepancies(line_items, chunk_size=chunk_size)
+
+            if not discrepancies:
+                self.stdout.write(self.style.SUCCESS('[OK] All quarter balances match the allocation tables.'))
+                return
+
+            for row in discrepancies:
+                self.stdout.write(self.style.WARNING(
+                    f"   Line item #{row['line_item_id']} {row['quarter']} {row['field']}: "
+                    f"stored {row['stored']} -> actual {row['actual']}"
+                ))
+            self.stdout.write(self.style.WARNING(
+                f'\n[!] Found {len(discrepancies)} discrepancies. '
+                'Run without --check to rebuild.'
+            ))
+            return
+
+        written = rebuild_quarter_balances(line_items, chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f'[OK] Rebuilt {written} quarter balance row(s).'))
@@ -0,0 +1,114 @@
+"""
+Management command to run queued PR/AD document conversions outside the web workers.
+
+Conversions are first tried by the thread pool of the web process that
+queued them, and retries are scheduled there with an in-process timer. Both
+are lost when the web process restarts, so production runs this command with
+--loop as the `worker` process (see Procfile): it picks up every due job,
+including retries, and on each pass requeues jobs stuck in RUNNING.
+
+Usage:
+    python manage.py run_conversion_jobs                    # Run every due job once
+    python manage.py run_conversion_jobs --loop --workers 2 # Keep polling for new jobs
+    python manage.py run_conversion_jobs --stale-minutes 30 # Requeue jobs stuck in RUNNING
+    python manage.py run_conversion_jobs --list
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from apps.budgets.models import ConversionJob
+from apps.budgets.services.conversion_job_service import (
+    CONVERSION_STALE_MINUTES,
+    CONVERSION_WORKERS,
+    get_due_jobs,
+    requeue_stale_jobs,
+    run_conversion_job,
+)
+
+
+class Command(BaseCommand):
+    help = 'Run queued PR/AD PDF conversions, requeue stuck ones or list conversion jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new jobs')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between polls with --loop (default: 5)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=CONVERSION_WORKERS,
+            help=f'Jobs converted in parallel (default: CONVERSION_WORKERS = {CONVERSION_WORKERS})',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            help=(
+                'Requeue RUNNING jobs started more than this many minutes ago '
+                f'(every pass with --loop, default: CONVERSION_STALE_MINUTES = {CONVERSION_STALE_MINUTES})'
+            ),
+        )
+        parser.add_argument('--list', action='store_true', help='List recent jobs')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for job in ConversionJob.objects.all()[:20]:
+                self._report(job)
+            return
+
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        stale_minutes = options['stale_minutes']
+        if stale_minutes is None and options['loop']:
+            stale_minutes = CONVERSION_STALE_MINUTES
+
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='conversion-worker') as pool:
+            while True:
+                if stale_minutes is not None:
+                    count = requeue_stale_jobs(stale_minutes)
+                    if count or not options['loop']:
+                        self.stdout.write(self.style.SUCCESS(f'[OK] Requeued {count} stale conversion job(s).'))
+
+                jobs = get_due_jobs()
+                for job_id, outcome in zip(
+                    [job.pk for job in jobs],
+                    pool.map(self._run, [job.pk for job in jobs])
+                ):
+                    if isinstance(outcome, Exception):
+                        self.stdout.write(self.style.ERROR(f'[!] Conversion {job_id} failed: {outcome}'))
+                    elif outcome is not None:
+                        self._report(outcome)
+
+                if not options['loop']:
+                    if not jobs:
+                        self.stdout.write(self.style.SUCCESS('[OK] No due conversion jobs.'))
+                    return
+                close_old_connections()
+                time.sleep(options['interval'])
+
+    def _run(self, job_id):
+        close_old_connections()
+        try:
+            return run_conversion_job(job_id)
+        except Exception as e:
+            return e
+        finally:
+            close_old_connections()
+
+    def _report(self, job):
+        style = self.style.SUCCESS if job.status == 'COMPLETED' else self.style.WARNING
+        marker = '[OK]' if job.status == 'COMPLETED' else '[!]'
+        duration = ''
+        if job.started_at and job.finished_at:
+            duration = f' in {(job.finished_at - job.started_at).total_seconds():.2f}s'
+        retry = ''
+        if job.status == 'PENDING' and job.attempts:
+            retry = f', retry at {job.next_attempt_at:%H:%M:%S}'
+        self.stdout.write(style(
+            f'{marker} Conversion {job.pk}: {job.get_target_display()} {job.object_id} - {job.status} '
+            f'(attempt {job.attempts}/{job.max_attempts}{retry}){duration}'
+        ))
+        if job.error:
+            self.stdout.write(self.style.ERROR(f'    Error: {job.error}'))
@@ -0,0 +1,97 @@
+"""
+Management command to process queued report exports outside the web workers.
+
+Exports are normally rendered by the thread pool of the web process that
+queued them, which loses them when it restarts. Production runs this command
+with --loop as the `exports` process (see Procfile): it picks up every
+pending job and on each pass requeues jobs stuck in RUNNING.
+
+Usage:
+    python manage.py run_export_jobs                    # Run every pending job once
+    python manage.py run_export_jobs --loop             # Keep polling for new jobs
+    python manage.py run_export_jobs --stale-minutes 30 # Requeue jobs stuck in RUNNING
+    python manage.py run_export_jobs --purge-days 7     # Delete old artifacts
+    python manage.py run_export_jobs --list
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.budgets.models import ExportJob
+from apps.budgets.services.export_job_service import (
+    EXPORT_STALE_MINUTES,
+    get_pending_jobs,
+    purge_exports,
+    requeue_stale_jobs,
+    run_export_job,
+)
+
+
+class Command(BaseCommand):
+    help = 'Run queued report exports, requeue stuck ones, purge old artifacts or list export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new jobs')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between polls with --loop (default: 5)')
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            help=(
+                'Requeue RUNNING jobs started more than this many minutes ago '
+                f'(every pass with --loop, default: EXPORT_STALE_MINUTES = {EXPORT_STALE_MINUTES})'
+            ),
+        )
+        parser.add_argument('--purge-days', type=int, help='Delete jobs finished more than this many days ago')
+        parser.add_argument('--list', action='store_true', help='List recent jobs')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for job in ExportJob.objects.all()[:20]:
+                self._report(job)
+            return
+
+        if options['purge_days'] is not None:
+            count = purge_exports(options['purge_days'])
+            self.stdout.write(self.style.SUCCESS(f'[OK] Deleted {count} export job(s).'))
+            return
+
+        stale_minutes = options['stale_minutes']
+        if stale_minutes is None and options['loop']:
+            stale_minutes = EXPORT_STALE_MINUTES
+
+        while True:
+            if stale_minutes is not None:
+                count = requeue_stale_jobs(stale_minutes)
+                if count or not options['loop']:
+                    self.stdout.write(self.style.SUCCESS(f'[OK] Requeued {count} stale export job(s).'))
+
+            jobs = get_pending_jobs()
+            for job in jobs:
+                try:
+                    job = run_export_job(job.pk)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'[!] Export {job.pk} failed: {e}'))
+                    continue
+                if job is not None:
+                    self._report(job)
+
+            if not options['loop']:
+                if not jobs:
+                    self.stdout.write(self.style.SUCCESS('[OK] No pending export jobs.'))
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def _report(self, job):
+        style = self.style.SUCCESS if job.status == 'COMPLETED' else self.style.WARNING
+        marker = '[OK]' if job.status == 'COMPLETED' else '[!]'
+        duration = ''
+        if job.started_at and job.finished_at:
+            duration = f' in {(job.finished_at - job.started_at).total_seconds():.2f}s'
+        self.stdout.write(style(
+            f'{marker} Export {job.pk}: {job.kind} - {job.status}{duration}'
+            f'{f" -> {job.filename}" if job.filename else ""}'
+        ))
+        if job.error:
+            self.stdout.write(self.style.ERROR(f'    Error: {job.error}'))
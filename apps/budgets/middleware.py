@@ -8,6 +8,7 @@ from apps.budgets.models import (
     PurchaseRequest,
     ActivityDesign,
 )
+from apps.budgets.services.archive_index_service import is_archived
 
 
 class ArchivedRecordMiddleware:
@@ -58,15 +59,13 @@ class ArchivedRecordMiddleware:
             else:
                 return None
 
-            try:
-                record = model_class.all_objects.get(id=record_id)
-                if record.is_archived:
-                    messages.error(
-                        request,
-                        'This record is archived and cannot be modified. Please contact your administrator if you need to restore it.'
-                    )
-                    return redirect(request.META.get('HTTP_REFERER', '/'))
-            except model_class.DoesNotExist:
-                pass
+            # Answered from the in-memory archived id index: writes to active
+            # records cost no query here, the view loads the row itself
+            if is_archived(model_class, record_id):
+                messages.error(
+                    request,
+                    'This record is archived and cannot be modified. Please contact your administrator if you need to restore it.'
+                )
+                return redirect(request.META.get('HTTP_REFERER', '/'))
 
         return None
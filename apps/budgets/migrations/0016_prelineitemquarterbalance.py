@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:04
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0015_activitydesign_archive_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PRELineItemQuarterBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quarter', models.CharField(choices=[('Q1', 'Quarter 1'), ('Q2', 'Quarter 2'), ('Q3', 'Quarter 3'), ('Q4', 'Quarter 4')], max_length=2)),
+                ('budgeted', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('pr_consumed', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('ad_consumed', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('pr_count', models.PositiveIntegerField(default=0)),
+                ('ad_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('line_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quarter_balances', to='budgets.prelineitem')),
+            ],
+            options={
+                'verbose_name': 'PRE Line Item Quarter Balance',
+                'verbose_name_plural': 'PRE Line Item Quarter Balances',
+                'db_table': 'pre_line_item_quarter_balances',
+                'ordering': ['line_item', 'quarter'],
+                'unique_together': {('line_item', 'quarter')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0016_prelineitemquarterbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='departmentpre',
+            name='pre_number',
+            field=models.CharField(blank=True, help_text='PRE-YYYY-NNNN, assigned by generate_pre_number()', max_length=50, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('PR', 'Purchase Request'), ('AD', 'Activity Design'), ('PRE', 'Program of Receipts and Expenditures')], max_length=10)),
+                ('year', models.PositiveIntegerField()),
+                ('last_value', models.PositiveIntegerField(default=0, help_text='Last number handed out')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Document Sequence',
+                'verbose_name_plural': 'Document Sequences',
+                'db_table': 'document_sequences',
+                'ordering': ['document_type', '-year'],
+                'unique_together': {('document_type', 'year')},
+            },
+        ),
+    ]
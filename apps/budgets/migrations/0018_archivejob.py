@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0017_documentsequence_departmentpre_pre_number'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.CharField(max_length=10)),
+                ('action', models.CharField(choices=[('ARCHIVE', 'Archive'), ('UNARCHIVE', 'Unarchive')], max_length=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('archive_type', models.CharField(blank=True, default='FISCAL_YEAR', max_length=20)),
+                ('reason', models.TextField(blank=True)),
+                ('chunk_size', models.PositiveIntegerField(default=1000)),
+                ('progress', models.JSONField(blank=True, default=dict, help_text='Rows updated per stage')),
+                ('current_stage', models.CharField(blank=True, max_length=30)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('elapsed_seconds', models.FloatField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('approved_budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_jobs', to='budgets.approvedbudget')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archive_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archive Job',
+                'verbose_name_plural': 'Archive Jobs',
+                'db_table': 'archive_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0019_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedPRECache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('parser_version', models.CharField(max_length=32)),
+                ('result', models.JSONField(help_text='JSON-safe parse_pre_excel() result')),
+                ('size', models.PositiveIntegerField(default=0, help_text='Size of the uploaded file in bytes')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Parsed PRE Cache Entry',
+                'verbose_name_plural': 'Parsed PRE Cache',
+                'db_table': 'parsed_pre_cache',
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'parser_version'), name='unique_parsed_pre')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:54
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0020_parsedprecache'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitydesign',
+            name='pdf_status',
+            field=models.CharField(blank=True, choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='pdf_status',
+            field=models.CharField(blank=True, choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='', help_text='Background conversion of the documents to PDF (see ConversionJob)', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='ConversionJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('pr', 'Purchase Request'), ('ad', 'Activity Design')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('results', models.JSONField(blank=True, default=dict, help_text='Results of the last attempt')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversion_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conversion Job',
+                'verbose_name_plural': 'Conversion Jobs',
+                'db_table': 'conversion_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='conversion__status_b8e044_idx'), models.Index(fields=['target', 'object_id'], name='conversion__target_d533fd_idx')],
+            },
+        ),
+    ]
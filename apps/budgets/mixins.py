@@ -0,0 +1,68 @@
+# bb_budget_monitoring_system/apps/budgets/mixins.py
+
+
+class TrackedFieldsMixin:
+    """
+    Remember the persisted value of selected fields so changes can be detected
+    without re-reading the row.
+
+    Values are snapshotted when the instance is loaded from the database and
+    again after every save, so pre_save/post_save receivers see the value the
+    row had before the current save.
+
+    Usage:
+        class PurchaseRequest(TrackedFieldsMixin, models.Model):
+            tracked_fields = ('status',)
+
+        pr.has_changed('status')  # True if status differs from the stored row
+        pr.previous('status')     # Stored value (None for unsaved instances)
+    """
+
+    tracked_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A key from the field default (uuid4) can't belong to a stored row;
+        # one passed in by the caller might (hand-built instances)
+        pk = self._meta.pk
+        self._pk_given = bool(args) or any(name in kwargs for name in ('pk', pk.name, pk.attname))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self, fields=None):
+        """Record the current value of the tracked fields (deferred fields are skipped)"""
+        if not hasattr(self, '_tracked_values'):
+            self._tracked_values = {}
+        for field in fields or self.tracked_fields:
+            if field in self.tracked_fields and field in self.__dict__:
+                self._tracked_values[field] = self.__dict__[field]
+
+    def is_new(self):
+        """True when no stored row can exist: unsaved and the primary key was not given"""
+        return self._state.adding and not self._pk_given
+
+    def is_tracked(self, field):
+        """True when the stored value of field is known without a query"""
+        return field in getattr(self, '_tracked_values', {})
+
+    def previous(self, field):
+        """Stored value of a tracked field, or None if unknown or unsaved"""
+        return getattr(self, '_tracked_values', {}).get(field)
+
+    def has_changed(self, field):
+        """True if field differs from its stored value (always True for unsaved instances)"""
+        if not self.is_tracked(field):
+            return True
+        return self.previous(field) != getattr(self, field)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot_tracked_fields(fields)
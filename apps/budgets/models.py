@@ -8,6 +8,7 @@ import uuid
 import os
 from django.conf import settings
 from .managers import ArchiveManager
+from .mixins import TrackedFieldsMixin
 
 def approved_budget_upload_path(instance, filename):
     """
@@ -238,11 +239,20 @@ class BudgetAllocation(models.Model):
         self.save()
 
 
-class DepartmentPRE(models.Model):
+class DepartmentPRE(TrackedFieldsMixin, models.Model):
     """Program of Receipts and Expenditures with complete workflow support"""
+    tracked_fields = ('status',)  # Read by the status signals, see TrackedFieldsMixin
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
     # Basic info
+    pre_number = models.CharField(
+        max_length=50,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="PRE-YYYY-NNNN, assigned by generate_pre_number()"
+    )
     submitted_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="submitted_pres")
     department = models.CharField(max_length=255)
     program = models.CharField(max_length=255, null=True, blank=True)
@@ -439,8 +449,10 @@ class DepartmentPRE(models.Model):
     
     def get_total_remaining(self):
         """Calculate total remaining budget across all line items and quarters"""
+        from .services.consumption_service import attach_quarter_consumption
+
         total_remaining = Decimal('0')
-        for line_item in self.line_items.all():
+        for line_item in attach_quarter_consumption(self.line_items.all(), source=self):
             for quarter in ['Q1', 'Q2', 'Q3', 'Q4']:
                 total_remaining += line_item.get_quarter_available(quarter)
         return total_remaining
@@ -475,8 +487,10 @@ class DepartmentPRE(models.Model):
         return self.total_amount - self.total_consumed
 
 
-class PurchaseRequest(models.Model):
+class PurchaseRequest(TrackedFieldsMixin, models.Model):
     """Purchase Request for procurement items"""
+    tracked_fields = ('status',)  # Read by the status signals, see TrackedFieldsMixin
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
     # Basic Info
@@ -562,6 +576,19 @@ class PurchaseRequest(models.Model):
         blank=True,
         help_text="Auto-generated PDF when admin partially approves"
     )
+    PDF_STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    pdf_status = models.CharField(
+        max_length=10,
+        choices=PDF_STATUS_CHOICES,
+        blank=True,
+        default='',
+        help_text="Background conversion of the documents to PDF (see ConversionJob)"
+    )
     
     approved_documents = models.FileField(
         upload_to='pr/approved_documents/',
@@ -721,8 +748,10 @@ class PurchaseRequestItem(models.Model):
         return f"{self.item_description} (x{self.quantity})"
 
 
-class ActivityDesign(models.Model):
+class ActivityDesign(TrackedFieldsMixin, models.Model):
     """Activity Design for non-procurement requests"""
+    tracked_fields = ('status',)  # Read by the status signals, see TrackedFieldsMixin
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     submitted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="activity_designs")
@@ -749,6 +778,8 @@ class ActivityDesign(models.Model):
 
     # Workflow files
     partially_approved_pdf = models.FileField(upload_to='ad_pdfs/%Y/%m/', null=True, blank=True)
+    PDF_STATUS_CHOICES = PurchaseRequest.PDF_STATUS_CHOICES
+    pdf_status = models.CharField(max_length=10, choices=PDF_STATUS_CHOICES, blank=True, default='')
     final_approved_scan = models.FileField(upload_to='ad_scanned/%Y/%m/', null=True, blank=True)
 
     # Approval tracking
@@ -955,6 +986,31 @@ class PRELineItem(models.Model):
         """Get the amount for a specific quarter"""
         return getattr(self, f'{quarter.lower()}_amount', Decimal('0'))
 
+    def _get_quarter_consumption(self, quarter):
+        """
+        PR/AD consumption figures for a quarter.
+
+        Uses the figures primed by attach_quarter_consumption() when present,
+        otherwise reads the materialized PRELineItemQuarterBalance rows.
+        """
+        from .services.consumption_service import empty_quarter_consumption
+
+        consumption = getattr(self, '_quarter_consumption', None)
+        if consumption is not None:
+            return consumption.get(quarter) or empty_quarter_consumption()
+
+        from .services.balance_service import get_quarter_balance
+
+        balance = get_quarter_balance(self, quarter)
+        if balance is None:
+            return empty_quarter_consumption()
+        return {
+            'pr_consumed': balance.pr_consumed,
+            'ad_consumed': balance.ad_consumed,
+            'pr_count': balance.pr_count,
+            'ad_count': balance.ad_count,
+        }
+
     def get_quarter_consumed(self, quarter):
         """
         Calculate consumed amount for a specific quarter.
@@ -964,30 +1020,8 @@ class PRELineItem(models.Model):
         This ensures accurate budget tracking by counting budget as "consumed"
         as soon as a PR/AD is submitted (Pending status), not just when fully approved.
         """
-        from django.db.models import Sum
-        from django.db.models.functions import Coalesce
-
-        # Count PR allocations (exclude only Draft, Rejected, Cancelled)
-        pr_consumed = PurchaseRequestAllocation.objects.filter(
-            pre_line_item=self,
-            quarter=quarter
-        ).exclude(
-            purchase_request__status__in=['Draft', 'Rejected', 'Cancelled']
-        ).aggregate(
-            total=Coalesce(Sum('allocated_amount'), Decimal('0.00'))
-        )['total']
-
-        # Count AD allocations (exclude only Draft, Rejected, Cancelled)
-        ad_consumed = ActivityDesignAllocation.objects.filter(
-            pre_line_item=self,
-            quarter=quarter
-        ).exclude(
-            activity_design__status__in=['Draft', 'Rejected', 'Cancelled']
-        ).aggregate(
-            total=Coalesce(Sum('allocated_amount'), Decimal('0.00'))
-        )['total']
-
-        return pr_consumed + ad_consumed
+        consumption = self._get_quarter_consumption(quarter)
+        return consumption['pr_consumed'] + consumption['ad_consumed']
 
     def get_quarter_available(self, quarter):
         """Calculate available amount for a specific quarter"""
@@ -1000,70 +1034,37 @@ class PRELineItem(models.Model):
         Calculate consumed amount by Purchase Requests only for a specific quarter.
         Includes Pending, Partially Approved, and Approved statuses.
         """
-        from django.db.models import Sum
-        from django.db.models.functions import Coalesce
-
-        pr_consumed = PurchaseRequestAllocation.objects.filter(
-            pre_line_item=self,
-            quarter=quarter
-        ).exclude(
-            purchase_request__status__in=['Draft', 'Rejected', 'Cancelled']
-        ).aggregate(
-            total=Coalesce(Sum('allocated_amount'), Decimal('0.00'))
-        )['total']
-
-        return pr_consumed
+        return self._get_quarter_consumption(quarter)['pr_consumed']
 
     def get_quarter_ad_consumed(self, quarter):
         """
         Calculate consumed amount by Activity Designs only for a specific quarter.
         Includes Pending, Partially Approved, and Approved statuses.
         """
-        from django.db.models import Sum
-        from django.db.models.functions import Coalesce
-
-        ad_consumed = ActivityDesignAllocation.objects.filter(
-            pre_line_item=self,
-            quarter=quarter
-        ).exclude(
-            activity_design__status__in=['Draft', 'Rejected', 'Cancelled']
-        ).aggregate(
-            total=Coalesce(Sum('allocated_amount'), Decimal('0.00'))
-        )['total']
-
-        return ad_consumed
+        return self._get_quarter_consumption(quarter)['ad_consumed']
 
     def get_quarter_pr_count(self, quarter):
         """Get count of Purchase Requests using this line item in a quarter"""
-        return PurchaseRequestAllocation.objects.filter(
-            pre_line_item=self,
-            quarter=quarter
-        ).exclude(
-            purchase_request__status__in=['Draft', 'Rejected', 'Cancelled']
-        ).values('purchase_request').distinct().count()
+        return self._get_quarter_consumption(quarter)['pr_count']
 
     def get_quarter_ad_count(self, quarter):
         """Get count of Activity Designs using this line item in a quarter"""
-        return ActivityDesignAllocation.objects.filter(
-            pre_line_item=self,
-            quarter=quarter
-        ).exclude(
-            activity_design__status__in=['Draft', 'Rejected', 'Cancelled']
-        ).values('activity_design').distinct().count()
+        return self._get_quarter_consumption(quarter)['ad_count']
 
     def get_quarter_breakdown(self, quarter):
         """
         Get detailed breakdown of budget usage for a specific quarter.
         Returns a dictionary with original, consumed (PR + AD), and available amounts.
         """
+        consumption = self._get_quarter_consumption(quarter)
         original = self.get_quarter_amount(quarter)
-        pr_consumed = self.get_quarter_pr_consumed(quarter)
-        ad_consumed = self.get_quarter_ad_consumed(quarter)
+        pr_consumed = consumption['pr_consumed']
+        ad_consumed = consumption['ad_consumed']
         total_consumed = pr_consumed + ad_consumed
         available = original - total_consumed
 
-        pr_count = self.get_quarter_pr_count(quarter)
-        ad_count = self.get_quarter_ad_count(quarter)
+        pr_count = consumption['pr_count']
+        ad_count = consumption['ad_count']
 
         return {
             'quarter': quarter,
@@ -1078,6 +1079,59 @@ class PRELineItem(models.Model):
         }
 
 
+class PRELineItemQuarterBalance(models.Model):
+    """
+    Denormalized budget balance of a PRE line item for one quarter.
+
+    Rows are maintained by apps.budgets.services.balance_service in the same
+    transaction as PR/AD allocation writes and status transitions, so an
+    availability check is a single row read instead of re-summing the
+    allocation tables.
+    """
+    line_item = models.ForeignKey(
+        'PRELineItem',
+        on_delete=models.CASCADE,
+        related_name='quarter_balances'
+    )
+    quarter = models.CharField(
+        max_length=2,
+        choices=[
+            ('Q1', 'Quarter 1'),
+            ('Q2', 'Quarter 2'),
+            ('Q3', 'Quarter 3'),
+            ('Q4', 'Quarter 4'),
+        ]
+    )
+
+    budgeted = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    pr_consumed = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    ad_consumed = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    pr_count = models.PositiveIntegerField(default=0)
+    ad_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pre_line_item_quarter_balances'
+        ordering = ['line_item', 'quarter']
+        verbose_name = 'PRE Line Item Quarter Balance'
+        verbose_name_plural = 'PRE Line Item Quarter Balances'
+        unique_together = ['line_item', 'quarter']
+
+    def __str__(self):
+        return f"{self.line_item_id} {self.quarter}: ₱{self.available:,.2f} available"
+
+    @property
+    def consumed(self):
+        """Total consumed by PRs and ADs"""
+        return self.pr_consumed + self.ad_consumed
+
+    @property
+    def available(self):
+        """Budgeted amount not yet held by PRs or ADs"""
+        return self.budgeted - self.consumed
+
+
 class PREReceipt(models.Model):
     """Budget receipts/income for PRE"""
     pre = models.ForeignKey('budgets.DepartmentPRE', on_delete=models.CASCADE, related_name='receipts')
@@ -1093,11 +1147,12 @@ class PREReceipt(models.Model):
         return (self.q1_amount or 0) + (self.q2_amount or 0) + (self.q3_amount or 0) + (self.q4_amount or 0)
     
 
-class PurchaseRequestAllocation(models.Model):
+class PurchaseRequestAllocation(TrackedFieldsMixin, models.Model):
     """
     Track allocation of PRE line items to Purchase Requests
     Records which PRE line items are funding each PR
     """
+    tracked_fields = ('pre_line_item_id', 'quarter')  # Read by the balance signal, see TrackedFieldsMixin
     
     purchase_request = models.ForeignKey(
         'PurchaseRequest',
@@ -1157,11 +1212,12 @@ class PurchaseRequestAllocation(models.Model):
         return f"{category} - {self.pre_line_item.item_name}"
 
 
-class ActivityDesignAllocation(models.Model):
+class ActivityDesignAllocation(TrackedFieldsMixin, models.Model):
     """
     Track allocation of PRE line items to Activity Designs
     Records which PRE line items are funding each AD
     """
+    tracked_fields = ('pre_line_item_id', 'quarter')  # Read by the balance signal, see TrackedFieldsMixin
     
     activity_design = models.ForeignKey(
         'ActivityDesign',
@@ -1284,6 +1340,227 @@ def get_allocation_summary(self):
         })
     return allocations
 
+class DocumentSequence(models.Model):
+    """
+    Per-year counter behind PR, AD and PRE numbers.
+
+    Incremented with a single UPDATE ... RETURNING by
+    apps.budgets.services.sequence_service; never edit last_value by hand.
+    """
+    DOCUMENT_TYPE_CHOICES = [
+        ('PR', 'Purchase Request'),
+        ('AD', 'Activity Design'),
+        ('PRE', 'Program of Receipts and Expenditures'),
+    ]
+
+    document_type = models.CharField(max_length=10, choices=DOCUMENT_TYPE_CHOICES)
+    year = models.PositiveIntegerField()
+    last_value = models.PositiveIntegerField(default=0, help_text='Last number handed out')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'document_sequences'
+        ordering = ['document_type', '-year']
+        verbose_name = 'Document Sequence'
+        verbose_name_plural = 'Document Sequences'
+        unique_together = ['document_type', 'year']
+
+    def __str__(self):
+        return f"{self.document_type}-{self.year}: {self.last_value}"
+
+
+class ArchiveJob(models.Model):
+    """
+    Progress of a fiscal year archive/unarchive run.
+
+    Rows are flipped with set-based UPDATEs in chunks by
+    apps.budgets.services.archive_job_service; every chunk commits together
+    with the progress counters, so a failed job resumes where it stopped.
+    """
+    ACTION_CHOICES = [
+        ('ARCHIVE', 'Archive'),
+        ('UNARCHIVE', 'Unarchive'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    approved_budget = models.ForeignKey(
+        ApprovedBudget,
+        on_delete=models.CASCADE,
+        related_name='archive_jobs'
+    )
+    fiscal_year = models.CharField(max_length=10)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    archive_type = models.CharField(max_length=20, default='FISCAL_YEAR', blank=True)
+    reason = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archive_jobs'
+    )
+
+    chunk_size = models.PositiveIntegerField(default=1000)
+    progress = models.JSONField(default=dict, blank=True, help_text='Rows updated per stage')
+    current_stage = models.CharField(max_length=30, blank=True)
+    rows_processed = models.PositiveIntegerField(default=0)
+    elapsed_seconds = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'archive_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Archive Job'
+        verbose_name_plural = 'Archive Jobs'
+
+    def __str__(self):
+        return f"{self.get_action_display()} FY {self.fiscal_year} ({self.status})"
+
+    @property
+    def rows_per_second(self):
+        """Throughput over the time actually spent updating rows"""
+        if not self.elapsed_seconds:
+            return 0
+        return self.rows_processed / self.elapsed_seconds
+
+
+class ExportJob(models.Model):
+    """
+    A report export rendered outside the request by the local export worker.
+
+    Finished artifacts are reused when the same export (kind, owner and
+    parameters, see params_hash) is requested again while the data it was
+    built from is unchanged (data_version).
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    params_hash = models.CharField(max_length=64, help_text='Hash of kind, owner and parameters')
+    data_version = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs'
+    )
+
+    row_estimate = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/%Y/%m/', blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'export_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        indexes = [
+            models.Index(fields=['params_hash', 'data_version', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
+
+
+class ConversionJob(models.Model):
+    """
+    PDF conversion of the documents of a partially approved PR or AD, run by
+    the local conversion worker instead of inside the approval request.
+    Failed attempts are retried with exponential backoff until max_attempts.
+    """
+    TARGET_CHOICES = [
+        ('pr', 'Purchase Request'),
+        ('ad', 'Activity Design'),
+    ]
+    STATUS_CHOICES = ExportJob.STATUS_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES)
+    object_id = models.UUIDField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='conversion_jobs'
+    )
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    results = models.JSONField(default=dict, blank=True, help_text='Results of the last attempt')
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'conversion_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Conversion Job'
+        verbose_name_plural = 'Conversion Jobs'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['target', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_target_display()} {self.object_id} ({self.status})"
+
+
+class ParsedPRECache(models.Model):
+    """
+    Parse result of an uploaded PRE workbook, keyed by the SHA-256 of the
+    file bytes and the parser version, so retries and re-uploads of the same
+    file skip parsing. Least recently used entries are evicted.
+    """
+    content_hash = models.CharField(max_length=64)
+    parser_version = models.CharField(max_length=32)
+    result = models.JSONField(help_text='JSON-safe parse_pre_excel() result')
+    size = models.PositiveIntegerField(default=0, help_text='Size of the uploaded file in bytes')
+    hits = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'parsed_pre_cache'
+        verbose_name = 'Parsed PRE Cache Entry'
+        verbose_name_plural = 'Parsed PRE Cache'
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'parser_version'], name='unique_parsed_pre'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} (parser {self.parser_version})"
+
+
 class RequestApproval(models.Model):
     """Generic approval tracking for all request types"""
     CONTENT_TYPE_CHOICES = [
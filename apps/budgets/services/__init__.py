@@ -7,6 +7,73 @@ from .archive_service import (
     get_archive_statistics,
     get_fiscal_years_list,
 )
+from .consumption_service import (
+    get_consumption_map,
+    attach_quarter_consumption,
+    attach_pre_consumption,
+)
+from .balance_service import (
+    create_initial_balances,
+    lock_quarter_balances,
+    refresh_balances_for,
+    refresh_quarter_balances,
+    get_quarter_balance,
+    get_quarter_balances,
+    rebuild_quarter_balances,
+    find_balance_discrepancies,
+)
+from .reservation_service import (
+    reserve_funds,
+    InsufficientFundsError,
+)
+from .dashboard_service import (
+    get_admin_dashboard_metrics,
+    get_request_status_counts,
+)
+from .snapshot_service import (
+    get_snapshot,
+    bump_snapshot_version,
+    get_snapshot_stats,
+)
+from .fiscal_year_service import (
+    get_available_fiscal_years,
+    invalidate_fiscal_years,
+)
+from .archive_index_service import (
+    is_archived,
+    invalidate_archived_index,
+)
+from .archive_job_service import (
+    create_archive_job,
+    run_archive_job,
+)
+from .export_job_service import (
+    enqueue_export,
+    run_export_job,
+    get_export_status,
+)
+from .conversion_job_service import (
+    enqueue_conversion,
+    run_conversion_job,
+    get_conversion_status,
+)
+from .pre_parse_cache_service import (
+    parse_pre_cached,
+    get_cached_pre_result,
+)
+from .pre_taxonomy_service import (
+    get_pre_taxonomy,
+    create_pre_line_items,
+)
+from .pre_import_service import (
+    import_parsed_pre,
+    PREImportError,
+)
+from .sequence_service import (
+    next_number,
+    provisional_number,
+    assign_number,
+)
 
 __all__ = [
     'archive_fiscal_year',
@@ -15,4 +82,43 @@ __all__ = [
     'unarchive_record',
     'get_archive_statistics',
     'get_fiscal_years_list',
+    'get_consumption_map',
+    'attach_quarter_consumption',
+    'attach_pre_consumption',
+    'create_initial_balances',
+    'lock_quarter_balances',
+    'refresh_balances_for',
+    'refresh_quarter_balances',
+    'get_quarter_balance',
+    'get_quarter_balances',
+    'rebuild_quarter_balances',
+    'find_balance_discrepancies',
+    'reserve_funds',
+    'InsufficientFundsError',
+    'get_admin_dashboard_metrics',
+    'get_request_status_counts',
+    'get_snapshot',
+    'bump_snapshot_version',
+    'get_snapshot_stats',
+    'get_available_fiscal_years',
+    'invalidate_fiscal_years',
+    'is_archived',
+    'invalidate_archived_index',
+    'create_archive_job',
+    'run_archive_job',
+    'enqueue_export',
+    'run_export_job',
+    'get_export_status',
+    'enqueue_conversion',
+    'run_conversion_job',
+    'get_conversion_status',
+    'parse_pre_cached',
+    'get_cached_pre_result',
+    'get_pre_taxonomy',
+    'create_pre_line_items',
+    'import_parsed_pre',
+    'PREImportError',
+    'next_number',
+    'provisional_number',
+    'assign_number',
 ]
@@ -0,0 +1,106 @@
+# bb_budget_monitoring_system/apps/budgets/services/archive_index_service.py
+import threading
+import time
+import uuid
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from django.core.cache import caches
+from django.db import transaction
+
+from apps.budgets.models import ActivityDesign, DepartmentPRE, PurchaseRequest
+
+
+# The index of each model is kept per process, tagged with a version stored
+# in the shared dashboards cache (the one snapshot_service versions by), so
+# an archive run in any process invalidates every worker's index at once.
+ARCHIVED_INDEX_CACHE_ALIAS = 'dashboards'
+INDEXED_MODELS = (DepartmentPRE, PurchaseRequest, ActivityDesign)
+
+_indexes: Dict[type, Tuple[int, FrozenSet[int]]] = {}  # model -> (version, archived ids)
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[ARCHIVED_INDEX_CACHE_ALIAS]
+
+
+def _version_key(model_class) -> str:
+    return f'archive_index:version:{model_class._meta.label_lower}'
+
+
+def _new_version() -> int:
+    # Time based, so a version key lost to eviction never falls back to the
+    # version an older index was built under
+    return int(time.time() * 1000)
+
+
+def _get_version(model_class) -> int:
+    cache = _cache()
+    version = cache.get(_version_key(model_class))
+    if version is None:
+        cache.add(_version_key(model_class), _new_version(), timeout=None)
+        version = cache.get(_version_key(model_class))
+    return version
+
+
+def _as_int(record_id) -> Optional[int]:
+    """UUIDs are kept as 128-bit integers, the most compact hashable form"""
+    if isinstance(record_id, uuid.UUID):
+        return record_id.int
+    try:
+        return uuid.UUID(str(record_id)).int
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _get_index(model_class) -> FrozenSet[int]:
+    version = _get_version(model_class)
+    entry = _indexes.get(model_class)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    archived_ids = frozenset(
+        record_id.int
+        for record_id in model_class.all_objects.filter(is_archived=True).values_list('id', flat=True)
+    )
+    with _lock:
+        _indexes[model_class] = (version, archived_ids)
+    return archived_ids
+
+
+def is_archived(model_class, record_id) -> bool:
+    """
+    Check whether a record is archived without touching its row.
+
+    The first call per model (and after each invalidation) loads the archived
+    ids of that model; archived rows are a small, slowly changing set, so
+    every later check is a set lookup plus a read of the shared version.
+
+    Args:
+        model_class: DepartmentPRE, PurchaseRequest or ActivityDesign (any
+            model with a UUID id, is_archived and an all_objects manager)
+        record_id: UUID or its string form
+
+    Returns:
+        True if the record is archived; False for active, missing or malformed ids
+    """
+    key = _as_int(record_id)
+    if key is None:
+        return False
+    return key in _get_index(model_class)
+
+
+def invalidate_archived_index(model_class=None) -> None:
+    """
+    Make every process rebuild the archived id index of one model (or all of
+    them) once the current transaction commits.
+    """
+    def _bump():
+        cache = _cache()
+        for model in (model_class,) if model_class is not None else INDEXED_MODELS:
+            try:
+                cache.incr(_version_key(model))
+            except ValueError:
+                cache.set(_version_key(model), _new_version(), timeout=None)
+
+    transaction.on_commit(_bump)
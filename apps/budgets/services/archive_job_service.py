@@ -0,0 +1,212 @@
+# bb_budget_monitoring_system/apps/budgets/services/archive_job_service.py
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.admin_panel.utils import log_audit_trail
+from apps.budgets.models import (
+    ActivityDesign,
+    ApprovedBudget,
+    ArchiveJob,
+    BudgetAllocation,
+    DepartmentPRE,
+    PurchaseRequest,
+)
+from apps.users.models import User
+from .archive_index_service import invalidate_archived_index
+from .fiscal_year_service import invalidate_fiscal_years
+from .snapshot_service import GLOBAL_VERSION_OWNER, bump_snapshot_version
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# (progress key, model, lookup from the model to the approved budget)
+# Archiving works bottom-up and flips the budget last, unarchiving restores the
+# budget first; either way an interrupted job leaves the year in its original
+# state at the top and is finished by resuming it.
+ARCHIVE_STAGES: List[Tuple[str, type, str]] = [
+    ('activity_designs', ActivityDesign, 'budget_allocation__approved_budget'),
+    ('purchase_requests', PurchaseRequest, 'budget_allocation__approved_budget'),
+    ('department_pres', DepartmentPRE, 'budget_allocation__approved_budget'),
+    ('budget_allocations', BudgetAllocation, 'approved_budget'),
+    ('approved_budgets', ApprovedBudget, 'pk'),
+]
+UNARCHIVE_STAGES = list(reversed(ARCHIVE_STAGES))
+
+
+def empty_archive_counts() -> Dict[str, int]:
+    """Counts dictionary returned by archive_fiscal_year/unarchive_fiscal_year"""
+    return {key: 0 for key, _, _ in reversed(ARCHIVE_STAGES)}
+
+
+def create_archive_job(
+    fiscal_year: str,
+    action: str = 'ARCHIVE',
+    requested_by: Optional[User] = None,
+    reason: str = "",
+    archive_type: str = "FISCAL_YEAR",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> ArchiveJob:
+    """
+    Create a pending archive/unarchive job for a fiscal year.
+
+    Raises:
+        ValueError: If there is no active (archive) or archived (unarchive)
+            budget for the fiscal year
+    """
+    if action not in ('ARCHIVE', 'UNARCHIVE'):
+        raise ValueError(f"Unknown archive action: {action}")
+
+    try:
+        budget = ApprovedBudget.all_objects.get(
+            fiscal_year=fiscal_year,
+            is_archived=(action == 'UNARCHIVE')
+        )
+    except ApprovedBudget.DoesNotExist:
+        state = 'archived' if action == 'UNARCHIVE' else 'active'
+        raise ValueError(f"No {state} budget found for fiscal year {fiscal_year}")
+
+    return ArchiveJob.objects.create(
+        approved_budget=budget,
+        fiscal_year=fiscal_year,
+        action=action,
+        requested_by=requested_by,
+        reason=reason,
+        archive_type=archive_type,
+        chunk_size=chunk_size,
+    )
+
+
+def _stage_values(job: ArchiveJob, key: str, model) -> Dict[str, object]:
+    """Column values written to every row of a stage"""
+    now = timezone.now()
+
+    if job.action == 'ARCHIVE':
+        if key == 'approved_budgets':
+            archive_reason = job.reason or f"Fiscal year {job.fiscal_year} archived"
+        else:
+            archive_reason = f"Cascaded from fiscal year {job.fiscal_year}"
+        values = {
+            'is_archived': True,
+            'archived_at': now,
+            'archived_by': job.requested_by,
+            'archive_reason': archive_reason,
+            'archive_type': job.archive_type,
+        }
+    else:
+        values = {
+            'is_archived': False,
+            'archived_at': None,
+            'archived_by': None,
+            'archive_reason': "",
+        }
+
+    # update() bypasses auto_now, set it explicitly like save() would
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        values['updated_at'] = now
+    return values
+
+
+def _run_stage(job: ArchiveJob, key: str, model, budget_lookup: str) -> None:
+    """Flip one model's rows chunk by chunk, committing progress with each chunk"""
+    job.current_stage = key
+    job.save(update_fields=['current_stage'])
+
+    rows = model.all_objects.filter(
+        **{budget_lookup: job.approved_budget_id},
+        is_archived=(job.action == 'UNARCHIVE')
+    )
+
+    while True:
+        started = time.monotonic()
+        with transaction.atomic():
+            ids = list(rows.order_by('pk').values_list('pk', flat=True)[:job.chunk_size])
+            if not ids:
+                return
+
+            updated = model.all_objects.filter(pk__in=ids).update(**_stage_values(job, key, model))
+
+            job.progress[key] = job.progress.get(key, 0) + updated
+            job.rows_processed += updated
+            job.elapsed_seconds += time.monotonic() - started
+            job.save(update_fields=['progress', 'rows_processed', 'elapsed_seconds'])
+
+
+def _finish(job: ArchiveJob) -> None:
+    """Audit log and cache invalidation normally done per row by save() signals"""
+    counts = {**empty_archive_counts(), **job.progress}
+
+    if job.requested_by:
+        verb = 'Archived' if job.action == 'ARCHIVE' else 'Unarchived'
+        log_audit_trail(
+            job.requested_by,
+            job.action,
+            'ApprovedBudget',
+            str(job.approved_budget_id),
+            f"{verb} fiscal year {job.fiscal_year}. " +
+            f"Budgets: {counts['approved_budgets']}, " +
+            f"Allocations: {counts['budget_allocations']}, " +
+            f"PREs: {counts['department_pres']}, " +
+            f"PRs: {counts['purchase_requests']}, " +
+            f"ADs: {counts['activity_designs']}. " +
+            f"Reason: {job.reason}"
+        )
+
+    invalidate_fiscal_years()
+    invalidate_archived_index()
+
+    owners = set(
+        BudgetAllocation.all_objects.filter(
+            approved_budget_id=job.approved_budget_id
+        ).values_list('end_user_id', flat=True)
+    )
+    for user_id in owners:
+        bump_snapshot_version(user_id)
+    bump_snapshot_version(GLOBAL_VERSION_OWNER)
+
+
+def run_archive_job(job: ArchiveJob) -> ArchiveJob:
+    """
+    Run (or resume) an archive job.
+
+    Rows are updated with set-based UPDATEs of at most job.chunk_size rows,
+    each chunk in its own short transaction, so locks are held per chunk
+    rather than for the whole year. No per-row save() happens, so the PR/AD
+    status notification signals do not fire for archiving. Resuming simply
+    picks up the rows that are not flipped yet.
+
+    Raises:
+        Exception: Re-raised after the job is marked FAILED with the error
+    """
+    if job.status == 'COMPLETED':
+        return job
+
+    job.status = 'RUNNING'
+    job.error = ''
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=['status', 'error', 'started_at'])
+
+    stages = ARCHIVE_STAGES if job.action == 'ARCHIVE' else UNARCHIVE_STAGES
+    try:
+        for key, model, budget_lookup in stages:
+            _run_stage(job, key, model, budget_lookup)
+        _finish(job)
+    except Exception as e:
+        job.status = 'FAILED'
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        raise
+
+    job.status = 'COMPLETED'
+    job.current_stage = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'current_stage', 'finished_at'])
+    return job
+
+
+def get_resumable_jobs() -> List[ArchiveJob]:
+    """Jobs that failed or were interrupted while running"""
+    return list(ArchiveJob.objects.filter(status__in=['FAILED', 'RUNNING', 'PENDING']).order_by('created_at'))
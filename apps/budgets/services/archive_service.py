@@ -9,264 +9,98 @@ from apps.budgets.models import (
     ActivityDesign,
 )
 from apps.users.models import User
-from apps.admin_panel.models import AuditTrail
+from apps.admin_panel.utils import log_audit_trail
 from typing import Dict, Optional, List
+from .archive_index_service import invalidate_archived_index
+from .archive_job_service import (
+    DEFAULT_CHUNK_SIZE,
+    create_archive_job,
+    empty_archive_counts,
+    run_archive_job,
+)
 
 
 def archive_fiscal_year(
     fiscal_year: str,
     archived_by: Optional[User] = None,
     reason: str = "",
-    archive_type: str = "FISCAL_YEAR"
+    archive_type: str = "FISCAL_YEAR",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
 ) -> Dict[str, int]:
     """
     Archive an entire fiscal year with cascading to all related records.
 
+    Runs an ArchiveJob (see archive_job_service): rows are flipped with
+    chunked set-based updates, and a failed run can be resumed from the job.
+
     Args:
         fiscal_year: The fiscal year to archive (e.g., "2023")
         archived_by: User performing the archive (None for system/automatic)
         reason: Reason for archiving
         archive_type: Type of archive ('FISCAL_YEAR' or 'MANUAL')
+        chunk_size: Rows updated per transaction
 
     Returns:
         Dictionary with counts of archived records
 
     Raises:
-        ApprovedBudget.DoesNotExist: If fiscal year not found
-        Exception: If any error occurs during archiving
+        Exception: If the fiscal year has no active budget or any error
+            occurs during archiving
     """
-    archived_counts = {
-        'approved_budgets': 0,
-        'budget_allocations': 0,
-        'department_pres': 0,
-        'purchase_requests': 0,
-        'activity_designs': 0,
-    }
-
     try:
-        with transaction.atomic():
-            # Get the approved budget for this fiscal year
-            try:
-                budget = ApprovedBudget.all_objects.get(
-                    fiscal_year=fiscal_year,
-                    is_archived=False
-                )
-            except ApprovedBudget.DoesNotExist:
-                raise ValueError(f"No active budget found for fiscal year {fiscal_year}")
-
-            # Archive the approved budget
-            budget.is_archived = True
-            budget.archived_at = timezone.now()
-            budget.archived_by = archived_by
-            budget.archive_reason = reason or f"Fiscal year {fiscal_year} archived"
-            budget.archive_type = archive_type
-            budget.save()
-            archived_counts['approved_budgets'] = 1
-
-            # Get all related budget allocations
-            allocations = BudgetAllocation.all_objects.filter(
-                approved_budget=budget,
-                is_archived=False
-            )
-
-            # Archive each allocation and its related documents
-            for allocation in allocations:
-                # Archive the allocation
-                allocation.is_archived = True
-                allocation.archived_at = timezone.now()
-                allocation.archived_by = archived_by
-                allocation.archive_reason = f"Cascaded from fiscal year {fiscal_year}"
-                allocation.archive_type = archive_type
-                allocation.save()
-                archived_counts['budget_allocations'] += 1
-
-                # Archive all DepartmentPREs for this allocation
-                pres = DepartmentPRE.all_objects.filter(
-                    budget_allocation=allocation,
-                    is_archived=False
-                )
-                for pre in pres:
-                    pre.is_archived = True
-                    pre.archived_at = timezone.now()
-                    pre.archived_by = archived_by
-                    pre.archive_reason = f"Cascaded from fiscal year {fiscal_year}"
-                    pre.archive_type = archive_type
-                    pre.save()
-                    archived_counts['department_pres'] += 1
-
-                # Archive all PurchaseRequests for this allocation
-                prs = PurchaseRequest.all_objects.filter(
-                    budget_allocation=allocation,
-                    is_archived=False
-                )
-                for pr in prs:
-                    pr.is_archived = True
-                    pr.archived_at = timezone.now()
-                    pr.archived_by = archived_by
-                    pr.archive_reason = f"Cascaded from fiscal year {fiscal_year}"
-                    pr.archive_type = archive_type
-                    pr.save()
-                    archived_counts['purchase_requests'] += 1
-
-                # Archive all ActivityDesigns for this allocation
-                ads = ActivityDesign.all_objects.filter(
-                    budget_allocation=allocation,
-                    is_archived=False
-                )
-                for ad in ads:
-                    ad.is_archived = True
-                    ad.archived_at = timezone.now()
-                    ad.archived_by = archived_by
-                    ad.archive_reason = f"Cascaded from fiscal year {fiscal_year}"
-                    ad.archive_type = archive_type
-                    ad.save()
-                    archived_counts['activity_designs'] += 1
-
-            # Log to AuditTrail
-            if archived_by:
-                AuditTrail.objects.create(
-                    user=archived_by,
-                    action='ARCHIVE',
-                    model_name='ApprovedBudget',
-                    record_id=str(budget.id),
-                    detail=f"Archived fiscal year {fiscal_year}. " +
-                           f"Budgets: {archived_counts['approved_budgets']}, " +
-                           f"Allocations: {archived_counts['budget_allocations']}, " +
-                           f"PREs: {archived_counts['department_pres']}, " +
-                           f"PRs: {archived_counts['purchase_requests']}, " +
-                           f"ADs: {archived_counts['activity_designs']}. " +
-                           f"Reason: {reason}"
-                )
-
-            return archived_counts
+        job = create_archive_job(
+            fiscal_year,
+            action='ARCHIVE',
+            requested_by=archived_by,
+            reason=reason,
+            archive_type=archive_type,
+            chunk_size=chunk_size
+        )
+        run_archive_job(job)
+        return {**empty_archive_counts(), **job.progress}
 
     except Exception as e:
-        # Re-raise the exception to trigger transaction rollback
         raise Exception(f"Error archiving fiscal year {fiscal_year}: {str(e)}")
 
 
 def unarchive_fiscal_year(
     fiscal_year: str,
     unarchived_by: User,
-    reason: str = ""
+    reason: str = "",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
 ) -> Dict[str, int]:
     """
     Unarchive (restore) an entire fiscal year with cascading to all related records.
 
+    Runs an ArchiveJob with the UNARCHIVE action (see archive_job_service).
+
     Args:
         fiscal_year: The fiscal year to unarchive (e.g., "2023")
         unarchived_by: User performing the unarchive
         reason: Reason for unarchiving (required)
+        chunk_size: Rows updated per transaction
 
     Returns:
         Dictionary with counts of unarchived records
 
     Raises:
-        ApprovedBudget.DoesNotExist: If fiscal year not found
         ValueError: If reason is not provided
-        Exception: If any error occurs during unarchiving
+        Exception: If the fiscal year has no archived budget or any error
+            occurs during unarchiving
     """
     if not reason or not reason.strip():
         raise ValueError("Unarchive reason is required")
 
-    unarchived_counts = {
-        'approved_budgets': 0,
-        'budget_allocations': 0,
-        'department_pres': 0,
-        'purchase_requests': 0,
-        'activity_designs': 0,
-    }
-
     try:
-        with transaction.atomic():
-            # Get the archived budget for this fiscal year
-            try:
-                budget = ApprovedBudget.all_objects.get(
-                    fiscal_year=fiscal_year,
-                    is_archived=True
-                )
-            except ApprovedBudget.DoesNotExist:
-                raise ValueError(f"No archived budget found for fiscal year {fiscal_year}")
-
-            # Unarchive the approved budget
-            budget.is_archived = False
-            budget.archived_at = None
-            budget.archived_by = None
-            budget.archive_reason = ""
-            budget.save()
-            unarchived_counts['approved_budgets'] = 1
-
-            # Get all related budget allocations (including archived ones)
-            allocations = BudgetAllocation.all_objects.filter(
-                approved_budget=budget,
-                is_archived=True
-            )
-
-            # Unarchive each allocation and its related documents
-            for allocation in allocations:
-                # Unarchive the allocation
-                allocation.is_archived = False
-                allocation.archived_at = None
-                allocation.archived_by = None
-                allocation.archive_reason = ""
-                allocation.save()
-                unarchived_counts['budget_allocations'] += 1
-
-                # Unarchive all DepartmentPREs for this allocation
-                pres = DepartmentPRE.all_objects.filter(
-                    budget_allocation=allocation,
-                    is_archived=True
-                )
-                for pre in pres:
-                    pre.is_archived = False
-                    pre.archived_at = None
-                    pre.archived_by = None
-                    pre.archive_reason = ""
-                    pre.save()
-                    unarchived_counts['department_pres'] += 1
-
-                # Unarchive all PurchaseRequests for this allocation
-                prs = PurchaseRequest.all_objects.filter(
-                    budget_allocation=allocation,
-                    is_archived=True
-                )
-                for pr in prs:
-                    pr.is_archived = False
-                    pr.archived_at = None
-                    pr.archived_by = None
-                    pr.archive_reason = ""
-                    pr.save()
-                    unarchived_counts['purchase_requests'] += 1
-
-                # Unarchive all ActivityDesigns for this allocation
-                ads = ActivityDesign.all_objects.filter(
-                    budget_allocation=allocation,
-                    is_archived=True
-                )
-                for ad in ads:
-                    ad.is_archived = False
-                    ad.archived_at = None
-                    ad.archived_by = None
-                    ad.archive_reason = ""
-                    ad.save()
-                    unarchived_counts['activity_designs'] += 1
-
-            # Log to AuditTrail
-            AuditTrail.objects.create(
-                user=unarchived_by,
-                action='UNARCHIVE',
-                model_name='ApprovedBudget',
-                record_id=str(budget.id),
-                detail=f"Unarchived fiscal year {fiscal_year}. " +
-                       f"Budgets: {unarchived_counts['approved_budgets']}, " +
-                       f"Allocations: {unarchived_counts['budget_allocations']}, " +
-                       f"PREs: {unarchived_counts['department_pres']}, " +
-                       f"PRs: {unarchived_counts['purchase_requests']}, " +
-                       f"ADs: {unarchived_counts['activity_designs']}. " +
-                       f"Reason: {reason}"
-            )
-
-            return unarchived_counts
+        job = create_archive_job(
+            fiscal_year,
+            action='UNARCHIVE',
+            requested_by=unarchived_by,
+            reason=reason,
+            chunk_size=chunk_size
+        )
+        run_archive_job(job)
+        return {**empty_archive_counts(), **job.progress}
 
     except Exception as e:
         raise Exception(f"Error unarchiving fiscal year {fiscal_year}: {str(e)}")
@@ -309,14 +143,16 @@ def archive_record(
             record.save()
 
             # Log to AuditTrail
-            AuditTrail.objects.create(
-                user=archived_by,
-                action='ARCHIVE',
-                model_name=model_class.__name__,
-                record_id=str(record_id),
-                detail=f"Archived {model_class.__name__} record. Reason: {reason}"
+            log_audit_trail(
+                archived_by,
+                'ARCHIVE',
+                model_class.__name__,
+                str(record_id),
+                f"Archived {model_class.__name__} record. Reason: {reason}"
             )
 
+            invalidate_archived_index(model_class)
+
             return True
 
     except model_class.DoesNotExist:
@@ -363,14 +199,16 @@ def unarchive_record(
             record.save()
 
             # Log to AuditTrail
-            AuditTrail.objects.create(
-                user=unarchived_by,
-                action='UNARCHIVE',
-                model_name=model_class.__name__,
-                record_id=str(record_id),
-                detail=f"Unarchived {model_class.__name__} record. Reason: {reason}"
+            log_audit_trail(
+                unarchived_by,
+                'UNARCHIVE',
+                model_class.__name__,
+                str(record_id),
+                f"Unarchived {model_class.__name__} record. Reason: {reason}"
             )
 
+            invalidate_archived_index(model_class)
+
             return True
 
     except model_class.DoesNotExist:
@@ -0,0 +1,257 @@
+# bb_budget_monitoring_system/apps/budgets/services/balance_service.py
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.budgets.models import PRELineItem, PRELineItemQuarterBalance
+from .consumption_service import (
+    NON_CONSUMING_STATUSES,
+    QUARTERS,
+    empty_quarter_consumption,
+    get_consumption_map,
+)
+
+
+BALANCE_FIELDS = ['budgeted', 'pr_consumed', 'ad_consumed', 'pr_count', 'ad_count']
+
+
+def _line_item_ids(line_items: Iterable) -> List[int]:
+    """Accept PRELineItem instances or raw ids"""
+    return sorted({
+        item.pk if isinstance(item, PRELineItem) else int(item)
+        for item in line_items
+        if item is not None
+    })
+
+
+def _build_balances(line_item_ids: List[int], quarters: Optional[Iterable[str]] = None) -> List[PRELineItemQuarterBalance]:
+    """Compute balance rows for the given line items from the raw allocation tables"""
+    quarters = [quarter for quarter in QUARTERS if quarters is None or quarter in quarters]
+    budgets = PRELineItem.objects.filter(pk__in=line_item_ids).values(
+        'id', 'q1_amount', 'q2_amount', 'q3_amount', 'q4_amount'
+    )
+    consumption = get_consumption_map(line_item_ids)
+
+    balances = []
+    for budget in budgets:
+        item_consumption = consumption.get(budget['id'], {})
+        for quarter in quarters:
+            figures = item_consumption.get(quarter) or empty_quarter_consumption()
+            balances.append(PRELineItemQuarterBalance(
+                line_item_id=budget['id'],
+                quarter=quarter,
+                budgeted=budget[f'{quarter.lower()}_amount'] or Decimal('0.00'),
+                pr_consumed=figures['pr_consumed'],
+                ad_consumed=figures['ad_consumed'],
+                pr_count=figures['pr_count'],
+                ad_count=figures['ad_count'],
+            ))
+    return balances
+
+
+def lock_quarter_balances(keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], PRELineItemQuarterBalance]:
+    """
+    Lock the stored balance rows of the given (line item id, quarter) pairs.
+
+    Only those rows are locked (SELECT ... FOR UPDATE), in (line item,
+    quarter) order, so writers touching overlapping pairs cannot deadlock
+    and other quarters of the same line item stay free. Must run inside a
+    transaction; pairs without a stored row are missing from the result.
+    """
+    line_items_by_quarter = {}
+    for line_item_id, quarter in keys:
+        line_items_by_quarter.setdefault(quarter, set()).add(line_item_id)
+    if not line_items_by_quarter:
+        return {}
+
+    condition = Q()
+    for quarter, line_item_ids in sorted(line_items_by_quarter.items()):
+        condition |= Q(quarter=quarter, line_item_id__in=sorted(line_item_ids))
+    rows = PRELineItemQuarterBalance.objects.select_for_update().filter(condition).order_by('line_item_id', 'quarter')
+    return {(row.line_item_id, row.quarter): row for row in rows}
+
+
+def refresh_balances_for(keys: Iterable[Tuple[int, str]]) -> int:
+    """
+    Recompute and upsert the balances of the given (line item id, quarter) pairs.
+
+    The stored rows are locked before the allocation sums are read, so the
+    totals written include every allocation committed by a concurrent writer
+    (reserve_funds holds the same locks until it commits). Runs inside the
+    caller's transaction (or its own savepoint), so the balances commit or
+    roll back together with the write that triggered the refresh.
+
+    Returns:
+        Number of balance rows written
+    """
+    keys = {(int(line_item_id), quarter) for line_item_id, quarter in keys if line_item_id is not None}
+    if not keys:
+        return 0
+
+    with transaction.atomic():
+        lock_quarter_balances(keys)
+        balances = [
+            balance for balance in _build_balances(
+                sorted({line_item_id for line_item_id, _ in keys}),
+                {quarter for _, quarter in keys}
+            )
+            if (balance.line_item_id, balance.quarter) in keys
+        ]
+        PRELineItemQuarterBalance.objects.bulk_create(
+            balances,
+            update_conflicts=True,
+            unique_fields=['line_item', 'quarter'],
+            update_fields=BALANCE_FIELDS + ['updated_at'],
+        )
+    return len(balances)
+
+
+def refresh_quarter_balances(line_items: Iterable, quarters: Optional[Iterable[str]] = None) -> int:
+    """
+    Recompute the quarter balances of the given line items and upsert them
+    (see refresh_balances_for).
+
+    Args:
+        line_items: PRELineItem instances or ids
+        quarters: Only rewrite these quarters (defaults to all four), so a
+            single allocation write touches a single balance row
+
+    Returns:
+        Number of balance rows written
+    """
+    quarters = [quarter for quarter in QUARTERS if quarters is None or quarter in quarters]
+    return refresh_balances_for(
+        (line_item_id, quarter) for line_item_id in _line_item_ids(line_items) for quarter in quarters
+    )
+
+
+def refresh_document_balances(document) -> int:
+    """
+    Refresh the balances of every line item funding a PurchaseRequest or
+    ActivityDesign (both expose their allocations as pre_allocations).
+    """
+    line_item_ids = document.pre_allocations.values_list('pre_line_item_id', flat=True)
+    return refresh_quarter_balances(line_item_ids)
+
+
+def status_affects_balances(old_status: Optional[str], new_status: str) -> bool:
+    """True when a status transition moves a PR/AD in or out of consuming budget"""
+    if old_status is None or old_status == new_status:
+        return False
+    return (old_status in NON_CONSUMING_STATUSES) != (new_status in NON_CONSUMING_STATUSES)
+
+
+def create_initial_balances(line_items: Iterable[PRELineItem]) -> int:
+    """
+    Materialize the four quarter balances of newly created line items.
+
+    Nothing can be allocated against a new line item yet, so the rows are
+    built from its budgeted amounts without reading the allocation tables.
+
+    Returns:
+        Number of balance rows written
+    """
+    balances = [
+        PRELineItemQuarterBalance(
+            line_item_id=line_item.pk,
+            quarter=quarter,
+            budgeted=line_item.get_quarter_amount(quarter) or Decimal('0.00'),
+        )
+        for line_item in line_items
+        for quarter in QUARTERS
+    ]
+    PRELineItemQuarterBalance.objects.bulk_create(balances, ignore_conflicts=True)
+    return len(balances)
+
+
+def get_quarter_balances(line_item) -> Dict[str, PRELineItemQuarterBalance]:
+    """
+    Read all four quarter balances of a line item in one query.
+
+    Reads never write: line items whose balances were never materialized
+    (created before the balance table existed) get unsaved balances computed
+    from the allocation tables until rebuild_quarter_balances stores them.
+
+    Returns:
+        Dictionary of quarter -> PRELineItemQuarterBalance
+    """
+    line_item_id = line_item.pk if isinstance(line_item, PRELineItem) else line_item
+    balances = {
+        balance.quarter: balance
+        for balance in PRELineItemQuarterBalance.objects.filter(line_item_id=line_item_id)
+    }
+    if len(balances) < len(QUARTERS):
+        balances = {balance.quarter: balance for balance in _build_balances([line_item_id])}
+    return balances
+
+
+def get_quarter_balance(line_item, quarter: str) -> Optional[PRELineItemQuarterBalance]:
+    """Read the balance of a single line item quarter"""
+    return get_quarter_balances(line_item).get(quarter)
+
+
+def rebuild_quarter_balances(queryset=None, chunk_size: int = 500) -> int:
+    """
+    Rebuild balances from the raw allocation tables.
+
+    Args:
+        queryset: PRELineItem queryset to rebuild (defaults to every line item)
+        chunk_size: Number of line items recomputed per transaction
+
+    Returns:
+        Number of balance rows written
+    """
+    if queryset is None:
+        queryset = PRELineItem.objects.all()
+
+    line_item_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    written = 0
+    for start in range(0, len(line_item_ids), chunk_size):
+        written += refresh_quarter_balances(line_item_ids[start:start + chunk_size])
+    return written
+
+
+def find_balance_discrepancies(queryset=None, chunk_size: int = 500) -> List[Dict[str, object]]:
+    """
+    Compare stored balances with the raw allocation sums.
+
+    Missing rows are reported with stored values of None, unless the quarter
+    has no PR/AD consumption (reads compute such rows from the allocation
+    tables, so they are not wrong, only not yet stored).
+
+    Returns:
+        List of dictionaries with line_item_id, quarter, field, stored and actual
+    """
+    if queryset is None:
+        queryset = PRELineItem.objects.all()
+
+    line_item_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    discrepancies = []
+
+    for start in range(0, len(line_item_ids), chunk_size):
+        chunk = line_item_ids[start:start + chunk_size]
+        stored = {
+            (balance.line_item_id, balance.quarter): balance
+            for balance in PRELineItemQuarterBalance.objects.filter(line_item_id__in=chunk)
+        }
+
+        for expected in _build_balances(chunk):
+            current = stored.get((expected.line_item_id, expected.quarter))
+            if current is None and not (expected.pr_count or expected.ad_count):
+                continue
+
+            for field in BALANCE_FIELDS:
+                actual = getattr(expected, field)
+                stored_value = getattr(current, field) if current else None
+                if stored_value != actual:
+                    discrepancies.append({
+                        'line_item_id': expected.line_item_id,
+                        'quarter': expected.quarter,
+                        'field': field,
+                        'stored': stored_value,
+                        'actual': actual,
+                    })
+
+    return discrepancies
@@ -0,0 +1,148 @@
+# bb_budget_monitoring_system/apps/budgets/services/consumption_service.py
+from decimal import Decimal
+from typing import Dict, Iterable, Union
+
+from django.db.models import Count, QuerySet, Sum
+
+from apps.budgets.models import (
+    ActivityDesignAllocation,
+    BudgetAllocation,
+    DepartmentPRE,
+    PRELineItem,
+    PurchaseRequestAllocation,
+)
+
+
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+
+# PR/AD statuses that do not hold any budget on a PRE line item
+NON_CONSUMING_STATUSES = ['Draft', 'Rejected', 'Cancelled']
+
+ConsumptionSource = Union[DepartmentPRE, BudgetAllocation, QuerySet, Iterable[PRELineItem]]
+
+
+def empty_quarter_consumption() -> Dict[str, object]:
+    """Consumption figures for a line item quarter without any PR/AD allocation"""
+    return {
+        'pr_consumed': Decimal('0.00'),
+        'ad_consumed': Decimal('0.00'),
+        'pr_count': 0,
+        'ad_count': 0,
+    }
+
+
+def _line_item_filter(source: ConsumptionSource) -> Dict[str, object]:
+    """
+    Translate a consumption source into a filter on the allocation tables.
+
+    A PRE or budget allocation is filtered through the join so the line items
+    never have to be loaded; a queryset becomes a subquery and any other
+    iterable of line items or ids is reduced to primary keys.
+    """
+    if isinstance(source, DepartmentPRE):
+        return {'pre_line_item__pre': source}
+    if isinstance(source, BudgetAllocation):
+        return {'pre_line_item__pre__budget_allocation': source}
+    if isinstance(source, QuerySet):
+        return {'pre_line_item__in': source.values('pk')}
+    return {'pre_line_item_id__in': [getattr(item, 'pk', item) for item in source]}
+
+
+def get_consumption_map(source: ConsumptionSource) -> Dict[int, Dict[str, Dict[str, object]]]:
+    """
+    Compute PR/AD consumption per (line item, quarter) in one grouped query per
+    allocation table.
+
+    Args:
+        source: A DepartmentPRE, a BudgetAllocation, a PRELineItem queryset or
+            any iterable of PRELineItem instances or ids
+
+    Returns:
+        Dictionary keyed by line item id, then by quarter, holding
+        pr_consumed, ad_consumed, pr_count and ad_count. Line items or quarters
+        without allocations are absent; use empty_quarter_consumption() as the
+        fallback.
+    """
+    line_item_filter = _line_item_filter(source)
+    if line_item_filter.get('pre_line_item_id__in') == []:
+        return {}
+
+    consumption = {}
+
+    def _quarter_entry(line_item_id, quarter):
+        quarters = consumption.setdefault(line_item_id, {})
+        if quarter not in quarters:
+            quarters[quarter] = empty_quarter_consumption()
+        return quarters[quarter]
+
+    pr_rows = PurchaseRequestAllocation.objects.filter(
+        **line_item_filter
+    ).exclude(
+        purchase_request__status__in=NON_CONSUMING_STATUSES
+    ).order_by().values(
+        'pre_line_item_id', 'quarter'
+    ).annotate(
+        total=Sum('allocated_amount'),
+        count=Count('purchase_request', distinct=True)
+    )
+
+    for row in pr_rows:
+        entry = _quarter_entry(row['pre_line_item_id'], row['quarter'])
+        entry['pr_consumed'] = row['total'] or Decimal('0.00')
+        entry['pr_count'] = row['count']
+
+    ad_rows = ActivityDesignAllocation.objects.filter(
+        **line_item_filter
+    ).exclude(
+        activity_design__status__in=NON_CONSUMING_STATUSES
+    ).order_by().values(
+        'pre_line_item_id', 'quarter'
+    ).annotate(
+        total=Sum('allocated_amount'),
+        count=Count('activity_design', distinct=True)
+    )
+
+    for row in ad_rows:
+        entry = _quarter_entry(row['pre_line_item_id'], row['quarter'])
+        entry['ad_consumed'] = row['total'] or Decimal('0.00')
+        entry['ad_count'] = row['count']
+
+    return consumption
+
+
+def attach_quarter_consumption(line_items: Iterable[PRELineItem], source: ConsumptionSource = None) -> list:
+    """
+    Prime PRELineItem instances with their quarter consumption so that
+    get_quarter_consumed(), get_quarter_available(), the PR/AD helpers and
+    get_quarter_breakdown() no longer query the database.
+
+    Args:
+        line_items: The PRELineItem instances the caller is about to render
+        source: Optional PRE or budget allocation covering those line items,
+            used to filter by join instead of an id list
+
+    Returns:
+        The line items as a list, in their original order
+    """
+    line_items = list(line_items)
+    consumption = get_consumption_map(source if source is not None else line_items)
+
+    for line_item in line_items:
+        line_item._quarter_consumption = consumption.get(line_item.pk, {})
+
+    return line_items
+
+
+def attach_pre_consumption(pres: Iterable[DepartmentPRE]) -> list:
+    """
+    Prime every line item of the given PREs (using their prefetched
+    line_items) with quarter consumption in a single pass.
+
+    Returns:
+        The PREs as a list, in their original order
+    """
+    pres = list(pres)
+    attach_quarter_consumption(
+        line_item for pre in pres for line_item in pre.line_items.all()
+    )
+    return pres
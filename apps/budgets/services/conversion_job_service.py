@@ -0,0 +1,231 @@
+# bb_budget_monitoring_system/apps/budgets/services/conversion_job_service.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional
+from uuid import UUID
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.budgets.models import ActivityDesign, ConversionJob, PurchaseRequest
+from apps.users.models import User
+
+
+# Threads converting documents in each web process
+CONVERSION_WORKERS = getattr(settings, 'CONVERSION_WORKERS', 2)
+
+CONVERSION_MAX_ATTEMPTS = getattr(settings, 'CONVERSION_MAX_ATTEMPTS', 3)
+
+# Seconds before the first retry; doubled for each further attempt
+CONVERSION_RETRY_BACKOFF = getattr(settings, 'CONVERSION_RETRY_BACKOFF', 30)
+
+# RUNNING jobs started longer ago than this lost their worker
+CONVERSION_STALE_MINUTES = getattr(settings, 'CONVERSION_STALE_MINUTES', 30)
+
+
+class ConversionTarget(NamedTuple):
+    model: type
+    converter: str  # Dotted path of converter(obj) -> results dict
+
+
+CONVERSION_TARGETS: Dict[str, ConversionTarget] = {
+    'pr': ConversionTarget(PurchaseRequest, 'apps.admin_panel.document_converter.convert_pr_documents_to_pdf'),
+    'ad': ConversionTarget(ActivityDesign, 'apps.admin_panel.document_converter.convert_ad_documents_to_pdf'),
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_target(target: str) -> ConversionTarget:
+    try:
+        return CONVERSION_TARGETS[target]
+    except KeyError:
+        raise ValueError(f"Unknown conversion target: {target}")
+
+
+def _set_pdf_status(job: ConversionJob, pdf_status: str) -> None:
+    # A plain UPDATE: the PR/AD status signals must not fire for this
+    _get_target(job.target).model.objects.filter(pk=job.object_id).update(pdf_status=pdf_status)
+
+
+def get_retry_delay(attempts: int) -> int:
+    """Seconds to wait after the `attempts`-th failed attempt"""
+    return CONVERSION_RETRY_BACKOFF * 2 ** max(attempts - 1, 0)
+
+
+def enqueue_conversion(target: str, obj, user: Optional[User] = None) -> ConversionJob:
+    """
+    Queue the PDF conversion of a PR's or AD's documents, or return the job
+    already queued or running for it.
+
+    Args:
+        target: Key of CONVERSION_TARGETS ('pr' or 'ad')
+        obj: The PurchaseRequest / ActivityDesign
+        user: Admin who triggered the conversion
+
+    Returns:
+        The new or existing ConversionJob
+    """
+    _get_target(target)
+    job = ConversionJob.objects.filter(
+        target=target,
+        object_id=obj.pk,
+        status__in=['PENDING', 'RUNNING']
+    ).first()
+    if job is not None:
+        return job
+
+    job = ConversionJob.objects.create(
+        target=target,
+        object_id=obj.pk,
+        requested_by=user,
+        max_attempts=CONVERSION_MAX_ATTEMPTS,
+    )
+    _set_pdf_status(job, 'queued')
+    obj.pdf_status = 'queued'
+    transaction.on_commit(lambda: submit_conversion_job(job.pk))
+    return job
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CONVERSION_WORKERS, thread_name_prefix='conversion-worker')
+        return _executor
+
+
+def submit_conversion_job(job_id, delay: float = 0) -> None:
+    """Hand a job to this process's worker pool, after `delay` seconds"""
+    if delay > 0:
+        timer = threading.Timer(delay, submit_conversion_job, args=[job_id])
+        timer.daemon = True
+        timer.start()
+        return
+    _get_executor().submit(_run_in_worker, job_id)
+
+
+def _run_in_worker(job_id) -> None:
+    close_old_connections()
+    try:
+        run_conversion_job(job_id)
+    except Exception:
+        # Already recorded on the job
+        pass
+    finally:
+        close_old_connections()
+
+
+def get_conversion_problem(results: Dict[str, object]) -> Optional[str]:
+    """Why a convert_*_documents_to_pdf() run needs a retry, or None if it succeeded"""
+    if results['errors']:
+        return '; '.join(results['errors'])
+
+    main_failed = results['main_document_format'] is not None and not results['main_document']
+    if main_failed or any(not doc['success'] for doc in results['supporting_docs']):
+        return '; '.join(results['warnings']) or 'Some documents were not converted'
+    return None
+
+
+def run_conversion_job(job_id) -> Optional[ConversionJob]:
+    """
+    Run one attempt of a due conversion job.
+
+    The job is claimed with a conditional UPDATE, so a job picked up by two
+    workers (the pool and the run_conversion_jobs command) runs only once.
+    A failed attempt is requeued with exponential backoff until the job
+    runs out of attempts.
+
+    Returns:
+        The job, or None if it was not pending or not yet due
+    """
+    now = timezone.now()
+    claimed = ConversionJob.objects.filter(pk=job_id, status='PENDING', next_attempt_at__lte=now).update(
+        status='RUNNING',
+        started_at=now,
+        attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return None
+
+    job = ConversionJob.objects.get(pk=job_id)
+    target = _get_target(job.target)
+    _set_pdf_status(job, 'running')
+
+    retry = True
+    try:
+        obj = target.model.objects.get(pk=job.object_id)
+        job.results = import_string(target.converter)(obj)
+        problem = get_conversion_problem(job.results)
+    except target.model.DoesNotExist:
+        problem, retry = f"{job.get_target_display()} {job.object_id} no longer exists", False
+    except Exception as e:
+        problem = str(e)
+
+    job.finished_at = timezone.now()
+    job.error = problem or ''
+    if problem is None:
+        job.status = 'COMPLETED'
+        _set_pdf_status(job, 'done')
+    elif retry and job.attempts < job.max_attempts:
+        delay = get_retry_delay(job.attempts)
+        job.status = 'PENDING'
+        job.next_attempt_at = job.finished_at + timedelta(seconds=delay)
+        _set_pdf_status(job, 'queued')
+        transaction.on_commit(lambda: submit_conversion_job(job.pk, delay=delay))
+    else:
+        job.status = 'FAILED'
+        _set_pdf_status(job, 'failed')
+
+    job.save(update_fields=['status', 'results', 'error', 'finished_at', 'next_attempt_at'])
+    return job
+
+
+def requeue_stale_jobs(minutes: int = CONVERSION_STALE_MINUTES) -> int:
+    """Return RUNNING jobs older than `minutes` (their worker died) to the queue"""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    stale = list(ConversionJob.objects.filter(status='RUNNING', started_at__lt=cutoff))
+    for job in stale:
+        _set_pdf_status(job, 'queued')
+    return ConversionJob.objects.filter(pk__in=[job.pk for job in stale], status='RUNNING').update(
+        status='PENDING',
+        next_attempt_at=timezone.now()
+    )
+
+
+def get_due_jobs() -> List[ConversionJob]:
+    return list(
+        ConversionJob.objects.filter(status='PENDING', next_attempt_at__lte=timezone.now()).order_by('next_attempt_at')
+    )
+
+
+def get_conversion_status(target: str, object_id: UUID) -> Dict[str, object]:
+    """JSON-serialisable PDF status of a PR/AD and its latest job, for polling"""
+    model = _get_target(target).model
+    pdf_status = model.objects.filter(pk=object_id).values_list('pdf_status', flat=True).first()
+    job = ConversionJob.objects.filter(target=target, object_id=object_id).first()
+
+    status = {
+        'target': target,
+        'object_id': str(object_id),
+        'pdf_status': pdf_status,
+        'job': None,
+    }
+    if job is not None:
+        status['job'] = {
+            'id': str(job.pk),
+            'status': job.status,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'next_attempt_at': job.next_attempt_at.isoformat() if job.status == 'PENDING' else None,
+            'error': job.error,
+            'warnings': job.results.get('warnings', []),
+            'cache': job.results.get('cache'),
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        }
+    return status
@@ -0,0 +1,175 @@
+# bb_budget_monitoring_system/apps/budgets/services/dashboard_service.py
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.budgets.models import (
+    ActivityDesign,
+    BudgetAllocation,
+    DepartmentPRE,
+    PurchaseRequest,
+)
+
+
+PENDING_STATUSES = ['Pending']
+APPROVED_STATUSES = ['Approved', 'Partially Approved']
+
+# An allocation is "low budget" when less than this share of it remains
+LOW_BUDGET_THRESHOLD = Decimal('0.20')
+
+# Queries issued by get_admin_dashboard_metrics(), independent of the number of
+# allocations or documents: 3 status count queries, 1 allocation summary,
+# 1 allocation table and 1 department breakdown
+DASHBOARD_QUERY_BUDGET = 6
+
+AMOUNT_FIELD = DecimalField(max_digits=15, decimal_places=2)
+ZERO = Value(Decimal('0.00'), output_field=AMOUNT_FIELD)
+
+
+def _spent_expression():
+    """PR + AD usage of an allocation (PRE usage is only a reservation)"""
+    return ExpressionWrapper(F('pr_amount_used') + F('ad_amount_used'), output_field=AMOUNT_FIELD)
+
+
+def _low_budget_filter() -> Q:
+    """remaining / allocated < threshold, rewritten without a division"""
+    return Q(allocated_amount__gt=0) & Q(
+        spent__gt=ExpressionWrapper(
+            F('allocated_amount') * (1 - LOW_BUDGET_THRESHOLD), output_field=AMOUNT_FIELD
+        )
+    )
+
+
+def get_request_status_counts(year: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Count pending and approved PRE/PR/AD documents, one query per document type.
+
+    Args:
+        year: Budget allocation year to filter on; None or 'all' counts every year
+
+    Returns:
+        Dictionary keyed by 'pre', 'pr' and 'ad', each holding pending and approved
+    """
+    counts = {}
+    for key, model in (('pre', DepartmentPRE), ('pr', PurchaseRequest), ('ad', ActivityDesign)):
+        queryset = model.objects.all()
+        if year and year != 'all':
+            queryset = queryset.filter(budget_allocation__allocated_at__year=year)
+
+        counts[key] = queryset.aggregate(
+            pending=Count('id', filter=Q(status__in=PENDING_STATUSES)),
+            approved=Count('id', filter=Q(status__in=APPROVED_STATUSES)),
+        )
+    return counts
+
+
+def annotate_allocation_usage(queryset):
+    """Annotate allocations with spent and remaining_budget computed in SQL"""
+    return queryset.annotate(spent=_spent_expression()).annotate(
+        remaining_budget=ExpressionWrapper(F('allocated_amount') - F('spent'), output_field=AMOUNT_FIELD)
+    )
+
+
+def get_allocation_summary(allocations) -> Dict[str, object]:
+    """
+    Total budget, active department count and low budget allocation count of a
+    budget allocation queryset, in a single aggregate query.
+    """
+    summary = annotate_allocation_usage(allocations.order_by()).aggregate(
+        total_budget=Coalesce(Sum('allocated_amount'), ZERO),
+        active_departments=Count('department', distinct=True),
+        low_budget_count=Count('id', filter=_low_budget_filter()),
+    )
+    return summary
+
+
+def get_allocation_rows(allocations) -> List[Dict[str, object]]:
+    """Rows for the dashboard allocation table, usage computed in SQL"""
+    return [
+        {
+            'id': allocation.id,
+            'department': allocation.department,
+            'approved_budget': allocation.approved_budget,
+            'total_allocated': allocation.allocated_amount,
+            'spent': allocation.spent,
+            'remaining_budget': allocation.remaining_budget,
+            'end_user': allocation.end_user,
+        }
+        for allocation in annotate_allocation_usage(
+            allocations.select_related('approved_budget', 'end_user')
+        )
+    ]
+
+
+def get_department_utilization() -> Dict[str, object]:
+    """
+    Allocated/spent/remaining per department over every active allocation,
+    plus the overall utilization percentage.
+    """
+    rows = list(
+        BudgetAllocation.objects.filter(is_active=True)
+        .values('department')
+        .annotate(
+            total_allocated=Coalesce(Sum('allocated_amount'), ZERO),
+            total_spent=Coalesce(Sum(_spent_expression()), ZERO),
+        )
+        .order_by('department')
+    )
+
+    labels = [row['department'] or 'Unknown' for row in rows]
+    allocated = [float(row['total_allocated']) for row in rows]
+    spent = [float(row['total_spent']) for row in rows]
+    remaining = [max(0.0, a - s) for a, s in zip(allocated, spent)]
+
+    total_allocated = sum(allocated)
+    utilization = (sum(spent) / total_allocated * 100) if total_allocated > 0 else 0
+
+    return {
+        'labels': labels,
+        'allocated': allocated,
+        'spent': spent,
+        'remaining': remaining,
+        'avg_utilization': utilization,
+    }
+
+
+def get_admin_dashboard_metrics(year: Optional[str] = None) -> Dict[str, object]:
+    """
+    Compute every budget and request metric shown on the admin dashboard.
+
+    The number of queries is fixed at DASHBOARD_QUERY_BUDGET no matter how many
+    allocations or documents exist; all per-allocation arithmetic (spent,
+    remaining, low budget detection) runs in the database.
+
+    Args:
+        year: Allocation year ('YYYY') or 'all'
+
+    Returns:
+        Dictionary with status_counts, total_pending, total_approved,
+        total_budget, active_departments, low_budget_depts, budget_allocated
+        and the department chart series
+    """
+    allocations = BudgetAllocation.objects.filter(is_active=True)
+    if year and year != 'all':
+        allocations = allocations.filter(allocated_at__year=year)
+
+    status_counts = get_request_status_counts(year)
+    summary = get_allocation_summary(allocations)
+    departments = get_department_utilization()
+
+    return {
+        'status_counts': status_counts,
+        'total_pending': sum(counts['pending'] for counts in status_counts.values()),
+        'total_approved': sum(counts['approved'] for counts in status_counts.values()),
+        'total_budget': summary['total_budget'],
+        'active_departments': summary['active_departments'],
+        'low_budget_depts': summary['low_budget_count'],
+        'budget_allocated': get_allocation_rows(allocations),
+        'dept_labels': departments['labels'],
+        'dept_allocated': departments['allocated'],
+        'dept_spent': departments['spent'],
+        'dept_remaining': departments['remaining'],
+        'avg_utilization': departments['avg_utilization'],
+    }
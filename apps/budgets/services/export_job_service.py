@@ -0,0 +1,274 @@
+# bb_budget_monitoring_system/apps/budgets/services/export_job_service.py
+import hashlib
+import json
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.budgets.models import ExportJob
+from apps.users.models import User
+from .snapshot_service import GLOBAL_VERSION_OWNER, get_snapshot_version
+
+
+# Exports estimated above this many rows are rendered by the worker instead
+# of inside the request
+EXPORT_ASYNC_ROW_THRESHOLD = getattr(settings, 'EXPORT_ASYNC_ROW_THRESHOLD', 5000)
+
+# Threads rendering exports in each web process
+EXPORT_WORKERS = getattr(settings, 'EXPORT_WORKERS', 2)
+
+# Jobs RUNNING (or still PENDING) for longer than this lost the process that
+# queued them; they are requeued instead of being handed out again
+EXPORT_STALE_MINUTES = getattr(settings, 'EXPORT_STALE_MINUTES', 30)
+
+# Rendered files larger than this spill from memory to disk before upload
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class ExportKind(NamedTuple):
+    renderer: str   # Dotted path of renderer(user, params, output) -> filename
+    per_user: bool  # Output depends on the requesting user's data only
+    content_type: str
+
+
+EXPORT_KINDS: Dict[str, ExportKind] = {
+    'admin_dashboard_excel': ExportKind(
+        'apps.admin_panel.views.render_admin_dashboard_excel', False,
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    ),
+    'budget_excel': ExportKind(
+        'apps.end_user_app.views.render_budget_excel', True,
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    ),
+    'budget_pdf': ExportKind(
+        'apps.end_user_app.views.render_budget_pdf', True,
+        'application/pdf',
+    ),
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_kind(kind: str) -> ExportKind:
+    try:
+        return EXPORT_KINDS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown export kind: {kind}")
+
+
+def get_data_version(kind: str, user: Optional[User]) -> str:
+    """
+    Version of the data an export reads.
+
+    Per-user exports follow the user's dashboard snapshot version, shared
+    exports the global one; both are bumped whenever a budget record they
+    read changes. Shared exports also roll over daily since they include
+    time-window metrics (active users in the last 30 days).
+    """
+    if _get_kind(kind).per_user:
+        return str(get_snapshot_version(user.pk))
+    return f"{get_snapshot_version(GLOBAL_VERSION_OWNER)}:{timezone.localdate().isoformat()}"
+
+
+def get_params_hash(kind: str, user: Optional[User], params: Dict[str, object]) -> str:
+    """Identity of an export: kind, owner (for per-user kinds) and parameters"""
+    owner = user.pk if user is not None and _get_kind(kind).per_user else None
+    payload = json.dumps({'kind': kind, 'owner': owner, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _is_stale(job: ExportJob, cutoff) -> bool:
+    if job.status == 'RUNNING':
+        return job.started_at is None or job.started_at < cutoff
+    return job.status == 'PENDING' and job.created_at < cutoff
+
+
+def _find_reusable(params_hash: str, data_version: str) -> Optional[ExportJob]:
+    """
+    A finished artifact, or a queued/running job, for the same export and data.
+
+    A job that has been queued or running for more than EXPORT_STALE_MINUTES
+    lost its worker (the web process restarted); it is requeued and handed to
+    this process's pool before being reused, so its pollers see progress.
+    """
+    jobs = ExportJob.objects.filter(
+        params_hash=params_hash,
+        data_version=data_version,
+        status__in=['PENDING', 'RUNNING', 'COMPLETED']
+    ).order_by('-created_at')
+
+    cutoff = timezone.now() - timedelta(minutes=EXPORT_STALE_MINUTES)
+    for job in jobs:
+        if job.status == 'COMPLETED':
+            if job.file and job.file.storage.exists(job.file.name):
+                return job
+            continue
+        if _is_stale(job, cutoff):
+            ExportJob.objects.filter(pk=job.pk, status=job.status).update(status='PENDING', started_at=None)
+            job.status, job.started_at = 'PENDING', None
+            transaction.on_commit(lambda job_id=job.pk: submit_export_job(job_id))
+        return job
+    return None
+
+
+def enqueue_export(
+    kind: str,
+    user: Optional[User],
+    params: Dict[str, object],
+    row_estimate: int = 0
+) -> ExportJob:
+    """
+    Queue an export, or return an existing job for the same export.
+
+    Args:
+        kind: Key of EXPORT_KINDS
+        user: Requesting user (owner of the data for per-user kinds)
+        params: Request parameters the export depends on; must be JSON
+            serialisable
+        row_estimate: Rough row count, for display only
+
+    Returns:
+        The new or reused ExportJob
+    """
+    params_hash = get_params_hash(kind, user, params)
+    data_version = get_data_version(kind, user)
+
+    job = _find_reusable(params_hash, data_version)
+    if job is not None:
+        return job
+
+    job = ExportJob.objects.create(
+        kind=kind,
+        params=params,
+        params_hash=params_hash,
+        data_version=data_version,
+        requested_by=user,
+        row_estimate=row_estimate,
+        content_type=_get_kind(kind).content_type,
+    )
+    transaction.on_commit(lambda: submit_export_job(job.pk))
+    return job
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix='export-worker')
+        return _executor
+
+
+def submit_export_job(job_id) -> None:
+    """Hand a job to this process's worker pool"""
+    _get_executor().submit(_run_in_worker, job_id)
+
+
+def _run_in_worker(job_id) -> None:
+    close_old_connections()
+    try:
+        run_export_job(job_id)
+    except Exception:
+        # Already recorded on the job
+        pass
+    finally:
+        close_old_connections()
+
+
+def run_export_job(job_id) -> Optional[ExportJob]:
+    """
+    Render a pending export and store the artifact.
+
+    The job is claimed with a conditional UPDATE, so a job picked up by two
+    workers (the pool and the run_export_jobs command) renders only once.
+
+    Returns:
+        The job, or None if it was not pending
+
+    Raises:
+        Exception: Re-raised after the job is marked FAILED with the error
+    """
+    claimed = ExportJob.objects.filter(pk=job_id, status='PENDING').update(
+        status='RUNNING',
+        started_at=timezone.now()
+    )
+    if not claimed:
+        return None
+
+    job = ExportJob.objects.select_related('requested_by').get(pk=job_id)
+
+    try:
+        renderer = import_string(_get_kind(job.kind).renderer)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as output:
+            filename = renderer(job.requested_by, job.params, output)
+            output.seek(0)
+            job.file.save(filename, File(output), save=False)
+    except Exception as e:
+        job.status = 'FAILED'
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        raise
+
+    job.filename = filename
+    job.status = 'COMPLETED'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'filename', 'status', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(minutes: int = EXPORT_STALE_MINUTES) -> int:
+    """Return RUNNING jobs older than `minutes` (their worker died) to the queue"""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return ExportJob.objects.filter(status='RUNNING', started_at__lt=cutoff).update(
+        status='PENDING',
+        started_at=None
+    )
+
+
+def get_pending_jobs() -> List[ExportJob]:
+    return list(ExportJob.objects.filter(status='PENDING').order_by('created_at'))
+
+
+def purge_exports(days: int) -> int:
+    """Delete jobs (and their files) finished more than `days` days ago"""
+    cutoff = timezone.now() - timedelta(days=days)
+    jobs = ExportJob.objects.filter(status__in=['COMPLETED', 'FAILED'], finished_at__lt=cutoff)
+
+    count = 0
+    for job in jobs.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+def can_access_export(job: ExportJob, user: User) -> bool:
+    """Owners can read their per-user exports; shared exports need the same role"""
+    if job.requested_by_id == user.pk:
+        return True
+    kind = EXPORT_KINDS.get(job.kind)
+    return kind is not None and not kind.per_user and getattr(user, 'is_admin', False)
+
+
+def get_export_status(job: ExportJob) -> Dict[str, object]:
+    """JSON-serialisable status of a job for polling"""
+    return {
+        'id': str(job.pk),
+        'kind': job.kind,
+        'status': job.status,
+        'row_estimate': job.row_estimate,
+        'filename': job.filename,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,52 @@
+# bb_budget_monitoring_system/apps/budgets/services/fiscal_year_service.py
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from django.db import transaction
+
+from apps.budgets.models import ApprovedBudget
+
+
+# Other worker processes only learn about a change through this timeout;
+# the process that made the change is invalidated immediately.
+FISCAL_YEAR_CACHE_TIMEOUT = 60
+
+_registry: Dict[bool, Tuple[float, List[str]]] = {}
+_lock = threading.Lock()
+
+
+def get_available_fiscal_years(include_archived: bool = False) -> List[str]:
+    """
+    Distinct fiscal years, newest first, cached for the lifetime of the process.
+
+    Args:
+        include_archived: Include archived fiscal years (admin view)
+
+    Returns:
+        List of fiscal year strings
+    """
+    entry = _registry.get(include_archived)
+    if entry is not None and time.monotonic() - entry[0] < FISCAL_YEAR_CACHE_TIMEOUT:
+        return list(entry[1])
+
+    manager = ApprovedBudget.all_objects if include_archived else ApprovedBudget.objects
+    fiscal_years = list(
+        manager.values_list('fiscal_year', flat=True).distinct().order_by('-fiscal_year')
+    )
+
+    with _lock:
+        _registry[include_archived] = (time.monotonic(), fiscal_years)
+    return list(fiscal_years)
+
+
+def invalidate_fiscal_years() -> None:
+    """
+    Drop the cached fiscal years once the current transaction commits
+    (immediately outside a transaction).
+    """
+    def _clear():
+        with _lock:
+            _registry.clear()
+
+    transaction.on_commit(_clear)
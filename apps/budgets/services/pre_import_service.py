@@ -0,0 +1,153 @@
+# bb_budget_monitoring_system/apps/budgets/services/pre_import_service.py
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from apps.admin_panel.utils import generate_pre_number, log_audit_trail
+from apps.budgets.models import BudgetAllocation, DepartmentPRE
+from .pre_taxonomy_service import SECTION_CATEGORIES, create_pre_line_items
+
+
+class PREImportError(Exception):
+    """A PRE workbook that cannot be imported (no allocation, over budget, ...)"""
+
+
+def normalize_department(name: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a department name"""
+    return re.sub(r'[\s_]+', ' ', name or '').strip().casefold()
+
+
+def build_allocation_index(fiscal_year: str) -> Dict[str, List[BudgetAllocation]]:
+    """Active allocations of a fiscal year by normalized department name"""
+    allocations = BudgetAllocation.objects.filter(
+        approved_budget__fiscal_year=fiscal_year,
+        is_active=True
+    ).select_related('approved_budget', 'end_user')
+
+    index: Dict[str, List[BudgetAllocation]] = {}
+    for allocation in allocations:
+        index.setdefault(normalize_department(allocation.department), []).append(allocation)
+    return index
+
+
+def match_allocation(
+    index: Dict[str, List[BudgetAllocation]],
+    department: Optional[str],
+    file_path: str
+) -> BudgetAllocation:
+    """
+    Allocation a workbook belongs to: the department in its END USER header,
+    or else its file name (without extension).
+
+    Raises:
+        PREImportError: No allocation, or more than one, matches
+    """
+    file_stem = os.path.splitext(os.path.basename(file_path))[0]
+    for candidate in (department, file_stem):
+        matches = index.get(normalize_department(candidate))
+        if not matches:
+            continue
+        if len(matches) > 1:
+            raise PREImportError(f"{len(matches)} allocations match department '{candidate}'")
+        return matches[0]
+
+    raise PREImportError(f"No allocation for department '{department or file_stem}'")
+
+
+def validate_pre_import(result: Dict[str, object], allocation: BudgetAllocation) -> int:
+    """
+    Checks upload_pre applies before a PRE is accepted.
+
+    Returns:
+        Number of line items the PRE will have
+
+    Raises:
+        PREImportError: The PRE cannot be imported for this allocation
+    """
+    budget_fiscal_year = allocation.approved_budget.fiscal_year
+    if result['fiscal_year'] and result['fiscal_year'] != budget_fiscal_year:
+        raise PREImportError(
+            f"PRE fiscal year ({result['fiscal_year']}) does not match "
+            f"budget allocation fiscal year ({budget_fiscal_year})"
+        )
+
+    if result['grand_total'] > allocation.remaining_balance:
+        raise PREImportError(
+            f"PRE total amount (₱{result['grand_total']:,.2f}) exceeds "
+            f"remaining budget allocation (₱{allocation.remaining_balance:,.2f})"
+        )
+
+    if DepartmentPRE.objects.filter(budget_allocation=allocation).exists():
+        raise PREImportError(f"A PRE already exists for the {allocation.department} allocation")
+
+    item_count = sum(len(result['data'].get(section, [])) for section in SECTION_CATEGORIES)
+    if item_count == 0:
+        raise PREImportError("The PRE has no line items")
+    return item_count
+
+
+def import_parsed_pre(result: Dict[str, object], allocation: BudgetAllocation) -> Tuple[DepartmentPRE, int]:
+    """
+    Create a pending DepartmentPRE with its line items from a parse_pre_file()
+    result, in one transaction, as if the allocation owner had submitted it
+    through upload_pre.
+
+    Returns:
+        (pre, number of line items created)
+
+    Raises:
+        PREImportError: The PRE cannot be imported for this allocation
+    """
+    header = result.get('header') or {}
+    file_path = result['file_path']
+
+    with transaction.atomic():
+        # Lock the allocation so a concurrent submission cannot slip in
+        # between the checks and the insert
+        allocation = BudgetAllocation.objects.select_for_update().select_related(
+            'approved_budget', 'end_user'
+        ).get(pk=allocation.pk)
+        validate_pre_import(result, allocation)
+
+        end_user = allocation.end_user
+        pre = DepartmentPRE.objects.create(
+            submitted_by=end_user,
+            department=allocation.department,
+            program=header.get('program'),
+            fund_source=header.get('fund_source'),
+            budget_allocation=allocation,
+            fiscal_year=allocation.approved_budget.fiscal_year,
+            total_amount=result['grand_total'],
+            status='Pending',
+            is_valid=True,
+            submitted_at=timezone.now(),
+            prepared_by_name=end_user.get_full_name(),
+        )
+
+        with open(file_path, 'rb') as f:
+            pre.uploaded_excel_file.save(os.path.basename(file_path), File(f), save=True)
+
+        try:
+            line_item_count = create_pre_line_items(pre, result['data'])
+            # Numbered last, like upload_pre (counter row locked until commit)
+            generate_pre_number(pre)
+        except Exception:
+            pre.uploaded_excel_file.delete(save=False)
+            raise
+
+        log_audit_trail(
+            request=end_user,
+            action='CREATE',
+            model_name='DepartmentPRE',
+            record_id=pre.id,
+            detail=(
+                f"Imported PRE from {os.path.basename(file_path)} with {line_item_count} line items, "
+                f"Total: ₱{result['grand_total']:,.2f}"
+            )
+        )
+
+    return pre, line_item_count
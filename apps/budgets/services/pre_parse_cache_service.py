@@ -0,0 +1,134 @@
+# bb_budget_monitoring_system/apps/budgets/services/pre_parse_cache_service.py
+import hashlib
+import json
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.budgets.models import ParsedPRECache
+from apps.end_user_app.utils.pre_parser import PARSER_VERSION, parse_pre_excel
+
+
+# Entries kept before the least recently used ones are evicted
+PRE_PARSE_CACHE_MAX_ENTRIES = getattr(settings, 'PRE_PARSE_CACHE_MAX_ENTRIES', 500)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> Tuple[str, int]:
+    """SHA-256 hex digest and size of a file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _to_cached(result: Dict[str, object]) -> Dict[str, object]:
+    """JSON-safe copy of a successful parse_pre_excel() result"""
+    return json.loads(json.dumps({
+        'data': result['data'],
+        'grand_total': result['grand_total'],
+        'fiscal_year': result['fiscal_year'],
+        'validation_warnings': result.get('validation_warnings', []),
+    }, default=str))
+
+
+def _from_cached(cached: Dict[str, object], key: str) -> Dict[str, object]:
+    """
+    parse_pre_excel()-shaped result from a cache entry. Line item amounts
+    stay strings (as they were in the session); grand_total is a Decimal.
+    """
+    return {
+        'success': True,
+        'key': key,
+        'data': cached['data'],
+        'grand_total': Decimal(cached['grand_total']),
+        'fiscal_year': cached['fiscal_year'],
+        'validation_warnings': cached['validation_warnings'],
+        'errors': [],
+    }
+
+
+def _touch(entry_id: int) -> None:
+    ParsedPRECache.objects.filter(pk=entry_id).update(
+        last_used_at=timezone.now(),
+        hits=F('hits') + 1
+    )
+
+
+def evict_pre_parse_cache(max_entries: int = PRE_PARSE_CACHE_MAX_ENTRIES) -> int:
+    """Delete the least recently used entries beyond `max_entries`"""
+    stale_ids = list(
+        ParsedPRECache.objects.order_by('-last_used_at').values_list('pk', flat=True)[max_entries:]
+    )
+    if not stale_ids:
+        return 0
+    deleted, _ = ParsedPRECache.objects.filter(pk__in=stale_ids).delete()
+    return deleted
+
+
+def parse_pre_cached(file_path: str) -> Dict[str, object]:
+    """
+    parse_pre_excel() through the parse cache.
+
+    Identical files (same bytes) parsed by the same parser version are only
+    parsed once. Failed parses are not cached.
+
+    Args:
+        file_path: Path of the uploaded PRE workbook
+
+    Returns:
+        parse_pre_excel()-shaped result; on success it also carries 'key',
+        the cache key to keep in the session, and 'data' is JSON-safe
+        (amounts as strings)
+    """
+    content_hash, size = hash_file(file_path)
+
+    entry = ParsedPRECache.objects.filter(
+        content_hash=content_hash,
+        parser_version=PARSER_VERSION
+    ).only('pk', 'result').first()
+    if entry is not None:
+        _touch(entry.pk)
+        return _from_cached(entry.result, content_hash)
+
+    result = parse_pre_excel(file_path)
+    if not result['success']:
+        return result
+
+    cached = _to_cached(result)
+    try:
+        with transaction.atomic():
+            ParsedPRECache.objects.create(
+                content_hash=content_hash,
+                parser_version=PARSER_VERSION,
+                result=cached,
+                size=size,
+            )
+    except IntegrityError:
+        # The same file was parsed concurrently
+        pass
+    evict_pre_parse_cache()
+
+    return _from_cached(cached, content_hash)
+
+
+def get_cached_pre_result(key: str) -> Optional[Dict[str, object]]:
+    """Result stored under a key from parse_pre_cached(), or None if evicted"""
+    if not key:
+        return None
+    entry = ParsedPRECache.objects.filter(
+        content_hash=key,
+        parser_version=PARSER_VERSION
+    ).only('pk', 'result').first()
+    if entry is None:
+        return None
+    _touch(entry.pk)
+    return _from_cached(entry.result, key)
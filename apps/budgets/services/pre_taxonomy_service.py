@@ -0,0 +1,149 @@
+# bb_budget_monitoring_system/apps/budgets/services/pre_taxonomy_service.py
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+
+from apps.budgets.models import DepartmentPRE, PRECategory, PRELineItem, PRESubCategory
+from .balance_service import create_initial_balances
+
+
+# PRE section -> (category type, category name, sort order)
+SECTION_CATEGORIES = {
+    'receipts': ('PERSONNEL', 'Receipts', 1),
+    'personnel': ('PERSONNEL', 'Personnel Services', 2),
+    'mooe': ('MOOE', 'Maintenance and Other Operating Expenses', 3),
+    'capital': ('CAPITAL', 'Capital Outlays', 4),
+}
+
+# Categories are seeded once (init_pre_categories) and rarely edited; other
+# worker processes pick up an edit through this timeout, the process that
+# made it is invalidated immediately.
+TAXONOMY_CACHE_TIMEOUT = 10 * 60
+
+CategoryMap = Dict[str, PRECategory]                     # category_type -> category
+SubCategoryMap = Dict[Tuple[int, str], PRESubCategory]   # (category id, name) -> subcategory
+
+_taxonomy: Optional[Tuple[float, CategoryMap, SubCategoryMap]] = None
+_lock = threading.Lock()
+
+
+def get_pre_taxonomy() -> Tuple[CategoryMap, SubCategoryMap]:
+    """
+    PRE categories by type and subcategories by (category id, name), loaded
+    with two queries and cached for the lifetime of the process.
+
+    Where several rows share a key the oldest wins, as the first match of a
+    lookup would.
+    """
+    global _taxonomy
+
+    entry = _taxonomy
+    if entry is not None and time.monotonic() - entry[0] < TAXONOMY_CACHE_TIMEOUT:
+        return entry[1], entry[2]
+
+    categories: CategoryMap = {}
+    for category in PRECategory.objects.order_by('-pk'):
+        categories[category.category_type] = category
+
+    subcategories: SubCategoryMap = {}
+    for subcategory in PRESubCategory.objects.order_by('-pk'):
+        subcategories[(subcategory.category_id, subcategory.name)] = subcategory
+
+    with _lock:
+        _taxonomy = (time.monotonic(), categories, subcategories)
+    return categories, subcategories
+
+
+def invalidate_pre_taxonomy() -> None:
+    """
+    Drop the cached taxonomy once the current transaction commits
+    (immediately outside a transaction).
+    """
+    def _clear():
+        global _taxonomy
+        with _lock:
+            _taxonomy = None
+
+    transaction.on_commit(_clear)
+
+
+def build_pre_line_items(pre: DepartmentPRE, extracted_data: Dict[str, list]) -> List[PRELineItem]:
+    """
+    Unsaved PRELineItem objects for parsed PRE data.
+
+    Categories and subcategories come from the cached taxonomy; missing ones
+    are created (which invalidates the cache once the transaction commits).
+
+    Args:
+        pre: DepartmentPRE the items belong to
+        extracted_data: Dict with sections (receipts, personnel, mooe, capital)
+
+    Returns:
+        List of PRELineItem, ready for bulk_create
+    """
+    cached_categories, cached_subcategories = get_pre_taxonomy()
+    # Rows created below only reach the shared cache after commit
+    categories = dict(cached_categories)
+    subcategories = dict(cached_subcategories)
+    line_items = []
+
+    for section_key, items_list in extracted_data.items():
+        if not items_list:
+            continue
+
+        category_type, category_name, sort_order = SECTION_CATEGORIES.get(
+            section_key,
+            ('MOOE', section_key.title(), 5)
+        )
+        category = categories.get(category_type)
+        if category is None:
+            category = categories[category_type] = PRECategory.objects.create(
+                category_type=category_type,
+                name=category_name,
+                code=category_type[:4].upper(),
+                is_active=True,
+                sort_order=sort_order,
+            )
+
+        for item_data in items_list:
+            subcategory = None
+            subcategory_name = item_data.get('category')  # MOOE/Capital have subcategories
+            if subcategory_name:
+                name = subcategory_name.replace('_', ' ').title()
+                subcategory = subcategories.get((category.pk, name))
+                if subcategory is None:
+                    subcategory = subcategories[(category.pk, name)] = PRESubCategory.objects.create(
+                        category=category,
+                        name=name,
+                        code=subcategory_name[:10].upper(),
+                        is_active=True,
+                    )
+
+            line_items.append(PRELineItem(
+                pre=pre,
+                category=category,
+                subcategory=subcategory,
+                item_name=item_data.get('item_name', 'Unknown Item'),
+                q1_amount=Decimal(str(item_data.get('q1', 0))),
+                q2_amount=Decimal(str(item_data.get('q2', 0))),
+                q3_amount=Decimal(str(item_data.get('q3', 0))),
+                q4_amount=Decimal(str(item_data.get('q4', 0))),
+            ))
+
+    return line_items
+
+
+def create_pre_line_items(pre: DepartmentPRE, extracted_data: Dict[str, list]) -> int:
+    """
+    Create the line items of a PRE with a single bulk_create, plus their
+    quarter balances (bulk_create sends no post_save).
+
+    Returns:
+        Number of line items created
+    """
+    line_items = PRELineItem.objects.bulk_create(build_pre_line_items(pre, extracted_data))
+    create_initial_balances(line_items)
+    return len(line_items)
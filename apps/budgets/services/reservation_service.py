@@ -0,0 +1,132 @@
+# bb_budget_monitoring_system/apps/budgets/services/reservation_service.py
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+
+from apps.budgets.models import (
+    ActivityDesign,
+    ActivityDesignAllocation,
+    PRELineItem,
+    PRELineItemQuarterBalance,
+    PurchaseRequest,
+    PurchaseRequestAllocation,
+)
+from .balance_service import lock_quarter_balances, refresh_balances_for
+
+
+class InsufficientFundsError(ValueError):
+    """Raised when a reservation exceeds the available balance of a line item quarter"""
+
+    def __init__(self, line_item: PRELineItem, quarter: str, balance: PRELineItemQuarterBalance, required: Decimal):
+        self.line_item = line_item
+        self.quarter = quarter
+        self.quarter_amount = balance.budgeted
+        self.pr_consumed = balance.pr_consumed
+        self.ad_consumed = balance.ad_consumed
+        self.available = balance.available
+        self.required = required
+        super().__init__(
+            f"Insufficient funds for {line_item.item_name} - {quarter}. "
+            f"Available: ₱{self.available:,.2f}, Required: ₱{required:,.2f}"
+        )
+
+    def get_breakdown(self) -> List[str]:
+        """Detailed message parts, in the format used by the submission views"""
+        parts = [
+            f"Insufficient funds for {self.line_item.item_name} - {self.quarter}.",
+            f"Quarter Budget: ₱{self.quarter_amount:,.2f}"
+        ]
+        if self.pr_consumed > 0:
+            parts.append(f"Used by PRs: ₱{self.pr_consumed:,.2f}")
+        if self.ad_consumed > 0:
+            parts.append(f"Used by ADs: ₱{self.ad_consumed:,.2f}")
+        parts.append(f"Available: ₱{self.available:,.2f}")
+        parts.append(f"Required: ₱{self.required:,.2f}")
+        return parts
+
+
+def _lock_balances(keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], PRELineItemQuarterBalance]:
+    """
+    Lock the balance rows of the given (line item id, quarter) pairs, and
+    only those: other quarters of the same line items stay free. Rows are
+    locked in (line item, quarter) order so concurrent reservations cannot
+    deadlock (see lock_quarter_balances).
+
+    Missing rows (line items older than the balance table) are materialized
+    first; the upsert is idempotent, so racing reservations are harmless.
+    """
+    keys = set(keys)
+    balances = lock_quarter_balances(keys)
+    missing = keys - set(balances)
+    if missing:
+        refresh_balances_for(missing)
+        balances = lock_quarter_balances(keys)
+    return balances
+
+
+def reserve_funds(document, reservations: Iterable[Dict[str, object]], notes: str = '') -> list:
+    """
+    Reserve PRE line item funds for a PR or AD and create its allocations.
+
+    Only the balance rows of the affected (line item, quarter) pairs are
+    locked, for the duration of the caller's transaction. Submissions against
+    other line items or quarters proceed in parallel; submissions against the
+    same quarter are serialized, so the balance can never be oversubscribed.
+
+    Args:
+        document: PurchaseRequest or ActivityDesign receiving the funds
+        reservations: Iterable of dicts with line_item (PRELineItem), quarter
+            and amount (Decimal)
+        notes: Optional allocation note; defaults to "Allocated from <item> - <quarter>"
+
+    Returns:
+        The created PurchaseRequestAllocation/ActivityDesignAllocation rows
+
+    Raises:
+        InsufficientFundsError: If any line item quarter lacks the requested
+            amount; nothing is reserved in that case
+        ValueError: If document is neither a PR nor an AD
+    """
+    if isinstance(document, PurchaseRequest):
+        allocation_model, document_field = PurchaseRequestAllocation, 'purchase_request'
+    elif isinstance(document, ActivityDesign):
+        allocation_model, document_field = ActivityDesignAllocation, 'activity_design'
+    else:
+        raise ValueError(f"Cannot reserve funds for {type(document).__name__}")
+
+    reservations = list(reservations)
+
+    # Several reservations may draw from the same quarter
+    requested = {}
+    for reservation in reservations:
+        key = (reservation['line_item'].pk, reservation['quarter'])
+        requested[key] = requested.get(key, Decimal('0.00')) + reservation['amount']
+
+    with transaction.atomic():
+        balances = _lock_balances(requested)
+
+        for reservation in reservations:
+            key = (reservation['line_item'].pk, reservation['quarter'])
+            balance = balances.get(key)
+            if balance is None or balance.available < requested[key]:
+                raise InsufficientFundsError(
+                    reservation['line_item'],
+                    reservation['quarter'],
+                    balance or PRELineItemQuarterBalance(quarter=reservation['quarter']),
+                    requested[key]
+                )
+
+        allocations = []
+        for reservation in reservations:
+            line_item = reservation['line_item']
+            quarter = reservation['quarter']
+            allocations.append(allocation_model.objects.create(
+                **{document_field: document},
+                pre_line_item=line_item,
+                quarter=quarter,
+                allocated_amount=reservation['amount'],
+                notes=notes or f"Allocated from {line_item.item_name} - {quarter}"
+            ))
+
+    return allocations
@@ -0,0 +1,159 @@
+# bb_budget_monitoring_system/apps/budgets/services/sequence_service.py
+import re
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.budgets.models import (
+    ActivityDesign,
+    DepartmentPRE,
+    DocumentSequence,
+    PurchaseRequest,
+)
+
+
+# document type -> (model, number field, prefix)
+SEQUENCE_SOURCES = {
+    'PR': (PurchaseRequest, 'pr_number', 'PR'),
+    'AD': (ActivityDesign, 'ad_number', 'AD'),
+    'PRE': (DepartmentPRE, 'pre_number', 'PRE'),
+}
+
+
+def format_number(document_type: str, year: int, value: int) -> str:
+    """Format a sequence value as PR-YYYY-NNNN / AD-YYYY-NNNN / PRE-YYYY-NNNN"""
+    prefix = SEQUENCE_SOURCES[document_type][2]
+    return f'{prefix}-{year}-{value:04d}'
+
+
+def _existing_max(document_type: str, year: int) -> int:
+    """
+    Highest number already issued for a type and year, used once to seed a new
+    counter so numbers minted before the counter existed are never reissued.
+    """
+    model, field, prefix = SEQUENCE_SOURCES[document_type]
+    pattern = re.compile(rf'^{prefix}-{year}-(\d+)$')
+
+    numbers = model.all_objects.filter(
+        **{f'{field}__startswith': f'{prefix}-{year}-'}
+    ).values_list(field, flat=True)
+
+    highest = 0
+    for number in numbers:
+        match = pattern.match(number or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest
+
+
+def _ensure_sequence(document_type: str, year: int) -> None:
+    """Create the counter row if missing; concurrent creators are ignored"""
+    if DocumentSequence.objects.filter(document_type=document_type, year=year).exists():
+        return
+
+    DocumentSequence.objects.bulk_create(
+        [DocumentSequence(
+            document_type=document_type,
+            year=year,
+            last_value=_existing_max(document_type, year),
+        )],
+        ignore_conflicts=True,
+    )
+
+
+def _increment(document_type: str, year: int, count: int) -> Optional[int]:
+    """
+    Atomically add count to the counter and return its new value, or None if
+    the counter row does not exist yet.
+    """
+    if connection.vendor in ('postgresql', 'sqlite'):
+        table = connection.ops.quote_name(DocumentSequence._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET last_value = last_value + %s, updated_at = %s '
+                f'WHERE document_type = %s AND year = %s RETURNING last_value',
+                [count, timezone.now(), document_type, year]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    # Backends without UPDATE ... RETURNING (MySQL)
+    with transaction.atomic():
+        sequence = DocumentSequence.objects.select_for_update().filter(
+            document_type=document_type, year=year
+        ).first()
+        if sequence is None:
+            return None
+        sequence.last_value += count
+        sequence.save(update_fields=['last_value', 'updated_at'])
+        return sequence.last_value
+
+
+def next_value(document_type: str, year: Optional[int] = None, count: int = 1) -> int:
+    """
+    Reserve count consecutive values and return the last one.
+
+    The increment joins the caller's transaction: if the submission rolls back
+    the numbers are released again, so issued numbers stay gap-free. The
+    counter row stays locked only until that transaction ends.
+
+    Args:
+        document_type: 'PR', 'AD' or 'PRE'
+        year: Sequence year (defaults to the current year)
+        count: Number of values to reserve
+
+    Returns:
+        The last reserved value
+    """
+    if document_type not in SEQUENCE_SOURCES:
+        raise ValueError(f"Unknown document type: {document_type}")
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    year = year or datetime.now().year
+
+    value = _increment(document_type, year, count)
+    if value is None:
+        _ensure_sequence(document_type, year)
+        value = _increment(document_type, year, count)
+    return value
+
+
+def next_number(document_type: str, year: Optional[int] = None) -> str:
+    """
+    Return the next formatted document number, e.g. next_number('PR') -> 'PR-2025-0042'.
+    """
+    year = year or datetime.now().year
+    return format_number(document_type, year, next_value(document_type, year))
+
+
+def provisional_number(document_type: str) -> str:
+    """
+    Unique placeholder for the number field of a document created before its
+    number is assigned with assign_number().
+    """
+    return f'{SEQUENCE_SOURCES[document_type][2]}-PENDING-{uuid.uuid4().hex}'
+
+
+def assign_number(document, document_type: str, year: Optional[int] = None) -> str:
+    """
+    Give a saved document its number from the sequence.
+
+    Call this as the last statement of the transaction that creates the
+    document (which is saved with provisional_number() until then). The
+    counter row is locked from the increment until commit, so taking the
+    number last keeps that window to a single UPDATE instead of the whole
+    submission, and submissions do not queue behind each other's fund
+    reservations and file copies.
+
+    Returns:
+        The formatted number, also set on the document
+    """
+    model, field, _ = SEQUENCE_SOURCES[document_type]
+    number = next_number(document_type, year)
+    model.all_objects.filter(pk=document.pk).update(**{field: number})
+    setattr(document, field, number)
+    return number
@@ -0,0 +1,161 @@
+# bb_budget_monitoring_system/apps/budgets/services/snapshot_service.py
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from apps.budgets.models import (
+    ActivityDesign,
+    ActivityDesignAllocation,
+    BudgetAllocation,
+    DepartmentPRE,
+    PRELineItem,
+    PurchaseRequest,
+    PurchaseRequestAllocation,
+)
+
+
+SNAPSHOT_CACHE_ALIAS = 'dashboards'
+SNAPSHOT_TIMEOUT = getattr(settings, 'DASHBOARD_SNAPSHOT_TIMEOUT', 15 * 60)
+
+# Version key bumped on every change, for data read across all users
+GLOBAL_VERSION_OWNER = 'all'
+
+HITS_KEY = 'snapshot:stats:hits'
+MISSES_KEY = 'snapshot:stats:misses'
+
+
+def _cache():
+    return caches[SNAPSHOT_CACHE_ALIAS]
+
+
+def _version_key(user_id) -> str:
+    return f'snapshot:version:{user_id}'
+
+
+def _new_version() -> int:
+    # Time based, so a version key lost to eviction never falls back to a
+    # number an older snapshot was stored under
+    return int(time.time() * 1000)
+
+
+def _incr(key: str) -> None:
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_snapshot_version(user_id) -> int:
+    """Current snapshot version of a user's dashboards"""
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), _new_version(), timeout=None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def bump_snapshot_version(user_id) -> None:
+    """Invalidate every cached dashboard snapshot of a user"""
+    if user_id is None:
+        return
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), _new_version(), timeout=None)
+
+
+def get_snapshot(user_id, name: str, params: Optional[Dict[str, object]], builder: Callable[[], dict]) -> dict:
+    """
+    Return a cached dashboard snapshot, building and storing it on a miss.
+
+    Snapshots are keyed by the user's current version, so a version bump makes
+    every older snapshot unreachable; they simply expire.
+
+    Args:
+        user_id: Owner of the budget allocations the snapshot is built from
+        name: Snapshot name (usually the view name)
+        params: Request parameters the snapshot depends on (year, quarter, ...)
+        builder: Callable computing the snapshot; must return picklable data
+
+    Returns:
+        The snapshot dictionary
+    """
+    cache = _cache()
+    param_key = ':'.join(f'{key}={value}' for key, value in sorted((params or {}).items()))
+    key = f'snapshot:{user_id}:{get_snapshot_version(user_id)}:{name}:{param_key}'
+
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        _incr(HITS_KEY)
+        return snapshot
+
+    _incr(MISSES_KEY)
+    snapshot = builder()
+    cache.set(key, snapshot, timeout=SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def get_snapshot_stats() -> Dict[str, object]:
+    """Hit/miss counters of the dashboard snapshot cache, for monitoring"""
+    cache = _cache()
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': (hits / total * 100) if total else 0,
+    }
+
+
+def reset_snapshot_stats() -> None:
+    """Reset the hit/miss counters"""
+    _cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def _allocation_owners(**filters) -> Iterable:
+    return BudgetAllocation.all_objects.filter(**filters).values_list('end_user_id', flat=True)
+
+
+def get_snapshot_owners(instance) -> Iterable:
+    """
+    Users whose dashboards read the given instance: the end users of the
+    budget allocations it belongs to.
+    """
+    if isinstance(instance, BudgetAllocation):
+        return [instance.end_user_id]
+    if isinstance(instance, (DepartmentPRE, PurchaseRequest, ActivityDesign)):
+        return _allocation_owners(pk=instance.budget_allocation_id)
+    if isinstance(instance, PRELineItem):
+        return _allocation_owners(pres__id=instance.pre_id)
+    if isinstance(instance, PurchaseRequestAllocation):
+        return _allocation_owners(purchase_requests__id=instance.purchase_request_id)
+    if isinstance(instance, ActivityDesignAllocation):
+        return _allocation_owners(activity_designs__id=instance.activity_design_id)
+    return []
+
+
+def invalidate_snapshots_for(instance) -> None:
+    """
+    Bump the snapshot version of everyone whose dashboards read the instance,
+    and the global version.
+
+    The owners are resolved immediately (the instance may be about to be
+    deleted) but the bump waits for the transaction to commit, so a dashboard
+    rebuilt mid-transaction cannot be cached under the new version.
+    """
+    owners = set(get_snapshot_owners(instance))
+
+    def _bump():
+        for user_id in owners:
+            bump_snapshot_version(user_id)
+        bump_snapshot_version(GLOBAL_VERSION_OWNER)
+
+    transaction.on_commit(_bump)
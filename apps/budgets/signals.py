@@ -2,45 +2,42 @@
 from django.db.models.signals import post_save, pre_delete, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import DepartmentPRE, PurchaseRequest, ActivityDesign, SystemNotification, BudgetAllocation
+from .models import ApprovedBudget, DepartmentPRE, PurchaseRequest, ActivityDesign, SystemNotification, BudgetAllocation, PRELineItem, PurchaseRequestAllocation, ActivityDesignAllocation, PRECategory, PRESubCategory
+from .services.balance_service import create_initial_balances, refresh_balances_for, refresh_quarter_balances, refresh_document_balances, status_affects_balances
+from .services.snapshot_service import invalidate_snapshots_for
+from .services.fiscal_year_service import invalidate_fiscal_years
+from .services.pre_taxonomy_service import invalidate_pre_taxonomy
 from decimal import Decimal
 
+def _previous_status(sender, instance):
+    """
+    Stored status of the row being saved.
+
+    Instances loaded from the database carry it (TrackedFieldsMixin), new
+    instances have none; only instances built by hand with the pk of an
+    existing row (or loaded with status deferred) still need a query.
+    """
+    if instance.is_new():
+        return None
+    if instance.is_tracked('status'):
+        return instance.previous('status')
+    return sender.all_objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
 # Track old status before save to detect status changes
 @receiver(pre_save, sender=DepartmentPRE)
 def track_pre_old_status(sender, instance, **kwargs):
     """Track old status before save"""
-    if instance.pk:
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except sender.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
+    instance._old_status = _previous_status(sender, instance)
 
 @receiver(pre_save, sender=PurchaseRequest)
 def track_pr_old_status(sender, instance, **kwargs):
     """Track old status before save"""
-    if instance.pk:
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except sender.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
+    instance._old_status = _previous_status(sender, instance)
 
 @receiver(pre_save, sender=ActivityDesign)
 def track_ad_old_status(sender, instance, **kwargs):
     """Track old status before save"""
-    if instance.pk:
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except sender.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
+    instance._old_status = _previous_status(sender, instance)
 
 @receiver(post_save, sender=DepartmentPRE)
 def update_budget_on_pre_approval(sender, instance, created, **kwargs):
@@ -286,4 +283,78 @@ def return_ad_budget_on_delete(sender, instance, **kwargs):
         
         print(f"✅ Returned ₱{instance.total_amount:,.2f} to allocation")
         print(f"   New ad_amount_used: ₱{allocation.ad_amount_used:,.2f}")
-        print(f"   New remaining_balance: ₱{allocation.remaining_balance:,.2f}\n")
\ No newline at end of file
+        print(f"   New remaining_balance: ₱{allocation.remaining_balance:,.2f}\n")
+
+
+@receiver(post_save, sender=PurchaseRequestAllocation)
+@receiver(post_delete, sender=PurchaseRequestAllocation)
+@receiver(post_save, sender=ActivityDesignAllocation)
+@receiver(post_delete, sender=ActivityDesignAllocation)
+def refresh_balance_on_allocation_change(sender, instance, **kwargs):
+    """Keep the line item quarter balances current when an allocation is written, moved or removed"""
+    line_item_id, quarter = instance.pre_line_item_id, instance.quarter
+
+    # An allocation moved to another line item or quarter also releases the
+    # one it was stored against (previous() is None for new allocations);
+    # both rows are locked and refreshed together
+    old_line_item_id = instance.previous('pre_line_item_id') or line_item_id
+    old_quarter = instance.previous('quarter') or quarter
+    refresh_balances_for({(line_item_id, quarter), (old_line_item_id, old_quarter)})
+
+
+@receiver(post_save, sender=PRELineItem)
+def refresh_balance_on_line_item_change(sender, instance, created, **kwargs):
+    """
+    Refresh budgeted amounts when a line item is edited.
+    New line items have no allocations yet, so their balances start empty.
+    """
+    if created:
+        create_initial_balances([instance])
+    else:
+        refresh_quarter_balances([instance.pk])
+
+
+@receiver(post_save, sender=PurchaseRequest)
+@receiver(post_save, sender=ActivityDesign)
+def refresh_balance_on_status_change(sender, instance, created, **kwargs):
+    """Move a PR/AD's allocations in or out of the balances when its status starts or stops consuming budget"""
+    if created:
+        return
+
+    if status_affects_balances(getattr(instance, '_old_status', None), instance.status):
+        refresh_document_balances(instance)
+
+
+@receiver(post_save, sender=BudgetAllocation)
+@receiver(pre_delete, sender=BudgetAllocation)
+@receiver(post_save, sender=DepartmentPRE)
+@receiver(pre_delete, sender=DepartmentPRE)
+@receiver(post_save, sender=PurchaseRequest)
+@receiver(pre_delete, sender=PurchaseRequest)
+@receiver(post_save, sender=ActivityDesign)
+@receiver(pre_delete, sender=ActivityDesign)
+@receiver(post_save, sender=PRELineItem)
+@receiver(pre_delete, sender=PRELineItem)
+@receiver(post_save, sender=PurchaseRequestAllocation)
+@receiver(pre_delete, sender=PurchaseRequestAllocation)
+@receiver(post_save, sender=ActivityDesignAllocation)
+@receiver(pre_delete, sender=ActivityDesignAllocation)
+def invalidate_dashboard_snapshots(sender, instance, **kwargs):
+    """Expire the cached dashboards of the allocation owner once the change commits"""
+    invalidate_snapshots_for(instance)
+
+
+@receiver(post_save, sender=ApprovedBudget)
+@receiver(post_delete, sender=ApprovedBudget)
+def invalidate_fiscal_year_registry(sender, **kwargs):
+    """A new, renamed, archived or deleted budget may change the list of fiscal years"""
+    invalidate_fiscal_years()
+
+
+@receiver(post_save, sender=PRECategory)
+@receiver(post_delete, sender=PRECategory)
+@receiver(post_save, sender=PRESubCategory)
+@receiver(post_delete, sender=PRESubCategory)
+def invalidate_pre_taxonomy_cache(sender, **kwargs):
+    """Reload the cached PRE category map after categories are seeded or edited"""
+    invalidate_pre_taxonomy()
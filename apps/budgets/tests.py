@@ -1,3 +1,839 @@
-from django.test import TestCase
+import math
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.admin_panel.utils import generate_pre_number
+from apps.budgets.models import (
+    ActivityDesign,
+    ActivityDesignAllocation,
+    ApprovedBudget,
+    BudgetAllocation,
+    ConversionJob,
+    DepartmentPRE,
+    ExportJob,
+    PRECategory,
+    PRELineItem,
+    PRELineItemQuarterBalance,
+    PurchaseRequest,
+    PurchaseRequestAllocation,
+)
+from apps.budgets.services import archive_index_service, pre_taxonomy_service
+from apps.budgets.services.archive_index_service import invalidate_archived_index, is_archived
+from apps.budgets.services.balance_service import (
+    find_balance_discrepancies,
+    get_quarter_balances,
+    lock_quarter_balances,
+    rebuild_quarter_balances,
+)
+from apps.budgets.services.conversion_job_service import CONVERSION_STALE_MINUTES
+from apps.budgets.services.export_job_service import EXPORT_STALE_MINUTES, enqueue_export
+from apps.budgets.services.consumption_service import (
+    QUARTERS,
+    attach_pre_consumption,
+    get_consumption_map,
+)
+from apps.budgets.services.dashboard_service import DASHBOARD_QUERY_BUDGET, get_admin_dashboard_metrics
+from apps.budgets.services.pre_taxonomy_service import create_pre_line_items, get_pre_taxonomy
+from apps.budgets.services.reservation_service import InsufficientFundsError, reserve_funds
+from apps.budgets.services.sequence_service import assign_number, provisional_number
+from apps.users.models import User
+
+
+class StopLoop(Exception):
+    """Raised from a patched time.sleep to end a worker command's --loop"""
+
+
+def create_pre(username='enduser', fiscal_year='2025', line_items=4, quarter_amount=Decimal('1000.00')):
+    """An approved PRE with `line_items` line items budgeting `quarter_amount` every quarter"""
+    user = User.objects.create_user(
+        username, f'{username} user', f'{username}@example.com', 'password', department='IT'
+    )
+    approved_budget, _ = ApprovedBudget.objects.get_or_create(
+        fiscal_year=fiscal_year,
+        defaults={
+            'title': f'Budget {fiscal_year}',
+            'amount': Decimal('1000000.00'),
+            'remaining_budget': Decimal('0.00'),
+        }
+    )
+    allocation = BudgetAllocation.objects.create(
+        approved_budget=approved_budget,
+        department='IT',
+        end_user=user,
+        allocated_amount=Decimal('500000.00'),
+        remaining_balance=Decimal('500000.00')
+    )
+    pre = DepartmentPRE.objects.create(
+        submitted_by=user,
+        department='IT',
+        fiscal_year=fiscal_year,
+        budget_allocation=allocation,
+        status='Approved'
+    )
+    category, _ = PRECategory.objects.get_or_create(
+        code='MOOE', defaults={'name': 'MOOE', 'category_type': 'MOOE'}
+    )
+    for index in range(line_items):
+        PRELineItem.objects.create(
+            pre=pre,
+            category=category,
+            item_name=f'Item {index + 1}',
+            q1_amount=quarter_amount,
+            q2_amount=quarter_amount,
+            q3_amount=quarter_amount,
+            q4_amount=quarter_amount
+        )
+    return pre
+
+
+def create_purchase_request(pre, allocations, status='Pending', number=1):
+    """A PR on the PRE's budget allocation with one allocation per (line item, quarter, amount)"""
+    purchase_request = PurchaseRequest.objects.create(
+        submitted_by=pre.submitted_by,
+        department=pre.department,
+        pr_number=f'PR-{pre.fiscal_year}-{number:04d}',
+        budget_allocation=pre.budget_allocation,
+        purpose='Supplies',
+        total_amount=sum(amount for _, _, amount in allocations),
+        status=status
+    )
+    for line_item, quarter, amount in allocations:
+        PurchaseRequestAllocation.objects.create(
+            purchase_request=purchase_request,
+            pre_line_item=line_item,
+            quarter=quarter,
+            allocated_amount=amount
+        )
+    return purchase_request
+
+
+def create_activity_design(pre, allocations, status='Pending', number=1):
+    """An AD on the PRE's budget allocation with one allocation per (line item, quarter, amount)"""
+    activity_design = ActivityDesign.objects.create(
+        submitted_by=pre.submitted_by,
+        department=pre.department,
+        ad_number=f'AD-{pre.fiscal_year}-{number:04d}',
+        budget_allocation=pre.budget_allocation,
+        total_amount=sum(amount for _, _, amount in allocations),
+        status=status
+    )
+    for line_item, quarter, amount in allocations:
+        ActivityDesignAllocation.objects.create(
+            activity_design=activity_design,
+            pre_line_item=line_item,
+            quarter=quarter,
+            allocated_amount=amount
+        )
+    return activity_design
+
+
+class ConsumptionServiceTests(TestCase):
+    """Quarter consumption is computed with one grouped query per allocation table"""
+
+    def setUp(self):
+        self.pre = create_pre(line_items=6)
+        self.items = list(self.pre.line_items.order_by('item_name'))
+
+        # PRs and ADs spread over several line items and quarters; Draft and
+        # Rejected ones hold no budget
+        create_purchase_request(self.pre, [
+            (self.items[0], 'Q1', Decimal('100.00')),
+            (self.items[0], 'Q2', Decimal('50.00')),
+            (self.items[1], 'Q3', Decimal('25.00')),
+        ], number=1)
+        create_purchase_request(self.pre, [
+            (self.items[0], 'Q1', Decimal('200.00')),
+            (self.items[2], 'Q4', Decimal('300.00')),
+        ], status='Approved', number=2)
+        create_purchase_request(self.pre, [(self.items[0], 'Q1', Decimal('999.00'))], status='Draft', number=3)
+        create_purchase_request(self.pre, [(self.items[3], 'Q2', Decimal('999.00'))], status='Rejected', number=4)
+        create_activity_design(self.pre, [
+            (self.items[0], 'Q1', Decimal('30.00')),
+            (self.items[4], 'Q2', Decimal('40.00')),
+        ], number=1)
+
+    def test_consumption_map_is_two_queries(self):
+        for source in (self.pre, self.pre.line_items.all(), self.items, [item.pk for item in self.items]):
+            with self.assertNumQueries(2):
+                consumption = get_consumption_map(source)
+
+            q1 = consumption[self.items[0].pk]['Q1']
+            self.assertEqual(q1['pr_consumed'], Decimal('300.00'))
+            self.assertEqual(q1['ad_consumed'], Decimal('30.00'))
+            self.assertEqual(q1['pr_count'], 2)
+            self.assertEqual(q1['ad_count'], 1)
+            self.assertEqual(consumption[self.items[2].pk]['Q4']['pr_consumed'], Decimal('300.00'))
+            self.assertEqual(consumption[self.items[4].pk]['Q2']['ad_consumed'], Decimal('40.00'))
+            self.assertNotIn(self.items[3].pk, consumption)
+            self.assertNotIn(self.items[5].pk, consumption)
+
+    def test_consumption_map_of_nothing_is_free(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_consumption_map([]), {})
+
+    def test_attach_pre_consumption_cost_is_independent_of_line_items(self):
+        create_pre(username='second', fiscal_year='2026', line_items=10)
+
+        pres = DepartmentPRE.objects.prefetch_related('line_items').order_by('fiscal_year')
+        # PREs + their line items, then one PR and one AD aggregate
+        with self.assertNumQueries(4):
+            pres = attach_pre_consumption(pres)
+            available = {
+                (line_item.pk, quarter): line_item.get_quarter_available(quarter)
+                for pre in pres
+                for line_item in pre.line_items.all()
+                for quarter in QUARTERS
+            }
+            counts = [
+                (line_item.get_quarter_pr_count(quarter), line_item.get_quarter_ad_count(quarter))
+                for pre in pres
+                for line_item in pre.line_items.all()
+                for quarter in QUARTERS
+            ]
+
+        self.assertEqual(len(available), 16 * 4)
+        self.assertEqual(available[(self.items[0].pk, 'Q1')], Decimal('670.00'))
+        self.assertEqual(available[(self.items[0].pk, 'Q2')], Decimal('950.00'))
+        self.assertEqual(available[(self.items[3].pk, 'Q2')], Decimal('1000.00'))
+        self.assertEqual(available[(self.items[4].pk, 'Q2')], Decimal('960.00'))
+        self.assertIn((2, 1), counts)
+
+    def test_total_remaining_matches_line_item_sums(self):
+        with self.assertNumQueries(3):
+            total_remaining = self.pre.get_total_remaining()
+
+        # 6 items x 4 quarters x 1000, less 300 + 50 + 25 + 300 (PRs) + 70 (ADs)
+        self.assertEqual(total_remaining, Decimal('24000.00') - Decimal('745.00'))
+
+
+class QuarterBalanceTests(TestCase):
+    """Balances are written by allocation/line item writes, never by reads"""
+
+    def setUp(self):
+        self.pre = create_pre(line_items=2)
+        self.first, self.second = self.pre.line_items.order_by('item_name')
+
+    def balance(self, line_item, quarter):
+        return PRELineItemQuarterBalance.objects.get(line_item=line_item, quarter=quarter)
+
+    def test_new_line_items_start_with_balances(self):
+        self.assertEqual(PRELineItemQuarterBalance.objects.filter(line_item__pre=self.pre).count(), 8)
+        self.assertEqual(self.balance(self.first, 'Q3').available, Decimal('1000.00'))
+
+    def test_lock_selects_only_the_requested_quarters(self):
+        keys = {(self.first.pk, 'Q2'), (self.second.pk, 'Q1'), (self.second.pk, 'Q2')}
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            balances = lock_quarter_balances(keys)
+
+        self.assertEqual(set(balances), keys)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"quarter" = ', queries[0]['sql'])
+
+    def test_reads_do_not_write(self):
+        create_purchase_request(self.pre, [(self.first, 'Q1', Decimal('400.00'))])
+        PRELineItemQuarterBalance.objects.filter(line_item=self.first).delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            balances = get_quarter_balances(self.first)
+            self.assertEqual(self.first.get_quarter_available('Q1'), Decimal('600.00'))
+
+        self.assertEqual(balances['Q1'].pr_consumed, Decimal('400.00'))
+        self.assertFalse(any(
+            query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+            for query in queries.captured_queries
+        ))
+        self.assertFalse(PRELineItemQuarterBalance.objects.filter(line_item=self.first).exists())
+
+        rebuild_quarter_balances()
+        self.assertEqual(self.balance(self.first, 'Q1').pr_consumed, Decimal('400.00'))
+        self.assertEqual(find_balance_discrepancies(), [])
+
+    def test_moving_an_allocation_refreshes_both_line_items(self):
+        purchase_request = create_purchase_request(self.pre, [(self.first, 'Q1', Decimal('400.00'))])
+        allocation = PurchaseRequestAllocation.objects.get(purchase_request=purchase_request)
+
+        allocation.pre_line_item = self.second
+        allocation.quarter = 'Q2'
+        allocation.save()
+
+        self.assertEqual(self.balance(self.first, 'Q1').pr_consumed, Decimal('0.00'))
+        self.assertEqual(self.balance(self.first, 'Q1').pr_count, 0)
+        self.assertEqual(self.balance(self.second, 'Q2').pr_consumed, Decimal('400.00'))
+        self.assertEqual(find_balance_discrepancies(), [])
+
+        allocation.delete()
+        self.assertEqual(self.balance(self.second, 'Q2').pr_consumed, Decimal('0.00'))
+
+
+class PRELineItemCreationTests(TestCase):
+    """Uploading a PRE costs the same queries for 1 line item as for 150"""
+
+    def setUp(self):
+        self.pre = create_pre(line_items=0)
+        mooe = PRECategory.objects.get(category_type='MOOE')
+        mooe.subcategories.create(name='Office Supplies', code='OFFICE_SUP')
+        patcher = mock.patch.object(pre_taxonomy_service, '_taxonomy', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def extracted_data(self, count):
+        return {'mooe': [
+            {'item_name': f'Item {index}', 'category': 'office_supplies', 'q1': 100, 'q2': 0, 'q3': 50, 'q4': 0}
+            for index in range(count)
+        ]}
+
+    def insert_queries(self, model, rows):
+        """INSERTs bulk_create needs for `rows` rows: one, unless the backend caps the parameters (SQLite)"""
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        return math.ceil(rows / connection.ops.bulk_batch_size(fields, [None] * rows))
+
+    def expected_queries(self, count, cold):
+        return (
+            (2 if cold else 0)  # Categories and subcategories
+            + self.insert_queries(PRELineItem, count)
+            + self.insert_queries(PRELineItemQuarterBalance, count * 4)
+        )
+
+    def test_query_count_does_not_grow_with_line_items(self):
+        for cold in (True, False):
+            for count in (1, 150):
+                with self.subTest(cold=cold, count=count):
+                    if cold:
+                        pre_taxonomy_service._taxonomy = None
+                    else:
+                        get_pre_taxonomy()
+
+                    with self.assertNumQueries(self.expected_queries(count, cold)):
+                        self.assertEqual(create_pre_line_items(self.pre, self.extracted_data(count)), count)
+
+        if connection.vendor == 'postgresql':
+            self.assertEqual(self.expected_queries(150, cold=True), 4)
+
+        self.assertEqual(self.pre.line_items.count(), 302)
+        self.assertEqual(PRELineItemQuarterBalance.objects.filter(line_item__pre=self.pre).count(), 302 * 4)
+        line_item = self.pre.line_items.last()
+        self.assertEqual(line_item.subcategory.name, 'Office Supplies')
+        self.assertEqual(line_item.get_quarter_available('Q3'), Decimal('50.00'))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Row locking (SELECT ... FOR UPDATE) needs PostgreSQL')
+class ReservationStressTests(TransactionTestCase):
+    """Parallel reservations and status changes never oversubscribe a line item quarter"""
+
+    THREADS = 8
+    RESERVATIONS_PER_THREAD = 10
+
+    def test_parallel_reservations_never_overdraw(self):
+        pre = create_pre(line_items=2, quarter_amount=Decimal('1000.00'))
+        contested, other = pre.line_items.order_by('item_name')
+
+        barrier = threading.Barrier(self.THREADS)
+        lock = threading.Lock()
+        outcome = {'reserved': 0, 'refused': 0, 'errors': []}
+
+        def submit(thread_index):
+            try:
+                barrier.wait()
+                for attempt in range(self.RESERVATIONS_PER_THREAD):
+                    purchase_request = create_purchase_request(
+                        pre, [], number=thread_index * self.RESERVATIONS_PER_THREAD + attempt + 1
+                    )
+                    # 8 x 10 x 30.00 requested against 1000.00; half the
+                    # threads lock the two line items in the opposite order
+                    reservations = [
+                        {'line_item': contested, 'quarter': 'Q1', 'amount': Decimal('30.00')},
+                        {'line_item': other, 'quarter': 'Q1', 'amount': Decimal('10.00')},
+                    ]
+                    if thread_index % 2:
+                        reservations.reverse()
+                    try:
+                        reserve_funds(purchase_request, reservations)
+                        result = 'reserved'
+                    except InsufficientFundsError:
+                        result = 'refused'
+                    with lock:
+                        outcome[result] += 1
+            except Exception as e:
+                with lock:
+                    outcome['errors'].append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(self.THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempts = self.THREADS * self.RESERVATIONS_PER_THREAD
+        print(
+            f"\nreserve_funds: {attempts} reservations from {self.THREADS} threads "
+            f"in {elapsed:.2f}s ({attempts / elapsed:.0f}/s)"
+        )
+
+        self.assertEqual(outcome['errors'], [])
+        self.assertEqual(outcome['reserved'] + outcome['refused'], attempts)
+        self.assertEqual(outcome['reserved'], 33)  # floor(1000 / 30)
+
+        contested_q1 = PRELineItemQuarterBalance.objects.get(line_item=contested, quarter='Q1')
+        other_q1 = PRELineItemQuarterBalance.objects.get(line_item=other, quarter='Q1')
+        self.assertEqual(contested_q1.pr_consumed, Decimal('990.00'))
+        self.assertEqual(other_q1.pr_consumed, Decimal('330.00'))
+        self.assertGreaterEqual(contested_q1.available, 0)
+        self.assertEqual(find_balance_discrepancies(), [])
+
+    def test_status_changes_racing_reservations_keep_balances_exact(self):
+        pre = create_pre(line_items=1, quarter_amount=Decimal('1000.00'))
+        line_item = pre.line_items.get()
+
+        # Ten pending PRs hold 50.00 each; one thread rejects them while the
+        # others keep reserving the released funds
+        pending = [
+            create_purchase_request(pre, [(line_item, 'Q1', Decimal('50.00'))], number=index + 1)
+            for index in range(10)
+        ]
+        reservers = self.THREADS - 1
+        barrier = threading.Barrier(self.THREADS)
+        lock = threading.Lock()
+        outcome = {'reserved': 0, 'refused': 0, 'errors': []}
+
+        def reject():
+            try:
+                barrier.wait()
+                for purchase_request in pending:
+                    purchase_request = PurchaseRequest.objects.get(pk=purchase_request.pk)
+                    purchase_request.status = 'Rejected'
+                    purchase_request.save()
+            except Exception as e:
+                with lock:
+                    outcome['errors'].append(e)
+            finally:
+                connections.close_all()
+
+        def reserve(thread_index):
+            try:
+                barrier.wait()
+                for attempt in range(self.RESERVATIONS_PER_THREAD):
+                    purchase_request = create_purchase_request(
+                        pre, [], number=100 + thread_index * self.RESERVATIONS_PER_THREAD + attempt
+                    )
+                    try:
+                        reserve_funds(purchase_request, [
+                            {'line_item': line_item, 'quarter': 'Q1', 'amount': Decimal('20.00')}
+                        ])
+                        result = 'reserved'
+                    except InsufficientFundsError:
+                        result = 'refused'
+                    with lock:
+                        outcome[result] += 1
+            except Exception as e:
+                with lock:
+                    outcome['errors'].append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=reject)]
+        threads += [threading.Thread(target=reserve, args=(index,)) for index in range(reservers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcome['errors'], [])
+        # A refresh computed before a reservation committed must not
+        # overwrite the balance with a stale total
+        self.assertEqual(find_balance_discrepancies(), [])
+        q1 = PRELineItemQuarterBalance.objects.get(line_item=line_item, quarter='Q1')
+        self.assertEqual(q1.pr_consumed, Decimal('20.00') * outcome['reserved'])
+        self.assertLessEqual(q1.pr_consumed, Decimal('1000.00'))
+
+    def test_other_quarters_of_a_line_item_do_not_wait(self):
+        pre = create_pre(line_items=1, quarter_amount=Decimal('1000.00'))
+        line_item = pre.line_items.get()
+        holder, same_quarter, other_quarter = (
+            create_purchase_request(pre, [], number=index + 1) for index in range(3)
+        )
+
+        locked, release = threading.Event(), threading.Event()
+        errors = []
+
+        def hold_q1():
+            try:
+                with transaction.atomic():
+                    reserve_funds(holder, [{'line_item': line_item, 'quarter': 'Q1', 'amount': Decimal('10.00')}])
+                    locked.set()
+                    release.wait(10)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                locked.set()
+                connections.close_all()
+
+        def reserve(purchase_request, quarter):
+            try:
+                reserve_funds(purchase_request, [{'line_item': line_item, 'quarter': quarter, 'amount': Decimal('10.00')}])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        holding = threading.Thread(target=hold_q1)
+        holding.start()
+        locked.wait(10)
+
+        q2 = threading.Thread(target=reserve, args=(other_quarter, 'Q2'))
+        q1 = threading.Thread(target=reserve, args=(same_quarter, 'Q1'))
+        q2.start()
+        q1.start()
+        q2.join(5)
+        q1.join(0.5)
+        self.assertFalse(q2.is_alive(), 'A Q2 reservation waited on a Q1 lock')
+        self.assertTrue(q1.is_alive(), 'A Q1 reservation did not wait on the Q1 lock')
+
+        release.set()
+        for thread in (holding, q1):
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            dict(PRELineItemQuarterBalance.objects.filter(line_item=line_item).values_list('quarter', 'pr_consumed')),
+            {'Q1': Decimal('20.00'), 'Q2': Decimal('10.00'), 'Q3': Decimal('0.00'), 'Q4': Decimal('0.00')}
+        )
+
+
+class DocumentSequenceTests(TestCase):
+    """Document numbers come from the per-year counter and are assigned last"""
+
+    def test_pre_number_uses_the_fiscal_year(self):
+        first = create_pre(fiscal_year='2031', line_items=0)
+        second = create_pre(username='second', fiscal_year='2031', line_items=0)
+
+        self.assertEqual(generate_pre_number(first), 'PRE-2031-0001')
+        self.assertEqual(generate_pre_number(second), 'PRE-2031-0002')
+        self.assertEqual(generate_pre_number(DepartmentPRE.objects.get(pk=first.pk)), 'PRE-2031-0001')
+
+    def test_rolled_back_number_is_released(self):
+        pre = create_pre(line_items=0)
+        try:
+            with transaction.atomic():
+                purchase_request = create_purchase_request(pre, [])
+                purchase_request.pr_number = provisional_number('PR')
+                assign_number(purchase_request, 'PR', year=2031)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        purchase_request = create_purchase_request(pre, [], number=2)
+        self.assertEqual(assign_number(purchase_request, 'PR', year=2031), 'PR-2031-0001')
+        self.assertEqual(PurchaseRequest.objects.get(pk=purchase_request.pk).pr_number, 'PR-2031-0001')
+
+
+class AdminDashboardMetricsTests(TestCase):
+    """The admin dashboard costs a fixed number of queries at any size"""
+
+    # (pr_amount_used, ad_amount_used) of a 1000.00 allocation; low budget
+    # means spent > 0.8 x allocated, so exactly 800.00 is not low
+    USAGE_PATTERNS = [
+        (Decimal('0.00'), Decimal('0.00')),
+        (Decimal('800.00'), Decimal('0.00')),
+        (Decimal('500.00'), Decimal('300.01')),
+        (Decimal('0.00'), Decimal('1000.00')),
+    ]
+
+    def create_allocations(self, start, count):
+        users = User.objects.bulk_create([
+            User(
+                username=f'dept{index}',
+                fullname=f'Department {index}',
+                email=f'dept{index}@example.com',
+                department=f'Department {index % 50}'
+            )
+            for index in range(start, start + count)
+        ])
+        BudgetAllocation.objects.bulk_create([
+            BudgetAllocation(
+                approved_budget=self.approved_budget,
+                department=user.department,
+                end_user=user,
+                allocated_amount=Decimal('1000.00'),
+                remaining_balance=Decimal('1000.00') - pr_used - ad_used,
+                pr_amount_used=pr_used,
+                ad_amount_used=ad_used
+            )
+            for index, user in enumerate(users, start)
+            for pr_used, ad_used in [self.USAGE_PATTERNS[index % len(self.USAGE_PATTERNS)]]
+        ])
+
+    def test_query_budget_is_fixed_up_to_10k_allocations(self):
+        self.assertEqual(DASHBOARD_QUERY_BUDGET, 6)
+        self.approved_budget = ApprovedBudget.objects.create(
+            title='Budget 2025',
+            fiscal_year='2025',
+            amount=Decimal('100000000.00'),
+            remaining_budget=Decimal('0.00')
+        )
+
+        for start, count in ((0, 8), (8, 9992)):
+            self.create_allocations(start, count)
+            total = start + count
+
+            with self.assertNumQueries(DASHBOARD_QUERY_BUDGET):
+                metrics = get_admin_dashboard_metrics('all')
+
+            self.assertEqual(len(metrics['budget_allocated']), total)
+            self.assertEqual(metrics['total_budget'], Decimal('1000.00') * total)
+            self.assertEqual(metrics['active_departments'], min(total, 50))
+            # Patterns 2 (800.01 spent) and 3 (1000.00 spent) of every four
+            self.assertEqual(metrics['low_budget_depts'], total // 2)
+
+    def test_low_budget_threshold(self):
+        self.approved_budget = ApprovedBudget.objects.create(
+            title='Budget 2025',
+            fiscal_year='2025',
+            amount=Decimal('100000.00'),
+            remaining_budget=Decimal('0.00')
+        )
+        self.create_allocations(0, 4)
+
+        rows = {row['end_user'].username: row for row in get_admin_dashboard_metrics()['budget_allocated']}
+        self.assertEqual(rows['dept1']['spent'], Decimal('800.00'))
+        self.assertEqual(rows['dept1']['remaining_budget'], Decimal('200.00'))
+        self.assertEqual(rows['dept2']['spent'], Decimal('800.01'))
+        self.assertEqual(get_admin_dashboard_metrics()['low_budget_depts'], 2)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'dashboards': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'archive-index-tests'},
+})
+class ArchivedIndexTests(TestCase):
+    """The archived id index answers without queries and is invalidated across processes"""
+
+    def setUp(self):
+        archive_index_service._indexes.clear()
+        self.addCleanup(archive_index_service._indexes.clear)
+        pre = create_pre(line_items=0)
+        self.purchase_request = create_purchase_request(pre, [])
+
+    def test_active_records_cost_no_query(self):
+        self.assertFalse(is_archived(PurchaseRequest, self.purchase_request.pk))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_archived(PurchaseRequest, str(self.purchase_request.pk)))
+            self.assertFalse(is_archived(PurchaseRequest, 'not-a-uuid'))
+
+    def test_invalidation_reaches_other_processes(self):
+        self.assertFalse(is_archived(PurchaseRequest, self.purchase_request.pk))
+        # The index as another worker process still holds it
+        other_worker_index = dict(archive_index_service._indexes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PurchaseRequest.all_objects.filter(pk=self.purchase_request.pk).update(is_archived=True)
+            invalidate_archived_index(PurchaseRequest)
+
+        archive_index_service._indexes.clear()
+        archive_index_service._indexes.update(other_worker_index)
+        self.assertTrue(is_archived(PurchaseRequest, self.purchase_request.pk))
+
+    def test_index_is_kept_until_invalidated(self):
+        self.assertFalse(is_archived(PurchaseRequest, self.purchase_request.pk))
+        PurchaseRequest.all_objects.filter(pk=self.purchase_request.pk).update(is_archived=True)
+        self.assertFalse(is_archived(PurchaseRequest, self.purchase_request.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_archived_index()
+        self.assertTrue(is_archived(PurchaseRequest, self.purchase_request.pk))
+
+
+class TrackedStatusTests(TestCase):
+    """The status signals know the stored status without re-reading the row"""
+
+    def setUp(self):
+        self.pre = create_pre(line_items=1)
+        self.line_item = self.pre.line_items.get()
+        self.purchase_request = create_purchase_request(
+            self.pre, [(self.line_item, 'Q1', Decimal('100.00'))]
+        )
+        self.table = PurchaseRequest._meta.db_table
+
+    def selects_of_purchase_requests(self, queries):
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{self.table}"' in query['sql']
+        ]
+
+    def test_status_save_does_not_select_the_row(self):
+        purchase_request = PurchaseRequest.objects.get(pk=self.purchase_request.pk)
+        purchase_request.status = 'Rejected'
+        with CaptureQueriesContext(connection) as queries:
+            purchase_request.save()
+
+        self.assertEqual(self.selects_of_purchase_requests(queries), [])
+        self.assertEqual(purchase_request._old_status, 'Pending')
+
+    def test_creation_does_not_select_the_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            purchase_request = create_purchase_request(self.pre, [], number=2)
+
+        self.assertEqual(self.selects_of_purchase_requests(queries), [])
+        self.assertIsNone(purchase_request._old_status)
+
+    def test_previous_status_after_save(self):
+        purchase_request = self.purchase_request
+        self.assertEqual(purchase_request.previous('status'), 'Pending')
+
+        purchase_request.status = 'Rejected'
+        purchase_request.save()
+        self.assertEqual(purchase_request._old_status, 'Pending')
+        self.assertEqual(purchase_request.previous('status'), 'Rejected')
+        self.assertFalse(purchase_request.has_changed('status'))
+
+        # Fields left out of update_fields keep their snapshot
+        purchase_request.status = 'Pending'
+        purchase_request.save(update_fields=['purpose'])
+        self.assertEqual(purchase_request.previous('status'), 'Rejected')
+        self.assertTrue(purchase_request.has_changed('status'))
+
+    def test_previous_status_after_refresh(self):
+        purchase_request = PurchaseRequest.objects.get(pk=self.purchase_request.pk)
+        PurchaseRequest.objects.filter(pk=purchase_request.pk).update(status='Rejected')
+
+        purchase_request.refresh_from_db()
+        self.assertEqual(purchase_request.previous('status'), 'Rejected')
+
+        purchase_request.status = 'Pending'
+        purchase_request.save()
+        self.assertEqual(purchase_request._old_status, 'Rejected')
+
+    def test_previous_status_of_hand_built_instances(self):
+        stored = PurchaseRequest.objects.filter(pk=self.purchase_request.pk).values().get()
+        stored['status'] = 'Rejected'
+        purchase_request = PurchaseRequest(**stored)
+        self.assertFalse(purchase_request.is_new())
+        self.assertFalse(purchase_request.is_tracked('status'))
+
+        # Nothing in memory says what the row holds: one lookup
+        with CaptureQueriesContext(connection) as queries:
+            purchase_request.save(force_update=True)
+        self.assertEqual(len(self.selects_of_purchase_requests(queries)), 1)
+        self.assertEqual(purchase_request._old_status, 'Pending')
+        self.assertEqual(purchase_request.previous('status'), 'Rejected')
+
+    def test_deferred_status_is_read_once(self):
+        purchase_request = PurchaseRequest.objects.defer('status').get(pk=self.purchase_request.pk)
+        self.assertFalse(purchase_request.is_tracked('status'))
+
+        purchase_request.purpose = 'Equipment'
+        purchase_request.save(update_fields=['purpose'])
+        self.assertEqual(purchase_request._old_status, 'Pending')
+
+
+class RunConversionJobsCommandTests(TestCase):
+    """The conversion worker requeues stuck jobs on every pass of its loop"""
+
+    def stuck_job(self):
+        return ConversionJob.objects.create(
+            target='pr',
+            object_id=uuid.uuid4(),
+            status='RUNNING',
+            attempts=1,
+            started_at=timezone.now() - timedelta(minutes=CONVERSION_STALE_MINUTES + 1)
+        )
+
+    def test_loop_requeues_stale_jobs_on_every_pass(self):
+        first = self.stuck_job()
+        later = []
+
+        def sleep(seconds):
+            # Between passes, another worker dies with a job RUNNING
+            if later:
+                raise StopLoop
+            later.append(self.stuck_job())
+
+        command = 'apps.budgets.management.commands.run_conversion_jobs'
+        with mock.patch(f'{command}.run_conversion_job', return_value=None) as run, mock.patch(f'{command}.time.sleep', sleep):
+            with self.assertRaises(StopLoop):
+                call_command('run_conversion_jobs', '--loop', stdout=StringIO())
+
+        self.assertEqual(
+            set(ConversionJob.objects.values_list('pk', 'status')),
+            {(first.pk, 'PENDING'), (later[0].pk, 'PENDING')}
+        )
+        self.assertEqual({call.args[0] for call in run.call_args_list}, {first.pk, later[0].pk})
+
+
+class ExportJobTests(TestCase):
+    """Identical exports share a job; jobs that lost their worker are requeued"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            'exporter', 'Export User', 'exporter@example.com', 'password', department='IT'
+        )
+        patcher = mock.patch('apps.budgets.services.export_job_service.submit_export_job')
+        self.submit = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def enqueue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return enqueue_export('budget_excel', self.user, {'year': '2025'}, row_estimate=9000)
+
+    def test_identical_exports_reuse_the_job(self):
+        job = self.enqueue()
+        ExportJob.objects.filter(pk=job.pk).update(status='RUNNING', started_at=timezone.now())
+
+        self.assertEqual(self.enqueue().pk, job.pk)
+        self.assertEqual(ExportJob.objects.count(), 1)
+        self.assertEqual(self.submit.call_count, 1)
+        self.assertEqual(ExportJob.objects.get().status, 'RUNNING')
+
+    def test_stale_running_job_is_requeued_before_reuse(self):
+        job = self.enqueue()
+        lost_at = timezone.now() - timedelta(minutes=EXPORT_STALE_MINUTES + 1)
+        ExportJob.objects.filter(pk=job.pk).update(status='RUNNING', started_at=lost_at)
+
+        reused = self.enqueue()
+        self.assertEqual(reused.pk, job.pk)
+        self.assertEqual(reused.status, 'PENDING')
+        self.assertEqual(ExportJob.objects.get().status, 'PENDING')
+        self.assertEqual([call.args[0] for call in self.submit.call_args_list], [job.pk, job.pk])
+
+    def test_stale_pending_job_is_resubmitted(self):
+        job = self.enqueue()
+        queued_at = timezone.now() - timedelta(minutes=EXPORT_STALE_MINUTES + 1)
+        ExportJob.objects.filter(pk=job.pk).update(created_at=queued_at)
+
+        self.assertEqual(self.enqueue().pk, job.pk)
+        self.assertEqual(self.submit.call_count, 2)
+
+    def test_loop_requeues_stale_jobs_on_every_pass(self):
+        job = self.enqueue()
+        lost_at = timezone.now() - timedelta(minutes=EXPORT_STALE_MINUTES + 1)
+        ExportJob.objects.filter(pk=job.pk).update(status='RUNNING', started_at=lost_at)
+        passes = []
+
+        def sleep(seconds):
+            passes.append(ExportJob.objects.get(pk=job.pk).status)
+            if len(passes) == 2:
+                raise StopLoop
+            # The worker rendering it dies between passes
+            ExportJob.objects.filter(pk=job.pk).update(status='RUNNING', started_at=lost_at)
+
+        command = 'apps.budgets.management.commands.run_export_jobs'
+        with mock.patch(f'{command}.run_export_job', return_value=None) as run, \
+                mock.patch(f'{command}.time.sleep', sleep):
+            with self.assertRaises(StopLoop):
+                call_command('run_export_jobs', '--loop', stdout=StringIO())
+
+        self.assertEqual(passes, ['PENDING', 'PENDING'])
+        self.assertEqual([call.args[0] for call in run.call_args_list], [job.pk, job.pk])
@@ -1,3 +1,53 @@
-from django.shortcuts import render
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
 
-# Create your views here.
+from .models import ExportJob
+from .services.export_job_service import can_access_export, get_export_status
+
+
+# Shared helpers behind the export job endpoints of the admin panel and the
+# end user app; each app wraps them in its own role_required views and urls.
+
+def _wants_json(request):
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest' or
+        'application/json' in request.headers.get('accept', '')
+    )
+
+
+def _job_urls(job, url_prefix):
+    return {
+        'status_url': reverse(f'{url_prefix}export_job_status', args=[job.pk]),
+        'download_url': reverse(f'{url_prefix}export_job_download', args=[job.pk]),
+    }
+
+
+def export_job_response(request, job, url_prefix=''):
+    """
+    Response of an export that went to the worker: 202 JSON for AJAX callers,
+    otherwise a page that polls the job and starts the download when ready.
+    """
+    payload = {**get_export_status(job), **_job_urls(job, url_prefix)}
+    if _wants_json(request):
+        return JsonResponse(payload, status=202)
+    return render(request, 'budgets/export_job.html', {'job': job, **payload}, status=202)
+
+
+def _get_job(request, job_id):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if not can_access_export(job, request.user):
+        raise Http404("Export not found")
+    return job
+
+
+def export_job_status_response(request, job_id, url_prefix=''):
+    job = _get_job(request, job_id)
+    return JsonResponse({**get_export_status(job), **_job_urls(job, url_prefix)})
+
+
+def export_job_download_response(request, job_id):
+    job = _get_job(request, job_id)
+    if job.status != 'COMPLETED' or not job.file:
+        return JsonResponse({'error': f'Export is {job.status.lower()}', **get_export_status(job)}, status=409)
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename, content_type=job.content_type)
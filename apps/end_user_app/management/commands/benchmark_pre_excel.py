@@ -0,0 +1,101 @@
+"""
+Management command to measure PRE Excel downloads per second.
+
+Each download fills the Departmental PRE template and saves it to memory,
+as download_pre_excel does. It is timed twice: once parsing the template
+with load_workbook() on every download (what a per-request template copy
+costs) and once through the cached template in utils/pre_excel_writer.
+
+Usage:
+    python manage.py benchmark_pre_excel                     # Sample PRE from testdata
+    python manage.py benchmark_pre_excel --pre 12 --downloads 50
+    python manage.py benchmark_pre_excel --concurrency 4 --skip-reload
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import load_workbook
+
+from apps.end_user_app.models import DepartmentPRE
+from apps.end_user_app.utils import pre_excel_writer
+
+
+SAMPLE_PRE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'testdata',
+    'pre_excel_expected_cells.json',
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PRE Excel downloads: template parsed per download vs the cached template'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pre', type=int, help='DepartmentPRE id to fill (default: the testdata sample PRE)')
+        parser.add_argument('--downloads', type=int, default=20, help='Downloads per mode (default: 20)')
+        parser.add_argument('--concurrency', type=int, default=1, help='Parallel downloads (default: 1)')
+        parser.add_argument('--skip-reload', action='store_true', help='Only run the cached-template downloads')
+
+    def handle(self, *args, **options):
+        if options['downloads'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--downloads and --concurrency must be at least 1')
+        if not os.path.isfile(pre_excel_writer.TEMPLATE_PATH):
+            raise CommandError(f'PRE template not found: {pre_excel_writer.TEMPLATE_PATH}')
+
+        pre = self._get_pre(options['pre'])
+        self.stdout.write(
+            f"Filling {options['downloads']} PRE workbook(s) per mode for '{pre.department}' "
+            f"with {options['concurrency']} in parallel"
+        )
+
+        if not options['skip_reload']:
+            def load_from_disk():
+                return load_workbook(pre_excel_writer.TEMPLATE_PATH)
+
+            with mock.patch.object(pre_excel_writer, 'load_template', load_from_disk):
+                self._report('Template parsed per download', self._run(pre, options))
+
+        started = time.perf_counter()
+        pre_excel_writer.load_template()
+        self.stdout.write(f'Template cache warm-up: {time.perf_counter() - started:.2f}s')
+        self._report('Cached template', self._run(pre, options))
+
+    def _get_pre(self, pre_id):
+        if pre_id is not None:
+            try:
+                return DepartmentPRE.objects.get(pk=pre_id)
+            except DepartmentPRE.DoesNotExist:
+                raise CommandError(f'DepartmentPRE {pre_id} does not exist')
+        with open(SAMPLE_PRE, encoding='utf-8') as f:
+            return DepartmentPRE(**json.load(f)['pre'])
+
+    def _run(self, pre, options):
+        """Fill and save `downloads` workbooks; (seconds, per-download times, bytes per download)"""
+        timings, sizes = [], []
+
+        def download(_):
+            download_started = time.perf_counter()
+            output = BytesIO()
+            pre_excel_writer.render_pre_excel(pre, output)
+            timings.append(time.perf_counter() - download_started)
+            sizes.append(output.tell())
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(download, range(options['downloads'])))
+        return time.perf_counter() - started, timings, sizes
+
+    def _report(self, label, run):
+        elapsed, timings, sizes = run
+        timings.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {label}: {len(timings)} download(s) in {elapsed:.2f}s '
+            f'({len(timings) / elapsed:.2f} downloads/s, median {timings[len(timings) // 2] * 1000:.0f} ms, '
+            f'max {timings[-1] * 1000:.0f} ms, {sizes[0] // 1024} KB each)'
+        ))
@@ -0,0 +1,107 @@
+"""
+Management command to compare the PRE upload parser with a whole-workbook read.
+
+Every file is parsed twice: once loading the whole workbook and reading each
+mapped cell by reference (what the parser did before its read-only cell
+plan), and once through parse_pre_excel(). The time per file and the peak
+traced memory of one parse are reported, and the values read by both are
+checked to be the same.
+
+Usage:
+    python manage.py benchmark_pre_parser                    # Sample PRE from testdata
+    python manage.py benchmark_pre_parser media/pre_uploads/2025/11/*.xlsx --repeat 5
+"""
+
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import load_workbook
+
+from apps.end_user_app.utils.pre_parser import PRE_SECTIONS, PREParser, parse_pre_excel
+
+
+SAMPLE_PRE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'testdata',
+    'pre_sample.xlsx',
+)
+
+
+def read_whole_workbook(path):
+    """Quarter and total values of every plan item, read from a fully loaded workbook"""
+    worksheet = load_workbook(path, data_only=True).active
+    values = []
+    for section in PRE_SECTIONS:
+        groups = PREParser.CELL_MAPPINGS[section]
+        if not isinstance(groups, dict):
+            groups = {None: groups}
+        for mappings in groups.values():
+            for _, *cell_refs in mappings:
+                values.append([PREParser._parse_value(worksheet[cell_ref].value) for cell_ref in cell_refs])
+    return values
+
+
+def read_with_plan(path):
+    """The same values through the parser's read-only cell plan"""
+    parser = PREParser(path)
+    if not parser.validate_template():
+        raise CommandError(f'{path}: {"; ".join(parser.errors)}')
+    return [
+        [parser._parse_value(parser._value_at(row, col)) for row, col in item.cells]
+        for item in parser.PLAN.items
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PRE upload parsing: whole workbook vs the read-only cell plan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', type=str, help='PRE workbooks (default: the testdata sample PRE)')
+        parser.add_argument('--repeat', type=int, default=3, help='Parses of every file per mode (default: 3)')
+
+    def handle(self, *args, **options):
+        files = [os.path.abspath(path) for path in options['files'] or [SAMPLE_PRE]]
+        for path in files:
+            if not os.path.isfile(path):
+                raise CommandError(f'File not found: {path}')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        self.stdout.write(f"Parsing {len(files)} file(s) {options['repeat']} time(s) per mode")
+
+        mismatches = [
+            os.path.basename(path) for path in files
+            if read_whole_workbook(path) != read_with_plan(path)
+        ]
+        for name in mismatches:
+            self.stdout.write(self.style.ERROR(f'[X] {name}: the two modes read different values'))
+
+        self._report('Whole workbook', self._run(files, options['repeat'], read_whole_workbook))
+        self._report('Read-only plan', self._run(files, options['repeat'], parse_pre_excel))
+
+    def _run(self, files, repeat, parse):
+        """(per-parse times, peak traced bytes of one parse of each file)"""
+        timings, peaks = [], []
+        for path in files:
+            tracemalloc.start()
+            try:
+                parse(path)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            for _ in range(repeat):
+                started = time.perf_counter()
+                parse(path)
+                timings.append(time.perf_counter() - started)
+        return timings, peaks
+
+    def _report(self, label, run):
+        timings, peaks = run
+        timings.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f'[OK] {label}: {len(timings)} parse(s), '
+            f'mean {sum(timings) / len(timings) * 1000:.0f} ms, median {timings[len(timings) // 2] * 1000:.0f} ms, '
+            f'max {timings[-1] * 1000:.0f} ms per file, peak memory {max(peaks) / 1024 / 1024:.1f} MiB'
+        ))
@@ -1,3 +1,228 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from docx import Document
+from docxtpl import DocxTemplate
+from jinja2 import TemplateSyntaxError
+from openpyxl import load_workbook
+
+from apps.budgets.models import DocumentSequence, PRDraft, PurchaseRequest
+from apps.budgets.tests import create_pre
+from apps.end_user_app.models import DepartmentPRE as LegacyDepartmentPRE
+from apps.end_user_app.utils import docx_templates
+from apps.end_user_app.utils.docx_templates import get_docx_template
+from apps.end_user_app.utils.pre_excel_writer import TEMPLATE_PATH, fill_pre_workbook
+from apps.end_user_app.utils.pre_parser import parse_pre_excel, parse_pre_file
+
+
+TESTDATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+
+class PurchaseRequestSubmitTests(TestCase):
+    """The PR number is taken at the end of the submission transaction"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.pre = create_pre(line_items=1)
+        self.line_item = self.pre.line_items.get()
+        self.user = self.pre.submitted_by
+        self.client.force_login(self.user)
+
+        draft = PRDraft.objects.create(user=self.user, pr_filename='pr.docx')
+        draft.pr_file.save('pr.docx', ContentFile(b'PR document'), save=True)
+
+    def submit(self):
+        return self.client.post(reverse('purchase_request_upload'), {
+            'action': 'submit',
+            'budget_allocation': self.pre.budget_allocation_id,
+            'source_of_fund': f'{self.pre.pk}|{self.line_item.pk}|Q1',
+            'total_amount': '250.00',
+            'purpose': 'Office supplies',
+        })
+
+    def test_number_is_the_last_write_of_the_submission(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.submit()
+
+        pr = PurchaseRequest.objects.get()
+        self.assertRedirects(response, reverse('preview_submitted_pr', args=[pr.pk]), fetch_redirect_response=False)
+        self.assertRegex(pr.pr_number, r'^PR-\d{4}-0001$')
+        self.assertEqual(pr.pre_allocations.get().allocated_amount, Decimal('250.00'))
+
+        # Between the counter increment and the end of the submission's
+        # atomic block, only the PR's own number is written
+        statements = [query['sql'] for query in queries.captured_queries]
+        sequence_table = DocumentSequence._meta.db_table
+        increment = max(
+            index for index, sql in enumerate(statements)
+            if sql.startswith('UPDATE') and sequence_table in sql
+        )
+        release = next(
+            index for index, sql in enumerate(statements)
+            if index > increment and sql.startswith('RELEASE SAVEPOINT')
+        )
+        writes = [
+            sql for sql in statements[increment + 1:release]
+            if sql.startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertIn(PurchaseRequest._meta.db_table, writes[0])
+        self.assertIn('pr_number', writes[0])
+
+    def test_numbers_are_consecutive(self):
+        self.submit()
+        PRDraft.objects.create(user=self.user, pr_filename='pr.docx').pr_file.save(
+            'pr.docx', ContentFile(b'PR document'), save=True
+        )
+        self.submit()
+
+        numbers = sorted(PurchaseRequest.objects.values_list('pr_number', flat=True))
+        self.assertEqual([number[-4:] for number in numbers], ['0001', '0002'])
+
+
+class PREExcelWriterTests(TestCase):
+    """The filled PRE workbook matches the checked-in cell map cell by cell"""
+
+    def setUp(self):
+        with open(os.path.join(TESTDATA_DIR, 'pre_excel_expected_cells.json'), encoding='utf-8') as f:
+            self.golden = json.load(f)
+
+    def test_workbook_matches_expected_cells(self):
+        pre = LegacyDepartmentPRE(**self.golden['pre'])
+        filled = fill_pre_workbook(pre)
+        template = load_workbook(TEMPLATE_PATH)
+
+        self.assertEqual(filled.sheetnames, template.sheetnames)
+        for name in template.sheetnames:
+            expected_sheet, filled_sheet = template[name], filled[name]
+            expected_cells = self.golden['cells'] if name == self.golden['sheet'] else {}
+
+            coordinates = {cell.coordinate for row in expected_sheet.iter_rows() for cell in row}
+            coordinates |= {cell.coordinate for row in filled_sheet.iter_rows() for cell in row}
+            coordinates |= set(expected_cells)
+            for coordinate in sorted(coordinates):
+                expected = expected_cells.get(coordinate, expected_sheet[coordinate].value)
+                self.assertEqual(filled_sheet[coordinate].value, expected, f'{name}!{coordinate}')
+
+            self.assertEqual(
+                sorted(map(str, filled_sheet.merged_cells.ranges)),
+                sorted(map(str, expected_sheet.merged_cells.ranges))
+            )
+            self.assertEqual(len(filled_sheet._images), len(expected_sheet._images))
+
+        # The signatory labels ("Prepared by:") are in column B of the
+        # template, where the writer (like the xlwings version) doesn't look
+        self.assertNotIn(pre.prepared_by_name, {
+            cell.value for row in filled[self.golden['sheet']].iter_rows() for cell in row
+        })
+
+    def test_copies_are_independent(self):
+        fill_pre_workbook(LegacyDepartmentPRE(**self.golden['pre']))
+        blank = fill_pre_workbook(LegacyDepartmentPRE(department='Library', data={}))
+
+        sheet = blank[self.golden['sheet']]
+        template = load_workbook(TEMPLATE_PATH)[self.golden['sheet']]
+        self.assertEqual(sheet['C5'].value, 'Library')
+        for coordinate in set(self.golden['cells']) - {'C5'}:
+            self.assertEqual(sheet[coordinate].value, template[coordinate].value, coordinate)
+
+
+class PREParserTests(TestCase):
+    """The read-only parser returns what the whole-workbook parser returned"""
+
+    SAMPLE = os.path.join(TESTDATA_DIR, 'pre_sample.xlsx')
+
+    def setUp(self):
+        with open(os.path.join(TESTDATA_DIR, 'pre_sample_expected.json'), encoding='utf-8') as f:
+            self.golden = json.load(f)['result']
+
+    def test_output_matches_the_previous_parser(self):
+        result = parse_pre_excel(self.SAMPLE)
+
+        self.assertIsInstance(result['grand_total'], Decimal)
+        self.assertIsInstance(result['data']['mooe'][0]['q1'], Decimal)
+        # Decimals compare by their str(), so 1434.00 must not come back as 1434
+        self.assertEqual(json.loads(json.dumps(result, default=str)), self.golden)
+
+    def test_parse_pre_file_adds_the_header(self):
+        result = parse_pre_file(self.SAMPLE)
+
+        self.assertEqual(result['header'], {
+            'department': 'College of Engineering',
+            'program': 'Higher Education',
+            'fund_source': 'STF',
+        })
+        self.assertEqual(result['data'], parse_pre_excel(self.SAMPLE)['data'])
+
+
+class DocxTemplateRegistryTests(TestCase):
+    """Registry renders reuse compiled parts but match a plain DocxTemplate render"""
+
+    context = {
+        'title_of_activity': 'Research Colloquium & Workshop <2025>',
+        'schedule_date': 'March 03, 2025',
+        'venue': 'AVR',
+        'rationale': 'Line one\nLine two',
+        'objectives': 'Objectives',
+        'methodology': 'Lecture',
+        'participants': 'Faculty',
+        'resource_persons': 'Dr. Cruz',
+        'materials_needed': 'Projector',
+        'evaluation_plan': 'Survey',
+        'source_of_fund_display': 'MOOE - Training Expenses',
+        'total_amount': '12,500.00',
+        'requested_by_name': 'Juan Dela Cruz',
+        'date_prepared': 'February 01, 2025',
+        'sessions': [{'order': 1, 'content': 'Opening'}, {'order': 2, 'content': 'Plenary'}],
+    }
+
+    def parts(self, template):
+        return {str(part.partname): part.blob for part in template.docx.part.package.iter_parts()}
+
+    def assertRendersLikeDocxTemplate(self, name, **options):
+        expected = DocxTemplate(os.path.join(docx_templates.TEMPLATE_DIR, name))
+        expected.render(self.context, **options)
+
+        # The first render compiles the parts, the second reuses them
+        for _ in range(2):
+            template = get_docx_template(name)
+            template.render(self.context, **options)
+            self.assertEqual(self.parts(template), self.parts(expected))
+
+    def test_activity_design_template(self):
+        self.assertRendersLikeDocxTemplate('activity_design_template.docx')
+
+    def test_activity_design_template_autoescaped(self):
+        self.assertRendersLikeDocxTemplate('activity_design_template.docx', autoescape=True)
+
+    def test_template_errors_carry_docx_context(self):
+        template_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, template_dir, ignore_errors=True)
+        document = Document()
+        for text in ('Title', 'Venue: {{ venue }}', 'Broken {{ venue( }}', 'Footer'):
+            document.add_paragraph(text)
+        document.save(os.path.join(template_dir, 'broken.docx'))
+
+        with self.assertRaises(TemplateSyntaxError) as plain:
+            DocxTemplate(os.path.join(template_dir, 'broken.docx')).render(self.context)
+
+        with mock.patch.object(docx_templates, 'TEMPLATE_DIR', template_dir):
+            with self.assertRaises(TemplateSyntaxError) as registry:
+                get_docx_template('broken.docx').render(self.context)
+
+        self.assertEqual(registry.exception.lineno, plain.exception.lineno)
+        self.assertEqual(list(registry.exception.docx_context), list(plain.exception.docx_context))
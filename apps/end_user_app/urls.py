@@ -45,4 +45,7 @@ urlpatterns = [
     path('budget/reports/', views.budget_reports, name='budget_reports'),
     path('budget/export/excel/', views.export_budget_excel, name='export_budget_excel'),
     path('budget/export/pdf/', views.export_budget_pdf, name='export_budget_pdf'),
+    path('budget/export/enqueue/', views.enqueue_budget_export, name='enqueue_budget_export'),
+    path('exports/<uuid:job_id>/status/', views.export_job_status, name='export_job_status'),
+    path('exports/<uuid:job_id>/download/', views.export_job_download, name='export_job_download'),
 ]
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+DOCX Template Registry
+Keeps Word templates from document_templates/ parsed and compiled in memory,
+so each download renders from a copy instead of re-reading the file
+"""
+
+import copy
+import os
+import re
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from docx import Document
+from docxtpl import DocxTemplate
+from jinja2 import Environment, TemplateError
+
+
+TEMPLATE_DIR = getattr(
+    settings,
+    'DOCUMENT_TEMPLATES_DIR',
+    os.path.join(settings.BASE_DIR, 'document_templates')
+)
+
+# The body and header/footer XML of a template is patched for jinja2 and
+# compiled on the first render only: that work depends on the template,
+# not on the context, and is most of docxtpl's render time.
+# RegistryDocxTemplate follows DocxTemplate.render_xml_part() of the docxtpl
+# version pinned in requirements.txt (0.20.2); check it when upgrading.
+BODY_PART = 'body'
+
+
+def _add_docx_context(exc, xml):
+    """Attach the template lines around a jinja2 error, as docxtpl does"""
+    if getattr(exc, 'lineno', None) is not None:
+        line_number = max(exc.lineno - 4, 0)
+        exc.docx_context = map(
+            lambda x: re.sub(r"<[^>]+>", "", x),
+            xml.splitlines()[line_number:line_number + 7]
+        )
+
+
+class CompiledTemplate:
+    """A template file parsed once, with its parts compiled on first use"""
+
+    def __init__(self, path, mtime):
+        self.path = path
+        self.mtime = mtime
+        with open(path, 'rb') as f:
+            self.document = Document(BytesIO(f.read()))
+        self.parts = {}  # (part key, autoescape) -> (jinja2 Template, encoding, patched xml)
+        self.lock = threading.Lock()
+
+    def get_part(self, key, autoescape, build):
+        """
+        The compiled template of a part, its encoding and source;
+        build() returns (patched xml, encoding)
+        """
+        compiled = self.parts.get((key, autoescape))
+        if compiled is None:
+            with self.lock:
+                compiled = self.parts.get((key, autoescape))
+                if compiled is None:
+                    xml, encoding = build()
+                    xml = re.sub(r"<w:p([ >])", r"\n<w:p\1", xml)
+                    try:
+                        template = Environment(autoescape=autoescape).from_string(xml)
+                    except TemplateError as exc:
+                        _add_docx_context(exc, xml)
+                        raise
+                    compiled = self.parts[(key, autoescape)] = (template, encoding, xml)
+        return compiled
+
+
+class RegistryDocxTemplate(DocxTemplate):
+    """
+    DocxTemplate rendering a copy of a registered template.
+
+    Behaves like DocxTemplate(path); renders without a custom jinja_env reuse
+    the template's compiled parts.
+    """
+
+    def __init__(self, compiled):
+        super().__init__(compiled.path)
+        self.compiled = compiled
+        self.docx = copy.deepcopy(compiled.document)
+        self.autoescape = None
+
+    def render(self, context, jinja_env=None, autoescape=False):
+        # Parts compiled for a caller's environment (filters, globals) can't be shared
+        self.autoescape = bool(autoescape) if jinja_env is None else None
+        super().render(context, jinja_env, autoescape)
+
+    def build_xml(self, context, jinja_env=None):
+        if self.autoescape is None:
+            return super().build_xml(context, jinja_env)
+
+        compiled = self.compiled.get_part(
+            BODY_PART,
+            self.autoescape,
+            lambda: (self.patch_xml(self.get_xml()), None)
+        )
+        return self._render_part(compiled, self.docx._part, context)
+
+    def build_headers_footers_xml(self, context, uri, jinja_env=None):
+        if self.autoescape is None:
+            yield from super().build_headers_footers_xml(context, uri, jinja_env)
+            return
+
+        for relKey, part in self.get_headers_footers(uri):
+            def build(part=part):
+                xml = self.get_part_xml(part)
+                return self.patch_xml(xml), self.get_headers_footers_encoding(xml)
+
+            compiled = self.compiled.get_part((uri, relKey), self.autoescape, build)
+            yield relKey, self._render_part(compiled, part, context).encode(compiled[1])
+
+    def _render_part(self, compiled, part, context):
+        # Same error context and post-processing as DocxTemplate.render_xml_part()
+        template, _, xml = compiled
+        self.current_rendering_part = part
+        try:
+            dst_xml = template.render(context)
+        except TemplateError as exc:
+            _add_docx_context(exc, xml)
+            raise
+        dst_xml = re.sub(r"\n<w:p([ >])", r"<w:p\1", dst_xml)
+        dst_xml = (
+            dst_xml.replace("{_{", "{{")
+            .replace("}_}", "}}")
+            .replace("{_%", "{%")
+            .replace("%_}", "%}")
+        )
+        return self.resolve_listing(dst_xml)
+
+
+_templates = {}  # name -> CompiledTemplate
+_lock = threading.Lock()
+
+
+def get_docx_template(name):
+    """
+    A fresh DocxTemplate for a file in document_templates/.
+
+    The file is read and parsed once per process and again only when its
+    modification time changes; each call returns an independent copy.
+
+    Args:
+        name: File name, e.g. 'activity_design_template.docx'
+
+    Returns:
+        RegistryDocxTemplate
+
+    Raises:
+        FileNotFoundError: The template does not exist
+    """
+    if os.path.basename(name) != name:
+        raise FileNotFoundError(f"Invalid template name: {name}")
+
+    path = os.path.join(TEMPLATE_DIR, name)
+    mtime = os.path.getmtime(path)  # FileNotFoundError if missing
+
+    compiled = _templates.get(name)
+    if compiled is None or compiled.mtime != mtime:
+        with _lock:
+            compiled = _templates.get(name)
+            if compiled is None or compiled.mtime != mtime:
+                compiled = _templates[name] = CompiledTemplate(path, mtime)
+    return RegistryDocxTemplate(compiled)
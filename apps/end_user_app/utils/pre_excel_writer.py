@@ -0,0 +1,239 @@
+"""
+PRE Excel Writer Utility
+Fills the Departmental PRE template with a submitted PRE's figures using
+openpyxl, so downloads need no spreadsheet application
+"""
+
+import os
+import pickle
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+from openpyxl import load_workbook
+
+
+TEMPLATE_PATH = getattr(
+    settings,
+    'PRE_EXCEL_TEMPLATE',
+    os.path.join(settings.BASE_DIR, 'excel_templates', 'Departmental-PRE.xlsx')
+)
+TEMPLATE_SHEET = 'Departmental PRE (2)'
+
+QUARTER_COLUMNS = ('E', 'F', 'G', 'H')
+TOTAL_COLUMN = 'I'
+DEPARTMENT_CELL = 'C5'
+SIGNATORY_ROWS = range(130, 200)  # Searched for the "... by" labels in column A
+
+# Budget item key (as stored in DepartmentPRE.data, with _q1.._q4 suffixes)
+# -> template row
+BUDGET_ITEM_ROWS = {
+    # Personnel Services Section
+    'basic_salary': 15,
+    'honoraria': 16,
+    'overtime_pay': 17,
+
+    # MOOE Section
+    'travel_local': 23,
+    'travel_foreign': 24,
+    'training_expenses': 26,
+    'office_supplies_expenses': 28,
+    'accountable_form_expenses': 29,
+    'agri_marine_supplies_expenses': 30,
+    'drugs_medicines': 31,
+    'med_dental_lab_supplies_expenses': 32,
+    'food_supplies_expenses': 33,
+    'fuel_oil_lubricants_expenses': 39,
+    'textbooks_instructional_materials_expenses': 40,
+    'construction_material_expenses': 41,
+    'other_supplies_materials_expenses': 42,
+    'semee_machinery': 44,
+    'semee_office_equipment': 45,
+    'semee_information_communication': 46,
+    'semee_communications_equipment': 47,
+    'semee_drr_equipment': 48,
+    'semee_medical_equipment': 49,
+    'semee_printing_equipment': 50,
+    'semee_sports_equipment': 51,
+    'semee_technical_scientific_equipment': 52,
+    'semee_ict_equipment': 53,
+    'semee_other_machinery_equipment': 54,
+    'furniture_fixtures': 56,
+    'books': 57,
+    'water_expenses': 59,
+    'electricity_expenses': 60,
+    'postage_courier_services': 62,
+    'telephone_expenses': 63,
+    'telephone_expenses_landline': 64,
+    'internet_subscription_expenses': 65,
+    'cable_satellite_telegraph_radio_expenses': 66,
+    'awards_rewards_expenses': 72,
+    'prizes': 73,
+    'survey_expenses': 75,
+    'survey_research_exploration_development_expenses': 76,
+    'legal_services': 78,
+    'auditing_services': 79,
+    'consultancy_services': 80,
+    'other_professional_servies': 81,
+    'security_services': 83,
+    'janitorial_services': 84,
+    'other_general_services': 85,
+    'environment/sanitary_services': 86,
+    'repair_maintenance_land_improvements': 88,
+    'buildings': 90,
+    'school_buildings': 91,
+    'hostel_dormitories': 92,
+    # 'other_structures' (row 93) shares its key with the Capital Outlays
+    # row below, which has always been the one filled
+    'repair_maintenance_machinery': 95,
+    'repair_maintenance_office_equipment': 96,
+    'repair_maintenance_ict_equipment': 97,
+    'repair_maintenance_agri_forestry_equipment': 98,
+    'repair_maintenance_marine_fishery_equipment': 99,
+    'repair_maintenance_airport_equipment': 100,
+    'repair_maintenance_communication_equipment': 101,
+    'repair_maintenance_drre_equipment': 102,
+    'repair_maintenance_medical_equipment': 103,
+    'repair_maintenance_printing_equipment': 104,
+    'repair_maintenance_sports_equipment': 105,
+    'repair_maintenance_technical_scientific_equipment': 106,
+    'repair_maintenance_other_machinery_equipment': 107,
+    'repair_maintenance_motor': 109,
+    'repair_maintenance_other_transportation_equipment': 110,
+    'repair_maintenance_furniture_fixtures': 111,
+    'repair_maintenance_semi_expendable_machinery_equipment': 112,
+    'repair_maintenance_other_property_plant_equipment': 113,
+    'taxes_duties_licenses': 115,
+    'fidelity_bond_premiums': 116,
+    'insurance_expenses': 117,
+    'labor_wages': 119,
+    'advertising_expenses': 121,
+    'printing_publication_expenses': 122,
+    'representation_expenses': 123,
+    'transportation_delivery_expenses': 124,
+    'rent/lease_expenses': 125,
+    'membership_dues_contribute_to_org': 126,
+    'subscription_expenses': 127,
+    'website_maintenance': 129,
+    'other_maintenance_operating_expenses': 130,
+
+    # Capital Outlays Section
+    'land': 136,
+    'land_improvements_aqua_structure': 138,
+    'water_supply_systems': 140,
+    'power_supply_systems': 141,
+    'other_infra_assets': 142,
+    'bos_building': 144,
+    'bos_school_buildings': 145,
+    'bos_hostels_dorm': 146,
+    'other_structures': 147,
+    'me_machinery': 149,
+    'me_office_equipment': 150,
+    'me_ict_equipment': 151,
+    'me_communication_equipment': 152,
+    'me_drre': 153,
+    'me_medical_equipment': 154,
+    'me_printing_equipment': 155,
+    'me_sports_equipment': 156,
+    'me_technical_scientific_equipment': 157,
+    'me_other_machinery_equipment': 158,
+    'te_motor': 160,
+    'te_other_transpo_equipment': 161,
+    'ffb_furniture_fixtures': 163,
+    'ffb_books': 164,
+    'cp_land_improvements': 166,
+    'cp_infra_assets': 167,
+    'cp_building_other_structures': 168,
+    'cp_leased_assets': 169,
+    'cp_leased_assets_improvements': 170,
+    'ia_computer_software': 172,
+    'ia_websites': 173,
+    'ia_other_tangible_assets': 174,
+}
+
+
+# Parsed template, pickled: unpickling gives each download its own copy in
+# about half the time load_workbook() takes. Reloaded when the file changes.
+_template = None  # (mtime, pickled workbook)
+_lock = threading.Lock()
+
+
+def _to_decimal(value):
+    try:
+        return Decimal(str(value)) if value not in (None, "") else Decimal('0')
+    except Exception:
+        return Decimal('0')
+
+
+def load_template():
+    """A private copy of the parsed PRE template"""
+    global _template
+
+    mtime = os.path.getmtime(TEMPLATE_PATH)  # FileNotFoundError if missing
+    entry = _template
+    if entry is None or entry[0] != mtime:
+        with _lock:
+            entry = _template
+            if entry is None or entry[0] != mtime:
+                workbook = load_workbook(TEMPLATE_PATH)
+                entry = _template = (mtime, pickle.dumps(workbook, protocol=pickle.HIGHEST_PROTOCOL))
+    return pickle.loads(entry[1])
+
+
+def fill_pre_workbook(pre):
+    """
+    The PRE template filled with a PRE's department, quarterly amounts and
+    signatories.
+
+    Only items with a positive total are written; quarters that are zero
+    keep the template's placeholder.
+
+    Args:
+        pre: end_user_app DepartmentPRE (amounts in pre.data)
+
+    Returns:
+        openpyxl Workbook
+    """
+    workbook = load_template()
+    if TEMPLATE_SHEET in workbook.sheetnames:
+        sheet = workbook[TEMPLATE_SHEET]
+    else:
+        sheet = workbook.worksheets[1] if len(workbook.worksheets) > 1 else workbook.worksheets[0]
+
+    sheet[DEPARTMENT_CELL] = pre.department
+
+    payload = pre.data or {}
+    for item_key, row_num in BUDGET_ITEM_ROWS.items():
+        quarters = [_to_decimal(payload.get(f"{item_key}_q{quarter}")) for quarter in range(1, 5)]
+        total = sum(quarters)
+        if total <= 0:
+            continue
+        for column, amount in zip(QUARTER_COLUMNS, quarters):
+            if amount > 0:
+                sheet[f'{column}{row_num}'] = float(amount)
+        sheet[f'{TOTAL_COLUMN}{row_num}'] = float(total)
+
+    signatories = (
+        ('prepared', pre.prepared_by_name),
+        ('certified', pre.certified_by_name),
+        ('approved', pre.approved_by_name),
+    )
+    for row in SIGNATORY_ROWS:
+        label = sheet[f'A{row}'].value
+        if not label:
+            continue
+        label = str(label).lower()
+        if 'by' not in label:
+            continue
+        for keyword, name in signatories:
+            if keyword in label:
+                if name:
+                    sheet[f'C{row}'] = name
+                break
+
+    return workbook
+
+
+def render_pre_excel(pre, output):
+    """Write the filled PRE workbook to a binary file object"""
+    fill_pre_workbook(pre).save(output)
@@ -3,8 +3,29 @@ PRE Excel Parser Utility
 Extracts data from PRE template with fixed cell positions
 """
 
+import hashlib
+import time
 from openpyxl import load_workbook
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
 from decimal import Decimal, InvalidOperation
+from typing import List, NamedTuple, Optional, Tuple
+
+
+PRE_SECTIONS = ('receipts', 'personnel', 'mooe', 'capital')
+
+
+class PlanItem(NamedTuple):
+    section: str
+    category: Optional[str]  # None for the flat sections (receipts, personnel)
+    item_name: str
+    cells: Tuple[Tuple[int, int], ...]  # (row, column) of q1..q4 and total
+
+
+class ParserPlan(NamedTuple):
+    items: List[PlanItem]
+    min_row: int
+    max_row: int
+    max_col: int
 
 
 class PREParser:
@@ -210,25 +231,54 @@ class PREParser:
         }
     }
     
+    # Cell holding the fiscal year
+    FISCAL_YEAR_CELL = 'D3'
+
+    # Header fields (END USER / PROGRAM / FUND SOURCE)
+    HEADER_CELLS = {
+        'department': 'C5',
+        'program': 'C6',
+        'fund_source': 'I6',
+    }
+
+    # Row-indexed read plan compiled from CELL_MAPPINGS (set below the class)
+    PLAN = None
+    
     def __init__(self, file_path):
         """Initialize parser with Excel file"""
         self.file_path = file_path
-        self.workbook = None
-        self.worksheet = None
+        self.rows = None
         self.errors = []
         
     def validate_template(self):
-        """Validate that the uploaded file matches expected template structure"""
+        """
+        Validate that the uploaded file matches expected template structure.
+
+        The workbook is opened read-only and only the row span covered by
+        PLAN is read (values only), then the file is closed again.
+        """
+        plan = self.PLAN
         try:
-            self.workbook = load_workbook(self.file_path, data_only=True)
-            self.worksheet = self.workbook.active
+            workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+            try:
+                worksheet = workbook.active
+                # Saved dimensions are unreliable; the plan gives the bounds
+                worksheet.reset_dimensions()
+                self.rows = list(worksheet.iter_rows(
+                    min_row=plan.min_row,
+                    max_row=plan.max_row,
+                    max_col=plan.max_col,
+                    values_only=True
+                ))
+            finally:
+                workbook.close()
             
             # Check header cells
-            # if self.worksheet['A1'].value != "Republic of the Philippines":
+            # if self._cell_value('A1') != "Republic of the Philippines":
             #     self.errors.append("Invalid template: Header mismatch")
             #     return False
             
-            # if "BOHOL ISLAND STATE UNIVERSITY" not in str(self.worksheet['B2'].value or ''):
+            # if "BOHOL ISLAND STATE UNIVERSITY" not in str(self._cell_value('B2') or ''):
             #     self.errors.append("Invalid template: Institution name mismatch")
             #     return False
             
@@ -237,12 +287,21 @@ class PREParser:
         except Exception as e:
             self.errors.append(f"Error reading file: {str(e)}")
             return False
+
+    def _value_at(self, row, col):
+        """Raw value at a 1-based row and 0-based column of the loaded span"""
+        try:
+            return self.rows[row - self.PLAN.min_row][col]
+        except IndexError:
+            return None
+
+    def _cell_value(self, cell_ref):
+        return self._value_at(*_cell_position(cell_ref))
     
-    def _parse_cell_value(self, cell_ref):
-        """Parse cell value and convert to Decimal, handling 'xxx' or 'XXX' as 0"""
+    @staticmethod
+    def _parse_value(cell_value):
+        """Convert a cell value to Decimal, handling 'xxx' or 'XXX' as 0"""
         try:
-            cell_value = self.worksheet[cell_ref].value
-            
             # Handle None or empty
             if cell_value is None or cell_value == '':
                 return Decimal('0')
@@ -263,27 +322,20 @@ class PREParser:
     
     def extract_line_items(self):
         """Extract all line items from the PRE"""
-        if not self.worksheet:
+        if self.rows is None:
             self.errors.append("Worksheet not loaded")
             return None
         
-        extracted_data = {
-            'receipts': [],
-            'personnel': [],
-            'mooe': [],
-            'capital': [],
-        }
+        extracted_data = {section: [] for section in PRE_SECTIONS}
         
         # ✅ Track validation warnings
         validation_warnings = []
         
-        # Extract Receipts
-        for item_name, q1, q2, q3, q4, total in self.CELL_MAPPINGS['receipts']:
-            q1_val = self._parse_cell_value(q1)
-            q2_val = self._parse_cell_value(q2)
-            q3_val = self._parse_cell_value(q3)
-            q4_val = self._parse_cell_value(q4)
-            total_val = self._parse_cell_value(total)
+        for entry in self.PLAN.items:
+            q1_val, q2_val, q3_val, q4_val, total_val = [
+                self._parse_value(self._value_at(row, col))
+                for row, col in entry.cells
+            ]
             
             # ✅ Calculate correct total from quarters
             calculated_total = q1_val + q2_val + q3_val + q4_val
@@ -291,7 +343,7 @@ class PREParser:
             # ✅ Validate: Check if Excel total matches calculated total
             if calculated_total > 0 and abs(total_val - calculated_total) > Decimal('0.01'):
                 validation_warnings.append({
-                    'item': item_name,
+                    'item': entry.item_name,
                     'excel_total': float(total_val),
                     'calculated_total': float(calculated_total),
                     'difference': float(calculated_total - total_val)
@@ -299,102 +351,16 @@ class PREParser:
             
             # Only add if there's any value
             if q1_val > 0 or q2_val > 0 or q3_val > 0 or q4_val > 0:
-                extracted_data['receipts'].append({
-                    'item_name': item_name,
-                    'q1': q1_val,
-                    'q2': q2_val,
-                    'q3': q3_val,
-                    'q4': q4_val,
-                    'total': calculated_total
-                })
-        
-        # Extract Personnel Services
-        for item_name, q1, q2, q3, q4, total in self.CELL_MAPPINGS['personnel']:
-            q1_val = self._parse_cell_value(q1)
-            q2_val = self._parse_cell_value(q2)
-            q3_val = self._parse_cell_value(q3)
-            q4_val = self._parse_cell_value(q4)
-            total_val = self._parse_cell_value(total)
-            
-            calculated_total = q1_val + q2_val + q3_val + q4_val
-            
-            if calculated_total > 0 and abs(total_val - calculated_total) > Decimal('0.01'):
-                validation_warnings.append({
-                    'item': item_name,
-                    'excel_total': float(total_val),
-                    'calculated_total': float(calculated_total),
-                    'difference': float(calculated_total - total_val)
-                })
-            
-            if q1_val > 0 or q2_val > 0 or q3_val > 0 or q4_val > 0:
-                extracted_data['personnel'].append({
-                    'item_name': item_name,
+                item = {'category': entry.category} if entry.category is not None else {}
+                item.update({
+                    'item_name': entry.item_name,
                     'q1': q1_val,
                     'q2': q2_val,
                     'q3': q3_val,
                     'q4': q4_val,
                     'total': calculated_total
                 })
-        
-        # Extract MOOE (nested structure)
-        for category, items in self.CELL_MAPPINGS['mooe'].items():
-            for item_name, q1, q2, q3, q4, total in items:
-                q1_val = self._parse_cell_value(q1)
-                q2_val = self._parse_cell_value(q2)
-                q3_val = self._parse_cell_value(q3)
-                q4_val = self._parse_cell_value(q4)
-                total_val = self._parse_cell_value(total)
-                
-                calculated_total = q1_val + q2_val + q3_val + q4_val
-                
-                if calculated_total > 0 and abs(total_val - calculated_total) > Decimal('0.01'):
-                    validation_warnings.append({
-                        'item': item_name,
-                        'excel_total': float(total_val),
-                        'calculated_total': float(calculated_total),
-                        'difference': float(calculated_total - total_val)
-                    })
-                
-                if q1_val > 0 or q2_val > 0 or q3_val > 0 or q4_val > 0:
-                    extracted_data['mooe'].append({
-                        'category': category,
-                        'item_name': item_name,
-                        'q1': q1_val,
-                        'q2': q2_val,
-                        'q3': q3_val,
-                        'q4': q4_val,
-                        'total': calculated_total
-                    })
-        
-        # Extract Capital Outlays (nested structure)
-        for category, items in self.CELL_MAPPINGS['capital'].items():
-            for item_name, q1, q2, q3, q4, total in items:
-                q1_val = self._parse_cell_value(q1)
-                q2_val = self._parse_cell_value(q2)
-                q3_val = self._parse_cell_value(q3)
-                q4_val = self._parse_cell_value(q4)
-                total_val = self._parse_cell_value(total)
-                
-                calculated_total = q1_val + q2_val + q3_val + q4_val
-                
-                if calculated_total > 0 and abs(total_val - calculated_total) > Decimal('0.01'):
-                    validation_warnings.append({
-                        'item': item_name,
-                        'excel_total': float(total_val),
-                        'calculated_total': float(calculated_total),
-                        'difference': float(calculated_total - total_val)
-                    })
-                
-                if q1_val > 0 or q2_val > 0 or q3_val > 0 or q4_val > 0:
-                    extracted_data['capital'].append({
-                        'category': category,
-                        'item_name': item_name,
-                        'q1': q1_val,
-                        'q2': q2_val,
-                        'q3': q3_val,
-                        'q4': q4_val,
-                        'total': calculated_total
-                    })
+                extracted_data[entry.section].append(item)
         
         # ✅ Store validation warnings
         extracted_data['validation_warnings'] = validation_warnings
@@ -415,18 +381,88 @@ class PREParser:
         """Extract fiscal year from PRE document"""
         try:
             # Assuming fiscal year is in a specific cell (adjust as needed)
-            fy_cell = self.worksheet['D3'].value  # Adjust cell reference
+            fy_cell = self._cell_value(self.FISCAL_YEAR_CELL)
             if fy_cell:
                 return str(fy_cell).strip()
             return None
         except:
             return None
 
+    def get_header(self):
+        """Header fields of the PRE (department, program, fund source), None when blank"""
+        header = {}
+        for field, cell_ref in self.HEADER_CELLS.items():
+            value = self._cell_value(cell_ref)
+            header[field] = str(value).strip() if value not in (None, '') else None
+        return header
+
+
+def _cell_position(cell_ref):
+    """'E10' -> (10, 4): 1-based row, 0-based column"""
+    column, row = coordinate_from_string(cell_ref)
+    return row, column_index_from_string(column) - 1
+
+
+def _compile_plan(cell_mappings, extra_cells=()):
+    """
+    Flatten CELL_MAPPINGS into the order extract_line_items() reports items
+    in, with every cell reference resolved to a (row, column) position, and
+    the row/column bounds the parser has to read.
+    """
+    items = []
+    for section in PRE_SECTIONS:
+        groups = cell_mappings[section]
+        if not isinstance(groups, dict):
+            groups = {None: groups}
+        for category, mappings in groups.items():
+            for item_name, *cell_refs in mappings:
+                items.append(PlanItem(
+                    section, category, item_name,
+                    tuple(_cell_position(cell_ref) for cell_ref in cell_refs)
+                ))
+
+    positions = [cell for item in items for cell in item.cells]
+    positions += [_cell_position(cell_ref) for cell_ref in extra_cells]
+    return ParserPlan(
+        items=items,
+        min_row=min(row for row, _ in positions),
+        max_row=max(row for row, _ in positions),
+        max_col=max(col for _, col in positions) + 1,
+    )
+
+
+PREParser.PLAN = _compile_plan(
+    PREParser.CELL_MAPPINGS,
+    extra_cells=[PREParser.FISCAL_YEAR_CELL, *PREParser.HEADER_CELLS.values()]
+)
+
+# Identifies the output of this parser for cached parse results: bump the
+# number when the parsing logic changes (cell mapping changes are picked up
+# by the digest)
+PARSER_VERSION = '2.' + hashlib.sha256(repr(PREParser.PLAN).encode('utf-8')).hexdigest()[:12]
+
 
 def parse_pre_excel(file_path):
     """Main function to parse PRE Excel file"""
+    return _parse(PREParser(file_path))
+
+
+def parse_pre_file(file_path):
+    """
+    parse_pre_excel() for batch imports, plus the PRE header fields and the
+    parse time. Needs no Django setup, so it can run in worker processes.
+    """
+    started = time.perf_counter()
     parser = PREParser(file_path)
-    
+    result = _parse(parser)
+    if result['success']:
+        result['header'] = parser.get_header()
+    result['file_path'] = file_path
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def _parse(parser):
     # Validate template
     if not parser.validate_template():
         return {
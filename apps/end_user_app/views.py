@@ -9,62 +9,54 @@ from .models import PurchaseRequest, PurchaseRequestItems, Budget_Realignment, D
 from decimal import Decimal, InvalidOperation, InvalidOperation, DecimalException
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.template.loader import render_to_string
 from decimal import Decimal
-from django.db.models import Sum, Q, F, DecimalField
+from django.db.models import Sum, Q, F
 from django.db.models.functions import Coalesce
 from django.contrib.humanize.templatetags.humanize import intcomma
 from datetime import datetime
-from apps.admin_panel.utils import log_audit_trail
+from apps.admin_panel.utils import log_audit_trail, generate_pre_number
 from apps.users.utils import role_required
 from .constants import FRIENDLY_LABELS
-from docxtpl import DocxTemplate
+from .utils.docx_templates import get_docx_template
+from .utils.pre_excel_writer import TEMPLATE_PATH as PRE_TEMPLATE_PATH, render_pre_excel
 from openpyxl import load_workbook
 import os
 import json
 from django.db import transaction
 from io import BytesIO
-import shutil
-import xlwings as xw
-import tempfile
 from apps.budgets.models import ApprovedBudget as NewApprovedBudget, BudgetAllocation as NewBudgetAllocation, DepartmentPRE as NewDepartmentPRE, PurchaseRequest as NewPurchaseRequest, PRELineItem, PurchaseRequestAllocation as NewPurchaseRequestAllocation, PRDraft, PRDraftSupportingDocument, PurchaseRequestSupportingDocument, ActivityDesign, ActivityDesignAllocation
-from .utils.pre_parser import parse_pre_excel
+from apps.budgets.services.consumption_service import attach_pre_consumption
+from apps.budgets.services.balance_service import get_quarter_balance, get_quarter_balances
+from apps.budgets.services.reservation_service import reserve_funds, InsufficientFundsError
+from apps.budgets.services.sequence_service import provisional_number
+from apps.budgets.services.snapshot_service import get_snapshot
+from apps.budgets.services.export_job_service import EXPORT_ASYNC_ROW_THRESHOLD, EXPORT_KINDS, enqueue_export
+from apps.budgets.services.pre_parse_cache_service import get_cached_pre_result, parse_pre_cached
+from apps.budgets.services.pre_taxonomy_service import create_pre_line_items as bulk_create_pre_line_items
+from apps.budgets.views import export_job_download_response, export_job_response, export_job_status_response
 from django.core.files.storage import default_storage
 from django.utils import timezone
 
-def generate_pr_number():
-    """Generate unique PR number in format PR-YYYY-NNNN"""
-    from datetime import datetime
-    from apps.budgets.models import PurchaseRequest
-    
-    year = datetime.now().year
-    
-    # Get the last PR number for this year
-    last_pr = PurchaseRequest.objects.filter(
-        pr_number__startswith=f'PR-{year}-'
-    ).order_by('-pr_number').first()
-    
-    if last_pr:
-        # Extract the sequence number and increment
-        last_sequence = int(last_pr.pr_number.split('-')[-1])
-        new_sequence = last_sequence + 1
-    else:
-        # First PR of the year
-        new_sequence = 1
-    
-    return f'PR-{year}-{new_sequence:04d}'
-
-# Create your views here.
-@role_required('end_user', login_url='/')
-def user_dashboard(request):
+def generate_pr_number(pr):
     """
-    End User Dashboard - Overview & Summary Page
-    Shows key metrics, recent activity, and quick links to detailed pages
+    Give a PR its unique number in format PR-YYYY-NNNN.
+
+    Numbers come from the per-year DocumentSequence counter; call as the last
+    statement of the submission transaction (see assign_number) so a rolled
+    back PR releases its number.
     """
+    from apps.budgets.services.sequence_service import assign_number
+
+    return assign_number(pr, 'PR')
+
+# Create your views here.
+def _build_user_dashboard_snapshot(user):
+    """Compute the user_dashboard context (cached per user, see snapshot_service)"""
     # Get user's budget allocations
     budget_allocations = NewBudgetAllocation.objects.filter(
-        end_user=request.user,
+        end_user=user,
         is_active=True
     ).select_related('approved_budget')
 
@@ -169,14 +161,15 @@ def user_dashboard(request):
 
     # Quick stats for quarterly breakdown (simplified)
     quarterly_data = []
-    for quarter in ['Q1', 'Q2', 'Q3', 'Q4']:
-        quarter_allocated = Decimal('0')
-        quarter_consumed = Decimal('0')
-
-        approved_pres = NewDepartmentPRE.objects.filter(
+    approved_pres = attach_pre_consumption(
+        NewDepartmentPRE.objects.filter(
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items')
+    )
+    for quarter in ['Q1', 'Q2', 'Q3', 'Q4']:
+        quarter_allocated = Decimal('0')
+        quarter_consumed = Decimal('0')
 
         for pre in approved_pres:
             for line_item in pre.line_items.all():
@@ -226,10 +219,24 @@ def user_dashboard(request):
         'quarterly_data': quarterly_data,
 
         # User info
-        'department_name': budget_allocations.first().department if budget_allocations.exists() else request.user.get_full_name(),
+        'department_name': budget_allocations.first().department if budget_allocations.exists() else user.get_full_name(),
         'first_allocation_id': budget_allocations.first().id if budget_allocations.exists() else None,
     }
 
+    return context
+
+
+@role_required('end_user', login_url='/')
+def user_dashboard(request):
+    """
+    End User Dashboard - Overview & Summary Page
+    Shows key metrics, recent activity, and quick links to detailed pages
+    """
+    context = get_snapshot(
+        request.user.pk, 'user_dashboard', None,
+        lambda: _build_user_dashboard_snapshot(request.user)
+    )
+
     return render(request, 'end_user_app/dashboard.html', context)
 
 @role_required('end_user', login_url='/')
@@ -440,7 +447,8 @@ def build_pre_source_options_v2(user):
 def calculate_line_item_consumed(line_item):
     """
     Calculate the total consumed/allocated amount for a specific PRE line item.
-    Sums up all allocations from both Purchase Requests and Activity Designs.
+    Reads the materialized quarter balances, which hold the allocations from both
+    Purchase Requests and Activity Designs.
     Includes Pending, Partially Approved, and Approved statuses.
     Excludes Draft, Rejected, and Cancelled.
 
@@ -450,50 +458,23 @@ def calculate_line_item_consumed(line_item):
     Returns:
         Decimal: Total consumed amount from all allocations (PR + AD)
     """
-    if isinstance(line_item, PRELineItem):
-        line_item_id = line_item.id
-    else:
-        line_item_id = line_item
+    balances = get_quarter_balances(line_item)
+    return sum((balance.consumed for balance in balances.values()), Decimal('0.00'))
 
-    # Sum PR consumption
-    pr_consumed = NewPurchaseRequestAllocation.objects.filter(
-        pre_line_item_id=line_item_id
-    ).exclude(
-        purchase_request__status__in=['Draft', 'Rejected', 'Cancelled']
-    ).aggregate(
-        total=Coalesce(
-            Sum('allocated_amount'),
-            Decimal('0.00'),
-            output_field=DecimalField(max_digits=15, decimal_places=2)
-        )
-    )['total']
 
-    # Sum AD consumption
-    ad_consumed = ActivityDesignAllocation.objects.filter(
-        pre_line_item_id=line_item_id
-    ).exclude(
-        activity_design__status__in=['Draft', 'Rejected', 'Cancelled']
-    ).aggregate(
-        total=Coalesce(
-            Sum('allocated_amount'),
-            Decimal('0.00'),
-            output_field=DecimalField(max_digits=15, decimal_places=2)
-        )
-    )['total']
-
-    return pr_consumed + ad_consumed
-
-
-def allocate_funds_to_purchase_request(purchase_request, pre_id, line_item_id, amount):
+def allocate_funds_to_purchase_request(purchase_request, pre_id, line_item_id, amount, quarter):
     """
-    Allocate funds from a specific PRE line item to a purchase request.
+    Allocate funds from a specific PRE line item quarter to a purchase request.
     Creates a PurchaseRequestAllocation record linking the PR to the PRE line item.
+    The line item quarter is locked while the funds are checked and reserved,
+    so concurrent submissions cannot oversubscribe it.
     
     Args:
         purchase_request: PurchaseRequest instance
         pre_id: UUID of the DepartmentPRE
         line_item_id: ID of the PRELineItem
         amount: Decimal amount to allocate
+        quarter: Quarter of the line item to draw from ('Q1'-'Q4')
         
     Returns:
         dict: {
@@ -510,25 +491,20 @@ def allocate_funds_to_purchase_request(purchase_request, pre_id, line_item_id, a
             pre__status='Approved'
         )
         
-        # Validate availability
-        consumed = calculate_line_item_consumed(line_item)
-        total = line_item.get_total()
-        available = total - consumed
-        
-        if available < amount:
+        # Check and reserve under the quarter balance lock
+        try:
+            allocation, = reserve_funds(purchase_request, [{
+                'line_item': line_item,
+                'quarter': quarter,
+                'amount': amount,
+            }])
+        except InsufficientFundsError as e:
             return {
                 'success': False,
                 'allocation': None,
-                'error': f'Insufficient funds. Available: ₱{available:,.2f}, Required: ₱{amount:,.2f}'
+                'error': f'Insufficient funds. Available: ₱{e.available:,.2f}, Required: ₱{amount:,.2f}'
             }
         
-        # Create allocation
-        allocation = NewPurchaseRequestAllocation.objects.create(
-            purchase_request=purchase_request,
-            pre_line_item=line_item,
-            allocated_amount=amount
-        )
-        
         return {
             'success': True,
             'allocation': allocation,
@@ -665,6 +641,7 @@ def get_pre_line_items(request):
             'line_items__category',
             'line_items__subcategory'
         )
+        attach_pre_consumption(approved_pres)
         
         line_items_data = []
         
@@ -964,36 +941,11 @@ def purchase_request_upload(request):
                 line_item = PRELineItem.objects.get(id=line_item_id)
                 pre = line_item.pre
 
-                # Get quarter amount
-                quarter_amount = getattr(line_item, f'{quarter.lower()}_amount', Decimal('0'))
-
-                # Calculate PR consumption for this quarter
-                pr_consumed = NewPurchaseRequestAllocation.objects.filter(
-                    pre_line_item=line_item,
-                    quarter=quarter
-                ).exclude(
-                    purchase_request__status__in=['Draft', 'Rejected', 'Cancelled']
-                ).aggregate(
-                    total=Coalesce(
-                        Sum('allocated_amount'),
-                        Decimal('0.00'),
-                        output_field=DecimalField(max_digits=15, decimal_places=2)
-                    )
-                )['total']
-
-                # Calculate AD consumption for this quarter
-                ad_consumed = ActivityDesignAllocation.objects.filter(
-                    pre_line_item=line_item,
-                    quarter=quarter
-                ).exclude(
-                    activity_design__status__in=['Draft', 'Rejected', 'Cancelled']
-                ).aggregate(
-                    total=Coalesce(
-                        Sum('allocated_amount'),
-                        Decimal('0.00'),
-                        output_field=DecimalField(max_digits=15, decimal_places=2)
-                    )
-                )['total']
+                # Read the materialized quarter balance
+                balance = get_quarter_balance(line_item, quarter)
+                quarter_amount = balance.budgeted
+                pr_consumed = balance.pr_consumed
+                ad_consumed = balance.ad_consumed
 
                 total_consumed = pr_consumed + ad_consumed
                 available = quarter_amount - total_consumed
@@ -1023,9 +975,6 @@ def purchase_request_upload(request):
                 from django.core.files.base import ContentFile
 
                 with transaction.atomic():
-                    # Generate PR number
-                    pr_number = generate_pr_number()
-
                     # Get budget allocation
                     budget_allocation = NewBudgetAllocation.objects.get(id=budget_allocation_id)
 
@@ -1037,7 +986,7 @@ def purchase_request_upload(request):
 
                     # ✅ CORRECTED: Create PR with correct field names
                     pr = NewPurchaseRequest.objects.create(
-                        pr_number=pr_number,
+                        pr_number=provisional_number('PR'),  # Numbered last, see below
                         submitted_by=request.user,  # ✅ Correct field name
                         department=budget_allocation.department,  # ✅ Get from allocation
                         budget_allocation=budget_allocation,
@@ -1049,6 +998,13 @@ def purchase_request_upload(request):
                         status='Pending',
                     )
 
+                    # ✅ Reserve the funds with quarter (locks this line item quarter only)
+                    reserve_funds(pr, [{
+                        'line_item': line_item,
+                        'quarter': quarter,
+                        'amount': total_amount,
+                    }])
+
                     # Save the copied PR file to the permanent location
                     pr.uploaded_document.save(
                         pr_filename,
@@ -1077,17 +1033,11 @@ def purchase_request_upload(request):
                             save=True
                         )
                     
-                    # ✅ Create allocation with quarter
-                    NewPurchaseRequestAllocation.objects.create(
-                        purchase_request=pr,
-                        pre_line_item=line_item,
-                        quarter=quarter,  # ✅ Save quarter
-                        allocated_amount=total_amount,
-                        notes=f"Allocated from {line_item.item_name} - {quarter}"
-                    )
-                    
                     # Clear draft
                     draft.delete()
+
+                    # Generate PR number last: the counter row stays locked until commit
+                    pr_number = generate_pr_number(pr)
                     
                     messages.success(request, 
                         f"Purchase Request {pr_number} submitted successfully! "
@@ -1105,6 +1055,9 @@ def purchase_request_upload(request):
                     # ✅ NEW: Redirect to preview instead of upload form
                     return redirect('preview_submitted_pr', pr_id=pr.id)
                     
+            except InsufficientFundsError as e:
+                messages.error(request, " | ".join(e.get_breakdown()))
+                return redirect('purchase_request_upload')
             except Exception as e:
                 import traceback
                 traceback.print_exc()
@@ -1925,7 +1878,7 @@ def upload_pre(request, allocation_id):
             
             # Parse Excel file
             try:
-                result = parse_pre_excel(draft.pre_file.path)
+                result = parse_pre_cached(draft.pre_file.path)
                 
                 if not result['success']:
                     messages.error(request, 
@@ -1947,15 +1900,13 @@ def upload_pre(request, allocation_id):
                         f"remaining budget allocation (₱{allocation.remaining_balance:,.2f}).")
                     return redirect('upload_pre', allocation_id=allocation_id)
                 
-                # Store data in session for preview
+                # Keep only the parse cache key in the session; preview
+                # reads the extracted data from the cache
                 request.session['pre_upload_data'] = {
                     'allocation_id': allocation_id,
                     'draft_id': draft.id,
-                    'extracted_data': json.dumps(result['data'], default=str),
-                    'grand_total': str(result['grand_total']),
-                    'fiscal_year': result['fiscal_year'],
+                    'parse_key': result['key'],
                     'pre_filename': draft.pre_filename,
-                    'validation_warnings': result.get('validation_warnings', [])
                 }
                 
                 messages.success(request, "Files validated successfully. Please review the extracted data.")
@@ -1988,6 +1939,9 @@ def create_pre_line_items(pre, extracted_data):
     """
     Create PRELineItem records from extracted data
     
+    Categories come from the cached PRE taxonomy and all items are inserted
+    with one bulk_create (see pre_taxonomy_service).
+    
     Args:
         pre: NewDepartmentPRE instance
         extracted_data: Dict with categories (receipts, personnel, mooe, capital)
@@ -1995,69 +1949,7 @@ def create_pre_line_items(pre, extracted_data):
     Returns:
         int: Number of line items created
     """
-    from apps.budgets.models import PRELineItem, PRECategory, PRESubCategory
-    
-    line_items_created = 0
-    
-    # Category mapping
-    category_mapping = {
-        'receipts': ('PERSONNEL', 'Receipts'),  # Or create a separate category
-        'personnel': ('PERSONNEL', 'Personnel Services'),
-        'mooe': ('MOOE', 'Maintenance and Other Operating Expenses'),
-        'capital': ('CAPITAL', 'Capital Outlays'),
-    }
-    
-    for section_key, items_list in extracted_data.items():
-        if not items_list:
-            continue
-        
-        # Get or create category
-        category_type, category_name = category_mapping.get(
-            section_key, 
-            ('MOOE', section_key.title())
-        )
-        
-        category, _ = PRECategory.objects.get_or_create(
-            category_type=category_type,
-            defaults={
-                'name': category_name,
-                'code': category_type[:4].upper(),
-                'is_active': True,
-                'sort_order': {'receipts': 1, 'personnel': 2, 'mooe': 3, 'capital': 4}.get(section_key, 5)
-            }
-        )
-        
-        # Create line items
-        for item_data in items_list:
-            item_name = item_data.get('item_name', 'Unknown Item')
-            
-            # Get subcategory from nested data (for MOOE and Capital)
-            subcategory = None
-            subcategory_name = item_data.get('category')  # MOOE/Capital have subcategories
-            
-            if subcategory_name:
-                subcategory, _ = PRESubCategory.objects.get_or_create(
-                    category=category,
-                    name=subcategory_name.replace('_', ' ').title(),
-                    defaults={
-                        'code': subcategory_name[:10].upper(),
-                        'is_active': True,
-                    }
-                )
-            
-            # Create line item
-            PRELineItem.objects.create(
-                pre=pre,
-                category=category,
-                subcategory=subcategory,
-                item_name=item_name,
-                q1_amount=Decimal(str(item_data.get('q1', 0))),
-                q2_amount=Decimal(str(item_data.get('q2', 0))),
-                q3_amount=Decimal(str(item_data.get('q3', 0))),
-                q4_amount=Decimal(str(item_data.get('q4', 0))),
-            )
-            
-            line_items_created += 1
+    line_items_created = bulk_create_pre_line_items(pre, extracted_data)
     
     print(f"✅ Created {line_items_created} PRELineItem records for PRE {pre.id}")
     return line_items_created
@@ -2075,10 +1967,21 @@ def preview_pre(request):
         messages.error(request, "No upload data found. Please upload PRE again.")
         return redirect('department_pre_page')
     
-    # Parse extracted data
-    extracted_data = json.loads(upload_data['extracted_data'])
-    grand_total = Decimal(upload_data['grand_total'])
-    validation_warnings = upload_data.get('validation_warnings', [])
+    # Parsed data comes from the parse cache; if the entry was evicted the
+    # draft file is parsed again
+    parsed = get_cached_pre_result(upload_data.get('parse_key'))
+    if parsed is None:
+        draft = PREDraft.objects.filter(id=upload_data.get('draft_id'), user=request.user).first()
+        if draft is not None and draft.pre_file:
+            parsed = parse_pre_cached(draft.pre_file.path)
+        if parsed is None or not parsed['success']:
+            request.session.pop('pre_upload_data', None)
+            messages.error(request, "No upload data found. Please upload PRE again.")
+            return redirect('department_pre_page')
+    
+    extracted_data = parsed['data']
+    grand_total = parsed['grand_total']
+    validation_warnings = parsed['validation_warnings']
     
     # Calculate section totals
     def calculate_section_totals(items):
@@ -2207,6 +2110,9 @@ def preview_pre(request):
                     # 4. Mark draft as submitted
                     draft.is_submitted = True
                     draft.save()
+
+                    # 5. PRE number of its fiscal year, taken last (counter row locked until commit)
+                    generate_pre_number(pre)
                 
                 # Move PRE file from temp to permanent location
                 # temp_file_path = upload_data['temp_file_path']
@@ -2271,7 +2177,7 @@ def preview_pre(request):
         'allocation': allocation,
         'extracted_data': extracted_data,
         'grand_total': grand_total,
-        'fiscal_year': upload_data['fiscal_year'],
+        'fiscal_year': parsed['fiscal_year'],
         'pre_filename': upload_data['pre_filename'],
         'supporting_docs': supporting_docs_info,
         'receipts_total': receipts_total,
@@ -3107,11 +3013,8 @@ def download_activity_design_word(request, pk):
     )
     
     try:
-        # Path to your Word template
-        template_path = r"C:\Users\John Romel Lucot\OneDrive\Desktop\Capstone project\bb_budget_monitoring_system\document_templates\activity_design_template.docx"
-        
-        # Load the template
-        doc = DocxTemplate(template_path)
+        # Copy of the parsed template kept by the registry (document_templates/)
+        doc = get_docx_template('activity_design_template.docx')
         
         # Prepare context data
         context = {
@@ -3178,8 +3081,7 @@ def inspect_excel_template(request):
     """Inspect the Excel template structure"""
     
     try:
-        template_path = r"c:\Users\John Romel Lucot\OneDrive\Desktop\Capstone project\bb_budget_monitoring_system\excel_templates\Departmental-PRE.xlsx"
-        wb = load_workbook(template_path)
+        wb = load_workbook(PRE_TEMPLATE_PATH)
         ws = wb.active
         
         inspection_data = []
@@ -3222,263 +3124,21 @@ def download_pre_excel(request, pk):
     )
     
     try:
-        template_path = r"c:\Users\John Romel Lucot\OneDrive\Desktop\Capstone project\bb_budget_monitoring_system\excel_templates\Departmental-PRE.xlsx"
-        
-        if not os.path.exists(template_path):
-            raise FileNotFoundError(f"Excel template not found")
-        
-        # Create temporary copy
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as temp_file:
-            shutil.copy2(template_path, temp_file.name)
-            temp_path = temp_file.name
-        
-        def to_decimal(value):
-            try:
-                return Decimal(str(value)) if value not in (None, "") else Decimal('0')
-            except Exception:
-                return Decimal('0')
-        
-        payload = pre.data or {}
-        
-        # ✅ Open Excel with xlwings
-        app = xw.App(visible=False)
-        wb = app.books.open(temp_path)
-        
-        # ✅ CRITICAL FIX: Select the correct sheet
-        print(f"=== SHEET SELECTION ===")
-        print(f"Available sheets: {[sheet.name for sheet in wb.sheets]}")
-        
-        try:
-            ws = wb.sheets["Departmental PRE (2)"]  # ✅ Correct sheet
-            print(f"Selected sheet: {ws.name}")
-        except Exception as e:
-            print(f"Could not find 'Departmental PRE (2)' sheet: {e}")
-            # Fallback to second sheet by index
-            ws = wb.sheets[1] if len(wb.sheets) > 1 else wb.sheets[0]
-            print(f"Using fallback sheet: {ws.name}")
-        
-        # ✅ Update department name
-        print(f"=== UPDATING DEPARTMENT ===")
-        try:
-            old_dept = ws.range('C5').value
-            ws.range('C5').value = pre.department
-            new_dept = ws.range('C5').value
-            print(f"Department: '{old_dept}' -> '{new_dept}'")
-        except Exception as e:
-            print(f"Department update error: {e}")
-        
-        # ✅ Budget data mapping
-        budget_items_mapping = {
-            # Personnel Services Section
-            'basic_salary': 15,
-            'honoraria': 16,
-            'overtime_pay': 17,
-            
-            # MOOE Section
-            'travel_local': 23,
-            'travel_foreign': 24,
-            'training_expenses': 26,
-            'office_supplies_expenses': 28,
-            'accountable_form_expenses': 29,
-            'agri_marine_supplies_expenses': 30,
-            'drugs_medicines': 31,
-            'med_dental_lab_supplies_expenses': 32,
-            'food_supplies_expenses': 33,
-            'fuel_oil_lubricants_expenses': 39,
-            'textbooks_instructional_materials_expenses': 40,
-            'construction_material_expenses': 41,
-            'other_supplies_materials_expenses': 42,
-            'semee_machinery': 44,
-            'semee_office_equipment': 45,
-            'semee_information_communication': 46,
-            'semee_communications_equipment': 47,
-            'semee_drr_equipment': 48,
-            'semee_medical_equipment': 49,
-            'semee_printing_equipment': 50,
-            'semee_sports_equipment': 51,
-            'semee_technical_scientific_equipment': 52,
-            'semee_ict_equipment': 53,
-            'semee_other_machinery_equipment': 54,
-            'furniture_fixtures': 56,
-            'books': 57,
-            'water_expenses': 59,
-            'electricity_expenses': 60,
-            'postage_courier_services': 62,
-            'telephone_expenses': 63,
-            'telephone_expenses_landline': 64,
-            'internet_subscription_expenses': 65,
-            'cable_satellite_telegraph_radio_expenses': 66,
-            'awards_rewards_expenses': 72,
-            'prizes': 73,
-            'survey_expenses': 75,
-            'survey_research_exploration_development_expenses': 76,
-            'legal_services': 78,
-            'auditing_services': 79,
-            'consultancy_services': 80,
-            'other_professional_servies': 81,
-            'security_services': 83,
-            'janitorial_services': 84,
-            'other_general_services': 85,
-            'environment/sanitary_services': 86,
-            'repair_maintenance_land_improvements': 88,
-            'buildings': 90,
-            'school_buildings': 91,
-            'hostel_dormitories': 92,
-            'other_structures': 93,
-            'repair_maintenance_machinery': 95,
-            'repair_maintenance_office_equipment': 96,
-            'repair_maintenance_ict_equipment': 97,
-            'repair_maintenance_agri_forestry_equipment': 98,
-            'repair_maintenance_marine_fishery_equipment': 99,
-            'repair_maintenance_airport_equipment': 100,
-            'repair_maintenance_communication_equipment': 101,
-            'repair_maintenance_drre_equipment': 102,
-            'repair_maintenance_medical_equipment': 103,
-            'repair_maintenance_printing_equipment': 104,
-            'repair_maintenance_sports_equipment': 105,
-            'repair_maintenance_technical_scientific_equipment': 106,
-            'repair_maintenance_other_machinery_equipment': 107,
-            'repair_maintenance_motor': 109,
-            'repair_maintenance_other_transportation_equipment': 110,
-            'repair_maintenance_furniture_fixtures': 111,
-            'repair_maintenance_semi_expendable_machinery_equipment': 112,
-            'repair_maintenance_other_property_plant_equipment': 113,
-            'taxes_duties_licenses': 115,
-            'fidelity_bond_premiums': 116,
-            'insurance_expenses': 117,
-            'labor_wages': 119,
-            'advertising_expenses': 121,
-            'printing_publication_expenses': 122,
-            'representation_expenses': 123,
-            'transportation_delivery_expenses': 124,
-            'rent/lease_expenses': 125,
-            'membership_dues_contribute_to_org': 126,
-            'subscription_expenses': 127,
-            'website_maintenance': 129,
-            'other_maintenance_operating_expenses': 130,
-            
-            # Capital Outlays Section
-            'land': 136,
-            'land_improvements_aqua_structure': 138,
-            'water_supply_systems': 140,
-            'power_supply_systems': 141,
-            'other_infra_assets': 142,
-            'bos_building': 144,
-            'bos_school_buildings': 145,
-            'bos_hostels_dorm': 146,
-            'other_structures': 147,
-            'me_machinery': 149,
-            'me_office_equipment': 150,
-            'me_ict_equipment': 151,
-            'me_communication_equipment': 152,
-            'me_drre': 153,
-            'me_medical_equipment': 154,
-            'me_printing_equipment': 155,
-            'me_sports_equipment': 156,
-            'me_technical_scientific_equipment': 157,
-            'me_other_machinery_equipment': 158,
-            'te_motor': 160,
-            'te_other_transpo_equipment': 161,
-            'ffb_furniture_fixtures': 163,
-            'ffb_books': 164,
-            'cp_land_improvements': 166,
-            'cp_infra_assets': 167,
-            'cp_building_other_structures': 168,
-            'cp_leased_assets': 169,
-            'cp_leased_assets_improvements': 170,
-            'ia_computer_software': 172,
-            'ia_websites': 173,
-            'ia_other_tangible_assets': 174,
-        }
-        
-        # ✅ Fill budget data
-        print(f"=== UPDATING BUDGET DATA ===")
-        updates_made = 0
-        
-        for item_key, row_num in budget_items_mapping.items():
-            try:
-                # Get quarterly values
-                q1 = to_decimal(payload.get(f"{item_key}_q1"))
-                q2 = to_decimal(payload.get(f"{item_key}_q2"))
-                q3 = to_decimal(payload.get(f"{item_key}_q3"))
-                q4 = to_decimal(payload.get(f"{item_key}_q4"))
-                total = q1 + q2 + q3 + q4
-                
-                if total > 0:
-                    print(f"Updating {item_key} (Row {row_num}): Q1={q1}, Q2={q2}, Q3={q3}, Q4={q4}")
-                    
-                    # Update quarterly data
-                    if q1 > 0:
-                        ws.range(f'E{row_num}').value = float(q1)
-                    if q2 > 0:
-                        ws.range(f'F{row_num}').value = float(q2)
-                    if q3 > 0:
-                        ws.range(f'G{row_num}').value = float(q3)
-                    if q4 > 0:
-                        ws.range(f'H{row_num}').value = float(q4)
-                    if total > 0:
-                        ws.range(f'I{row_num}').value = float(total)
-                    
-                    updates_made += 1
-                    
-            except Exception as e:
-                print(f"Error updating {item_key}: {e}")
-                continue
-        
-        print(f"Total updates made: {updates_made}")
-        
-        # ✅ Fill certification section
-        try:
-            # Search for certification fields
-            for row in range(130, 200):
-                try:
-                    cell_value = ws.range(f'A{row}').value
-                    if cell_value:
-                        cell_value_lower = str(cell_value).lower()
-                        
-                        if 'prepared' in cell_value_lower and 'by' in cell_value_lower:
-                            if pre.prepared_by_name:
-                                ws.range(f'C{row}').value = pre.prepared_by_name
-                                print(f"Updated prepared by at row {row}")
-                        elif 'certified' in cell_value_lower and 'by' in cell_value_lower:
-                            if pre.certified_by_name:
-                                ws.range(f'C{row}').value = pre.certified_by_name
-                                print(f"Updated certified by at row {row}")
-                        elif 'approved' in cell_value_lower and 'by' in cell_value_lower:
-                            if pre.approved_by_name:
-                                ws.range(f'C{row}').value = pre.approved_by_name
-                                print(f"Updated approved by at row {row}")
-                except Exception:
-                    continue
-        except Exception as e:
-            print(f"Could not update certification: {e}")
-        
-        # ✅ Save and close
-        print("Saving workbook...")
-        wb.save()
-        wb.close()
-        app.quit()
-        
-        # Read the file
-        with open(temp_path, 'rb') as f:
-            file_content = f.read()
-        
-        # Clean up
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
+        # Filled from the in-memory template copy, no temp file or Excel instance
+        output = BytesIO()
+        render_pre_excel(pre, output)
+        output.seek(0)
         
         # Generate filename
         safe_dept = "".join(c for c in pre.department if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
         filename = f"PRE_{safe_dept}_{pre.id}_{pre.created_at.strftime('%Y%m%d')}.xlsx"
         
-        # Create response
-        response = HttpResponse(
-            file_content,
+        response = FileResponse(
+            output,
+            as_attachment=True,
+            filename=filename,
             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
         
         # Log the download
         log_audit_trail(
@@ -3491,11 +3151,11 @@ def download_pre_excel(request, pk):
         
         return response
         
+    except FileNotFoundError:
+        messages.error(request, "Excel template not found. Please contact administrator.")
+        return redirect('preview_pre', pk=pk)
     except Exception as e:
         messages.error(request, f"Error generating Excel document: {str(e)}")
-        print(f"DEBUG: Excel generation error: {e}")
-        import traceback
-        traceback.print_exc()
         return redirect('preview_pre', pk=pk)
 
 
@@ -3667,27 +3327,17 @@ def download_pre_excel(request, pk):
 # ACTIVITY DESIGN VIEWS (Multi-line item support)
 # ================================================================================
 
-def generate_ad_number():
-    """Generate unique AD number in format AD-YYYY-NNNN"""
-    from datetime import datetime
-    from apps.budgets.models import ActivityDesign
-
-    year = datetime.now().year
-
-    # Get the last AD number for this year
-    last_ad = ActivityDesign.objects.filter(
-        ad_number__startswith=f'AD-{year}-'
-    ).order_by('-ad_number').first()
+def generate_ad_number(activity_design):
+    """
+    Give an AD its unique number in format AD-YYYY-NNNN.
 
-    if last_ad:
-        # Extract the sequence number and increment
-        last_sequence = int(last_ad.ad_number.split('-')[-1])
-        new_sequence = last_sequence + 1
-    else:
-        # First AD of the year
-        new_sequence = 1
+    Numbers come from the per-year DocumentSequence counter; call as the last
+    statement of the submission transaction (see assign_number) so a rolled
+    back AD releases its number.
+    """
+    from apps.budgets.services.sequence_service import assign_number
 
-    return f'AD-{year}-{new_sequence:04d}'
+    return assign_number(activity_design, 'AD')
 
 
 @role_required('end_user', login_url='/')
@@ -3696,7 +3346,7 @@ def activity_design_upload(request):
     Handle Activity Design document upload with supporting files
     Supports MULTIPLE PRE line items with individual amounts
     """
-    from apps.budgets.models import ADDraft, ADDraftSupportingDocument, ActivityDesign, ActivityDesignAllocation, ActivityDesignSupportingDocument
+    from apps.budgets.models import ADDraft, ADDraftSupportingDocument, ActivityDesign, ActivityDesignSupportingDocument
 
     # Get or create draft
     draft, created = ADDraft.objects.get_or_create(
@@ -4002,9 +3652,6 @@ def activity_design_upload(request):
                 with transaction.atomic():
                     from django.core.files.base import ContentFile
 
-                    # Generate AD number
-                    ad_number = generate_ad_number()
-
                     # Read the draft AD file to copy it
                     draft.ad_file.open('rb')
                     ad_file_content = draft.ad_file.read()
@@ -4015,7 +3662,7 @@ def activity_design_upload(request):
                     activity_design = ActivityDesign.objects.create(
                         submitted_by=request.user,
                         budget_allocation=budget_allocation,
-                        ad_number=ad_number,
+                        ad_number=provisional_number('AD'),  # Numbered last, see below
                         department=budget_allocation.department,
                         purpose=purpose,
                         total_amount=total_amount,
@@ -4030,15 +3677,15 @@ def activity_design_upload(request):
                         save=True
                     )
 
-                    # Create allocations for each line item
-                    for alloc_data in allocations_to_create:
-                        ActivityDesignAllocation.objects.create(
-                            activity_design=activity_design,
-                            pre_line_item=alloc_data['line_item'],
-                            quarter=alloc_data['quarter'],
-                            allocated_amount=alloc_data['amount'],
-                            notes=f"Allocated from {alloc_data['line_item'].item_name} - {alloc_data['quarter']}"
-                        )
+                    # Reserve funds for each line item (locks only the quarters used)
+                    reserve_funds(activity_design, [
+                        {
+                            'line_item': alloc_data['line_item'],
+                            'quarter': alloc_data['quarter'],
+                            'amount': alloc_data['amount'],
+                        }
+                        for alloc_data in allocations_to_create
+                    ])
 
                     # Copy supporting documents to AD
                     for draft_doc in draft.supporting_documents.all():
@@ -4070,6 +3717,9 @@ def activity_design_upload(request):
                     draft.is_submitted = True
                     draft.save()
 
+                    # Generate AD number last: the counter row stays locked until commit
+                    ad_number = generate_ad_number(activity_design)
+
                     # Log audit trail
                     log_audit_trail(
                         request=request,
@@ -4088,6 +3738,9 @@ def activity_design_upload(request):
             except json.JSONDecodeError:
                 messages.error(request, "Invalid line items data format.")
                 return redirect('activity_design_upload')
+            except InsufficientFundsError as e:
+                messages.error(request, " | ".join(e.get_breakdown()))
+                return redirect('activity_design_upload')
             except NewBudgetAllocation.DoesNotExist:
                 messages.error(request, "Selected budget allocation not found.")
                 return redirect('activity_design_upload')
@@ -4134,6 +3787,7 @@ def get_pre_line_items_for_ad(request):
             'line_items__category',
             'line_items__subcategory'
         )
+        attach_pre_consumption(approved_pres)
 
         line_items_data = []
 
@@ -4288,24 +3942,14 @@ def preview_submitted_ad(request, ad_id):
 # BUDGET MONITORING DASHBOARD VIEWS
 # ============================================================================
 
-@role_required('end_user', login_url='/')
-def budget_overview(request):
-    """
-    Main Budget Monitoring Dashboard - Overview Page
-    Shows key metrics, charts, and recent activity
-    """
+def _build_budget_overview_snapshot(user, selected_year):
+    """Compute the budget_overview context for one year filter (cached per user)"""
     from apps.budgets.models import PurchaseRequest as NewPurchaseRequest
-    from django.db.models import Q
     from django.db.models.functions import ExtractYear
-    from datetime import datetime
-
-    # Get current year and year filter
-    current_year = str(datetime.now().year)
-    selected_year = request.GET.get('year', current_year)
 
     # Get user's budget allocations with year filtering
     base_allocations = NewBudgetAllocation.objects.filter(
-        end_user=request.user,
+        end_user=user,
         is_active=True
     ).select_related('approved_budget')
 
@@ -4429,7 +4073,30 @@ def budget_overview(request):
         'ad_count': ad_count,
         'quarterly_spending': quarterly_spending,
         'recent_activity': recent_activity,
-        'available_years': available_years,
+        'available_years': list(available_years),
+    }
+
+    return context
+
+
+@role_required('end_user', login_url='/')
+def budget_overview(request):
+    """
+    Main Budget Monitoring Dashboard - Overview Page
+    Shows key metrics, charts, and recent activity
+    """
+    from datetime import datetime
+
+    # Get current year and year filter
+    current_year = str(datetime.now().year)
+    selected_year = request.GET.get('year', current_year)
+
+    context = get_snapshot(
+        request.user.pk, 'budget_overview', {'year': selected_year},
+        lambda: _build_budget_overview_snapshot(request.user, selected_year)
+    )
+    context = {
+        **context,
         'selected_year': selected_year,
         'current_year': current_year,
     }
@@ -4481,6 +4148,7 @@ def pre_budget_details(request):
         'line_items__category',
         'line_items__subcategory'
     ).order_by('-created_at')
+    attach_pre_consumption(approved_pres)
 
     # Calculate PRE summary data
     pre_data = []
@@ -4547,23 +4215,13 @@ def pre_budget_details(request):
     return render(request, 'end_user_app/pre_budget_details.html', context)
 
 
-@role_required('end_user', login_url='/')
-def quarterly_analysis(request):
-    """
-    Quarterly Budget Analysis Page
-    Shows quarter-specific breakdown with tabs
-    """
+def _build_quarterly_analysis_snapshot(user, selected_year, selected_quarter):
+    """Compute the quarterly_analysis context for one year/quarter (cached per user)"""
     from django.db.models.functions import ExtractYear
-    from datetime import datetime
-
-    # Get current year and year filter
-    current_year = str(datetime.now().year)
-    selected_year = request.GET.get('year', current_year)
-    selected_quarter = request.GET.get('quarter', 'Q1')
 
     # Get user's budget allocations with year filtering
     base_allocations = NewBudgetAllocation.objects.filter(
-        end_user=request.user,
+        end_user=user,
         is_active=True
     )
 
@@ -4589,6 +4247,7 @@ def quarterly_analysis(request):
         budget_allocation__in=budget_allocations,
         status__in=['Approved', 'Partially Approved']
     ).prefetch_related('line_items__category', 'line_items__subcategory')
+    attach_pre_consumption(approved_pres)
 
     # Calculate quarter summary
     quarter_total = Decimal('0')
@@ -4671,7 +4330,31 @@ def quarterly_analysis(request):
         'quarter_utilization': quarter_utilization,
         'quarter_line_items': quarter_line_items,
         'transactions': transactions,
-        'available_years': available_years,
+        'available_years': list(available_years),
+    }
+
+    return context
+
+
+@role_required('end_user', login_url='/')
+def quarterly_analysis(request):
+    """
+    Quarterly Budget Analysis Page
+    Shows quarter-specific breakdown with tabs
+    """
+    from datetime import datetime
+
+    # Get current year and year filter
+    current_year = str(datetime.now().year)
+    selected_year = request.GET.get('year', current_year)
+    selected_quarter = request.GET.get('quarter', 'Q1')
+
+    context = get_snapshot(
+        request.user.pk, 'quarterly_analysis', {'year': selected_year, 'quarter': selected_quarter},
+        lambda: _build_quarterly_analysis_snapshot(request.user, selected_year, selected_quarter)
+    )
+    context = {
+        **context,
         'selected_year': selected_year,
         'current_year': current_year,
     }
@@ -4837,20 +4520,27 @@ def budget_reports(request):
     return render(request, 'end_user_app/budget_reports.html', context)
 
 
-@role_required('end_user', login_url='/')
-def export_budget_excel(request):
+def render_budget_excel(user, params, output):
     """
-    Export budget data to Excel
+    Render a budget report to Excel
     Supports different report types with year filtering
+
+    Args:
+        user: End user whose budget allocations are reported
+        params: 'type', 'quarter' and 'year' request parameters
+        output: Binary file object the workbook is written to
+
+    Returns:
+        Download filename
     """
     from openpyxl import Workbook
     from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
     from openpyxl.utils import get_column_letter
     from datetime import datetime
 
-    report_type = request.GET.get('type', 'summary')
-    quarter = request.GET.get('quarter', 'Q1')
-    year_filter = request.GET.get('year')
+    report_type = params.get('type', 'summary')
+    quarter = params.get('quarter', 'Q1')
+    year_filter = params.get('year')
 
     # Create workbook
     wb = Workbook()
@@ -4858,7 +4548,7 @@ def export_budget_excel(request):
 
     # Get user's budget allocations with year filtering
     budget_allocations = NewBudgetAllocation.objects.filter(
-        end_user=request.user,
+        end_user=user,
         is_active=True
     )
 
@@ -4890,6 +4580,7 @@ def export_budget_excel(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category', 'line_items__subcategory').order_by('-created_at')
+        attach_pre_consumption(approved_pres)
 
         row = 4
 
@@ -5004,6 +4695,7 @@ def export_budget_excel(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category')
+        attach_pre_consumption(approved_pres)
 
         # Calculate totals
         total_allocated = sum(ba.allocated_amount for ba in budget_allocations)
@@ -5166,6 +4858,7 @@ def export_budget_excel(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category')
+        attach_pre_consumption(approved_pres)
 
         row = 1
         ws_pre['A1'] = 'PRE LINE ITEMS BREAKDOWN'
@@ -5242,6 +4935,7 @@ def export_budget_excel(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category')
+        attach_pre_consumption(approved_pres)
 
         # Aggregate by category
         from django.db.models import Sum
@@ -5377,6 +5071,7 @@ def export_budget_excel(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category')
+        attach_pre_consumption(approved_pres)
 
         # Calculate quarter totals
         quarter_allocated = 0
@@ -5593,25 +5288,26 @@ def export_budget_excel(request):
 
             ws.column_dimensions[column_letter].width = adjusted_width
 
-    # Prepare response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-
     # Include year in filename
     year_text = f"_{year_filter}" if year_filter and year_filter != 'all' else "_AllYears" if year_filter == 'all' else ""
     filename = f'Budget_Report_{report_type}{year_text}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-    wb.save(response)
-    return response
+    wb.save(output)
+    return filename
 
 
-@role_required('end_user', login_url='/')
-def export_budget_pdf(request):
+def render_budget_pdf(user, params, output):
     """
-    Export budget data to PDF
+    Render a budget report to PDF
     Supports different report types
+
+    Args:
+        user: End user whose budget allocations are reported
+        params: 'type' and 'quarter' request parameters
+        output: Binary file object the PDF is written to
+
+    Returns:
+        Download filename
     """
     from reportlab.lib.pagesizes import letter, A4
     from reportlab.lib import colors
@@ -5620,15 +5316,13 @@ def export_budget_pdf(request):
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
-    report_type = request.GET.get('type', 'summary')
-    quarter = request.GET.get('quarter', 'Q1')
+    report_type = params.get('type', 'summary')
+    quarter = params.get('quarter', 'Q1')
 
-    response = HttpResponse(content_type='application/pdf')
     filename = f'Budget_Report_{report_type}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
     # Create PDF
-    doc = SimpleDocTemplate(response, pagesize=A4)
+    doc = SimpleDocTemplate(output, pagesize=A4)
     story = []
     styles = getSampleStyleSheet()
 
@@ -5653,7 +5347,7 @@ def export_budget_pdf(request):
 
     # Get data
     budget_allocations = NewBudgetAllocation.objects.filter(
-        end_user=request.user,
+        end_user=user,
         is_active=True
     )
 
@@ -5696,6 +5390,7 @@ def export_budget_pdf(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category')
+        attach_pre_consumption(approved_pres)
 
         pre_data = [['Line Item', 'Category', 'Q1', 'Q2', 'Q3', 'Q4', 'Total', 'Consumed']]
 
@@ -5739,6 +5434,7 @@ def export_budget_pdf(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category')
+        attach_pre_consumption(approved_pres)
 
         category_data = {}
 
@@ -5838,6 +5534,7 @@ def export_budget_pdf(request):
             budget_allocation__in=budget_allocations,
             status__in=['Approved', 'Partially Approved']
         ).prefetch_related('line_items__category')
+        attach_pre_consumption(approved_pres)
 
         # Calculate quarter totals
         quarter_allocated = 0
@@ -6022,4 +5719,85 @@ def export_budget_pdf(request):
         story.append(t)
 
     doc.build(story)
-    return response
\ No newline at end of file
+    return filename
+
+
+def _estimate_budget_report_rows(user):
+    """Rough row count of a budget report: PRE line items plus PR/AD funding lines"""
+    allocations = NewBudgetAllocation.objects.filter(end_user=user, is_active=True)
+    return (
+        PRELineItem.objects.filter(pre__budget_allocation__in=allocations).count() +
+        NewPurchaseRequestAllocation.objects.filter(purchase_request__budget_allocation__in=allocations).count() +
+        ActivityDesignAllocation.objects.filter(activity_design__budget_allocation__in=allocations).count()
+    )
+
+
+def _budget_export_response(request, kind, renderer, params):
+    """Render small reports in the request, hand large ones to the export worker"""
+    row_estimate = _estimate_budget_report_rows(request.user)
+    if row_estimate > EXPORT_ASYNC_ROW_THRESHOLD:
+        job = enqueue_export(kind, request.user, params, row_estimate)
+        return export_job_response(request, job)
+
+    output = BytesIO()
+    filename = renderer(request.user, params, output)
+    response = HttpResponse(output.getvalue(), content_type=EXPORT_KINDS[kind].content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _budget_excel_params(request):
+    return {
+        'type': request.GET.get('type', 'summary'),
+        'quarter': request.GET.get('quarter', 'Q1'),
+        'year': request.GET.get('year'),
+    }
+
+
+def _budget_pdf_params(request):
+    return {
+        'type': request.GET.get('type', 'summary'),
+        'quarter': request.GET.get('quarter', 'Q1'),
+    }
+
+
+@role_required('end_user', login_url='/')
+def export_budget_excel(request):
+    """
+    Export budget data to Excel
+    Large reports are queued for the export worker (see render_budget_excel)
+    """
+    return _budget_export_response(request, 'budget_excel', render_budget_excel, _budget_excel_params(request))
+
+
+@role_required('end_user', login_url='/')
+def export_budget_pdf(request):
+    """
+    Export budget data to PDF
+    Large reports are queued for the export worker (see render_budget_pdf)
+    """
+    return _budget_export_response(request, 'budget_pdf', render_budget_pdf, _budget_pdf_params(request))
+
+
+@role_required('end_user', login_url='/')
+def enqueue_budget_export(request):
+    """Queue a budget report export regardless of its size (?format=pdf for PDF)"""
+    if request.GET.get('format') == 'pdf':
+        kind, params = 'budget_pdf', _budget_pdf_params(request)
+    else:
+        kind, params = 'budget_excel', _budget_excel_params(request)
+
+    job = enqueue_export(kind, request.user, params, _estimate_budget_report_rows(request.user))
+    return export_job_response(request, job)
+
+
+@role_required('end_user', login_url='/')
+def export_job_status(request, job_id):
+    """Poll an export job"""
+    return export_job_status_response(request, job_id)
+
+
+@role_required('end_user', login_url='/')
+def export_job_download(request, job_id):
+    """Download a finished export"""
+    return export_job_download_response(request, job_id)
@@ -73,6 +73,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.admin_panel.audit_writer.AuditBufferMiddleware',  # Batch audit trail writes per request
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "django_browser_reload.middleware.BrowserReloadMiddleware",
@@ -123,6 +124,70 @@ DATABASES = {
 
 
 
+# Cache
+# Dashboard snapshots live in a file cache so every gunicorn worker sees the
+# same versions (a local-memory cache would only be invalidated in the worker
+# that handled the write).
+
+import tempfile
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboards': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DASHBOARD_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'bb_budget_dashboards')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+DASHBOARD_SNAPSHOT_TIMEOUT = 15 * 60  # seconds; versions invalidate earlier on change
+
+# Report exports estimated above this many rows are queued for the export
+# worker instead of being rendered inside the request; the `exports` process
+# of the Procfile (`manage.py run_export_jobs --loop`) runs jobs left behind
+# and requeues those RUNNING for longer than EXPORT_STALE_MINUTES
+EXPORT_ASYNC_ROW_THRESHOLD = 5000
+EXPORT_WORKERS = 2  # export threads per web process
+EXPORT_STALE_MINUTES = 30
+
+# Parsed PRE uploads cached by file content; least recently used entries
+# beyond this count are evicted
+PRE_PARSE_CACHE_MAX_ENTRIES = 500
+
+# Audit trail rows older than this many days are moved to the monthly
+# archive files by `manage.py archive_audit_trail`
+AUDIT_RETENTION_DAYS = 365
+
+# Audit entries not yet written are kept here so a crashed process doesn't
+# lose them (apps/admin_panel/audit_writer.py); None disables the spool
+AUDIT_SPOOL_DIR = os.path.join(BASE_DIR, 'audit_spool')
+
+# Office document -> PDF conversion (apps/admin_panel/office_pool.py). Each
+# web process keeps OFFICE_POOL_SIZE warm headless LibreOffice instances;
+# 0 spawns soffice per conversion instead. Pooling needs python3-uno.
+LIBREOFFICE_PATH = os.getenv('LIBREOFFICE_PATH', '/usr/bin/soffice')
+OFFICE_POOL_SIZE = int(os.getenv('OFFICE_POOL_SIZE', 2))
+OFFICE_POOL_QUEUE_SIZE = 20       # conversions waiting for a free instance
+OFFICE_CONVERSION_TIMEOUT = 60    # seconds per document before the instance is restarted
+OFFICE_HEALTH_CHECK_TIMEOUT = 5   # seconds the pre-job health check may take before the instance is restarted
+
+# Converted PDFs are cached under MEDIA_ROOT/pdf_cache/ by the SHA-256 of
+# the source document; least recently used ones are evicted beyond this size
+PDF_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Documents of partially approved PRs/ADs are converted to PDF by a worker
+# pool in the web process and by the `worker` process of the Procfile
+# (`manage.py run_conversion_jobs --loop`); failed conversions are retried
+# after 30s, 60s, ... up to the attempt limit, and jobs RUNNING for longer
+# than CONVERSION_STALE_MINUTES are requeued
+CONVERSION_WORKERS = 2
+CONVERSION_MAX_ATTEMPTS = 3
+CONVERSION_RETRY_BACKOFF = 30
+CONVERSION_STALE_MINUTES = 30
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 